@@ -0,0 +1,3 @@
+"""Shim module to allow `from bq.async_client import AsyncBigQueryClient`."""
+from __future__ import annotations
+from src.bq.async_client import *  # type: ignore  # noqa: F401,F403
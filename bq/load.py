@@ -1,21 +1,24 @@
 """Loaders for documents and chunks using staging tables + MERGE.
 
-Workflow:
+Workflow (one BigQuery script job via ScriptBatch):
   1. Create unique staging table name with timestamp suffix.
-  2. Load JSON rows via BigQuery JSON literal (for simplicity, still inline).
-  3. Execute MERGE template (sql/upsert_*.sql) with placeholders replaced.
-  4. Drop staging table in finally block.
+  2. Load JSON rows via a bound @rows JSON string parameter (small batches).
+  3. Execute MERGE template (sql/upsert_*.sql) with placeholders replaced;
+     its CREATE TABLE IF NOT EXISTS is skipped once the target exists.
+  4. Drop staging table at the end of the script (and again, best effort,
+     if the script fails).
 
+MERGE row counts come from the script's child job statistics.
 Offline stub returns len(input) without side effects.
 """
 from __future__ import annotations
 from typing import List, Dict, Any
-from pathlib import Path
 import os
 import json
 import datetime as _dt
 
 from .bigquery_client import BigQueryClientBase
+from .script import ScriptBatch
 
 
 def _is_stub(client: BigQueryClientBase) -> bool:
@@ -26,15 +29,10 @@ def _ts() -> str:
     return _dt.datetime.utcnow().strftime("%Y%m%d%H%M%S")
 
 
-def _create_staging(
-    client: BigQueryClientBase, fq_table: str, rows: List[Dict[str, Any]]
-) -> None:
-    if not rows:
-        return
+def _staging_sql(fq_table: str) -> str:
     # Inline JSON ingestion (small batches) using temp table strategy.
     # For production volumes: use load_job with newline-delimited JSON.
-    encoded = json.dumps(rows)
-    sql = f"""
+    return f"""
     CREATE TABLE `{fq_table}` AS
     SELECT
       JSON_VALUE(r, '$.doc_id') AS doc_id,
@@ -45,41 +43,40 @@ def _create_staging(
       TO_JSON(r) AS meta
     FROM UNNEST(JSON_QUERY_ARRAY(PARSE_JSON(@rows), '$')) r
     """
-    sql = sql.replace(
-        "@rows", f"'{encoded.replace(chr(39), chr(92) + chr(39))}'"
-    )  # naive escaping
-    client.run_sql_template("inline", {"raw_sql": sql})  # type: ignore
 
 
-def _merge(
-    template_name: str, client: BigQueryClientBase, **params: str
-) -> Dict[str, int]:
-    sql_path = {
-        "documents": "sql/upsert_documents.sql",
-        "chunks": "sql/upsert_chunks.sql",
+def _upsert(
+    template_name: str, client: BigQueryClientBase, rows: List[Dict[str, Any]]
+) -> int:
+    sql_name = {
+        "documents": "upsert_documents.sql",
+        "chunks": "upsert_chunks.sql",
     }[template_name]
-    body = Path(sql_path).read_text(encoding="utf-8")  # type: ignore
-    for k, v in params.items():
-        body = body.replace(f"{{{k}}}", v)
-    # Execute MERGE; row count accessible via job stats if real client.
-    # Execute merge; RealClient exposes google Job via internal attribute.
-    # Our abstraction returns only rows; attempt direct query for dml stats.
-    try:  # best effort to access underlying real client
-        real = getattr(client, "_client", None)
-        if real:  # attempt direct query for dml stats
-            job = real.query(body)
-            list(job.result())
-            stats = getattr(job, "dml_stats", None)
-            if stats:  # type: ignore[attr-defined]
-                return {
-                    "inserted": getattr(stats, "inserted_row_count", 0),
-                    "updated": getattr(stats, "updated_row_count", 0),
-                    "deleted": getattr(stats, "deleted_row_count", 0),
-                }
+    project = os.getenv("PROJECT_ID", "")
+    dataset = os.getenv("DATASET", "")
+    staging = f"{project}.{dataset}.staging_{template_name}_{_ts()}"
+    drop_sql = f"DROP TABLE IF EXISTS `{staging}`"
+    batch = (
+        ScriptBatch(client)
+        .add_sql(_staging_sql(staging), {"rows": json.dumps(rows)}, label="staging")
+        .add(sql_name, {"PROJECT": project, "DATASET": dataset, "STAGING": staging})
+        .add_sql(drop_sql, label="drop_staging")
+    )
+    try:
+        result = batch.run()
     except Exception:
-        pass
-    client.run_sql_template("inline", {"raw_sql": body})  # type: ignore
-    return {"inserted": 0, "updated": 0, "deleted": 0}
+        try:  # script failed before its DROP ran
+            client.run_sql_template("inline", {"raw_sql": drop_sql})  # type: ignore
+        except Exception:
+            pass
+        raise
+    stats = result.dml(sql_name)
+    print(
+        "{kind} upsert: inserted={i} updated={u} deleted={d}".format(
+            kind=template_name, i=stats["inserted"], u=stats["updated"], d=stats["deleted"]
+        )
+    )
+    return stats["inserted"] + stats["updated"]
 
 
 def upsert_documents(
@@ -89,31 +86,7 @@ def upsert_documents(
         return 0
     if _is_stub(client):
         return len(docs)
-    project = os.getenv("PROJECT_ID", "")
-    dataset = os.getenv("DATASET", "")
-    staging = f"{project}.{dataset}.staging_documents_{_ts()}"
-    try:
-        _create_staging(client, staging, docs)
-        stats = _merge(
-            "documents",
-            client,
-            PROJECT=project,
-            DATASET=dataset,
-            STAGING=staging,
-        )
-        print(
-            "documents upsert: inserted={i} updated={u} deleted={d}".format(
-                i=stats["inserted"], u=stats["updated"], d=stats["deleted"]
-            )
-        )
-        return stats["inserted"] + stats["updated"]
-    finally:
-        try:
-            client.run_sql_template(
-                "inline", {"raw_sql": f"DROP TABLE IF EXISTS `{staging}`"}
-            )  # type: ignore
-        except Exception:
-            pass
+    return _upsert("documents", client, docs)
 
 
 def upsert_chunks(
@@ -123,28 +96,4 @@ def upsert_chunks(
         return 0
     if _is_stub(client):
         return len(chunks)
-    project = os.getenv("PROJECT_ID", "")
-    dataset = os.getenv("DATASET", "")
-    staging = f"{project}.{dataset}.staging_chunks_{_ts()}"
-    try:
-        _create_staging(client, staging, chunks)
-        stats = _merge(
-            "chunks",
-            client,
-            PROJECT=project,
-            DATASET=dataset,
-            STAGING=staging,
-        )
-        print(
-            "chunks upsert: inserted={i} updated={u} deleted={d}".format(
-                i=stats["inserted"], u=stats["updated"], d=stats["deleted"]
-            )
-        )
-        return stats["inserted"] + stats["updated"]
-    finally:
-        try:
-            client.run_sql_template(
-                "inline", {"raw_sql": f"DROP TABLE IF EXISTS `{staging}`"}
-            )  # type: ignore
-        except Exception:
-            pass
+    return _upsert("chunks", client, chunks)
@@ -0,0 +1,26 @@
+"""Chunk neighbor graph build (DDL + rebuild DML as one script job).
+
+Equivalent of ``make build-chunk-neighbors``: ensures the chunk_neighbors
+table (skipped when it exists) and runs the DELETE + INSERT rebuild from
+sql/build_chunk_neighbors.sql. Per-statement row counts come from the
+script's child jobs.
+"""
+from __future__ import annotations
+from typing import Dict
+
+from .bigquery_client import BigQueryClientBase
+from .script import ScriptBatch
+
+DDL_TEMPLATE = "chunk_neighbors_ddl.sql"
+BUILD_TEMPLATE = "build_chunk_neighbors.sql"
+
+
+def build_chunk_neighbors(client: BigQueryClientBase) -> Dict[str, int]:
+    """Rebuild chunk_neighbors; returns {inserted, deleted, jobs}."""
+    result = ScriptBatch(client).add(DDL_TEMPLATE).add(BUILD_TEMPLATE).run()
+    stats = result.dml(BUILD_TEMPLATE)
+    print(
+        f"[graph] chunk_neighbors built: inserted={stats['inserted']} "
+        f"deleted={stats['deleted']} jobs={result.jobs}"
+    )
+    return {"inserted": stats["inserted"], "deleted": stats["deleted"], "jobs": result.jobs}
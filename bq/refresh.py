@@ -1,6 +1,6 @@
 """Embedding refresh logic using SQL template and batch limit.
 
-Reads template at sql/embeddings_refresh.sql with placeholders:
+Renders sql/embeddings_refresh.sql (via the template registry) with:
     {PROJECT}, {DATASET}, {EMBED_MODEL_FQID}, {BATCH_LIMIT}
 
 Behavior:
@@ -8,18 +8,19 @@ Behavior:
     * If embed model unset -> prints message, returns zeros.
     * EMBED_BATCH_LIMIT env (default 10000, clamp 1..50000).
     * loop=True will iterate until a batch inserts 0 rows.
-        (Relies on BigQuery job.dml_stats.inserted_row_count; falls back
-         to 0 if unavailable.)
+        (Relies on BigQuery job.dml_stats.inserted_row_count, or the
+         per-statement counts of clients exposing run_script such as
+         LocalClient; falls back to 0 if unavailable.)
 """
 from __future__ import annotations
 from typing import Optional, Dict, Any
 import os
-from pathlib import Path
 
 from .bigquery_client import BigQueryClientBase
+from src.bq.templates import get_registry
 from pipeline import config
 
-TEMPLATE_PATH = Path("sql/embeddings_refresh.sql")
+TEMPLATE_NAME = "embeddings_refresh.sql"
 
 
 def _batch_limit() -> int:
@@ -32,12 +33,15 @@ def _batch_limit() -> int:
 
 
 def _render(model_fqid: str, limit: int) -> str:
-    body = TEMPLATE_PATH.read_text(encoding="utf-8")
-    body = body.replace("{PROJECT}", config.PROJECT_ID)
-    body = body.replace("{DATASET}", config.DATASET)
-    body = body.replace("{EMBED_MODEL_FQID}", model_fqid)
-    body = body.replace("{BATCH_LIMIT}", str(limit))
-    return body
+    return get_registry().render(
+        TEMPLATE_NAME,
+        {
+            "PROJECT": config.PROJECT_ID,
+            "DATASET": config.DATASET,
+            "EMBED_MODEL_FQID": model_fqid,
+            "BATCH_LIMIT": limit,
+        },
+    )
 
 
 def refresh_embeddings(
@@ -85,6 +89,9 @@ def refresh_embeddings(
                     inserted = getattr(stats, "inserted_row_count", 0)
             except Exception:  # pragma: no cover - best effort
                 inserted = 0
+        elif hasattr(client, "run_script"):
+            results = client.run_script(sql, {}, name=TEMPLATE_NAME)  # type: ignore[attr-defined]
+            inserted = sum(int(r.get("inserted") or 0) for r in results)
         else:
             # Fallback to abstraction (cannot access inserted count)
             client.run_sql_template("inline", {"raw_sql": sql})  # type: ignore
@@ -6,7 +6,7 @@ model is unavailable.
 """
 from __future__ import annotations
 import logging
-from typing import Any, Dict, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 from .bigquery_client import BigQueryClientBase
 
 logger = logging.getLogger(__name__)
@@ -79,48 +79,77 @@ def predict_routing(
     if mode in ("auto", "learned"):
         try:
             rows = client.run_sql_template(
-                "router_predict.sql", {"query_text": f"'{query}'"}
+                "router_predict.sql", {"query_text": query}
             )
-            
-            if rows:
-                row = rows[0]
-                predicted_label = row.get("predicted_label")
-                predicted_probs = row.get("predicted_label_probs", [])
-                
-                if predicted_label in ROUTING_CONFIG:
-                    config = ROUTING_CONFIG[predicted_label].copy()
-                    
-                    # Add prediction metadata for telemetry
-                    max_prob = (
-                        max(predicted_probs) if predicted_probs else 0.0
-                    )
-                    config["prediction_meta"] = {
-                        "predicted_label": predicted_label,
-                        "confidence": max_prob,
-                        "all_probs": predicted_probs
-                    }
-                    
-                    logger.info(
-                        f"Router predicted: {predicted_label} "
-                        f"(confidence: {max_prob:.3f})"
-                    )
-                    return config, "learned"
-                    
+            config = _learned_config(rows)
+            if config is not None:
+                return config, "learned"
+
         except Exception as exc:
-            logger.warning(
-                f"Learned routing failed, falling back to heuristics: {exc}"
-            )
-            
-            # If mode is 'learned' only, fail instead of fallback
-            if mode == "learned":
-                raise RuntimeError(
-                    f"Learned routing required but unavailable: {exc}"
-                )
-    
+            _learned_failed(exc, mode)
+
     # Fallback to heuristics
     return _heuristic_routing(query), "heuristic"
 
 
+async def predict_routing_async(
+    aclient: Any, query: str, mode: str = "auto"
+) -> Tuple[Dict[str, Any], str]:
+    """Async twin of predict_routing over an AsyncBigQueryClient."""
+    if mode in ("auto", "learned"):
+        try:
+            rows = await aclient.run_sql_template_async(
+                "router_predict.sql", {"query_text": query}
+            )
+            config = _learned_config(rows)
+            if config is not None:
+                return config, "learned"
+        except Exception as exc:
+            _learned_failed(exc, mode)
+    return _heuristic_routing(query), "heuristic"
+
+
+def _learned_config(rows: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Routing config from router_predict rows (None if unusable)."""
+    if not rows:
+        return None
+    row = rows[0]
+    predicted_label = row.get("predicted_label")
+    predicted_probs = row.get("predicted_label_probs", [])
+
+    if predicted_label not in ROUTING_CONFIG:
+        return None
+    config = ROUTING_CONFIG[predicted_label].copy()
+
+    # Add prediction metadata for telemetry
+    max_prob = (
+        max(predicted_probs) if predicted_probs else 0.0
+    )
+    config["prediction_meta"] = {
+        "predicted_label": predicted_label,
+        "confidence": max_prob,
+        "all_probs": predicted_probs
+    }
+
+    logger.info(
+        f"Router predicted: {predicted_label} "
+        f"(confidence: {max_prob:.3f})"
+    )
+    return config
+
+
+def _learned_failed(exc: Exception, mode: str) -> None:
+    logger.warning(
+        f"Learned routing failed, falling back to heuristics: {exc}"
+    )
+
+    # If mode is 'learned' only, fail instead of fallback
+    if mode == "learned":
+        raise RuntimeError(
+            f"Learned routing required but unavailable: {exc}"
+        )
+
+
 def _heuristic_routing(query: str) -> Dict[str, Any]:
     """Rule-based routing fallback logic."""
     query_lower = query.lower()
@@ -160,7 +189,7 @@ def check_router_model_exists(client: BigQueryClientBase) -> bool:
     try:
         # Try a simple predict query to test model existence
         client.run_sql_template(
-            "router_predict.sql", {"query_text": "'test'"}
+            "router_predict.sql", {"query_text": "test"}
         )
         return True
     except Exception:
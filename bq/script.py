@@ -0,0 +1,3 @@
+"""Shim module to allow `from bq.script import ScriptBatch`."""
+from __future__ import annotations
+from src.bq.script import *  # type: ignore  # noqa: F401,F403
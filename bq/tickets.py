@@ -6,6 +6,7 @@ Stub client paths become no-ops except they return empty results.
 from __future__ import annotations
 from typing import Optional, Dict, Any
 from .bigquery_client import BigQueryClientBase
+from .script import ScriptBatch
 
 
 class TicketsRepo:
@@ -13,14 +14,15 @@ class TicketsRepo:
         self.client = client
 
     def ensure_schema(self) -> None:
-        self.client.run_sql_template("ddl_tickets.sql", {})  # type: ignore
+        # one script job; tables that already exist are skipped
+        ScriptBatch(self.client).add("ddl_tickets.sql").run()
 
     def load_ticket_for_triage(
         self, ticket_id: str, max_comments: int = 5
     ) -> Optional[Dict[str, Any]]:
         rows = self.client.run_sql_template(
             "select_ticket_for_triage.sql",
-            {"TICKET_ID": ticket_id, "MAX_COMMENTS": max_comments},
+            {"ticket_id": ticket_id, "max_comments": max_comments},
         )
         return rows[0] if rows else None
 
@@ -49,7 +51,7 @@ class TicketsRepo:
             "insert_resolution.sql",
             {
                 "ticket_id": ticket_id,
-                "resolved_at": datetime.now(timezone.utc).isoformat(),
+                "resolved_at": datetime.now(timezone.utc),
                 "resolution_text": resolution_text or "",
                 "playbook_md": playbook_md,
             },
@@ -15,6 +15,12 @@ from bq import router as bq_router
 from ingest import extract_text, parse_log, to_chunks
 from bq.load import upsert_documents, upsert_chunks
 from bq.refresh import refresh_embeddings
+from bq.neighbors import build_chunk_neighbors
+from src.bq import partitions, vector_index
+from src.bq.embed_cache import default_embedding_cache
+from src.bq.guardrails import BytesBudget, format_bytes
+from src.bq.telemetry import default_registry
+from src.retrieval import hybrid, lexical, semantic_cache
 from pathlib import Path
 from core.orchestrator import Orchestrator
 
@@ -44,6 +50,11 @@ def cmd_triage(args: argparse.Namespace) -> int:
     router_mode = getattr(args, "router", "auto")
     graph_boost = getattr(args, "graph_boost", 0.0)
 
+    if getattr(args, "estimate", False):
+        return _print_estimates(
+            client, _triage_templates(client, args, router_mode, graph_boost)
+        )
+
     if getattr(args, "ticket_id", None):
         result = orch.triage_ticket(
             ticket_id=args.ticket_id,
@@ -76,12 +87,80 @@ def cmd_triage(args: argparse.Namespace) -> int:
             d=stats.get("min_distance"),
         )
     )
+    cache = getattr(client, "cache", None)
+    if cache is not None:
+        print(f"[bq_cache] {cache.stats()}")
+    resilience = getattr(client, "resilience", None)
+    if resilience is not None:
+        print(f"[bq_resilience] {resilience.stats()}")
+    embed_cache = default_embedding_cache()
+    if embed_cache is not None and getattr(client, "embedding_model", lambda: None)():
+        print(f"[bq_embed_cache] {embed_cache.stats()}")
+    sem_cache = semantic_cache.default_semantic_cache()
+    if sem_cache is not None:
+        print(f"[semantic_cache] {sem_cache.stats()}")
+    if getattr(args, "metrics_out", None):
+        written = default_registry().to_jsonl(args.metrics_out)
+        print(f"[bq_metrics] {written} job records -> {args.metrics_out}")
     if not result["draft_ok"]:
         print(f"Verification: {result['verify_msg']}")
         return 1
     return 0
 
 
+def _triage_templates(
+    client, args: argparse.Namespace, router_mode: str, graph_boost: float
+) -> list[tuple[str, dict]]:
+    """Templates (with representative params) a triage run would submit."""
+    query_text = args.title or args.body or args.ticket_id or ""
+    calls: list[tuple[str, dict]] = []
+    if getattr(args, "ticket_id", None):
+        calls.append(
+            (
+                "select_ticket_for_triage.sql",
+                {"ticket_id": args.ticket_id, "max_comments": args.max_comments},
+            )
+        )
+    if router_mode != "heuristic":
+        calls.append(("router_predict.sql", {"query_text": query_text}))
+    routing = bq_router._heuristic_routing(query_text)
+    calls.extend(
+        hybrid.plan_templates(
+            client,
+            query_text,
+            k=routing.get("k", args.k),
+            types=routing.get("types") or None,
+            graph_boost=graph_boost,
+        )
+    )
+    return calls
+
+
+def _print_estimates(client, calls: list[tuple[str, dict]]) -> int:
+    """Dry-run each template and report bytes against its cap (nothing runs)."""
+    budget = getattr(client, "budget", None) or BytesBudget.from_env()
+    total = 0
+    over = 0
+    supported = False
+    for name, params in calls:
+        try:
+            est = client.estimate(name, params)
+        except Exception as exc:  # noqa: BLE001
+            print(f"[estimate] {name}: failed ({exc})")
+            over += 1
+            continue
+        supported = supported or est is not None
+        cap = budget.cap_for(name)
+        flag = " OVER CAP" if cap is not None and est is not None and est > cap else ""
+        over += 1 if flag else 0
+        total += est or 0
+        print(f"[estimate] {name}: bytes={format_bytes(est)} cap={format_bytes(cap)}{flag}")
+    if not supported:
+        print("[estimate] dry runs need BIGQUERY_REAL=1 (stub client has no estimates)")
+    print(f"[estimate] total={format_bytes(total)} templates={len(calls)}")
+    return 1 if over else 0
+
+
 def build_parser() -> argparse.ArgumentParser:
     p = argparse.ArgumentParser(prog="northstar")
     sub = p.add_subparsers(dest="cmd", required=True)
@@ -136,6 +215,15 @@ def build_parser() -> argparse.ArgumentParser:
         default="out/playbook.md",
         help="Output markdown path",
     )
+    t.add_argument(
+        "--estimate",
+        action="store_true",
+        help="Dry-run the triage templates and print estimated bytes vs caps (no jobs run)",
+    )
+    t.add_argument(
+        "--metrics-out",
+        help="Append per-template BigQuery job telemetry (JSON lines) to this path",
+    )
     t.set_defaults(func=cmd_triage)
 
     ing = sub.add_parser("ingest", help="Ingest OCR/log files and embed")
@@ -159,6 +247,45 @@ def build_parser() -> argparse.ArgumentParser:
     router_cmd.add_argument("--force", action="store_true", help="Recreate model even if it exists")
     router_cmd.set_defaults(func=cmd_train_router)
 
+    nb = sub.add_parser(
+        "build-neighbors", help="Rebuild chunk_neighbors graph (single script job)"
+    )
+    nb.set_defaults(func=cmd_build_neighbors)
+
+    bp = sub.add_parser(
+        "build-partitions", help="Create / sync chunks_emb_<type> partitions (single script job)"
+    )
+    bp.add_argument("--type", action="append", dest="types", help="Chunk type (repeatable)")
+    bp.add_argument("--rebuild", action="store_true", help="Drop and refill (after re-embedding)")
+    bp.set_defaults(func=cmd_build_partitions)
+
+    si = sub.add_parser(
+        "build-search-index", help="Create the chunks.text search index (hybrid_sql mode)"
+    )
+    si.set_defaults(func=cmd_build_search_index)
+
+    ix = sub.add_parser(
+        "index", help="Manage the chunks_emb vector index (create / status / drop / tune)"
+    )
+    ix.add_argument("action", choices=["create", "status", "drop", "tune"])
+    ix.add_argument(
+        "--type", dest="index_type", type=str.upper, choices=vector_index.INDEX_TYPES,
+        default="IVF",
+        help="Index type for create",
+    )
+    ix.add_argument("--num-lists", type=int, default=None, help="IVF num_lists (default: BigQuery)")
+    ix.add_argument(
+        "--leaf-size", type=int, default=None, help="TreeAH leaf_node_embedding_count"
+    )
+    ix.add_argument(
+        "--fractions",
+        default=",".join(f"{f:g}" for f in vector_index.TUNING_FRACTIONS),
+        help="fraction_lists_to_search values compared by tune",
+    )
+    ix.add_argument("--k", type=int, default=10, help="Recall@k for tune")
+    ix.add_argument("--sample", type=int, default=20, help="Stored embeddings used as queries")
+    ix.set_defaults(func=cmd_index)
+
     return p
 
 
@@ -214,7 +341,21 @@ def cmd_ingest(args: argparse.Namespace) -> int:
         )
     docs_effective = upsert_documents(client, all_docs)
     chunks_effective = upsert_chunks(client, all_chunks)
+    try:
+        lex_stats = lexical.index_chunks(all_chunks)
+    except Exception as exc:
+        lex_stats = None
+        print(f"Updating lexical index failed: {exc}")
+    if lex_stats:
+        print(
+            "[lexical] {index}: added={added} rows={rows} terms={terms}".format(**lex_stats)
+        )
     emb_stats = refresh_embeddings(client, loop=getattr(args, "refresh_loop", False))
+    if partitions.enabled() and emb_stats.get("total_inserted"):
+        try:
+            partitions.refresh_type_partitions(client)
+        except Exception as exc:
+            print(f"Refreshing type partitions failed: {exc}")
     msg = (
         "DocsEff:{d} ChunksEff:{c} Embeddings(batches={b} total={t} "
         "last={lb}) (total_docs={td} total_chunks={tc})"
@@ -259,6 +400,83 @@ def cmd_train_router(args: argparse.Namespace) -> int:
         return 1
 
 
+def cmd_build_neighbors(args: argparse.Namespace) -> int:
+    """Create (if missing) and rebuild the chunk neighbor graph."""
+    client = make_client()
+    try:
+        build_chunk_neighbors(client)
+    except Exception as exc:
+        print(f"Building chunk neighbors failed: {exc}")
+        return 1
+    return 0
+
+
+def cmd_build_partitions(args: argparse.Namespace) -> int:
+    """Create (if missing) and sync the per-type chunks_emb partitions."""
+    client = make_client()
+    try:
+        partitions.refresh_type_partitions(client, args.types, rebuild=args.rebuild)
+    except Exception as exc:
+        print(f"Building type partitions failed: {exc}")
+        return 1
+    return 0
+
+
+def cmd_build_search_index(args: argparse.Namespace) -> int:
+    """Create the managed SEARCH INDEX on chunks.text (no-op if it exists)."""
+    client = make_client()
+    try:
+        client.run_sql_template(hybrid.SEARCH_INDEX_TEMPLATE, {})
+    except Exception as exc:
+        print(f"Creating search index failed: {exc}")
+        return 1
+    print(f"[search-index] {hybrid.SEARCH_INDEX_TEMPLATE} applied")
+    return 0
+
+
+def cmd_index(args: argparse.Namespace) -> int:
+    """Create / inspect / drop / tune the chunks_emb VECTOR INDEX."""
+    client = make_client()
+    try:
+        if args.action == "create":
+            template = vector_index.create_index(
+                client, args.index_type, args.num_lists, args.leaf_size
+            )
+            print(f"[vector-index] {template} applied (refresh runs in the background)")
+        elif args.action == "drop":
+            vector_index.drop_index(client)
+            print(f"[vector-index] {vector_index.INDEX_NAME} dropped")
+        elif args.action == "status":
+            status = vector_index.index_status(client)
+            if status is None:
+                print("[vector-index] none on chunks_emb (searches are brute force)")
+            else:
+                print(
+                    f"[vector-index] {status.get('index_name')}: "
+                    f"status={status.get('index_status')} "
+                    f"coverage={status.get('coverage_percentage')}% "
+                    f"refreshed={status.get('last_refresh_time')}"
+                )
+                if status.get("disable_reason"):
+                    print(f"[vector-index] disabled: {status['disable_reason']}")
+        else:
+            fractions = [float(f) for f in args.fractions.split(",") if f.strip()]
+            report = vector_index.tune(client, fractions, k=args.k, sample_size=args.sample)
+            if not report[0]["queries"]:
+                print("[vector-index] chunks_emb has no embeddings to sample")
+                return 0
+            print(f"[vector-index] recall@{args.k} vs brute force ({report[0]['queries']} queries)")
+            for row in report:
+                print(
+                    f"  {row['setting']:<16} recall={row['recall']} "
+                    f"p50={row['latency_ms_p50']}ms max={row['latency_ms_max']}ms"
+                )
+    except Exception as exc:
+        print(f"Vector index {args.action} failed: {exc}")
+        return 1
+    return 0
+
+
 def main(argv: list[str] | None = None) -> int:  # pragma: no cover
     parser = build_parser()
     args = parser.parse_args(argv)
@@ -1,12 +1,14 @@
 """Orchestrator for triage flow: plan -> retrieve -> draft -> verify."""
 
 from __future__ import annotations
-from typing import Any, Dict, cast
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple, cast
 from experts import router, kb_writer
 from verify import kb_verifier
-from retrieval.hybrid import vector_search
+from retrieval.hybrid import hybrid_search, hybrid_search_async
 from bq.tickets import TicketsRepo
 from bq.bigquery_client import BigQueryClientBase
+from bq.async_client import AsyncBigQueryClient
 from bq import router as bq_router
 
 
@@ -15,6 +17,7 @@ class Orchestrator:
 
     def __init__(self, bq_client: BigQueryClientBase) -> None:
         self._bq = bq_client
+        self._abq: Optional[AsyncBigQueryClient] = None
 
     def triage(
         self,
@@ -34,48 +37,48 @@ class Orchestrator:
         final_k = routing_config.get("k", k)
         types = routing_config.get("types", [])
 
-        # Use appropriate vector search based on types
-        if types:
-            snippets = vector_search(
-                self._bq, query_text=query_text, k=final_k, types=types, graph_boost=graph_boost
-            )
-        else:
-            snippets = vector_search(
-                self._bq, query_text=query_text, k=final_k, graph_boost=graph_boost
-            )
-
-        plan_header = cast(Dict[str, Any], plan["plan_header"])
-        sev = ticket.get("severity")
-        if sev:
-            plan_header.setdefault("assumptions", []).append(f"Severity: {sev}")
-        md = kb_writer.render_agent_playbook(plan_header, snippets)
-        ok, msg = kb_verifier.verify_agent_playbook(md)
+        # BM25 + vector with RRF when a lexical index is loaded, else vector only
+        snippets = hybrid_search(
+            self._bq, query_text=query_text, k=final_k, types=types or None, graph_boost=graph_boost
+        )
 
-        # Enhanced telemetry including routing info
-        stats = {
-            "k": len(snippets),
-            "final_k": final_k,
-            "types": types,
-            "router_strategy": strategy_used,
-            "min_distance": min((s.get("distance", 1.0) for s in snippets), default=1.0),
-            "ok": ok,
-        }
+        result = self._draft(
+            plan, ticket.get("severity"), snippets, routing_config, strategy_used, final_k, types
+        )
+        print(f"[triage_stats] {result['stats']}")
+        return result
 
-        # Add routing metadata if available
-        if "prediction_meta" in routing_config:
-            stats["router_prediction"] = routing_config["prediction_meta"]
-        elif "heuristic_meta" in routing_config:
-            stats["router_heuristic"] = routing_config["heuristic_meta"]
+    async def triage_async(
+        self,
+        ticket: Dict[str, str],
+        k: int = 5,
+        router_mode: str = "auto",
+        graph_boost: float = 0.0,
+        speculate: bool = True,
+    ) -> Dict[str, Any]:
+        """Async variant of triage that overlaps routing with retrieval.
 
-        print(f"[triage_stats] {stats}")
-        return {
-            "plan": plan,
-            "snippets": snippets,
-            "draft_md": md,
-            "draft_ok": ok,
-            "verify_msg": msg,
-            "stats": stats,
-        }
+        With a learned router (auto/learned) the search for the heuristic
+        route is started speculatively alongside router_predict.sql; it is
+        kept when the learned route agrees and re-issued otherwise.
+        """
+        plan = router.plan_mode(ticket)
+        query_text = ticket.get("title") or ticket.get("body") or ""
+        routing, snippets = await self._route_and_search(
+            query_text, k, router_mode, graph_boost, speculate
+        )
+        routing_config, strategy_used = routing
+        result = self._draft(
+            plan,
+            ticket.get("severity"),
+            snippets,
+            routing_config,
+            strategy_used,
+            routing_config.get("k", k),
+            routing_config.get("types", []),
+        )
+        print(f"[triage_stats] {result['stats']}")
+        return result
 
     def triage_ticket(
         self,
@@ -90,25 +93,7 @@ class Orchestrator:
         repo = TicketsRepo(self._bq)
         # load ticket (may be None)
         record = repo.load_ticket_for_triage(ticket_id, max_comments)
-        if not record:
-            # fabricate minimal placeholder
-            ticket = {
-                "title": f"Ticket {ticket_id} (not found)",
-                "body": "",
-                "severity": severity,
-            }
-        else:
-            # build composite body including comments if present
-            comments = record.get("recent_comments") or ""
-            body = record.get("body") or ""
-            composite_body = body
-            if comments:
-                composite_body = (record.get("title") or "") + "\n" + comments
-            ticket = {
-                "title": record.get("title") or "",
-                "body": composite_body,
-                "severity": record.get("severity") or severity,
-            }
+        ticket = _ticket_from_record(ticket_id, record, severity)
         plan = router.plan_mode(ticket)
         query_text = ticket.get("title") or ticket.get("body") or ""
 
@@ -119,17 +104,144 @@ class Orchestrator:
         final_k = routing_config.get("k", k)
         types = routing_config.get("types", [])
 
-        # Use appropriate vector search based on types
-        if types:
-            snippets = vector_search(
-                self._bq, query_text=query_text, k=final_k, types=types, graph_boost=graph_boost
+        # BM25 + vector with RRF when a lexical index is loaded, else vector only
+        snippets = hybrid_search(
+            self._bq, query_text=query_text, k=final_k, types=types or None, graph_boost=graph_boost
+        )
+        drafted = self._draft(
+            plan,
+            ticket.get("severity") or severity,
+            snippets,
+            routing_config,
+            strategy_used,
+            final_k,
+            types,
+        )
+        md = drafted["draft_md"]
+        links_written = 0
+        if write and ticket_id and snippets:
+            for cid, score in _evidence_links(snippets):
+                repo.upsert_link(ticket_id, cid, "evidence", score)
+                links_written += 1
+            repo.upsert_resolution(
+                ticket_id,
+                playbook_md=md,
+                resolution_text=_summary_line(md),
             )
-        else:
-            snippets = vector_search(
-                self._bq, query_text=query_text, k=final_k, graph_boost=graph_boost
+        return self._ticket_result(ticket_id, record, drafted, links_written, write)
+
+    async def triage_ticket_async(
+        self,
+        ticket_id: str,
+        max_comments: int = 5,
+        severity: str = "Unknown",
+        k: int = 5,
+        write: bool = True,
+        router_mode: str = "auto",
+        graph_boost: float = 0.0,
+        speculate: bool = True,
+    ) -> Dict[str, Any]:
+        """Async variant of triage_ticket; link/resolution writes run concurrently."""
+        abq = self._async_client()
+        repo = TicketsRepo(abq)  # type: ignore[arg-type]
+        record = await asyncio.to_thread(repo.load_ticket_for_triage, ticket_id, max_comments)
+        ticket = _ticket_from_record(ticket_id, record, severity)
+        plan = router.plan_mode(ticket)
+        query_text = ticket.get("title") or ticket.get("body") or ""
+        routing, snippets = await self._route_and_search(
+            query_text, k, router_mode, graph_boost, speculate
+        )
+        routing_config, strategy_used = routing
+        drafted = self._draft(
+            plan,
+            ticket.get("severity") or severity,
+            snippets,
+            routing_config,
+            strategy_used,
+            routing_config.get("k", k),
+            routing_config.get("types", []),
+        )
+        md = drafted["draft_md"]
+        links_written = 0
+        if write and ticket_id and snippets:
+            links = _evidence_links(snippets)
+            writes = [
+                asyncio.to_thread(repo.upsert_link, ticket_id, cid, "evidence", score)
+                for cid, score in links
+            ]
+            writes.append(
+                asyncio.to_thread(
+                    repo.upsert_resolution,
+                    ticket_id,
+                    playbook_md=md,
+                    resolution_text=_summary_line(md),
+                )
+            )
+            await asyncio.gather(*writes)
+            links_written = len(links)
+        return self._ticket_result(ticket_id, record, drafted, links_written, write)
+
+    # -- helpers --------------------------------------------------------
+    def _async_client(self) -> AsyncBigQueryClient:
+        if self._abq is None:
+            self._abq = AsyncBigQueryClient(self._bq)
+        return self._abq
+
+    async def _route_and_search(
+        self,
+        query_text: str,
+        k: int,
+        router_mode: str,
+        graph_boost: float,
+        speculate: bool,
+    ) -> Tuple[Tuple[Dict[str, Any], str], List[Dict[str, Any]]]:
+        abq = self._async_client()
+
+        def _search(cfg: Dict[str, Any]):
+            # BM25 + vector with RRF when a lexical index is loaded, else vector only
+            return hybrid_search_async(
+                abq,
+                query_text=query_text,
+                k=cfg.get("k", k),
+                types=cfg.get("types") or None,
+                graph_boost=graph_boost,
             )
-        plan_header = cast(Dict[str, Any], plan["plan_header"])  # type: ignore
-        sev = ticket.get("severity") or severity
+
+        routing_task = asyncio.ensure_future(
+            bq_router.predict_routing_async(abq, query_text, router_mode)
+        )
+        guess: Optional[Dict[str, Any]] = None
+        speculative: Optional[asyncio.Future] = None
+        if speculate and router_mode != "heuristic":
+            guess = bq_router._heuristic_routing(query_text)
+            speculative = asyncio.ensure_future(_search(guess))
+            # a discarded speculative search must not log an unretrieved error
+            speculative.add_done_callback(lambda f: f.cancelled() or f.exception())
+        try:
+            routing_config, strategy_used = await routing_task
+        except Exception:
+            if speculative is not None:
+                speculative.cancel()
+            raise
+        if speculative is not None and guess is not None and _same_route(guess, routing_config):
+            snippets = await speculative
+        else:
+            if speculative is not None:
+                speculative.cancel()
+            snippets = await _search(routing_config)
+        return (routing_config, strategy_used), snippets
+
+    def _draft(
+        self,
+        plan: Dict[str, Any],
+        sev: Optional[str],
+        snippets: List[Dict[str, Any]],
+        routing_config: Dict[str, Any],
+        strategy_used: str,
+        final_k: int,
+        types: List[str],
+    ) -> Dict[str, Any]:
+        plan_header = cast(Dict[str, Any], plan["plan_header"])
         if sev:
             plan_header.setdefault("assumptions", []).append(f"Severity: {sev}")
         md = kb_writer.render_agent_playbook(plan_header, snippets)
@@ -150,39 +262,78 @@ class Orchestrator:
             stats["router_prediction"] = routing_config["prediction_meta"]
         elif "heuristic_meta" in routing_config:
             stats["router_heuristic"] = routing_config["heuristic_meta"]
-        links_written = 0
-        if write and ticket_id and snippets:
-            for sn in snippets:
-                cid = sn.get("id")
-                if not cid:
-                    continue
-                dist = sn.get("distance") or 1.0
-                score = 1.0 - float(dist)
-                repo.upsert_link(ticket_id, str(cid), "evidence", score)
-                links_written += 1
-            summary_line = md.splitlines()[3] if md.splitlines() else ""
-            repo.upsert_resolution(
-                ticket_id,
-                playbook_md=md,
-                resolution_text=summary_line[:200],
-            )
-        print(
-            f"[triage_ticket_stats] id={ticket_id} k={len(snippets)} ok={ok} "
-            f"links={links_written} write={write}"
-        )
         return {
-            "ticket_id": ticket_id,
-            "record": record,
             "plan": plan,
             "snippets": snippets,
             "draft_md": md,
             "draft_ok": ok,
             "verify_msg": msg,
             "stats": stats,
+        }
+
+    @staticmethod
+    def _ticket_result(
+        ticket_id: str,
+        record: Optional[Dict[str, Any]],
+        drafted: Dict[str, Any],
+        links_written: int,
+        write: bool,
+    ) -> Dict[str, Any]:
+        print(
+            f"[triage_ticket_stats] id={ticket_id} k={len(drafted['snippets'])} "
+            f"ok={drafted['draft_ok']} links={links_written} write={write}"
+        )
+        return {
+            "ticket_id": ticket_id,
+            "record": record,
+            **drafted,
             "links_written": links_written,
         }
 
 
+def _ticket_from_record(
+    ticket_id: str, record: Optional[Dict[str, Any]], severity: str
+) -> Dict[str, str]:
+    if not record:
+        # fabricate minimal placeholder
+        return {
+            "title": f"Ticket {ticket_id} (not found)",
+            "body": "",
+            "severity": severity,
+        }
+    # build composite body including comments if present
+    comments = record.get("recent_comments") or ""
+    body = record.get("body") or ""
+    composite_body = body
+    if comments:
+        composite_body = (record.get("title") or "") + "\n" + comments
+    return {
+        "title": record.get("title") or "",
+        "body": composite_body,
+        "severity": record.get("severity") or severity,
+    }
+
+
+def _evidence_links(snippets: List[Dict[str, Any]]) -> List[Tuple[str, float]]:
+    links: List[Tuple[str, float]] = []
+    for sn in snippets:
+        cid = sn.get("id")
+        if not cid:
+            continue
+        dist = sn.get("distance") or 1.0
+        links.append((str(cid), 1.0 - float(dist)))
+    return links
+
+
+def _summary_line(md: str) -> str:
+    summary_line = md.splitlines()[3] if md.splitlines() else ""
+    return summary_line[:200]
+
+
+def _same_route(a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+    return a.get("k") == b.get("k") and list(a.get("types") or []) == list(b.get("types") or [])
+
+
 # Reflection:
-# Straight mapping from spec.
+# Straight mapping from spec; async variants overlap independent BigQuery jobs.
 # Next improvement: feed clarifier answers into retrieval.
@@ -3,5 +3,17 @@
 Bridges earlier src/ layout so absolute import works.
 """
 from __future__ import annotations
-from src.retrieval.hybrid import vector_search  # type: ignore
-__all__ = ["vector_search"]
+from src.retrieval.hybrid import (  # type: ignore
+    hybrid_search,
+    hybrid_search_async,
+    vector_search,
+    vector_search_async,
+    vector_search_batch,
+)
+__all__ = [
+    "hybrid_search",
+    "hybrid_search_async",
+    "vector_search",
+    "vector_search_async",
+    "vector_search_batch",
+]
@@ -0,0 +1,64 @@
+"""Build or incrementally sync the in-process ANN index from chunks_emb.
+
+Loads the existing snapshot (if any), fetches only chunk ids it has not
+seen (``--full`` re-reads everything), re-clusters when it has grown, and
+saves it back. Point RETRIEVAL_ANN_INDEX at the output so vector_search
+queries it before falling back to BigQuery. ``--quantize int8|binary``
+stores compact codes (full vectors go to a mapped embedding snapshot) and calibrates
+the exact-rescoring shortlist to ``--recall-tolerance``. Needs the 'ann'
+extra.
+
+Usage:
+    python scripts/build_ann_index.py --out .cache/chunks_emb.ann.npz
+    python scripts/build_ann_index.py --quantize binary --recall-tolerance 0.01
+"""
+from __future__ import annotations
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bq import make_client  # noqa: E402
+from src.retrieval.ann import ChunkIndex  # noqa: E402
+from src.retrieval.quantize import SCHEMES  # noqa: E402
+
+
+def main(argv: list[str] | None = None) -> int:  # pragma: no cover
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", default=".cache/chunks_emb.ann.npz", help="snapshot path")
+    parser.add_argument("--full", action="store_true", help="re-read every row")
+    parser.add_argument("--nlist", type=int, default=None, help="force re-clustering with N lists")
+    parser.add_argument(
+        "--quantize", choices=["none", *SCHEMES], default=None,
+        help="code scheme for the coarse scan (default: keep the snapshot's)",
+    )
+    parser.add_argument("--rescore", type=int, default=None, help="shortlist = k * rescore")
+    parser.add_argument(
+        "--recall-tolerance", type=float, default=None,
+        help="max recall@k loss vs an exact scan (default RETRIEVAL_ANN_RECALL_TOLERANCE or 0.02)",
+    )
+    parser.add_argument("--recall-k", type=int, default=10, help="k used for calibration")
+    args = parser.parse_args(argv)
+
+    out = Path(args.out)
+    opts = {k: v for k, v in (("quantization", args.quantize), ("rescore", args.rescore)) if v}
+    index = ChunkIndex.load(out, **opts) if out.exists() else ChunkIndex(**opts)
+    started = time.perf_counter()
+    stats = index.sync(make_client(), full=args.full)
+    if args.nlist:
+        stats["nlist"] = index.train(args.nlist)
+    if index.quantization:
+        stats["calibration"] = index.calibrate(args.recall_k, args.recall_tolerance)
+    stats["quantization"] = index.quantization or "none"
+    stats["memory_bytes"] = index.memory_bytes()
+    index.save(out)
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+    print(json.dumps({"index": str(out), **stats}))
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
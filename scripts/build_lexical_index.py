@@ -0,0 +1,41 @@
+"""Build or refresh the in-process BM25 lexical index from the chunks table.
+
+Loads the existing snapshot (if any), drops chunks that no longer exist and
+fetches only new ones (``--full`` re-reads every row). Point
+RETRIEVAL_LEXICAL_INDEX at the output so triage fuses keyword and vector
+results (hybrid_search). Needs the 'ann' extra.
+
+Usage:
+    python scripts/build_lexical_index.py --out .cache/chunks.bm25.npz
+"""
+from __future__ import annotations
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bq import make_client  # noqa: E402
+from src.retrieval.lexical import BM25Index  # noqa: E402
+
+
+def main(argv: list[str] | None = None) -> int:  # pragma: no cover
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", default=".cache/chunks.bm25.npz", help="snapshot path")
+    parser.add_argument("--full", action="store_true", help="re-read every chunk")
+    args = parser.parse_args(argv)
+
+    out = Path(args.out)
+    index = BM25Index.load(out) if out.exists() else BM25Index()
+    started = time.perf_counter()
+    stats = index.sync(make_client(), full=args.full)
+    index.save(out)
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+    print(json.dumps({"index": str(out), **stats}))
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
@@ -0,0 +1,48 @@
+"""Build or refresh the in-process neighbor graph (CSR) from chunk_neighbors.
+
+Loads the existing snapshot (if any), checks per-source edge counts and
+weight sums, and reloads every edge only when they changed (``--full``
+forces it). ``--chunk`` re-reads just the edges of the given source chunks.
+Point RETRIEVAL_GRAPH at the output so graph expansion in vector_search
+runs locally. Needs the 'ann' extra.
+
+Usage:
+    python scripts/build_neighbor_graph.py --out .cache/chunk_neighbors.graph.npz
+"""
+from __future__ import annotations
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bq import make_client  # noqa: E402
+from src.retrieval.neighbor_graph import NeighborGraph  # noqa: E402
+
+
+def main(argv: list[str] | None = None) -> int:  # pragma: no cover
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", default=".cache/chunk_neighbors.graph.npz", help="snapshot path")
+    parser.add_argument("--full", action="store_true", help="reload every edge")
+    parser.add_argument("--chunk", action="append", default=[], help="refresh one source chunk")
+    args = parser.parse_args(argv)
+
+    out = Path(args.out)
+    graph = NeighborGraph.load(out) if out.exists() else NeighborGraph()
+    started = time.perf_counter()
+    client = make_client()
+    if args.chunk and len(graph):
+        stats = {"refreshed_rows": graph.refresh(client, args.chunk), "nodes": len(graph)}
+        stats["edges"] = graph.edges
+    else:
+        stats = graph.sync(client, full=args.full)
+    graph.save(out)
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+    print(json.dumps({"graph": str(out), **stats}))
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
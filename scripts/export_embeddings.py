@@ -0,0 +1,48 @@
+"""Export chunks_emb embeddings to Parquet or a memory-mapped snapshot.
+
+Parquet reads through the BigQuery Storage Read API as an Arrow table (no
+per-row dicts) and writes it with pyarrow.parquet; it requires
+BIGQUERY_REAL=1 and the 'arrow' extra (the stub client exports an empty
+table). ``--format snapshot`` streams the rows into the flat-array
+directory of src/retrieval/snapshot.py ('ann' extra); point
+RETRIEVAL_EMBEDDING_SNAPSHOT at it so eval runners and other local
+readers map one shared copy.
+
+Usage:
+    python scripts/export_embeddings.py --out out/chunks_emb.parquet
+    python scripts/export_embeddings.py --format snapshot --out .cache/chunks_emb.snapshot
+"""
+from __future__ import annotations
+import argparse
+import json
+from pathlib import Path
+
+from bq import make_client
+
+
+def main(argv: list[str] | None = None) -> int:  # pragma: no cover
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", default=None, help="output path (file or snapshot directory)")
+    parser.add_argument("--format", choices=["parquet", "snapshot"], default="parquet")
+    args = parser.parse_args(argv)
+
+    client = make_client()
+    if args.format == "snapshot":
+        from src.retrieval.snapshot import export_snapshot
+
+        manifest = export_snapshot(client, args.out or ".cache/chunks_emb.snapshot")
+        print(json.dumps({"snapshot": args.out or ".cache/chunks_emb.snapshot", **manifest}))
+        return 0
+
+    import pyarrow.parquet as pq
+
+    table = client.run_sql_template_arrow("export_chunk_embeddings.sql", {})
+    out_path = Path(args.out or "out/chunks_emb.parquet")
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    pq.write_table(table, out_path)
+    print(f"Exported {table.num_rows} embeddings -> {out_path}")
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
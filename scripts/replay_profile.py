@@ -0,0 +1,71 @@
+"""Profile Orchestrator.triage against a recorded cassette.
+
+Record once against a real project (any command works; every template
+call is appended to the cassette):
+
+    BQ_RECORD=out/triage.cassette.jsonl BIGQUERY_REAL=1 \
+        python -m core.cli triage --title "DB timeout" --body "pool exhausted" \
+        --graph-boost 0.2 --out out/triage.md
+
+then replay the same tickets offline, with the recorded latencies
+(``--latency 1``) or none (``--latency 0``, Python-side cost only):
+
+    python scripts/replay_profile.py out/triage.cassette.jsonl \
+        --title "DB timeout" --body "pool exhausted" --graph-boost 0.2 --latency 0
+"""
+from __future__ import annotations
+import argparse
+import cProfile
+import io
+import json
+import pstats
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.orchestrator import Orchestrator  # noqa: E402
+from src.bq.cassette import ReplayClient  # noqa: E402
+from src.bq.telemetry import MetricsRegistry  # noqa: E402
+
+
+def main(argv: list[str] | None = None) -> int:  # pragma: no cover
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("cassette")
+    parser.add_argument("--title", required=True)
+    parser.add_argument("--body", default="")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--router", default="auto")
+    parser.add_argument("--graph-boost", type=float, default=0.0)
+    parser.add_argument("--latency", type=float, default=0.0, help="recorded latency scale")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--top", type=int, default=25, help="profile rows to print")
+    args = parser.parse_args(argv)
+
+    reg = MetricsRegistry()
+    client = ReplayClient(args.cassette, latency_scale=args.latency, metrics=reg)
+    orch = Orchestrator(client)
+    ticket = {"title": args.title, "body": args.body}
+
+    prof = cProfile.Profile()
+    started = time.perf_counter()
+    prof.enable()
+    for _ in range(args.repeat):
+        orch.triage(ticket, k=args.k, router_mode=args.router, graph_boost=args.graph_boost)
+    prof.disable()
+    per_run_ms = (time.perf_counter() - started) * 1000.0 / max(1, args.repeat)
+
+    out = io.StringIO()
+    pstats.Stats(prof, stream=out).sort_stats("cumulative").print_stats(args.top)
+    print(out.getvalue())
+    print(json.dumps({
+        "runs": args.repeat,
+        "per_run_ms": round(per_run_ms, 3),
+        "templates": {n: s["latency_ms"] for n, s in reg.summary().items()},
+    }, indent=2, default=lambda v: round(v, 3)))
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main())
@@ -30,7 +30,10 @@ from typing import List, Dict, Any, Optional
 try:  # ensure project root on path when running as a script
     from bq import make_client  # type: ignore
     from core.orchestrator import Orchestrator  # type: ignore
-    from retrieval.hybrid import vector_search  # type: ignore
+    from retrieval.hybrid import vector_search, vector_search_batch  # type: ignore
+    from src.bq.telemetry import default_registry  # type: ignore
+    from src.retrieval.query_embed import embed_query as _embed_query  # type: ignore
+    from src.retrieval.snapshot import default_snapshot  # type: ignore
 except ModuleNotFoundError:  # pragma: no cover - path fix branch
     import pathlib
     import sys as _sys
@@ -40,7 +43,10 @@ except ModuleNotFoundError:  # pragma: no cover - path fix branch
         _sys.path.insert(0, str(root))
     from bq import make_client  # type: ignore
     from core.orchestrator import Orchestrator  # type: ignore
-    from retrieval.hybrid import vector_search  # type: ignore
+    from retrieval.hybrid import vector_search, vector_search_batch  # type: ignore
+    from src.bq.telemetry import default_registry  # type: ignore
+    from src.retrieval.query_embed import embed_query as _embed_query  # type: ignore
+    from src.retrieval.snapshot import default_snapshot  # type: ignore
 
 EVAL_SET_PATH = Path("metrics/eval_set.jsonl")
 
@@ -73,22 +79,15 @@ def compute_mrr(relevances: List[float]) -> float:
 
 
 def embed_query(client, query_text: str) -> Optional[List[float]]:
-    """Get query embedding using the same model as vector search."""
+    """Get query embedding using the same model as vector search.
+
+    Served from the query-embedding cache when retrieval already embedded
+    the same text (src/bq/embed_cache.py).
+    """
     try:
-        # Use ML.GENERATE_EMBEDDING to get query embedding
-        embedding_sql = """
-        SELECT embedding
-        FROM ML.GENERATE_EMBEDDING(
-            MODEL `${PROJECT_ID}.${DATASET}.text_embedding_model`,
-            (SELECT '${QUERY_TEXT}' AS content)
-        )
-        """
-        result = client.run_sql_template("", {"raw_sql": embedding_sql, "query_text": query_text})
-        if result and "embedding" in result[0]:
-            return result[0]["embedding"]["values"]
+        return _embed_query(client, query_text)
     except Exception:
-        pass
-    return None
+        return None
 
 
 def cosine_similarity(a: List[float], b: List[float]) -> float:
@@ -103,11 +102,15 @@ def cosine_similarity(a: List[float], b: List[float]) -> float:
     if norm_a == 0 or norm_b == 0:
         return 0.0
 
-    return dot_product / (norm_a * norm_b)
+    return float(dot_product / (norm_a * norm_b))
+
 
+def get_chunk_embedding(chunk: Dict[str, Any], snapshot: Any = None) -> Optional[Any]:
+    """Extract embedding from chunk if available.
 
-def get_chunk_embedding(chunk: Dict[str, Any]) -> Optional[List[float]]:
-    """Extract embedding from chunk if available."""
+    Falls back to the memory-mapped embedding snapshot (a zero-copy row,
+    src/retrieval/snapshot.py) when the chunk row carries no vector.
+    """
     # Check various possible embedding field names
     for field in ["embedding", "embeddings", "vector"]:
         if field in chunk:
@@ -116,6 +119,9 @@ def get_chunk_embedding(chunk: Dict[str, Any]) -> Optional[List[float]]:
                 return emb
             elif isinstance(emb, dict) and "values" in emb:
                 return emb["values"]
+    chunk_id = chunk.get("id") or chunk.get("chunk_id")
+    if snapshot is not None and chunk_id is not None:
+        return snapshot.embedding(str(chunk_id))
     return None
 
 
@@ -139,8 +145,14 @@ def extract_timing_from_stats(stats: Dict[str, Any]) -> Dict[str, float]:
     return timings
 
 
-def estimate_cost_from_stats(stats: Dict[str, Any]) -> Dict[str, Any]:
-    """Estimate costs from orchestrator stats and BQ metadata."""
+def estimate_cost_from_stats(
+    stats: Dict[str, Any], job_totals: Optional[Dict[str, int]] = None
+) -> Dict[str, Any]:
+    """Estimate costs from orchestrator stats and BQ metadata.
+
+    ``job_totals`` is the telemetry delta (bytes, slot-ms, jobs) recorded
+    for this item; without it bytes fall back to a rough k-based guess.
+    """
     cost_info = {
         "ml_calls": 0,
         "bytes_processed": 0,
@@ -155,13 +167,24 @@ def estimate_cost_from_stats(stats: Dict[str, Any]) -> Dict[str, Any]:
     cost_info["embedding_calls"] += 1  # Query embedding
     cost_info["vector_search_calls"] += 1  # Vector search
 
-    # Estimate bytes processed (placeholder - would need actual BQ job info)
-    k = stats.get("k", 5)
-    cost_info["bytes_processed"] = k * 1000  # Rough estimate
+    if job_totals is not None:
+        cost_info["bytes_processed"] = job_totals.get("bytes_processed", 0)
+        cost_info["bytes_billed"] = job_totals.get("bytes_billed", 0)
+        cost_info["slot_ms"] = job_totals.get("slot_ms", 0)
+        cost_info["bq_jobs"] = job_totals.get("jobs", 0)
+        cost_info["bq_cache_hits"] = job_totals.get("cache_hits", 0)
+    else:
+        # Rough estimate when no job telemetry is available
+        k = stats.get("k", 5)
+        cost_info["bytes_processed"] = k * 1000
 
     return cost_info
 
 
+def _totals_delta(before: Dict[str, int], after: Dict[str, int]) -> Dict[str, int]:
+    return {key: after.get(key, 0) - before.get(key, 0) for key in after}
+
+
 def load_items() -> List[dict]:
     if not EVAL_SET_PATH.exists():
         raise SystemExit("Eval set missing; run gen_eval_set first")
@@ -178,21 +201,36 @@ def retrieve_chunks(client, query: str, k: int, types: List[str] | None) -> List
     return vector_search(client, query_text=query, k=k, types=types or [])
 
 
+def retrieve_batch(client, items: List[dict], k: int) -> List[List[dict]]:
+    """Retrieval for every item: one batched search per distinct type filter."""
+    groups: Dict[tuple, List[int]] = {}
+    for i, it in enumerate(items):
+        groups.setdefault(tuple(it.get("types") or ()), []).append(i)
+    out: List[List[dict]] = [[] for _ in items]
+    for types, idxs in groups.items():
+        queries = [items[i]["query_text"] for i in idxs]
+        for i, chunks in zip(idxs, vector_search_batch(client, queries, k=k, types=list(types))):
+            out[i] = chunks
+    return out
+
+
 def evaluate(items: List[dict], k: int, use_stub: bool) -> dict:
     client = make_client()
     orch = Orchestrator(client)
     per_item: List[dict] = []
     all_timings: List[Dict[str, float]] = []
     all_costs: List[Dict[str, Any]] = []
+    registry = default_registry()
+    snapshot = default_snapshot()  # RETRIEVAL_EMBEDDING_SNAPSHOT; shared page cache
 
-    for it in items:
-        q = it["query_text"]
-        types = it.get("types")
+    # Time the retrieval step (batched; per-item time is the amortized share)
+    start_time = time.time()
+    retrieved = retrieve_batch(client, items, k)
+    retrieval_time = (time.time() - start_time) * 1000 / max(1, len(items))  # ms
 
-        # Time the retrieval step
-        start_time = time.time()
-        chunks = retrieve_chunks(client, q, k=k, types=types)
-        retrieval_time = (time.time() - start_time) * 1000  # ms
+    for it, chunks in zip(items, retrieved):
+        totals_before = registry.totals()
+        q = it["query_text"]
 
         # Get query embedding for semantic similarity
         query_embedding = embed_query(client, q) if not use_stub else None
@@ -215,8 +253,8 @@ def evaluate(items: List[dict], k: int, use_stub: bool) -> dict:
 
             # Cosine similarity if embeddings available
             if query_embedding:
-                chunk_embedding = get_chunk_embedding(c)
-                if chunk_embedding:
+                chunk_embedding = get_chunk_embedding(c, snapshot)
+                if chunk_embedding is not None and len(chunk_embedding):
                     cosine_score = cosine_similarity(query_embedding, chunk_embedding)
                     cosine_scores.append(cosine_score)
 
@@ -246,8 +284,10 @@ def evaluate(items: List[dict], k: int, use_stub: bool) -> dict:
         timings["triage_total_ms"] = triage_time
         all_timings.append(timings)
 
-        # Estimate costs
-        cost_info = estimate_cost_from_stats(stats)
+        # Costs from recorded job telemetry for this item
+        cost_info = estimate_cost_from_stats(
+            stats, _totals_delta(totals_before, registry.totals())
+        )
         all_costs.append(cost_info)
 
         per_item.append(
@@ -338,6 +378,10 @@ def evaluate(items: List[dict], k: int, use_stub: bool) -> dict:
     else:
         agg["cost_estimates"] = None
 
+    cache = getattr(client, "cache", None)
+    agg["result_cache"] = cache.stats() if cache is not None else None
+    agg["bq_jobs"] = registry.summary()
+
     return {"items": per_item, "aggregate": agg}
 
 
@@ -348,6 +392,8 @@ def main(argv: list[str] | None = None) -> int:
     parser.add_argument(
         "--use-stub", action="store_true", help="Force stub retrieval (ignore BIGQUERY_REAL)"
     )
+    parser.add_argument("--metrics-jsonl", help="Append per-job telemetry as JSON lines")
+    parser.add_argument("--metrics-prom", help="Write Prometheus text metrics to this path")
     args = parser.parse_args(argv)
 
     use_stub = args.use_stub or os.getenv("BIGQUERY_REAL") != "1"
@@ -356,6 +402,12 @@ def main(argv: list[str] | None = None) -> int:
     out_path = Path(args.output)
     out_path.parent.mkdir(parents=True, exist_ok=True)
     out_path.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    if args.metrics_jsonl:
+        default_registry().to_jsonl(args.metrics_jsonl)
+    if args.metrics_prom:
+        prom_path = Path(args.metrics_prom)
+        prom_path.parent.mkdir(parents=True, exist_ok=True)
+        prom_path.write_text(default_registry().to_prometheus(), encoding="utf-8")
 
     agg = results["aggregate"]
 
@@ -0,0 +1,5 @@
+-- Chunk ids that have an embedding (ANN index sync: diff against the index)
+-- Variables: ${PROJECT_ID}, ${DATASET}
+SELECT chunk_id
+FROM `${PROJECT_ID}.${DATASET}.chunks_emb`
+WHERE embedding IS NOT NULL;
@@ -0,0 +1,12 @@
+-- Chunk embeddings with text/meta for the in-process ANN index
+-- Variables: ${PROJECT_ID}, ${DATASET}
+-- Query parameters: @chunk_ids ARRAY<STRING> (empty array = full snapshot)
+SELECT
+  chunk_id,
+  text,
+  meta,
+  JSON_VALUE(meta, '$.type') AS type,
+  embedding
+FROM `${PROJECT_ID}.${DATASET}.chunks_emb`
+WHERE embedding IS NOT NULL
+  AND (ARRAY_LENGTH(@chunk_ids) = 0 OR chunk_id IN UNNEST(@chunk_ids));
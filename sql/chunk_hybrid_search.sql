@@ -0,0 +1,76 @@
+-- Keyword (SEARCH) + vector (ML.VECTOR_SEARCH) retrieval fused in one job
+-- Variables: ${PROJECT_ID}, ${DATASET}, ${EMBED_MODEL}, ${VECTOR_SEARCH_OPTIONS}
+-- Query parameters: @query_text STRING, @search_query STRING, @top_k INT64,
+--   @candidates INT64, @rrf_k INT64, @types ARRAY<STRING>
+-- Up to @candidates hits from each side are ranked, then fused with
+-- reciprocal rank fusion: rrf_score = sum 1 / (@rrf_k + rank). distance is
+-- the vector distance; keyword-only hits get 1 - rrf_score / (2 / (@rrf_k + 1)).
+-- SEARCH() reads the chunks_text_search_idx search index (chunks_search_index_ddl.sql).
+
+WITH query_vec AS (
+  SELECT ML.GENERATE_EMBEDDING(
+    MODEL `${PROJECT_ID}.${DATASET}.${EMBED_MODEL}`,
+    @query_text AS text
+  ) AS qvec
+),
+vector_hits AS (
+  SELECT
+    vs.chunk_id,
+    vs.distance,
+    ROW_NUMBER() OVER (ORDER BY vs.distance, vs.chunk_id) AS vector_rank
+  FROM ML.VECTOR_SEARCH(
+    TABLE `${PROJECT_ID}.${DATASET}.chunks_emb`,
+    (SELECT qvec FROM query_vec),
+    top_k => @candidates,
+    options => '${VECTOR_SEARCH_OPTIONS}'
+  ) AS vs
+  JOIN `${PROJECT_ID}.${DATASET}.chunks_emb` c ON c.chunk_id = vs.chunk_id
+  WHERE (ARRAY_LENGTH(@types) = 0 OR JSON_VALUE(c.meta, '$.type') IN UNNEST(@types))
+),
+lexical_ranked AS (
+  SELECT
+    c.chunk_id,
+    ROW_NUMBER() OVER (ORDER BY LENGTH(c.text), c.chunk_id) AS lexical_rank
+  FROM `${PROJECT_ID}.${DATASET}.chunks` c
+  WHERE SEARCH(c.text, @search_query)
+    AND (ARRAY_LENGTH(@types) = 0 OR JSON_VALUE(c.meta, '$.type') IN UNNEST(@types))
+),
+ranks AS (
+  SELECT chunk_id, distance, vector_rank, CAST(NULL AS INT64) AS lexical_rank
+  FROM vector_hits
+
+  UNION ALL
+
+  SELECT chunk_id, CAST(NULL AS FLOAT64) AS distance, CAST(NULL AS INT64) AS vector_rank,
+    lexical_rank
+  FROM lexical_ranked
+  WHERE lexical_rank <= @candidates
+),
+fused AS (
+  SELECT
+    chunk_id,
+    MIN(distance) AS distance,
+    MIN(vector_rank) AS vector_rank,
+    MIN(lexical_rank) AS lexical_rank,
+    SUM(1.0 / (@rrf_k + COALESCE(vector_rank, lexical_rank))) AS rrf_score
+  FROM ranks
+  GROUP BY chunk_id
+),
+top_fused AS (
+  SELECT *, ROW_NUMBER() OVER (ORDER BY rrf_score DESC, chunk_id) AS fused_rank
+  FROM fused
+)
+SELECT
+  f.chunk_id,
+  COALESCE(f.distance, 1.0 - f.rrf_score * (@rrf_k + 1) / 2.0) AS distance,
+  c.text,
+  c.meta,
+  f.rrf_score,
+  f.vector_rank,
+  f.lexical_rank,
+  -- first row carries the query vector for the embedding cache (*_by_vec.sql on reuse)
+  CASE WHEN f.fused_rank = 1 THEN (SELECT qvec FROM query_vec) END AS query_embedding
+FROM top_fused f
+JOIN `${PROJECT_ID}.${DATASET}.chunks` c ON c.chunk_id = f.chunk_id
+WHERE f.fused_rank <= @top_k
+ORDER BY f.fused_rank;
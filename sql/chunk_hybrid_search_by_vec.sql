@@ -0,0 +1,69 @@
+-- Keyword + vector retrieval fused in one job, from a precomputed query vector
+-- Variables: ${PROJECT_ID}, ${DATASET}, ${VECTOR_SEARCH_OPTIONS}
+-- Query parameters: @query_embedding ARRAY<FLOAT64>, @search_query STRING,
+--   @top_k INT64, @candidates INT64, @rrf_k INT64, @types ARRAY<STRING>
+-- Same output as chunk_hybrid_search.sql; the vector comes from the
+-- query-embedding cache (src/bq/embed_cache.py) so no embedding call runs.
+
+WITH query_vec AS (
+  SELECT @query_embedding AS qvec
+),
+vector_hits AS (
+  SELECT
+    vs.chunk_id,
+    vs.distance,
+    ROW_NUMBER() OVER (ORDER BY vs.distance, vs.chunk_id) AS vector_rank
+  FROM ML.VECTOR_SEARCH(
+    TABLE `${PROJECT_ID}.${DATASET}.chunks_emb`,
+    (SELECT qvec FROM query_vec),
+    top_k => @candidates,
+    options => '${VECTOR_SEARCH_OPTIONS}'
+  ) AS vs
+  JOIN `${PROJECT_ID}.${DATASET}.chunks_emb` c ON c.chunk_id = vs.chunk_id
+  WHERE (ARRAY_LENGTH(@types) = 0 OR JSON_VALUE(c.meta, '$.type') IN UNNEST(@types))
+),
+lexical_ranked AS (
+  SELECT
+    c.chunk_id,
+    ROW_NUMBER() OVER (ORDER BY LENGTH(c.text), c.chunk_id) AS lexical_rank
+  FROM `${PROJECT_ID}.${DATASET}.chunks` c
+  WHERE SEARCH(c.text, @search_query)
+    AND (ARRAY_LENGTH(@types) = 0 OR JSON_VALUE(c.meta, '$.type') IN UNNEST(@types))
+),
+ranks AS (
+  SELECT chunk_id, distance, vector_rank, CAST(NULL AS INT64) AS lexical_rank
+  FROM vector_hits
+
+  UNION ALL
+
+  SELECT chunk_id, CAST(NULL AS FLOAT64) AS distance, CAST(NULL AS INT64) AS vector_rank,
+    lexical_rank
+  FROM lexical_ranked
+  WHERE lexical_rank <= @candidates
+),
+fused AS (
+  SELECT
+    chunk_id,
+    MIN(distance) AS distance,
+    MIN(vector_rank) AS vector_rank,
+    MIN(lexical_rank) AS lexical_rank,
+    SUM(1.0 / (@rrf_k + COALESCE(vector_rank, lexical_rank))) AS rrf_score
+  FROM ranks
+  GROUP BY chunk_id
+),
+top_fused AS (
+  SELECT *, ROW_NUMBER() OVER (ORDER BY rrf_score DESC, chunk_id) AS fused_rank
+  FROM fused
+)
+SELECT
+  f.chunk_id,
+  COALESCE(f.distance, 1.0 - f.rrf_score * (@rrf_k + 1) / 2.0) AS distance,
+  c.text,
+  c.meta,
+  f.rrf_score,
+  f.vector_rank,
+  f.lexical_rank
+FROM top_fused f
+JOIN `${PROJECT_ID}.${DATASET}.chunks` c ON c.chunk_id = f.chunk_id
+WHERE f.fused_rank <= @top_k
+ORDER BY f.fused_rank;
@@ -0,0 +1,21 @@
+-- Neighbor edges for the in-process CSR graph (retrieval/neighbor_graph.py)
+-- Variables: ${PROJECT_ID}, ${DATASET}
+-- Query parameters: @chunk_ids ARRAY<STRING> (empty array = every source chunk)
+-- Same two sources as get_chunk_neighbors.sql; pairs are merged client-side
+SELECT
+  src_chunk_id,
+  nbr_chunk_id,
+  weight,
+  'similarity' AS source_type
+FROM `${PROJECT_ID}.${DATASET}.chunk_neighbors`
+WHERE (ARRAY_LENGTH(@chunk_ids) = 0 OR src_chunk_id IN UNNEST(@chunk_ids))
+
+UNION ALL
+
+SELECT
+  src_chunk_id,
+  nbr_chunk_id,
+  weight,
+  'co_occurrence' AS source_type
+FROM `${PROJECT_ID}.${DATASET}.chunk_neighbors_ticket`
+WHERE (ARRAY_LENGTH(@chunk_ids) = 0 OR src_chunk_id IN UNNEST(@chunk_ids));
@@ -0,0 +1,9 @@
+-- Edge counts / weight sums per neighbor source (graph cache freshness check)
+-- Variables: ${PROJECT_ID}, ${DATASET}
+SELECT 'similarity' AS source_type, COUNT(*) AS edges, SUM(weight) AS weight_sum
+FROM `${PROJECT_ID}.${DATASET}.chunk_neighbors`
+
+UNION ALL
+
+SELECT 'co_occurrence' AS source_type, COUNT(*) AS edges, SUM(weight) AS weight_sum
+FROM `${PROJECT_ID}.${DATASET}.chunk_neighbors_ticket`;
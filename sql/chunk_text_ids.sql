@@ -0,0 +1,5 @@
+-- Chunk ids in the chunks table (lexical index sync: diff against the index)
+-- Variables: ${PROJECT_ID}, ${DATASET}
+SELECT chunk_id
+FROM `${PROJECT_ID}.${DATASET}.chunks`
+WHERE text IS NOT NULL;
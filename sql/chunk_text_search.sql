@@ -0,0 +1,29 @@
+-- Keyword search over chunk text via the search index (no embedding)
+-- Variables: ${PROJECT_ID}, ${DATASET}
+-- Query parameters: @search_query STRING, @top_k INT64, @rrf_k INT64, @types ARRAY<STRING>
+-- Chunks containing every term of @search_query (backtick-quoted terms match
+-- as whole identifiers); SEARCH() has no relevance score, so the densest
+-- (shortest) matching chunks rank first. Same columns as chunk_hybrid_search.sql,
+-- scored like its keyword-only hits.
+
+WITH lexical_hits AS (
+  SELECT
+    c.chunk_id,
+    c.text,
+    c.meta,
+    ROW_NUMBER() OVER (ORDER BY LENGTH(c.text), c.chunk_id) AS lexical_rank
+  FROM `${PROJECT_ID}.${DATASET}.chunks` c
+  WHERE SEARCH(c.text, @search_query)
+    AND (ARRAY_LENGTH(@types) = 0 OR JSON_VALUE(c.meta, '$.type') IN UNNEST(@types))
+)
+SELECT
+  chunk_id,
+  1.0 - (@rrf_k + 1) / (2.0 * (@rrf_k + lexical_rank)) AS distance,
+  text,
+  meta,
+  1.0 / (@rrf_k + lexical_rank) AS rrf_score,
+  CAST(NULL AS INT64) AS vector_rank,
+  lexical_rank
+FROM lexical_hits
+WHERE lexical_rank <= @top_k
+ORDER BY lexical_rank;
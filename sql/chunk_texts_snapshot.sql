@@ -0,0 +1,11 @@
+-- Chunk text with meta for the in-process lexical (BM25) index
+-- Variables: ${PROJECT_ID}, ${DATASET}
+-- Query parameters: @chunk_ids ARRAY<STRING> (empty array = full snapshot)
+SELECT
+  chunk_id,
+  text,
+  meta,
+  JSON_VALUE(meta, '$.type') AS type
+FROM `${PROJECT_ID}.${DATASET}.chunks`
+WHERE text IS NOT NULL
+  AND (ARRAY_LENGTH(@chunk_ids) = 0 OR chunk_id IN UNNEST(@chunk_ids));
@@ -0,0 +1,9 @@
+-- Chunk types present in chunks_emb (one partition table per type)
+-- Variables: ${PROJECT_ID}, ${DATASET}
+SELECT
+  JSON_VALUE(meta, '$.type') AS chunk_type,
+  COUNT(*) AS chunks
+FROM `${PROJECT_ID}.${DATASET}.chunks_emb`
+WHERE embedding IS NOT NULL AND JSON_VALUE(meta, '$.type') IS NOT NULL
+GROUP BY chunk_type
+ORDER BY chunk_type;
@@ -1,24 +1,28 @@
 -- Vector search over chunk embeddings with provenance meta
--- Variables: ${PROJECT_ID}, ${DATASET}, ${TOP_K}, ${QUERY_TEXT}, ${EMBED_MODEL}
--- Multi-type filter supported via ${TYPE_ARRAY} literal (e.g., ['pdf','log'])
--- If empty array literal [] then no filtering.
+-- Variables: ${PROJECT_ID}, ${DATASET}, ${EMBED_MODEL}, ${VECTOR_SEARCH_OPTIONS}
+-- Query parameters: @query_text STRING, @top_k INT64, @types ARRAY<STRING>
+-- Multi-type filter via @types (e.g., ['pdf','log']); empty array = no filtering.
 
 WITH query_vec AS (
   SELECT ML.GENERATE_EMBEDDING(
     MODEL `${PROJECT_ID}.${DATASET}.${EMBED_MODEL}`,
-    ${QUERY_TEXT} AS text
+    @query_text AS text
   ) AS qvec
 )
 SELECT
   vs.chunk_id,
   vs.distance,
   c.text,
-  c.meta
+  c.meta,
+  -- first row carries the query vector for the embedding cache (*_by_vec.sql on reuse)
+  CASE WHEN ROW_NUMBER() OVER (ORDER BY vs.distance) = 1
+    THEN (SELECT qvec FROM query_vec) END AS query_embedding
 FROM ML.VECTOR_SEARCH(
   TABLE `${PROJECT_ID}.${DATASET}.chunks_emb`,
   (SELECT qvec FROM query_vec),
-  top_k => ${TOP_K}
+  top_k => @top_k,
+  options => '${VECTOR_SEARCH_OPTIONS}'
 ) AS vs
 JOIN `${PROJECT_ID}.${DATASET}.chunks_emb` c ON c.chunk_id = vs.chunk_id
-WHERE (ARRAY_LENGTH(${TYPE_ARRAY}) = 0 OR JSON_VALUE(c.meta, '$.type') IN UNNEST(${TYPE_ARRAY}))
+WHERE (ARRAY_LENGTH(@types) = 0 OR JSON_VALUE(c.meta, '$.type') IN UNNEST(@types))
 ORDER BY vs.distance ASC;
@@ -0,0 +1,23 @@
+-- Vector search over chunk embeddings from a precomputed query vector
+-- Variables: ${PROJECT_ID}, ${DATASET}, ${VECTOR_SEARCH_OPTIONS}
+-- Query parameters: @query_embedding ARRAY<FLOAT64>, @top_k INT64, @types ARRAY<STRING>
+-- Same output as chunk_vector_search.sql; the vector comes from the
+-- query-embedding cache (src/bq/embed_cache.py) so no embedding call runs.
+
+WITH query_vec AS (
+  SELECT @query_embedding AS qvec
+)
+SELECT
+  vs.chunk_id,
+  vs.distance,
+  c.text,
+  c.meta
+FROM ML.VECTOR_SEARCH(
+  TABLE `${PROJECT_ID}.${DATASET}.chunks_emb`,
+  (SELECT qvec FROM query_vec),
+  top_k => @top_k,
+  options => '${VECTOR_SEARCH_OPTIONS}'
+) AS vs
+JOIN `${PROJECT_ID}.${DATASET}.chunks_emb` c ON c.chunk_id = vs.chunk_id
+WHERE (ARRAY_LENGTH(@types) = 0 OR JSON_VALUE(c.meta, '$.type') IN UNNEST(@types))
+ORDER BY vs.distance ASC;
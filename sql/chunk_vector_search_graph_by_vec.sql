@@ -0,0 +1,84 @@
+-- Vector search + graph expansion in one job, from a precomputed query vector
+-- Variables: ${PROJECT_ID}, ${DATASET}, ${VECTOR_SEARCH_OPTIONS}
+-- Query parameters: @query_embedding ARRAY<FLOAT64>, @top_k INT64, @types ARRAY<STRING>,
+--   @max_neighbors INT64
+-- Same rows as chunk_vector_search_graph.sql (embedding cache hit).
+
+WITH query_vec AS (
+  SELECT @query_embedding AS qvec
+),
+hits AS (
+  SELECT vs.chunk_id, vs.distance, c.text, c.meta
+  FROM ML.VECTOR_SEARCH(
+    TABLE `${PROJECT_ID}.${DATASET}.chunks_emb`,
+    (SELECT qvec FROM query_vec),
+    top_k => @top_k,
+    options => '${VECTOR_SEARCH_OPTIONS}'
+  ) AS vs
+  JOIN `${PROJECT_ID}.${DATASET}.chunks_emb` c ON c.chunk_id = vs.chunk_id
+  WHERE (ARRAY_LENGTH(@types) = 0 OR JSON_VALUE(c.meta, '$.type') IN UNNEST(@types))
+),
+neighbors_union AS (
+  SELECT cn.src_chunk_id, cn.nbr_chunk_id, cn.weight, 'similarity' AS source_type
+  FROM `${PROJECT_ID}.${DATASET}.chunk_neighbors` cn
+  JOIN hits h ON cn.src_chunk_id = h.chunk_id
+
+  UNION ALL
+
+  SELECT cnt.src_chunk_id, cnt.nbr_chunk_id, cnt.weight, 'co_occurrence' AS source_type
+  FROM `${PROJECT_ID}.${DATASET}.chunk_neighbors_ticket` cnt
+  JOIN hits h ON cnt.src_chunk_id = h.chunk_id
+),
+ranked_neighbors AS (
+  SELECT
+    src_chunk_id,
+    nbr_chunk_id,
+    MAX(weight) AS weight,
+    STRING_AGG(source_type, ',') AS sources
+  FROM neighbors_union
+  GROUP BY src_chunk_id, nbr_chunk_id
+),
+limited_neighbors AS (
+  SELECT
+    src_chunk_id,
+    nbr_chunk_id,
+    weight,
+    sources,
+    ROW_NUMBER() OVER (
+      PARTITION BY src_chunk_id
+      ORDER BY weight DESC, nbr_chunk_id
+    ) AS rn
+  FROM ranked_neighbors
+),
+neighbors AS (
+  -- per-hit limit first, then drop neighbors that are hits themselves
+  SELECT src_chunk_id, nbr_chunk_id, weight, sources
+  FROM limited_neighbors
+  WHERE rn <= @max_neighbors
+    AND nbr_chunk_id NOT IN (SELECT chunk_id FROM hits)
+)
+SELECT
+  'hit' AS row_kind,
+  h.chunk_id,
+  h.distance,
+  h.text,
+  h.meta,
+  CAST(NULL AS STRING) AS src_chunk_id,
+  CAST(NULL AS FLOAT64) AS weight,
+  CAST(NULL AS STRING) AS sources
+FROM hits h
+
+UNION ALL
+
+SELECT
+  'neighbor' AS row_kind,
+  n.nbr_chunk_id AS chunk_id,
+  NULL AS distance,
+  c.text,
+  c.meta,
+  n.src_chunk_id,
+  n.weight,
+  n.sources
+FROM neighbors n
+JOIN `${PROJECT_ID}.${DATASET}.chunks_emb` c ON c.chunk_id = n.nbr_chunk_id
+ORDER BY row_kind, distance, src_chunk_id, weight DESC;
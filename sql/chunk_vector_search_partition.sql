@@ -0,0 +1,29 @@
+-- Vector search over one chunk-type partition (chunks_emb_<type>)
+-- Variables: ${PROJECT_ID}, ${DATASET}, ${EMBED_MODEL}, ${CHUNK_TYPE}, ${VECTOR_SEARCH_OPTIONS}
+-- Query parameters: @query_text STRING, @top_k INT64
+-- The partition holds only ${CHUNK_TYPE} chunks, so top_k is taken after the
+-- type filter (chunk_vector_search.sql filters afterwards and can come back short).
+-- Partitions are maintained by src/bq/partitions.py (chunks_emb_partition_refresh.sql).
+
+WITH query_vec AS (
+  SELECT ML.GENERATE_EMBEDDING(
+    MODEL `${PROJECT_ID}.${DATASET}.${EMBED_MODEL}`,
+    @query_text AS text
+  ) AS qvec
+)
+SELECT
+  vs.chunk_id,
+  vs.distance,
+  c.text,
+  c.meta,
+  -- first row carries the query vector for the embedding cache (*_by_vec.sql on reuse)
+  CASE WHEN ROW_NUMBER() OVER (ORDER BY vs.distance) = 1
+    THEN (SELECT qvec FROM query_vec) END AS query_embedding
+FROM ML.VECTOR_SEARCH(
+  TABLE `${PROJECT_ID}.${DATASET}.chunks_emb_${CHUNK_TYPE}`,
+  (SELECT qvec FROM query_vec),
+  top_k => @top_k,
+  options => '${VECTOR_SEARCH_OPTIONS}'
+) AS vs
+JOIN `${PROJECT_ID}.${DATASET}.chunks_emb` c ON c.chunk_id = vs.chunk_id
+ORDER BY vs.distance ASC;
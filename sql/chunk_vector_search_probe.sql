@@ -0,0 +1,16 @@
+-- Bare nearest-neighbor ids for vector index tuning (no text / meta join)
+-- Variables: ${PROJECT_ID}, ${DATASET}, ${VECTOR_SEARCH_OPTIONS}
+-- Query parameters: @query_embedding ARRAY<FLOAT64>, @top_k INT64, @nonce STRING
+-- Not result-cached, and @nonce (fresh per tuning setting) keeps BigQuery's
+-- query cache from answering a repeated probe, so every run measures a search.
+SELECT
+  vs.chunk_id,
+  vs.distance,
+  @nonce AS nonce
+FROM ML.VECTOR_SEARCH(
+  TABLE `${PROJECT_ID}.${DATASET}.chunks_emb`,
+  (SELECT @query_embedding AS qvec),
+  top_k => @top_k,
+  options => '${VECTOR_SEARCH_OPTIONS}'
+) AS vs
+ORDER BY vs.distance ASC;
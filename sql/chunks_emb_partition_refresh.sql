@@ -0,0 +1,26 @@
+-- Sync one chunk-type partition of chunks_emb (chunks_emb_<type>)
+-- Variables: ${PROJECT_ID}, ${DATASET}, ${CHUNK_TYPE}
+-- ${CHUNK_TYPE} is validated by src/bq/partitions.py ([a-z0-9_]+), so it is
+-- safe as both a table suffix and a string literal.
+-- Adds embedded chunks missing from the partition and drops rows whose chunk
+-- left chunks_emb or changed type; re-embedded chunks need a rebuild.
+
+CREATE TABLE IF NOT EXISTS `${PROJECT_ID}.${DATASET}.chunks_emb_${CHUNK_TYPE}` (
+  chunk_id STRING,
+  embedding ARRAY<FLOAT64>
+);
+
+DELETE FROM `${PROJECT_ID}.${DATASET}.chunks_emb_${CHUNK_TYPE}`
+WHERE chunk_id NOT IN (
+  SELECT chunk_id
+  FROM `${PROJECT_ID}.${DATASET}.chunks_emb`
+  WHERE embedding IS NOT NULL AND JSON_VALUE(meta, '$.type') = '${CHUNK_TYPE}'
+);
+
+INSERT INTO `${PROJECT_ID}.${DATASET}.chunks_emb_${CHUNK_TYPE}` (chunk_id, embedding)
+SELECT c.chunk_id, c.embedding
+FROM `${PROJECT_ID}.${DATASET}.chunks_emb` c
+LEFT JOIN `${PROJECT_ID}.${DATASET}.chunks_emb_${CHUNK_TYPE}` p ON p.chunk_id = c.chunk_id
+WHERE p.chunk_id IS NULL
+  AND c.embedding IS NOT NULL
+  AND JSON_VALUE(c.meta, '$.type') = '${CHUNK_TYPE}';
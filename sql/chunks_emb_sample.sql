@@ -0,0 +1,8 @@
+-- Stored chunk embeddings used as tuning queries (core.cli index tune)
+-- Variables: ${PROJECT_ID}, ${DATASET}
+-- Query parameters: @sample_size INT64
+SELECT chunk_id, embedding
+FROM `${PROJECT_ID}.${DATASET}.chunks_emb`
+WHERE embedding IS NOT NULL
+ORDER BY chunk_id
+LIMIT @sample_size;
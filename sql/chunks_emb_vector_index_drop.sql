@@ -0,0 +1,4 @@
+-- Drop the chunks_emb vector index (searches fall back to brute force)
+-- Variables: ${PROJECT_ID}, ${DATASET}
+DROP VECTOR INDEX IF EXISTS chunks_emb_vector_idx
+ON `${PROJECT_ID}.${DATASET}.chunks_emb`;
@@ -0,0 +1,12 @@
+-- Managed IVF vector index over chunk embeddings
+-- Variables: ${PROJECT_ID}, ${DATASET}, ${IVF_OPTIONS} (JSON, e.g. {"num_lists": 1000})
+-- ML.VECTOR_SEARCH over chunks_emb probes fraction_lists_to_search of the
+-- IVF lists instead of scanning every row; BigQuery refreshes the index in
+-- the background (see chunks_emb_vector_index_status.sql for coverage).
+CREATE VECTOR INDEX IF NOT EXISTS chunks_emb_vector_idx
+ON `${PROJECT_ID}.${DATASET}.chunks_emb` (embedding)
+OPTIONS (
+  index_type = 'IVF',
+  distance_type = 'COSINE',
+  ivf_options = '${IVF_OPTIONS}'
+);
@@ -0,0 +1,14 @@
+-- Vector index state and coverage for chunks_emb
+-- Variables: ${PROJECT_ID}, ${DATASET}
+-- coverage_percentage < 100 means part of the table is still searched by
+-- brute force until the background refresh catches up.
+SELECT
+  index_name,
+  table_name,
+  index_status,
+  coverage_percentage,
+  last_refresh_time,
+  disable_reason,
+  ddl
+FROM `${PROJECT_ID}.${DATASET}.INFORMATION_SCHEMA.VECTOR_INDEXES`
+WHERE table_name = 'chunks_emb';
@@ -0,0 +1,11 @@
+-- Managed TreeAH vector index over chunk embeddings
+-- Variables: ${PROJECT_ID}, ${DATASET}, ${TREE_AH_OPTIONS} (JSON, e.g. {"leaf_node_embedding_count": 1000})
+-- TreeAH (ScaNN-style asymmetric hashing) suits large batch searches;
+-- same name as the IVF index, so only one of the two exists at a time.
+CREATE VECTOR INDEX IF NOT EXISTS chunks_emb_vector_idx
+ON `${PROJECT_ID}.${DATASET}.chunks_emb` (embedding)
+OPTIONS (
+  index_type = 'TREE_AH',
+  distance_type = 'COSINE',
+  tree_ah_options = '${TREE_AH_OPTIONS}'
+);
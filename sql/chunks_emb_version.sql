@@ -0,0 +1,9 @@
+-- Change marker for chunks_emb from table metadata (no table scan)
+-- Variables: ${PROJECT_ID}, ${DATASET}
+-- The semantic result cache (src/retrieval/semantic_cache.py) drops entries
+-- stored before the last modification.
+SELECT
+  row_count,
+  last_modified_time
+FROM `${PROJECT_ID}.${DATASET}.__TABLES__`
+WHERE table_id = 'chunks_emb';
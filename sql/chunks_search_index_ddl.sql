@@ -0,0 +1,8 @@
+-- Managed search index over chunk text (token lookups for SEARCH())
+-- Variables: ${PROJECT_ID}, ${DATASET}
+-- LOG_ANALYZER indexes identifiers (hosts, error codes, dotted names) whole
+-- and by their parts, so chunk_text_search.sql / chunk_hybrid_search.sql
+-- read only matching chunks instead of scanning chunks.text.
+CREATE SEARCH INDEX IF NOT EXISTS chunks_text_search_idx
+ON `${PROJECT_ID}.${DATASET}.chunks` (text)
+OPTIONS (analyzer = 'LOG_ANALYZER');
@@ -0,0 +1,8 @@
+-- Embed one query text (in-process ANN index, query-embedding reuse)
+-- Variables: ${PROJECT_ID}, ${DATASET}, ${EMBED_MODEL}
+-- Query parameters: @query_text STRING
+SELECT ml_generate_embedding_result AS embedding
+FROM ML.GENERATE_EMBEDDING(
+  MODEL `${PROJECT_ID}.${DATASET}.${EMBED_MODEL}`,
+  (SELECT @query_text AS content)
+);
@@ -0,0 +1,12 @@
+-- Export chunk embeddings for local analysis (columnar read via Storage Read API)
+-- Also streamed into the memory-mapped snapshot (src/retrieval/snapshot.py)
+-- PLACEHOLDERS: ${PROJECT_ID}, ${DATASET}
+SELECT
+  chunk_id,
+  doc_id,
+  JSON_VALUE(meta, '$.type') AS type,
+  meta,
+  embedding
+FROM `${PROJECT_ID}.${DATASET}.chunks_emb`
+WHERE embedding IS NOT NULL
+ORDER BY chunk_id;
@@ -1,5 +1,6 @@
 -- Get chunk details for neighbor expansion
--- Variables: ${PROJECT_ID}, ${DATASET}, ${CHUNK_IDS_ARRAY}
+-- Variables: ${PROJECT_ID}, ${DATASET}
+-- Query parameters: @chunk_ids ARRAY<STRING>
 -- Returns chunk details needed for re-ranking
 
 SELECT
@@ -7,4 +8,4 @@ SELECT
   text,
   meta
 FROM `${PROJECT_ID}.${DATASET}.chunks_emb`
-WHERE chunk_id IN UNNEST(${CHUNK_IDS_ARRAY});
+WHERE chunk_id IN UNNEST(@chunk_ids);
@@ -1,10 +1,11 @@
 -- Get chunk neighbors for graph expansion
--- Variables: ${PROJECT_ID}, ${DATASET}, ${CHUNK_IDS_ARRAY}, ${MAX_NEIGHBORS}
+-- Variables: ${PROJECT_ID}, ${DATASET}
+-- Query parameters: @chunk_ids ARRAY<STRING>, @max_neighbors INT64
 -- Returns neighbors from both similarity and co-occurrence tables
 
 WITH target_chunks AS (
   SELECT chunk_id
-  FROM UNNEST(${CHUNK_IDS_ARRAY}) AS chunk_id
+  FROM UNNEST(@chunk_ids) AS chunk_id
 ),
 neighbors_union AS (
   -- Similarity-based neighbors
@@ -54,5 +55,5 @@ SELECT
   weight,
   sources
 FROM limited_neighbors
-WHERE rn <= ${MAX_NEIGHBORS}
+WHERE rn <= @max_neighbors
 ORDER BY src_chunk_id, weight DESC;
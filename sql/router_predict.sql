@@ -1,5 +1,6 @@
 -- Router prediction SQL: Predict routing strategy using trained BQML model
--- Variables: ${PROJECT_ID}, ${DATASET}, ${QUERY_TEXT}
+-- Variables: ${PROJECT_ID}, ${DATASET}
+-- Query parameters: @query_text STRING
 -- Returns: predicted_label, predicted_label_probs for routing decision
 
 SELECT
@@ -7,5 +8,5 @@ SELECT
   predicted_label_probs
 FROM ML.PREDICT(
   MODEL `${PROJECT_ID}.${DATASET}.router_m`,
-  (SELECT ${QUERY_TEXT} AS text)
+  (SELECT @query_text AS text)
 );
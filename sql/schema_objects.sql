@@ -0,0 +1,10 @@
+-- Tables / views in a dataset with stored view definitions
+-- Used by src/bq/script.py to skip DDL that would not change anything.
+-- PLACEHOLDERS: ${PROJECT_ID}, ${DATASET}
+SELECT
+  t.table_name,
+  t.table_type,
+  v.view_definition
+FROM `${PROJECT_ID}.${DATASET}.INFORMATION_SCHEMA.TABLES` t
+LEFT JOIN `${PROJECT_ID}.${DATASET}.INFORMATION_SCHEMA.VIEWS` v
+  USING (table_name);
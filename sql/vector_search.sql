@@ -1,20 +1,25 @@
 -- Phase 0 Vector Search
--- Variables: ${PROJECT_ID}, ${DATASET}, ${EMBED_MODEL}, ${QUERY_TEXT}, ${TOP_K}
+-- Variables: ${PROJECT_ID}, ${DATASET}, ${EMBED_MODEL}, ${VECTOR_SEARCH_OPTIONS}
+-- Query parameters: @query_text STRING, @top_k INT64
 
 WITH query_vec AS (
   SELECT ML.GENERATE_EMBEDDING(
     MODEL `${PROJECT_ID}.${DATASET}.${EMBED_MODEL}`,
-    ${QUERY_TEXT} AS text
+    @query_text AS text
   ) AS qvec
 )
 SELECT
   vs.id,
   vs.distance,
-  t.text
+  t.text,
+  -- first row carries the query vector for the embedding cache (*_by_vec.sql on reuse)
+  CASE WHEN ROW_NUMBER() OVER (ORDER BY vs.distance) = 1
+    THEN (SELECT qvec FROM query_vec) END AS query_embedding
 FROM ML.VECTOR_SEARCH(
   TABLE `${PROJECT_ID}.${DATASET}.demo_texts_emb`,
   (SELECT qvec FROM query_vec),
-  top_k => ${TOP_K}
+  top_k => @top_k,
+  options => '${VECTOR_SEARCH_OPTIONS}'
 ) AS vs
 JOIN `${PROJECT_ID}.${DATASET}.demo_texts_emb` t ON t.id = vs.id
 ORDER BY vs.distance ASC;
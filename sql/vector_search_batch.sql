@@ -0,0 +1,27 @@
+-- Phase 0 Vector Search, batched: N query texts, one job
+-- Variables: ${PROJECT_ID}, ${DATASET}, ${EMBED_MODEL}
+-- Query parameters: @query_texts ARRAY<STRING>, @top_k INT64
+-- query_id is the 0-based position in @query_texts; top_k applies per query.
+
+WITH queries AS (
+  SELECT id, ml_generate_embedding_result AS qvec
+  FROM ML.GENERATE_EMBEDDING(
+    MODEL `${PROJECT_ID}.${DATASET}.${EMBED_MODEL}`,
+    (SELECT q_pos AS id, q_text AS content FROM UNNEST(@query_texts) AS q_text WITH OFFSET AS q_pos)
+  )
+)
+SELECT
+  vs.query_id,
+  vs.id,
+  vs.distance,
+  t.text,
+  CASE WHEN ROW_NUMBER() OVER (PARTITION BY vs.query_id ORDER BY vs.distance) = 1
+    THEN q.qvec END AS query_embedding
+FROM ML.VECTOR_SEARCH(
+  TABLE `${PROJECT_ID}.${DATASET}.demo_texts_emb`,
+  (SELECT id, qvec FROM queries),
+  top_k => @top_k
+) AS vs
+JOIN `${PROJECT_ID}.${DATASET}.demo_texts_emb` t ON t.id = vs.id
+JOIN queries q ON q.id = vs.query_id
+ORDER BY vs.query_id, vs.distance ASC;
@@ -0,0 +1,19 @@
+-- Phase 0 Vector Search from a precomputed query vector (embedding cache hit)
+-- Variables: ${PROJECT_ID}, ${DATASET}, ${VECTOR_SEARCH_OPTIONS}
+-- Query parameters: @query_embedding ARRAY<FLOAT64>, @top_k INT64
+
+WITH query_vec AS (
+  SELECT @query_embedding AS qvec
+)
+SELECT
+  vs.id,
+  vs.distance,
+  t.text
+FROM ML.VECTOR_SEARCH(
+  TABLE `${PROJECT_ID}.${DATASET}.demo_texts_emb`,
+  (SELECT qvec FROM query_vec),
+  top_k => @top_k,
+  options => '${VECTOR_SEARCH_OPTIONS}'
+) AS vs
+JOIN `${PROJECT_ID}.${DATASET}.demo_texts_emb` t ON t.id = vs.id
+ORDER BY vs.distance ASC;
@@ -0,0 +1,78 @@
+"""Asyncio facade over the BigQuery client variants.
+
+``run_sql_template_async`` submits a job without blocking the event loop
+and polls it cooperatively, so independent templates (routing, search,
+link writes) can be in flight at the same time. Clients without a
+``start_query`` split (stub, test doubles) run in a worker thread.
+
+With a client resilience policy (RealClient.resilience), polled jobs share
+its circuit breakers, retry transient read failures with non-blocking
+backoff and are cancelled at their template deadline.
+"""
+from __future__ import annotations
+import asyncio
+from typing import Any, Dict, List, Optional
+
+from .bigquery_client import BigQueryClientBase
+from .resilience import QueryTimeout
+
+
+class AsyncBigQueryClient:
+    """Concurrent job submission on top of a sync client."""
+
+    def __init__(
+        self,
+        client: BigQueryClientBase,
+        max_concurrency: int = 8,
+        poll_interval: float = 0.05,
+        max_poll_interval: float = 1.0,
+    ) -> None:
+        self.client = client
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self._max_concurrency = max(1, max_concurrency)
+        self._sem: Optional[asyncio.Semaphore] = None
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        # created lazily so the facade can be built outside a running loop
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(self._max_concurrency)
+        return self._sem
+
+    async def run_sql_template_async(
+        self, name: str, params: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        start = getattr(self.client, "start_query", None)
+        async with self._semaphore():
+            if start is None:
+                return await asyncio.to_thread(self.client.run_sql_template, name, params)
+            res = getattr(self.client, "resilience", None)
+            if res is None:
+                return await self._poll(start, name, params, None)
+            read_only = await asyncio.to_thread(self.client.is_read_only, name, params)  # type: ignore[attr-defined]
+            timeout = res.timeout_for(name)
+            return await res.call_async(
+                name, lambda: self._poll(start, name, params, timeout), retry=read_only
+            )
+
+    async def _poll(
+        self, start: Any, name: str, params: Dict[str, Any], timeout: Optional[float]
+    ) -> List[Dict[str, Any]]:
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        pending = await asyncio.to_thread(start, name, params)
+        delay = self.poll_interval
+        while not await asyncio.to_thread(pending.done):
+            if deadline is not None and loop.time() >= deadline:
+                await asyncio.to_thread(pending.cancel)
+                raise QueryTimeout(name, timeout or 0.0)
+            wait = delay if deadline is None else max(0.0, min(delay, deadline - loop.time()))
+            await asyncio.sleep(wait)
+            delay = min(self.max_poll_interval, delay * 2)
+        return await asyncio.to_thread(pending.result)
+
+    def run_sql_template(
+        self, name: str, params: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        """Blocking passthrough so the facade can stand in for a sync client."""
+        return self.client.run_sql_template(name, params)
@@ -1,14 +1,17 @@
 """BigQuery client wrapper (stub + real) for Phase 1.
 
-Environment switch: set BIGQUERY_REAL=1 to use RealClient, else StubClient.
+Environment switch: set BIGQUERY_REAL=1 to use RealClient, BIGQUERY_LOCAL=1
+for the offline SQLite backend (src.bq.local.LocalClient), else StubClient.
 """
 from __future__ import annotations
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+import datetime
 import importlib
 import os
 import sys
+import time
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator, List, NoReturn, Optional
 
 # Add project root to path for config import  
 project_root = Path(__file__).parent.parent.parent
@@ -16,8 +19,16 @@ sys.path.insert(0, str(project_root))
 
 # Import config module for authentication handling
 from config import load_env
+from . import pool, vector_index
+from .cache import ResultCache, default_cache, is_read_only, make_key
+from .guardrails import BytesBudget, BytesBudgetExceeded, is_bytes_limit_error
+from .resilience import QueryTimeout, Resilience, first_finished
+from .templates import get_registry, param_names
+from .telemetry import JobMetrics, MetricsRegistry, default_registry
 
-SQL_DIR = Path("sql")
+SQL_DIR = Path("sql")  # kept for callers; templates load via get_registry()
+DEFAULT_PAGE_SIZE = 1000  # rows per page for run_sql_template_iter
+POLL_INTERVAL = 0.05  # first done() poll while hedging / enforcing a deadline
 
 
 class BigQueryClientBase:
@@ -28,6 +39,29 @@ class BigQueryClientBase:
     ) -> List[Dict[str, Any]]:  # pragma: no cover - interface
         raise NotImplementedError
 
+    def run_sql_template_iter(
+        self, name: str, params: Dict[str, Any], page_size: int = DEFAULT_PAGE_SIZE
+    ) -> Iterator[Dict[str, Any]]:
+        """Rows as an iterator; clients without paging materialize first."""
+        return iter(self.run_sql_template(name, params))
+
+    def run_sql_template_arrow(
+        self, name: str, params: Dict[str, Any], as_pandas: bool = False
+    ) -> Any:
+        """Result as a ``pyarrow.Table`` (or pandas DataFrame with ``as_pandas``).
+
+        Built from row dicts here; RealClient reads columnar pages directly.
+        """
+        return rows_to_columnar(self.run_sql_template(name, params), as_pandas)
+
+    def estimate(self, name: str, params: Dict[str, Any]) -> Optional[int]:
+        """Estimated bytes processed (dry run); None if unsupported."""
+        return None
+
+    def embedding_model(self) -> Optional[str]:
+        """Identity of the query-embedding model; None disables embedding reuse."""
+        return None
+
 
 @dataclass
 class StubClient(BigQueryClientBase):
@@ -124,6 +158,30 @@ class StubClient(BigQueryClientBase):
             # Default empty for other raw SQL queries
             return []
             
+        if name in ("vector_search_batch.sql", "chunk_vector_search_batch.sql"):
+            single = name.replace("_batch", "")
+            return [
+                {**row, "query_id": i}
+                for i, q in enumerate(params.get("query_texts") or [])
+                for row in self.run_sql_template(single, {**params, "query_text": q})
+            ]
+        if name == "chunk_vector_search_partition.sql":
+            # one chunk-type partition: the filtered search restricted to that type
+            return self.run_sql_template(
+                "chunk_vector_search.sql", {**params, "types": [params.get("CHUNK_TYPE")]}
+            )
+        if name == "chunk_hybrid_search.sql":
+            # keyword + vector fusion; the stub's one chunk ranks first on both sides
+            return [
+                {**row, "rrf_score": 2.0 / 61, "vector_rank": 1, "lexical_rank": 1}
+                for row in self.run_sql_template("chunk_vector_search.sql", params)
+            ]
+        if name == "chunk_vector_search_graph.sql":
+            # fused search + graph expansion; the stub has no neighbors
+            return [
+                {**row, "row_kind": "hit"}
+                for row in self.run_sql_template("chunk_vector_search.sql", params)
+            ]
         if name == "vector_search.sql":
             q = params.get("query_text", "")
             return [
@@ -151,6 +209,10 @@ class RealClient(BigQueryClientBase):
 
     project: str | None = None
     location: str | None = None
+    cache: Optional[ResultCache] = None
+    metrics: Optional[MetricsRegistry] = field(default_factory=default_registry)
+    budget: Optional[BytesBudget] = field(default_factory=BytesBudget.from_env)
+    resilience: Optional[Resilience] = field(default_factory=Resilience.from_env)
 
     def __post_init__(self) -> None:
         try:  # lazy import
@@ -160,94 +222,439 @@ class RealClient(BigQueryClientBase):
                 "bigquery lib missing; install or unset BIGQUERY_REAL."
             ) from exc
         self._bq_mod = bigquery_mod
-        
-        # Support different authentication methods
-        api_key = os.getenv("GOOGLE_API_KEY")
-        service_account_path = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
-        
-        if api_key:
-            # Use API key authentication (for testing)
-            from google.auth.credentials import AnonymousCredentials
-            self._client = bigquery_mod.Client(
-                project=self.project,
-                location=self.location,
-                credentials=AnonymousCredentials()
-            )
-            # Note: API keys have limited BigQuery support
-            print(f"[auth] Using API key authentication for project "
-                  f"{self.project}")
-        elif service_account_path:
-            # Use service account file
-            self._client = bigquery_mod.Client(
-                project=self.project, location=self.location
-            )
-            print(f"[auth] Using service account from {service_account_path}")
-        else:
-            # Use default credentials (ADC)
-            self._client = bigquery_mod.Client(
-                project=self.project, location=self.location
-            )
-            print(f"[auth] Using default credentials for project "
-                  f"{self.project}")
+        # one shared Client (auth + HTTP session) per (project, location)
+        self._client = pool.get_client(bigquery_mod, self.project, self.location)
+
+    def warm_up(self, wait: bool = False) -> None:
+        """Resolve credentials / open the connection in the background."""
+        pool.warm_up(self._bq_mod, self.project, self.location, wait=wait)
+
+    def identifiers(self) -> Dict[str, str]:
+        """Values for ${NAME} identifier placeholders."""
+        return template_identifiers(self.project)
+
+    def embedding_model(self) -> Optional[str]:
+        return embedding_model_id(self.identifiers())
+
+    def render(self, name: str, params: Dict[str, Any]) -> str:
+        """Render a registry template (or raw SQL) to final SQL text.
+
+        Raises TemplateError before any job is submitted if inputs are
+        missing.
+        """
+        return render_sql(name, params, self.identifiers())
+
+    def start_query(
+        self, name: str, params: Dict[str, Any], sql: Optional[str] = None
+    ) -> "PendingQuery":
+        """Render and submit without waiting for completion.
+
+        ``sql`` skips rendering when the caller already rendered the
+        template. Cache hits come back as an already-finished handle.
+        """
+        if sql is None:
+            sql = self.render(name, params)
+        cache_key = None
+        if self.cache is not None and self.cache.should_cache(name, sql):
+            cache_key = make_key(sql, params)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return PendingQuery(self, name, rows=cached)
+        cap = self.budget.cap_for(name) if self.budget is not None else None
+        config_kwargs: Dict[str, Any] = {}
+        if cap is not None:
+            config_kwargs["maximum_bytes_billed"] = cap
+            if self.budget is not None and self.budget.preflight:
+                self.budget.check(name, self._dry_run(sql, params))
+        job_config = self._bq_mod.QueryJobConfig(
+            query_parameters=query_parameters(self._bq_mod, sql, params), **config_kwargs
+        )
+        started = time.perf_counter()
+        try:
+            job = self._client.query(sql, job_config=job_config)
+        except Exception as exc:
+            self._record(name, None, started, error=exc)
+            self._reraise(name, exc)
+        return PendingQuery(self, name, job=job, cache_key=cache_key, started=started)
+
+    def run_script(
+        self, sql: str, params: Dict[str, Any], name: str = "_script.sql"
+    ) -> List[Dict[str, Any]]:
+        """Run a rendered multi-statement script as one job.
+
+        Returns one entry per executed statement (from the script's child
+        jobs, oldest first): statement_type, rows (SELECT only) and DML
+        counts. Use src.bq.script.ScriptBatch rather than calling directly.
+        """
+        cap = self.budget.cap_for(name) if self.budget is not None else None
+        config_kwargs: Dict[str, Any] = {"maximum_bytes_billed": cap} if cap else {}
+        job_config = self._bq_mod.QueryJobConfig(
+            query_parameters=query_parameters(self._bq_mod, sql, params), **config_kwargs
+        )
+        started = time.perf_counter()
+        try:
+            job = self._client.query(sql, job_config=job_config)
+            job.result()
+            # list_jobs returns newest first
+            children = list(self._client.list_jobs(parent_job=job.job_id))[::-1] or [job]
+            out = [_statement_summary(child) for child in children]
+        except Exception as exc:
+            self._record(name, None, started, error=exc)
+            self._reraise(name, exc)
+        self._record(name, job, started, rows=len(out))
+        return out
+
+    def estimate(self, name: str, params: Dict[str, Any]) -> Optional[int]:
+        """Bytes the template would process, via a dry-run job (free)."""
+        return self._dry_run(self.render(name, params), params)
+
+    def _dry_run(self, sql: str, params: Dict[str, Any]) -> int:
+        job_config = self._bq_mod.QueryJobConfig(
+            dry_run=True,
+            use_query_cache=False,
+            query_parameters=query_parameters(self._bq_mod, sql, params),
+        )
+        try:
+            job = self._client.query(sql, job_config=job_config)
+        except Exception as exc:
+            _reraise(exc)
+        return int(getattr(job, "total_bytes_processed", None) or 0)
+
+    def _reraise(self, name: str, exc: Exception) -> NoReturn:
+        cap = self.budget.cap_for(name) if self.budget is not None else None
+        if cap is not None and is_bytes_limit_error(exc):
+            raise BytesBudgetExceeded(name, cap) from exc
+        _reraise(exc)
+
+    def _record(
+        self,
+        name: str,
+        job: Any,
+        started: float,
+        rows: Optional[int] = None,
+        error: Optional[BaseException] = None,
+    ) -> None:
+        if self.metrics is None:
+            return
+        latency_ms = (time.perf_counter() - started) * 1000.0
+        self.metrics.record(JobMetrics.from_job(name, job, latency_ms, rows, error))
 
     def run_sql_template(
         self, name: str, params: Dict[str, Any]
     ) -> List[Dict[str, Any]]:
-        # Raw SQL bypass
-        if "raw_sql" in params:
-            sql = params["raw_sql"]
-        else:
-            path = SQL_DIR / name
-            if not path.exists():  # pragma: no cover
-                raise FileNotFoundError(f"SQL template not found: {name}")
-            sql_src = path.read_text(encoding="utf-8")
-            sql = sql_src
-        # Parameter placeholders
-        batch_limit_env = os.getenv("EMBED_BATCH_LIMIT", "10000")
+        """Rows of a template, under the retry / breaker / hedge policy."""
+        res = self.resilience
+        if res is None:
+            return self.start_query(name, params).result()
+        sql = self.render(name, params)
+        read_only = is_read_only(sql)
+        return res.call(
+            name, lambda: self._run_guarded(name, params, sql, read_only), retry=read_only
+        )
+
+    def is_read_only(self, name: str, params: Dict[str, Any]) -> bool:
+        """True if the rendered template only reads (safe to retry / hedge)."""
+        return is_read_only(self.render(name, params))
+
+    def _run_guarded(
+        self, name: str, params: Dict[str, Any], sql: str, read_only: bool
+    ) -> List[Dict[str, Any]]:
+        res = self.resilience
+        assert res is not None
+        timeout = res.timeout_for(name)
+        hedge_after = res.hedge_after(name, self.metrics) if read_only else None
+        if timeout is not None and hedge_after is not None and hedge_after >= timeout:
+            hedge_after = None
+        started = res.clock()
+        deadline = started + timeout if timeout is not None else None
+        first = self.start_query(name, params, sql)
+        pending = [first]
+        if hedge_after is not None:
+            done = first_finished(pending, POLL_INTERVAL, started + hedge_after, res.clock, res.sleep)
+            if done is not None:
+                return done.result()
+            res.note("hedges")
+            pending.append(self.start_query(name, params, sql))
+        elif deadline is None:
+            return first.result()
+        while True:
+            winner = first_finished(pending, POLL_INTERVAL, deadline, res.clock, res.sleep)
+            if winner is None:
+                for p in pending:
+                    p.cancel()
+                res.note("timeouts")
+                raise QueryTimeout(name, timeout or 0.0)
+            pending.remove(winner)
+            try:
+                rows = winner.result()
+            except Exception:
+                if pending:  # the other copy may still succeed
+                    continue
+                raise
+            for p in pending:
+                p.cancel()
+            if winner is not first:
+                res.note("hedge_wins")
+            return rows
+
+    def run_sql_template_iter(
+        self, name: str, params: Dict[str, Any], page_size: int = DEFAULT_PAGE_SIZE
+    ) -> Iterator[Dict[str, Any]]:
+        """Submit now; yield rows one page at a time (constant memory).
+
+        Streamed results are never written to the result cache.
+        """
+        return self.start_query(name, params).iter_rows(page_size)
+
+    def run_sql_template_arrow(
+        self, name: str, params: Dict[str, Any], as_pandas: bool = False
+    ) -> Any:
+        """Columnar result fetched through the BigQuery Storage Read API.
+
+        Falls back to the REST row API when google-cloud-bigquery-storage is
+        not installed. Columnar results bypass the result cache.
+        """
+        return self.start_query(name, params).arrow(as_pandas)
+
+
+class PendingQuery:
+    """Handle for a submitted (or cache-served) template query."""
+
+    def __init__(
+        self,
+        client: RealClient,
+        name: str,
+        job: Any = None,
+        rows: Optional[List[Dict[str, Any]]] = None,
+        cache_key: Optional[str] = None,
+        started: Optional[float] = None,
+    ) -> None:
+        self.client = client
+        self.name = name
+        self.job = job
+        self._rows = rows
+        self._cache_key = cache_key
+        self._started = time.perf_counter() if started is None else started
+
+    def done(self) -> bool:
+        """Non-blocking completion check (one status poll for real jobs)."""
+        if self._rows is not None:
+            return True
+        return bool(self.job.done())
+
+    def cancel(self) -> None:
+        """Best-effort cancel of an unfinished job (hedge loser, deadline)."""
+        if self._rows is not None or self.job is None:
+            return
+        cancel = getattr(self.job, "cancel", None)
+        if cancel is None:
+            return
         try:
-            batch_limit = min(50000, max(1, int(batch_limit_env)))
-        except ValueError:
-            batch_limit = 10000
-        replacements = {
-            "${PROJECT_ID}": self.project or "",
-            "${DATASET}": os.getenv("BQ_DATASET", "demo_ai"),
-            "${EMBED_MODEL}": os.getenv(
-                "BQ_EMBED_MODEL", "text-embedding-004"
-            ),
-            "${QUERY_TEXT}": f"'{params.get('query_text', '')}'",
-            "${TOP_K}": str(params.get("top_k", 5)),
-            "${EMBED_BATCH_LIMIT}": str(batch_limit),
-            "${TYPE_ARRAY}": (
-                "[" + ",".join(f"'{t}'" for t in params.get("types", [])) + "]"
-                if params.get("types")
-                else "[]"
-            ),
-        }
-        for k, v in replacements.items():
-            sql = sql.replace(k, v)
+            cancel()
+        except Exception:  # pragma: no cover - already finished / no permission
+            pass
+
+    def result(self) -> List[Dict[str, Any]]:
+        """Block until finished; rows as dicts."""
+        if self._rows is not None:
+            return self._rows
         try:
-            job = self._client.query(sql)
-            rows = list(job.result())
-        except Exception as exc:  # pragma: no cover
-            if "credentials" in str(exc).lower():
-                raise RuntimeError(
-                    "BigQuery creds missing; set env or unset BIGQUERY_REAL."
-                ) from exc
-            raise
+            rows = list(self.job.result())
+        except Exception as exc:
+            self.client._record(self.name, self.job, self._started, error=exc)
+            self.client._reraise(self.name, exc)
         out: List[Dict[str, Any]] = []
         for r in rows:
             d = dict(r)
             out.append(d)
+        self.client._record(self.name, self.job, self._started, rows=len(out))
+        cache = self.client.cache
+        if self._cache_key is not None and cache is not None:
+            cache.put(self.name, self._cache_key, out)
+        self._rows = out
         return out
 
+    def arrow(self, as_pandas: bool = False) -> Any:
+        """Block until finished; ``pyarrow.Table`` or pandas DataFrame."""
+        if self._rows is not None:
+            return rows_to_columnar(self._rows, as_pandas)
+        try:
+            row_iter = self.job.result()
+            if as_pandas:
+                table = row_iter.to_dataframe(create_bqstorage_client=True)
+            else:
+                table = row_iter.to_arrow(create_bqstorage_client=True)
+        except Exception as exc:
+            self.client._record(self.name, self.job, self._started, error=exc)
+            self.client._reraise(self.name, exc)
+        self.client._record(self.name, self.job, self._started, rows=len(table))
+        return table
+
+    def iter_rows(self, page_size: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Yield rows page by page; only one page is held in memory."""
+        if self._rows is not None:
+            yield from self._rows
+            return
+        count = 0
+        try:
+            row_iter = self.job.result(page_size=page_size)
+            pages = getattr(row_iter, "pages", None)
+            for page in pages if pages is not None else (row_iter,):
+                for r in page:
+                    count += 1
+                    yield dict(r)
+        except Exception as exc:
+            self.client._record(self.name, self.job, self._started, rows=count, error=exc)
+            self.client._reraise(self.name, exc)
+        except GeneratorExit:  # consumer stopped early
+            self.client._record(self.name, self.job, self._started, rows=count)
+            raise
+        self.client._record(self.name, self.job, self._started, rows=count)
+
+
+def template_identifiers(project: Optional[str]) -> Dict[str, str]:
+    """Values for ${NAME} identifier placeholders (project, dataset, model)."""
+    batch_limit_env = os.getenv("EMBED_BATCH_LIMIT", "10000")
+    try:
+        batch_limit = min(50000, max(1, int(batch_limit_env)))
+    except ValueError:
+        batch_limit = 10000
+    return {
+        "PROJECT_ID": project or "",
+        "DATASET": os.getenv("BQ_DATASET", "demo_ai"),
+        "EMBED_MODEL": os.getenv("BQ_EMBED_MODEL", "text-embedding-004"),
+        "EMBED_BATCH_LIMIT": str(batch_limit),
+        "VECTOR_SEARCH_OPTIONS": vector_index.search_options(),
+    }
+
+
+def embedding_model_id(values: Dict[str, str]) -> str:
+    """Fully qualified ${EMBED_MODEL} (query-embedding cache key part)."""
+    return f"{values['PROJECT_ID']}.{values['DATASET']}.{values['EMBED_MODEL']}"
+
+
+def render_sql(name: str, params: Dict[str, Any], values: Dict[str, str]) -> str:
+    """Render a registry template (or ``raw_sql``) with identifier ``values``.
+
+    Upper-case keys in ``params`` fill extra ${NAME} placeholders
+    (e.g. SOURCE_TABLE); lower-case keys are bound as @params.
+    """
+    values = dict(values)
+    if "raw_sql" in params:
+        sql = params["raw_sql"]
+        for k, v in values.items():
+            sql = sql.replace("${" + k + "}", v)
+        return sql
+    values.update({k: str(v) for k, v in params.items() if k.isupper()})
+    return get_registry().render(name, values, params)
+
+
+def _reraise(exc: Exception) -> NoReturn:
+    if "credentials" in str(exc).lower():
+        raise RuntimeError(
+            "BigQuery creds missing; set env or unset BIGQUERY_REAL."
+        ) from exc
+    raise exc
+
+
+def _statement_summary(job: Any) -> Dict[str, Any]:
+    statement_type = getattr(job, "statement_type", None)
+    rows = [dict(r) for r in job.result()] if statement_type == "SELECT" else []
+    stats = getattr(job, "dml_stats", None)
+    return {
+        "job_id": getattr(job, "job_id", None),
+        "statement_type": statement_type,
+        "rows": rows,
+        "inserted": int(getattr(stats, "inserted_row_count", 0) or 0),
+        "updated": int(getattr(stats, "updated_row_count", 0) or 0),
+        "deleted": int(getattr(stats, "deleted_row_count", 0) or 0),
+    }
+
+
+def rows_to_columnar(rows: List[Dict[str, Any]], as_pandas: bool = False) -> Any:
+    """Row dicts -> ``pyarrow.Table`` (or pandas DataFrame)."""
+    mod_name = "pandas" if as_pandas else "pyarrow"
+    try:
+        mod = importlib.import_module(mod_name)
+    except Exception as exc:
+        raise RuntimeError(
+            f"{mod_name} missing; install the 'arrow' extra for columnar results."
+        ) from exc
+    return mod.DataFrame(rows) if as_pandas else mod.Table.from_pylist(rows)
+
+
+def _bq_type(value: Any) -> str:
+    if isinstance(value, bool):
+        return "BOOL"
+    if isinstance(value, int):
+        return "INT64"
+    if isinstance(value, float):
+        return "FLOAT64"
+    if isinstance(value, datetime.datetime):
+        return "TIMESTAMP"
+    if isinstance(value, datetime.date):
+        return "DATE"
+    if isinstance(value, bytes):
+        return "BYTES"
+    return "STRING"
+
+
+def query_parameters(bq_mod: Any, sql: str, params: Dict[str, Any]) -> List[Any]:
+    """Build Scalar/ArrayQueryParameter list for ``@name`` refs in ``sql``.
+
+    Only names present in ``params`` are bound; the SQL text itself is never
+    modified so identical templates stay byte-identical across calls.
+    """
+    names = param_names(sql)
+    out: List[Any] = []
+    for name in sorted(names):
+        if name not in params or name == "raw_sql":
+            continue
+        value = params[name]
+        if isinstance(value, (list, tuple)):
+            elem = _bq_type(value[0]) if value else "STRING"
+            out.append(bq_mod.ArrayQueryParameter(name, elem, list(value)))
+        else:
+            out.append(bq_mod.ScalarQueryParameter(name, _bq_type(value), value))
+    return out
+
 
 def make_client() -> BigQueryClientBase:
-    """Factory for appropriate client based on env switch."""
+    """Factory for appropriate client based on env switch.
+
+    BQ_REPLAY=path serves a recorded cassette instead of any backend;
+    BQ_RECORD=path records calls of the selected client (src/bq/cassette.py).
+    """
+    replay = os.getenv("BQ_REPLAY")
+    if replay:
+        from .cassette import ReplayClient
+
+        return ReplayClient.from_env(replay)
+    client = _select_client()
+    record = os.getenv("BQ_RECORD")
+    if record:
+        from .cassette import RecordingClient
+
+        return RecordingClient(client, record)
+    return client
+
+
+def _select_client() -> BigQueryClientBase:
     if os.getenv("BIGQUERY_REAL") == "1":
-        return RealClient(
+        client = RealClient(
             project=os.getenv("BQ_PROJECT_ID"),
             location=os.getenv("BQ_LOCATION"),
+            cache=default_cache(),
         )
+        if os.getenv("BQ_WARMUP", "1") != "0":
+            client.warm_up()  # no-op after the first call per process
+        return client
+    if os.getenv("BIGQUERY_LOCAL") == "1":
+        from .local import LocalClient
+
+        local = LocalClient.from_env()
+        local.ensure_schema()
+        return local
     return StubClient()
 
 # Reflection:
@@ -0,0 +1,259 @@
+"""Result cache for rendered SQL templates.
+
+Two tiers:
+    * in-process LRU bounded by (pickled) byte size
+    * optional on-disk directory shared by every process pointed at it
+      (CLI, dashboard, scripts/run_eval.py)
+
+Entries are keyed by rendered SQL plus parameters and expire per template
+TTL. Only read-only statements (SELECT / WITH) are ever cached.
+
+Environment:
+    BQ_CACHE=1             enable the default cache in make_client()
+    BQ_CACHE_DIR           disk tier directory (unset = memory only)
+    BQ_CACHE_MAX_BYTES     memory tier bound (default 64 MiB)
+    BQ_CACHE_TTL           default TTL seconds for unlisted templates (0)
+    BQ_CACHE_TTLS          per-template overrides: "name=seconds,..."
+"""
+from __future__ import annotations
+from collections import OrderedDict
+import hashlib
+import json
+import os
+import pickle
+import re
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+Rows = List[Dict[str, Any]]
+
+# Seconds; templates not listed fall back to default_ttl (0 = uncached).
+DEFAULT_TTLS: Dict[str, float] = {
+    "router_predict.sql": 3600.0,
+    "vector_search.sql": 300.0,
+    "chunk_vector_search.sql": 300.0,
+    "vector_search_by_vec.sql": 300.0,
+    "chunk_vector_search_by_vec.sql": 300.0,
+    "vector_search_batch.sql": 300.0,
+    "chunk_vector_search_batch.sql": 300.0,
+    "chunk_vector_search_graph.sql": 300.0,
+    "chunk_vector_search_graph_by_vec.sql": 300.0,
+    "chunk_vector_search_partition.sql": 300.0,
+    "chunk_vector_search_partition_by_vec.sql": 300.0,
+    "chunk_hybrid_search.sql": 300.0,
+    "chunk_hybrid_search_by_vec.sql": 300.0,
+    "chunk_text_search.sql": 300.0,
+    "get_chunk_neighbors.sql": 300.0,
+    "get_chunk_details.sql": 900.0,
+    "_raw.sql": 120.0,  # dashboard view reads
+}
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+_COMMENT_RE = re.compile(r"(--[^\n]*\n)|(/\*.*?\*/)", re.DOTALL)
+
+
+def is_read_only(sql: str) -> bool:
+    """True if the statement is a plain query (SELECT / WITH)."""
+    body = _COMMENT_RE.sub(" ", sql + "\n").strip()
+    if ";" in body.rstrip(";"):
+        return False  # multi-statement script
+    head = body[:6].upper()
+    return head.startswith("SELECT") or head.startswith("WITH")
+
+
+def make_key(sql: str, params: Dict[str, Any]) -> str:
+    """Stable cache key from rendered SQL plus parameters."""
+    payload = json.dumps(
+        {"sql": sql, "params": {k: v for k, v in params.items() if k != "raw_sql"}},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _parse_ttls(raw: str) -> Dict[str, float]:
+    out: Dict[str, float] = {}
+    for part in raw.split(","):
+        name, _, val = part.partition("=")
+        if not name.strip() or not val.strip():
+            continue
+        try:
+            out[name.strip()] = float(val)
+        except ValueError:
+            continue
+    return out
+
+
+class ResultCache:
+    """Byte-bounded LRU with per-template TTL and optional disk tier."""
+
+    def __init__(
+        self,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        ttls: Optional[Dict[str, float]] = None,
+        default_ttl: float = 0.0,
+        disk_dir: Optional[str | Path] = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.max_bytes = max(0, int(max_bytes))
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.default_ttl = default_ttl
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+        self._clock = clock
+        self._lock = threading.Lock()
+        # key -> (expires_at, size, rows)
+        self._mem: "OrderedDict[str, Tuple[float, int, Rows]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_env(cls) -> "ResultCache":
+        ttls = dict(DEFAULT_TTLS)
+        ttls.update(_parse_ttls(os.getenv("BQ_CACHE_TTLS", "")))
+        try:
+            max_bytes = int(os.getenv("BQ_CACHE_MAX_BYTES", str(DEFAULT_MAX_BYTES)))
+        except ValueError:
+            max_bytes = DEFAULT_MAX_BYTES
+        try:
+            default_ttl = float(os.getenv("BQ_CACHE_TTL", "0"))
+        except ValueError:
+            default_ttl = 0.0
+        return cls(
+            max_bytes=max_bytes,
+            ttls=ttls,
+            default_ttl=default_ttl,
+            disk_dir=os.getenv("BQ_CACHE_DIR") or None,
+        )
+
+    # -- policy ---------------------------------------------------------
+    def ttl_for(self, name: str) -> float:
+        return self.ttls.get(name, self.default_ttl)
+
+    def should_cache(self, name: str, sql: str) -> bool:
+        return self.ttl_for(name) > 0 and is_read_only(sql)
+
+    # -- lookup / store -------------------------------------------------
+    def get(self, key: str) -> Optional[Rows]:
+        now = self._clock()
+        with self._lock:
+            entry = self._mem.get(key)
+            if entry is not None:
+                expires_at, size, rows = entry
+                if expires_at > now:
+                    self._mem.move_to_end(key)
+                    self.hits += 1
+                    return [dict(r) for r in rows]
+                self._drop(key)
+        rows = self._disk_get(key, now)
+        with self._lock:
+            if rows is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+        return [dict(r) for r in rows]
+
+    def put(self, name: str, key: str, rows: Rows) -> None:
+        ttl = self.ttl_for(name)
+        if ttl <= 0:
+            return
+        expires_at = self._clock() + ttl
+        blob = pickle.dumps((expires_at, rows), protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._store(key, expires_at, len(blob), [dict(r) for r in rows])
+        self._disk_put(key, blob)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mem.clear()
+            self._bytes = 0
+        if self.disk_dir is not None:
+            for p in self.disk_dir.glob("*.pkl"):
+                try:
+                    p.unlink()
+                except OSError:
+                    pass
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._mem),
+                "bytes": self._bytes,
+            }
+
+    # -- internals ------------------------------------------------------
+    def _store(self, key: str, expires_at: float, size: int, rows: Rows) -> None:
+        if key in self._mem:
+            self._drop(key)
+        if size > self.max_bytes:
+            return  # too large for memory tier; disk may still hold it
+        self._mem[key] = (expires_at, size, rows)
+        self._bytes += size
+        while self._bytes > self.max_bytes and self._mem:
+            oldest = next(iter(self._mem))
+            self._drop(oldest)
+            self.evictions += 1
+
+    def _drop(self, key: str) -> None:
+        _, size, _ = self._mem.pop(key)
+        self._bytes -= size
+
+    def _disk_path(self, key: str) -> Optional[Path]:
+        return self.disk_dir / f"{key}.pkl" if self.disk_dir is not None else None
+
+    def _disk_get(self, key: str, now: float) -> Optional[Rows]:
+        path = self._disk_path(key)
+        if path is None or not path.exists():
+            return None
+        try:
+            blob = path.read_bytes()
+            expires_at, rows = pickle.loads(blob)
+        except Exception:
+            return None
+        if expires_at <= now:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            return None
+        with self._lock:
+            self._store(key, expires_at, len(blob), rows)
+        return rows
+
+    def _disk_put(self, key: str, blob: bytes) -> None:
+        path = self._disk_path(key)
+        if path is None:
+            return
+        try:  # atomic replace so concurrent readers never see partial files
+            fd, tmp = tempfile.mkstemp(dir=str(self.disk_dir), suffix=".tmp")
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(blob)
+            os.replace(tmp, path)
+        except OSError:  # pragma: no cover - disk tier is best effort
+            pass
+
+
+_DEFAULT_CACHE: Optional[ResultCache] = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def default_cache() -> Optional[ResultCache]:
+    """Process-wide cache from env (None unless BQ_CACHE=1)."""
+    global _DEFAULT_CACHE
+    if os.getenv("BQ_CACHE") != "1":
+        return None
+    with _DEFAULT_LOCK:
+        if _DEFAULT_CACHE is None:
+            _DEFAULT_CACHE = ResultCache.from_env()
+        return _DEFAULT_CACHE
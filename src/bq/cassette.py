@@ -0,0 +1,292 @@
+"""Record / replay BigQuery template calls ("cassettes").
+
+RecordingClient wraps any client and appends every ``run_sql_template`` /
+``run_script`` call to a JSON-lines cassette: template, params, rows (or
+per-statement results), the error if it failed, the client-observed
+latency and the job's bytes processed / billed when the wrapped client
+records telemetry. ReplayClient serves a cassette back without a network:
+
+    * calls match on (template, params); repeated identical calls replay
+      in recorded order and wrap around
+    * ``latency_scale=1.0`` sleeps the recorded latency per call (original
+      distribution), ``0.0`` replays instantly; other values scale it
+    * replayed calls are recorded in the telemetry registry, so
+      ``summary()`` percentiles compare directly with the recording run
+    * recorded errors are raised again as ReplayedError
+
+Environment (make_client):
+    BQ_RECORD=path         wrap the selected client in a RecordingClient
+    BQ_REPLAY=path         serve a cassette instead of any backend
+    BQ_REPLAY_LATENCY      latency scale for BQ_REPLAY (default 1.0)
+"""
+from __future__ import annotations
+import base64
+import datetime
+import decimal
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
+
+from .bigquery_client import (
+    BigQueryClientBase,
+    render_sql,
+    template_identifiers,
+)
+from .cache import make_key
+from .telemetry import JobMetrics, MetricsRegistry, default_registry
+
+CASSETTE_VERSION = 1
+
+Rows = List[Dict[str, Any]]
+
+
+class CassetteMiss(KeyError):
+    """ReplayClient has no recording for a call."""
+
+
+class ReplayedError(RuntimeError):
+    """A call that failed while recording, raised again on replay."""
+
+
+# -- value encoding -----------------------------------------------------
+# JSON with tagged objects for the non-JSON types BigQuery rows carry.
+def _encode(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {str(k): _encode(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_encode(v) for v in value]
+    if isinstance(value, datetime.datetime):
+        return {"$t": "datetime", "v": value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {"$t": "date", "v": value.isoformat()}
+    if isinstance(value, datetime.time):
+        return {"$t": "time", "v": value.isoformat()}
+    if isinstance(value, decimal.Decimal):
+        return {"$t": "decimal", "v": str(value)}
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return {"$t": "bytes", "v": base64.b64encode(bytes(value)).decode("ascii")}
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if hasattr(value, "tolist"):  # numpy scalars / arrays
+        return _encode(value.tolist())
+    return str(value)
+
+
+_DECODERS: Dict[str, Callable[[str], Any]] = {
+    "datetime": datetime.datetime.fromisoformat,
+    "date": datetime.date.fromisoformat,
+    "time": datetime.time.fromisoformat,
+    "decimal": decimal.Decimal,
+    "bytes": base64.b64decode,
+}
+
+
+def _decode(value: Any) -> Any:
+    if isinstance(value, list):
+        return [_decode(v) for v in value]
+    if isinstance(value, dict):
+        tag = value.get("$t")
+        if tag in _DECODERS and set(value) == {"$t", "v"}:
+            return _DECODERS[tag](value["v"])
+        return {k: _decode(v) for k, v in value.items()}
+    return value
+
+
+def call_key(kind: str, name: str, params: Dict[str, Any], sql: str = "") -> str:
+    """Match key for a call; raw SQL and scripts key on their text."""
+    text = params.get("raw_sql") or sql
+    return make_key(f"{kind}:{name}:{text}", params)
+
+
+def load_cassette(path: Union[str, Path]) -> List[Dict[str, Any]]:
+    """Decoded cassette entries in recorded order."""
+    entries: List[Dict[str, Any]] = []
+    with Path(path).open("r", encoding="utf-8") as fh:
+        for line in fh:
+            line = line.strip()
+            if line:
+                entries.append(_decode(json.loads(line)))
+    return entries
+
+
+# -- recording ----------------------------------------------------------
+class RecordingClient(BigQueryClientBase):
+    """Pass-through wrapper appending each call to a cassette file.
+
+    Attributes it does not wrap (render, identifiers, estimate, cache,
+    budget, ...) resolve on the inner client; ``run_script`` exists only
+    if the inner client has it, so ScriptBatch picks the same path.
+    ``start_query`` is hidden, so AsyncBigQueryClient runs jobs through
+    the recorded ``run_sql_template``; the iter / arrow readers come from
+    BigQueryClientBase and materialize through it as well.
+    """
+
+    def __init__(self, inner: BigQueryClientBase, path: Union[str, Path]) -> None:
+        self.inner = inner
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def __getattr__(self, attr: str) -> Any:
+        if attr in ("inner", "start_query"):  # not yet set (copy / unpickle); unrecorded
+            raise AttributeError(attr)
+        if attr == "run_script":
+            getattr(self.inner, "run_script")  # AttributeError if unsupported
+            return self._run_script
+        return getattr(self.inner, attr)
+
+    def run_sql_template(self, name: str, params: Dict[str, Any]) -> Rows:
+        return self._call(
+            "template", name, params, "", lambda: self.inner.run_sql_template(name, params)
+        )
+
+    def _run_script(
+        self, sql: str, params: Dict[str, Any], name: str = "_script.sql"
+    ) -> Rows:
+        return self._call(
+            "script", name, params, sql,
+            lambda: self.inner.run_script(sql, params, name=name),  # type: ignore[attr-defined]
+        )
+
+    def _call(
+        self, kind: str, name: str, params: Dict[str, Any], sql: str, fn: Callable[[], Rows]
+    ) -> Rows:
+        started = time.perf_counter()
+        wall = time.time()
+        try:
+            rows = fn()
+        except Exception as exc:
+            self._write(kind, name, params, sql, started, wall, None, exc)
+            raise
+        self._write(kind, name, params, sql, started, wall, rows, None)
+        return rows
+
+    def _write(
+        self,
+        kind: str,
+        name: str,
+        params: Dict[str, Any],
+        sql: str,
+        started: float,
+        wall: float,
+        rows: Optional[Rows],
+        error: Optional[BaseException],
+    ) -> None:
+        latency_ms = (time.perf_counter() - started) * 1000.0
+        job = self._job_metrics(name, wall)
+        entry = {
+            "v": CASSETTE_VERSION,
+            "kind": kind,
+            "template": name,
+            "key": call_key(kind, name, params, sql),
+            "params": params,
+            "rows": rows,
+            "error": (f"{type(error).__name__}: {error}" if error is not None else None),
+            "latency_ms": round(latency_ms, 3),
+            "bytes_processed": job.bytes_processed if job else 0,
+            "bytes_billed": job.bytes_billed if job else 0,
+            "cache_hit": bool(job.cache_hit) if job else False,
+        }
+        line = json.dumps(_encode(entry), sort_keys=True)
+        with self._lock:
+            with self.path.open("a", encoding="utf-8") as fh:
+                fh.write(line + "\n")
+
+    def _job_metrics(self, name: str, since: float) -> Optional[JobMetrics]:
+        registry = getattr(self.inner, "metrics", None)
+        if registry is None:
+            return None
+        records = [r for r in registry.records(name) if r.ts >= since]
+        return records[-1] if records else None
+
+
+# -- replay -------------------------------------------------------------
+class ReplayClient(BigQueryClientBase):
+    """Serves a cassette; no network, no backend."""
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        latency_scale: float = 1.0,
+        project: Optional[str] = None,
+        metrics: Optional[MetricsRegistry] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.path = Path(path)
+        self.latency_scale = max(0.0, float(latency_scale))
+        self.project = project
+        self.metrics = metrics if metrics is not None else default_registry()
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._entries: Dict[str, List[Dict[str, Any]]] = {}
+        self._cursor: Dict[str, int] = {}
+        for entry in load_cassette(self.path):
+            self._entries.setdefault(entry["key"], []).append(entry)
+
+    @classmethod
+    def from_env(cls, path: Union[str, Path]) -> "ReplayClient":
+        try:
+            scale = float(os.getenv("BQ_REPLAY_LATENCY", "1.0"))
+        except ValueError:
+            scale = 1.0
+        return cls(path, latency_scale=scale, project=os.getenv("BQ_PROJECT_ID"))
+
+    def __len__(self) -> int:
+        return sum(len(v) for v in self._entries.values())
+
+    def identifiers(self) -> Dict[str, str]:
+        return template_identifiers(self.project)
+
+    def render(self, name: str, params: Dict[str, Any]) -> str:
+        return render_sql(name, params, self.identifiers())
+
+    def run_sql_template(self, name: str, params: Dict[str, Any]) -> Rows:
+        return self._replay("template", name, params, "")
+
+    def run_script(
+        self, sql: str, params: Dict[str, Any], name: str = "_script.sql"
+    ) -> Rows:
+        return self._replay("script", name, params, sql)
+
+    def run_sql_template_iter(
+        self, name: str, params: Dict[str, Any], page_size: int = 1000
+    ) -> Iterator[Dict[str, Any]]:
+        return iter(self.run_sql_template(name, params))
+
+    def _next(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                return None
+            i = self._cursor.get(key, 0)
+            self._cursor[key] = (i + 1) % len(entries)
+            return entries[i]
+
+    def _replay(self, kind: str, name: str, params: Dict[str, Any], sql: str) -> Rows:
+        entry = self._next(call_key(kind, name, params, sql))
+        if entry is None:
+            raise CassetteMiss(f"{name}: no recorded {kind} call with these params")
+        latency_ms = float(entry.get("latency_ms") or 0.0) * self.latency_scale
+        started = time.perf_counter()
+        if latency_ms > 0:
+            self._sleep(latency_ms / 1000.0)
+        error = entry.get("error")
+        rows = entry.get("rows") or []
+        if self.metrics is not None:
+            self.metrics.record(
+                JobMetrics(
+                    template=name,
+                    latency_ms=(time.perf_counter() - started) * 1000.0,
+                    bytes_processed=int(entry.get("bytes_processed") or 0),
+                    bytes_billed=int(entry.get("bytes_billed") or 0),
+                    cache_hit=bool(entry.get("cache_hit")),
+                    rows=None if error else len(rows),
+                    error=error,
+                )
+            )
+        if error:
+            raise ReplayedError(error)
+        return [dict(r) for r in rows]
@@ -0,0 +1,226 @@
+"""Query-embedding cache keyed by (embedding model, normalized query text).
+
+Two tiers, like the result cache (cache.py):
+    * in-process LRU bounded by entry count
+    * optional SQLite file shared by every process pointed at it, evicted
+      least-recently-used past ``max_disk_entries``
+
+Search paths (retrieval/hybrid.py) look the query up first and run the
+``*_by_vec.sql`` templates on a hit, so ML.GENERATE_EMBEDDING runs once per
+distinct query text and model instead of inside every search. Misses are
+filled from the ``query_embedding`` column the embedding search templates
+return, so a miss still costs a single job.
+
+Vectors are stored as float32 (``array`` module; numpy not required).
+
+Environment:
+    BQ_EMBED_CACHE=0            disable the default cache
+    BQ_EMBED_CACHE_PATH         SQLite disk tier (unset = memory only)
+    BQ_EMBED_CACHE_MAX          memory tier entries (default 4096)
+    BQ_EMBED_CACHE_DISK_MAX     disk tier entries (default 200000)
+"""
+from __future__ import annotations
+from array import array
+from collections import OrderedDict
+import hashlib
+import os
+from pathlib import Path
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+DEFAULT_MAX_ENTRIES = 4096
+DEFAULT_MAX_DISK_ENTRIES = 200_000
+
+_WS_RE = re.compile(r"\s+")
+
+_DISK_DDL = """
+CREATE TABLE IF NOT EXISTS query_embeddings (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    vec BLOB NOT NULL,
+    used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS query_embeddings_used ON query_embeddings (used);
+"""
+
+
+def normalize_text(text: str) -> str:
+    """NFKC, trimmed, whitespace runs collapsed; case is kept (models see it)."""
+    return _WS_RE.sub(" ", unicodedata.normalize("NFKC", text or "")).strip()
+
+
+def cache_key(model: str, text: str) -> str:
+    payload = f"{model}\x00{normalize_text(text)}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+class EmbeddingCache:
+    """Entry-bounded LRU of query vectors with optional SQLite disk tier."""
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        path: Optional[str | Path] = None,
+        max_disk_entries: int = DEFAULT_MAX_DISK_ENTRIES,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.max_entries = max(0, int(max_entries))
+        self.max_disk_entries = max(1, int(max_disk_entries))
+        self.path = Path(path) if path else None
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._mem: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        self._disk_count = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(str(self.path), timeout=5.0, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(_DISK_DDL)
+            self._disk_count = db.execute("SELECT COUNT(*) FROM query_embeddings").fetchone()[0]
+            self._db = db
+
+    @classmethod
+    def from_env(cls) -> "EmbeddingCache":
+        return cls(
+            max_entries=_env_int("BQ_EMBED_CACHE_MAX", DEFAULT_MAX_ENTRIES),
+            path=os.getenv("BQ_EMBED_CACHE_PATH") or None,
+            max_disk_entries=_env_int("BQ_EMBED_CACHE_DISK_MAX", DEFAULT_MAX_DISK_ENTRIES),
+        )
+
+    def get(self, model: str, text: str) -> Optional[List[float]]:
+        key = cache_key(model, text)
+        with self._lock:
+            vec = self._mem.get(key)
+            if vec is not None:
+                self._mem.move_to_end(key)
+                self.hits += 1
+                return vec
+            vec = self._disk_get(key)
+            if vec is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._mem_put(key, vec)
+            return vec
+
+    def put(self, model: str, text: str, vec: Sequence[float]) -> None:
+        if not vec:
+            return
+        key = cache_key(model, text)
+        stored = list(array("f", vec))  # float32 round trip: same values from either tier
+        with self._lock:
+            self._mem_put(key, stored)
+            self._disk_put(key, model, stored)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mem.clear()
+            if self._db is not None:
+                with self._db:
+                    self._db.execute("DELETE FROM query_embeddings")
+                self._disk_count = 0
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def __len__(self) -> int:
+        return len(self._mem)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._mem),
+                "disk_entries": self._disk_count,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    # -- internals (lock held) ---------------------------------------------
+    def _mem_put(self, key: str, vec: List[float]) -> None:
+        if self.max_entries == 0:
+            return
+        self._mem[key] = vec
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_entries:
+            self._mem.popitem(last=False)
+            self.evictions += 1
+
+    def _disk_get(self, key: str) -> Optional[List[float]]:
+        if self._db is None:
+            return None
+        row = self._db.execute(
+            "SELECT vec FROM query_embeddings WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        with self._db:
+            self._db.execute(
+                "UPDATE query_embeddings SET used = ? WHERE key = ?", (self._clock(), key)
+            )
+        vec = array("f")
+        vec.frombytes(row[0])
+        return vec.tolist()
+
+    def _disk_put(self, key: str, model: str, vec: List[float]) -> None:
+        if self._db is None:
+            return
+        blob = array("f", vec).tobytes()
+        with self._db:
+            cur = self._db.execute(
+                "INSERT OR IGNORE INTO query_embeddings (key, model, vec, used) VALUES (?, ?, ?, ?)",
+                (key, model, blob, self._clock()),
+            )
+            self._disk_count += cur.rowcount
+            if self._disk_count > self.max_disk_entries:
+                # trim to 90% so eviction runs once per batch of inserts, not per put
+                drop = self._disk_count - int(self.max_disk_entries * 0.9)
+                cur = self._db.execute(
+                    "DELETE FROM query_embeddings WHERE key IN "
+                    "(SELECT key FROM query_embeddings ORDER BY used LIMIT ?)",
+                    (drop,),
+                )
+                self._disk_count -= cur.rowcount
+                self.evictions += cur.rowcount
+
+
+_DEFAULT: Optional[EmbeddingCache] = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def default_embedding_cache() -> Optional[EmbeddingCache]:
+    """Process-wide cache from env (None if BQ_EMBED_CACHE=0)."""
+    global _DEFAULT
+    if os.getenv("BQ_EMBED_CACHE", "1") == "0":
+        return None
+    with _DEFAULT_LOCK:
+        if _DEFAULT is None:
+            _DEFAULT = EmbeddingCache.from_env()
+        return _DEFAULT
+
+
+def set_default_embedding_cache(cache: Optional[EmbeddingCache]) -> None:
+    """Install (or reset to env-configured) the process-wide cache."""
+    global _DEFAULT
+    with _DEFAULT_LOCK:
+        _DEFAULT = cache
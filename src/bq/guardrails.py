@@ -0,0 +1,107 @@
+"""Per-template ``maximum_bytes_billed`` caps and dry-run preflight.
+
+Every job RealClient submits carries the cap for its template, so BigQuery
+rejects an over-budget query before it scans anything. Scan-heavy templates
+(the full self ``ML.VECTOR_SEARCH`` behind view_duplicate_chunks, neighbor
+builds, dashboard reads) get conservative defaults.
+
+Environment:
+    BQ_MAX_BYTES_BILLED      cap for templates without their own (unset = none)
+    BQ_TEMPLATE_MAX_BYTES    per-template overrides: "name=bytes,..." (0 = uncapped)
+    BQ_PREFLIGHT=1           dry-run each job first and fail before submitting
+"""
+from __future__ import annotations
+import os
+from typing import Dict, Optional
+
+GIB = 1024 ** 3
+
+DEFAULT_CAPS: Dict[str, int] = {
+    "_raw.sql": 10 * GIB,  # dashboard reads (view_duplicate_chunks runs a self vector search)
+    "views_duplicates.sql": 1 * GIB,  # DDL only; reads happen through _raw.sql
+    "views_by_severity.sql": 1 * GIB,
+    "views_common_issues.sql": 1 * GIB,
+    "build_chunk_neighbors.sql": 50 * GIB,
+    "embeddings_refresh.sql": 50 * GIB,
+    "export_chunk_embeddings.sql": 50 * GIB,
+    "chunks_emb_partition_refresh.sql": 50 * GIB,
+}
+
+
+class BytesBudgetExceeded(RuntimeError):
+    """A template's (estimated or billed) bytes exceed its cap."""
+
+    def __init__(self, name: str, cap: int, estimate: Optional[int] = None) -> None:
+        self.name = name
+        self.cap = cap
+        self.estimate = estimate
+        detail = f"estimated {format_bytes(estimate)}, " if estimate is not None else ""
+        super().__init__(
+            f"{name}: {detail}maximum_bytes_billed is {format_bytes(cap)}; "
+            f"raise it via BQ_TEMPLATE_MAX_BYTES={name}=<bytes>"
+        )
+
+
+def format_bytes(n: Optional[int]) -> str:
+    if n is None:
+        return "n/a"
+    size = float(n)
+    for unit in ("B", "KiB", "MiB", "GiB", "TiB"):
+        if size < 1024 or unit == "TiB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.2f} {unit}"
+        size /= 1024
+    return f"{n} B"  # pragma: no cover
+
+
+def _parse_caps(raw: str) -> Dict[str, int]:
+    out: Dict[str, int] = {}
+    for part in raw.split(","):
+        name, _, val = part.partition("=")
+        if not name.strip() or not val.strip():
+            continue
+        try:
+            out[name.strip()] = int(float(val))
+        except ValueError:
+            continue
+    return out
+
+
+class BytesBudget:
+    """Resolves the maximum_bytes_billed cap for a template."""
+
+    def __init__(
+        self,
+        caps: Optional[Dict[str, int]] = None,
+        default_cap: Optional[int] = None,
+        preflight: bool = False,
+    ) -> None:
+        self.caps = dict(DEFAULT_CAPS if caps is None else caps)
+        self.default_cap = default_cap
+        self.preflight = preflight
+
+    @classmethod
+    def from_env(cls) -> "BytesBudget":
+        caps = dict(DEFAULT_CAPS)
+        caps.update(_parse_caps(os.getenv("BQ_TEMPLATE_MAX_BYTES", "")))
+        try:
+            default_cap = int(float(os.getenv("BQ_MAX_BYTES_BILLED", "0"))) or None
+        except ValueError:
+            default_cap = None
+        return cls(caps=caps, default_cap=default_cap, preflight=os.getenv("BQ_PREFLIGHT") == "1")
+
+    def cap_for(self, name: str) -> Optional[int]:
+        """Cap in bytes, or None when the template is uncapped."""
+        cap = self.caps.get(name, self.default_cap)
+        return cap if cap and cap > 0 else None
+
+    def check(self, name: str, estimate: Optional[int]) -> None:
+        """Raise BytesBudgetExceeded when a dry-run estimate is over the cap."""
+        cap = self.cap_for(name)
+        if cap is not None and estimate is not None and estimate > cap:
+            raise BytesBudgetExceeded(name, cap, estimate)
+
+
+def is_bytes_limit_error(exc: BaseException) -> bool:
+    """True for BigQuery's bytesBilledLimitExceeded job failure."""
+    text = str(exc).lower()
+    return "bytesbilledlimitexceeded" in text or "limit for bytes billed" in text
@@ -0,0 +1,967 @@
+"""Offline SQL backend: runs the sql/ templates against SQLite.
+
+LocalClient renders templates exactly like RealClient (same registry,
+identifiers and @params), translates the BigQuery dialect to SQLite and
+executes it, so ingest, retrieval and graph expansion can be exercised
+(and timed) end to end without a project. Translation covers what the
+templates use:
+
+    `project.dataset.table`         -> "table" (one local dataset)
+    @name, IN UNNEST(@arr), UNNEST(x) alias, ARRAY_LENGTH
+                                    -> :name / json_each / json_array_length
+    JSON_VALUE, JSON_QUERY_ARRAY, PARSE_JSON, TO_JSON
+                                    -> SQLite JSON1
+    MERGE ... WHEN [NOT] MATCHED    -> UPDATE ... FROM + INSERT ... WHERE NOT EXISTS
+    CREATE OR REPLACE TABLE / VIEW  -> DROP + CREATE (PARTITION/CLUSTER/OPTIONS dropped)
+    ML.GENERATE_EMBEDDING           -> deterministic LocalEmbedder
+    ML.VECTOR_SEARCH                -> exact numpy search (src.bq.local_ml)
+    SEARCH(col, query)              -> token match in Python (LOG_ANALYZER-like)
+    CREATE / DROP SEARCH|VECTOR INDEX
+                                    -> no-op (SQLite scans)
+    ML.PREDICT                      -> LocalSqlError, so callers fall back the
+                                       way they do when the BQML model is missing
+
+Vectors are stored as float32 BLOBs. The search matrix of a table is
+loaded once and reloaded only after a statement writes to that table.
+``ML.VECTOR_SEARCH`` inside a view is not supported (the dashboard's
+view_duplicate_chunks).
+
+Environment:
+    BIGQUERY_LOCAL=1       make_client() returns a LocalClient
+    BQ_LOCAL_DB            SQLite file (default .cache/local_bq.sqlite3)
+    BQ_LOCAL_EMBED_DIM     local embedding width (default 256)
+"""
+from __future__ import annotations
+from dataclasses import dataclass, field
+import datetime
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .bigquery_client import BigQueryClientBase, render_sql, template_identifiers
+from .local_ml import DEFAULT_DIM, LocalEmbedder, VectorTable, from_blob, stack_vectors, to_blob
+from .script import ddl_target, forget_schema, split_statements
+from .telemetry import JobMetrics, MetricsRegistry, default_registry
+
+DEFAULT_DB = ".cache/local_bq.sqlite3"
+VECTOR_COLUMNS = frozenset(
+    {"embedding", "qvec", "query_embedding", "ml_generate_embedding_result"}
+)
+JSON_COLUMNS = frozenset({"meta"})
+
+# Tables the templates read but no template creates (notebook-provisioned in BigQuery).
+BOOTSTRAP_DDL = """
+CREATE TABLE IF NOT EXISTS `documents` (doc_id STRING, type STRING, uri STRING, meta JSON);
+CREATE TABLE IF NOT EXISTS `chunks` (chunk_id STRING, doc_id STRING, text STRING, meta JSON);
+CREATE TABLE IF NOT EXISTS `chunks_emb` (
+  chunk_id STRING, doc_id STRING, text STRING, meta JSON, embedding ARRAY<FLOAT64>
+);
+CREATE TABLE IF NOT EXISTS `demo_texts_emb` (id STRING, text STRING, embedding ARRAY<FLOAT64>);
+"""
+BOOTSTRAP_TEMPLATES = (
+    "chunk_neighbors_ddl.sql",
+    "ddl_tickets.sql",
+    "view_chunk_neighbors_ticket.sql",
+)
+# SQLite-only; BigQuery has no secondary indexes
+LOCAL_INDEXES = (
+    'CREATE INDEX IF NOT EXISTS "ix_chunks_chunk_id" ON "chunks" (chunk_id)',
+    'CREATE INDEX IF NOT EXISTS "ix_chunks_emb_chunk_id" ON "chunks_emb" (chunk_id)',
+    'CREATE INDEX IF NOT EXISTS "ix_chunk_neighbors_src" ON "chunk_neighbors" (src_chunk_id)',
+    'CREATE INDEX IF NOT EXISTS "ix_links_ticket" ON "ticket_chunk_links" (ticket_id)',
+)
+_CATALOG_DDL = (
+    'CREATE TABLE IF NOT EXISTS "_local_views" (name TEXT PRIMARY KEY, definition TEXT)',
+    """CREATE TEMP VIEW IF NOT EXISTS "INFORMATION_SCHEMA.TABLES" AS
+    SELECT name AS table_name,
+           CASE type WHEN 'view' THEN 'VIEW' ELSE 'BASE TABLE' END AS table_type
+    FROM sqlite_master
+    WHERE type IN ('table', 'view') AND name NOT LIKE 'sqlite%' AND name != '_local_views'""",
+    """CREATE TEMP VIEW IF NOT EXISTS "INFORMATION_SCHEMA.VIEWS" AS
+    SELECT name AS table_name, definition AS view_definition FROM "_local_views\"""",
+    # table metadata; last_modified_time is this connection's write counter
+    """CREATE TEMP VIEW IF NOT EXISTS "__TABLES__" AS
+    SELECT name AS table_id, NULL AS row_count, local_table_version(name) AS last_modified_time
+    FROM sqlite_master
+    WHERE type = 'table' AND name NOT LIKE 'sqlite%' AND name != '_local_views'""",
+    # no managed vector indexes locally: ML.VECTOR_SEARCH is always exact
+    """CREATE TEMP VIEW IF NOT EXISTS "INFORMATION_SCHEMA.VECTOR_INDEXES" AS
+    SELECT NULL AS index_name, NULL AS table_name, NULL AS index_status,
+           NULL AS coverage_percentage, NULL AS last_refresh_time,
+           NULL AS disable_reason, NULL AS ddl
+    WHERE 0""",
+)
+
+
+class LocalSqlError(RuntimeError):
+    """A statement the local backend cannot translate or execute."""
+
+
+# ---------------------------------------------------------------------------
+# translation
+# ---------------------------------------------------------------------------
+
+_MARK_RE = re.compile("\x00(\\d+)\x00")
+_ALIAS_STOP = frozenset(
+    "WHERE JOIN ON LEFT RIGHT INNER CROSS FULL OUTER GROUP ORDER LIMIT UNION WITH "
+    "SELECT FROM HAVING WINDOW QUALIFY USING".split()
+)
+_WITH_OFFSET_RE = re.compile(r"\s+WITH\s+OFFSET(?:\s+(?:AS\s+)?(\w+))?", re.IGNORECASE)
+_WRITE_RE = re.compile(
+    r"^\s*(?:INSERT\s+(?:OR\s+\w+\s+)?INTO|UPDATE|DELETE\s+FROM|DELETE|"
+    r"CREATE\s+(?:TEMP\w*\s+)?TABLE(?:\s+IF\s+NOT\s+EXISTS)?|"
+    r"DROP\s+TABLE(?:\s+IF\s+EXISTS)?)\s+(?:\"((?:[^\"]|\"\")+)\"|(\w+))",
+    re.IGNORECASE,
+)
+_SIMPLE_REWRITES: Tuple[Tuple[str, str], ...] = (
+    (r"\bSAFE\.", ""),
+    (r"\b(?:JSON_VALUE|JSON_EXTRACT_SCALAR|JSON_QUERY_ARRAY|JSON_QUERY|JSON_EXTRACT)\s*\(",
+     "json_extract("),
+    (r"\b(?:PARSE_JSON|TO_JSON_STRING|TO_JSON)\s*\(", "json("),
+    (r"\bARRAY_LENGTH\s*\(", "json_array_length("),
+    (r"\bSTRING_AGG\s*\(", "group_concat("),
+    (r"\bLEAST\s*\(", "MIN("),
+    (r"\bGREATEST\s*\(", "MAX("),
+    (r"\bCURRENT_TIMESTAMP\s*\(\s*\)", "CURRENT_TIMESTAMP"),
+    (r"\bARRAY\s*<[^>]*>+", "TEXT"),
+    (r"\bSTRING\b", "TEXT"),
+    (r"\bINT64\b", "INTEGER"),
+    (r"\bFLOAT64\b", "REAL"),
+    (r"\bBOOL(?:EAN)?\b", "INTEGER"),
+    (r"\b(?:JSON|TIMESTAMP)\b(?!\s*\()", "TEXT"),
+    (r"/", " * 1.0 / "),  # BigQuery '/' is always float division
+    (r"\b(\w+)\.base\.(\w+)", r"\1.\2"),  # ML.VECTOR_SEARCH output structs
+    (r"\b(\w+)\.query\.(\w+)", r"\1.query_\2"),
+    (r"(?<![@\w])@(\w+)", r":\1"),
+)
+_COMPILED_REWRITES = tuple((re.compile(p, re.IGNORECASE), r) for p, r in _SIMPLE_REWRITES)
+
+
+@dataclass
+class VectorSearchCall:
+    """One ML.VECTOR_SEARCH(...) replaced by a temp table at execution time."""
+
+    temp_name: str
+    base_table: str
+    query_sql: str
+    top_k: str  # literal or :param
+    distance_type: str = "COSINE"
+    column: str = "embedding"
+    query_column: Optional[str] = None
+
+
+@dataclass
+class MergeSpec:
+    target: str
+    target_alias: str
+    source_sql: str
+    source_alias: str
+    condition: str
+    update_sets: Optional[str] = None
+    insert_cols: Optional[str] = None
+    insert_vals: Optional[str] = None
+
+
+@dataclass
+class LocalStatement:
+    """A BigQuery statement translated to SQLite."""
+
+    statement_type: str
+    sql: str
+    pre: List[str] = field(default_factory=list)
+    searches: List[VectorSearchCall] = field(default_factory=list)
+    merge: Optional[MergeSpec] = None
+    target: Optional[str] = None
+    view: Optional[Tuple[str, str]] = None  # (name, BigQuery view query)
+
+
+def _sqlite_ident(name: str) -> str:
+    parts = name.split(".")
+    local = ".".join(parts[2:]) if len(parts) >= 3 else parts[-1]
+    return '"' + local.replace('"', '""') + '"'
+
+
+def _decode_string(body: str, raw: bool) -> str:
+    if raw:
+        return body
+    out: List[str] = []
+    i = 0
+    escapes = {"n": "\n", "t": "\t", "r": "\r", "0": "\0"}
+    while i < len(body):
+        ch = body[i]
+        if ch == "\\" and i + 1 < len(body):
+            nxt = body[i + 1]
+            out.append(escapes.get(nxt, nxt))
+            i += 2
+            continue
+        out.append(ch)
+        i += 1
+    return "".join(out)
+
+
+class _Masked:
+    """SQL with comments removed and literals / quoted names replaced by marks.
+
+    Rewrites then only ever see SQL structure; ``unmask`` restores each mark
+    as a SQLite string literal or double-quoted identifier.
+    """
+
+    def __init__(self, sql: str) -> None:
+        self.sqlite: List[str] = []  # mark -> SQLite text
+        self.values: List[str] = []  # mark -> decoded string / identifier
+        self.text = self._scan(sql)
+
+    def _mark(self, sqlite_text: str, value: str) -> str:
+        self.sqlite.append(sqlite_text)
+        self.values.append(value)
+        return f"\x00{len(self.sqlite) - 1}\x00"
+
+    def _scan(self, sql: str) -> str:
+        out: List[str] = []
+        i, n = 0, len(sql)
+        while i < n:
+            ch = sql[i]
+            if sql.startswith("--", i) or ch == "#":
+                end = sql.find("\n", i)
+                i = n if end == -1 else end
+                continue
+            if sql.startswith("/*", i):
+                end = sql.find("*/", i + 2)
+                i = n if end == -1 else end + 2
+                out.append(" ")
+                continue
+            if ch == "`":
+                end = sql.find("`", i + 1)
+                if end == -1:
+                    raise LocalSqlError("unterminated backtick identifier")
+                name = sql[i + 1:end]
+                out.append(self._mark(_sqlite_ident(name), name))
+                i = end + 1
+                continue
+            if ch in ("'", '"'):
+                raw = bool(out) and out[-1] in ("r", "R") and (
+                    len(out) < 2 or not (out[-2].isalnum() or out[-2] == "_")
+                )
+                if raw:
+                    out.pop()
+                quote = sql[i:i + 3] if sql.startswith(ch * 3, i) else ch
+                j = i + len(quote)
+                while j < n and not sql.startswith(quote, j):
+                    j += 2 if sql[j] == "\\" and not raw else 1
+                if j >= n:
+                    raise LocalSqlError("unterminated string literal")
+                value = _decode_string(sql[i + len(quote):j], raw)
+                out.append(self._mark("'" + value.replace("'", "''") + "'", value))
+                i = j + len(quote)
+                continue
+            out.append(ch)
+            i += 1
+        return "".join(out)
+
+    def unmask(self, text: str) -> str:
+        return _MARK_RE.sub(lambda m: self.sqlite[int(m.group(1))], text)
+
+    def value(self, token: str) -> Optional[str]:
+        m = _MARK_RE.fullmatch(token.strip())
+        return self.values[int(m.group(1))] if m else None
+
+
+def _close_paren(text: str, open_idx: int) -> int:
+    depth = 0
+    for i in range(open_idx, len(text)):
+        if text[i] == "(":
+            depth += 1
+        elif text[i] == ")":
+            depth -= 1
+            if depth == 0:
+                return i
+    raise LocalSqlError("unbalanced parentheses")
+
+
+def _split_args(inner: str) -> List[str]:
+    args: List[str] = []
+    depth, start = 0, 0
+    for i, ch in enumerate(inner):
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == "," and depth == 0:
+            args.append(inner[start:i].strip())
+            start = i + 1
+    tail = inner[start:].strip()
+    if tail:
+        args.append(tail)
+    return args
+
+
+def _top_level(text: str, pattern: str, start: int = 0) -> Optional[re.Match]:
+    """First match of ``pattern`` at paren depth 0 (relative to ``start``)."""
+    rx = re.compile(pattern, re.IGNORECASE)
+    depth = 0
+    i = start
+    while i < len(text):
+        ch = text[i]
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif depth == 0:
+            m = rx.match(text, i)
+            if m and (i == 0 or not (text[i - 1].isalnum() or text[i - 1] == "_")):
+                return m
+        i += 1
+    return None
+
+
+RewriteFn = Callable[[str, re.Match, str, int], Tuple[str, int]]
+
+
+def _rewrite_calls(text: str, pattern: str, fn: RewriteFn) -> str:
+    """Replace every ``NAME(...)`` call, innermost / rightmost first.
+
+    ``pattern`` must end at the opening paren; ``fn(text, match, inner,
+    close_idx)`` returns (replacement, end index of the replaced span).
+    """
+    rx = re.compile(pattern, re.IGNORECASE)
+    while True:
+        matches = list(rx.finditer(text))
+        if not matches:
+            return text
+        m = matches[-1]
+        close = _close_paren(text, m.end() - 1)
+        replacement, end = fn(text, m, text[m.end():close], close)
+        text = text[:m.start()] + replacement + text[end:]
+
+
+def _embedding_call(text: str, m: re.Match, inner: str, close: int) -> Tuple[str, int]:
+    args = _split_args(inner)
+    if len(args) < 2 or not re.match(r"MODEL\b", args[0], re.IGNORECASE):
+        raise LocalSqlError("ML.GENERATE_EMBEDDING needs MODEL and an input")
+    source = args[1]
+    table = re.match(r"TABLE\s+(\S+)$", source, re.IGNORECASE)
+    if table or source.startswith("("):
+        # table-valued form: input columns + ml_generate_embedding_result
+        rel = table.group(1) if table else source
+        repl = (
+            "(SELECT _g.*, ml_generate_embedding(_g.content) AS ml_generate_embedding_result "
+            f"FROM {rel} AS _g)"
+        )
+        return repl, close + 1
+    expr = re.sub(r"^\w+\s*=>\s*", "", source)
+    expr = re.sub(r"\s+AS\s+\w+$", "", expr, flags=re.IGNORECASE)
+    return f"ml_generate_embedding({expr})", close + 1
+
+
+def _in_unnest(text: str, m: re.Match, inner: str, close: int) -> Tuple[str, int]:
+    return f"IN (SELECT value FROM json_each({inner}))", close + 1
+
+
+def _unnest(text: str, m: re.Match, inner: str, close: int) -> Tuple[str, int]:
+    alias = re.compile(r"\s+(?:AS\s+)?(\w+)", re.IGNORECASE).match(text, close + 1)
+    if alias and alias.group(1).upper() not in _ALIAS_STOP:
+        name = alias.group(1)
+        offset = _WITH_OFFSET_RE.match(text, alias.end())
+        if offset:  # json_each key is the 0-based array position
+            pos = offset.group(1) or "offset"
+            return (
+                f"(SELECT value AS {name}, key AS {pos} FROM json_each({inner})) AS {name}",
+                offset.end(),
+            )
+        return f"(SELECT value AS {name} FROM json_each({inner})) AS {name}", alias.end()
+    return f"(SELECT value FROM json_each({inner}))", close + 1
+
+
+def _array_subquery(text: str, m: re.Match, inner: str, close: int) -> Tuple[str, int]:
+    body = inner.strip()
+    sel = re.match(r"SELECT\s+", body, re.IGNORECASE)
+    frm = _top_level(body, r"FROM\b", sel.end()) if sel else None
+    if sel is None or frm is None:
+        raise LocalSqlError("ARRAY(...) needs a SELECT ... FROM subquery")
+    expr = body[sel.end():frm.start()].strip()
+    return f"(SELECT json_group_array({expr}) {body[frm.start():]})", close + 1
+
+
+def _leading_ctes(text: str) -> List[Tuple[int, int]]:
+    """(start, end) of each CTE in a statement's leading WITH clause."""
+    m = re.match(r"\s*WITH\s+(?:RECURSIVE\s+)?", text, re.IGNORECASE)
+    if not m:
+        return []
+    ctes: List[Tuple[int, int]] = []
+    pos = m.end()
+    head = re.compile(r"\s*(?:\w+|\x00\d+\x00)\s+AS\s*\(", re.IGNORECASE)
+    while True:
+        h = head.match(text, pos)
+        if not h:
+            break
+        close = _close_paren(text, h.end() - 1)
+        ctes.append((h.start(), close + 1))
+        pos = close + 1
+        comma = re.compile(r"\s*,").match(text, pos)
+        if not comma:
+            break
+        pos = comma.end()
+    return ctes
+
+
+class _Translator:
+    def __init__(self, sql: str) -> None:
+        self.masked = _Masked(sql)
+        self.searches: List[VectorSearchCall] = []
+
+    def rewrite(self, text: str) -> str:
+        if re.search(r"\bML\.PREDICT\s*\(", text, re.IGNORECASE):
+            raise LocalSqlError("ML.PREDICT (BQML models) is not available locally")
+        text = self._vector_searches(text)
+        text = _rewrite_calls(text, r"\bML\.GENERATE_EMBEDDING\s*\(", _embedding_call)
+        text = _rewrite_calls(text, r"\bIN\s+UNNEST\s*\(", _in_unnest)
+        text = _rewrite_calls(text, r"\bUNNEST\s*\(", _unnest)
+        text = _rewrite_calls(text, r"\bARRAY\s*\((?=\s*SELECT\b)", _array_subquery)
+        for rx, repl in _COMPILED_REWRITES:
+            text = rx.sub(repl, text)
+        return text
+
+    def _vector_searches(self, text: str) -> str:
+        rx = re.compile(r"\bML\.VECTOR_SEARCH\s*\(", re.IGNORECASE)
+        calls = list(rx.finditer(text))
+        if not calls:
+            return text
+        ctes = _leading_ctes(text)
+        spans: List[Tuple[int, int, str]] = []
+        for m in calls:
+            close = _close_paren(text, m.end() - 1)
+            args = _split_args(text[m.end():close])
+            if len(args) < 2:
+                raise LocalSqlError("ML.VECTOR_SEARCH needs a base table and a query")
+            base = re.match(r"TABLE\s+(\S+)$", args[0], re.IGNORECASE)
+            if not base:
+                raise LocalSqlError("ML.VECTOR_SEARCH base must be TABLE <name>")
+            query = args[1]
+            q_table = re.match(r"TABLE\s+(\S+)$", query, re.IGNORECASE)
+            rel = q_table.group(1) if q_table else query
+            # only CTEs defined before the one holding this call are visible
+            visible = [c for c in ctes if c[1] <= m.start()]
+            prefix = ""
+            if visible:
+                prefix = "WITH " + text[visible[0][0]:visible[-1][1]].strip() + " "
+            query_sql = f"{prefix}SELECT * FROM {rel} AS _q"
+            if rx.search(query_sql):
+                raise LocalSqlError("nested ML.VECTOR_SEARCH is not supported locally")
+            call = VectorSearchCall(
+                temp_name=f"_vs_{len(self.searches)}",
+                base_table=self.masked.unmask(base.group(1)),
+                query_sql=query_sql,
+                top_k="10",
+            )
+            for opt in args[2:]:
+                o = re.match(r"(\w+)\s*=>\s*(.+)$", opt, re.DOTALL)
+                if not o:
+                    continue
+                key, val = o.group(1).lower(), o.group(2).strip()
+                literal = self.masked.value(val)
+                if key == "top_k":
+                    call.top_k = re.sub(r"^@", ":", val)
+                elif key == "distance_type" and literal:
+                    call.distance_type = literal.upper()
+                elif key == "column_to_search" and literal:
+                    call.column = literal
+                elif key == "query_column_to_search" and literal:
+                    call.query_column = literal
+            self.searches.append(call)
+            spans.append((m.start(), close + 1, call.temp_name))
+        for start, end, name in reversed(spans):
+            text = text[:start] + f"\x01{name}\x01" + text[end:]
+        return text
+
+    def finish(self, text: str) -> str:
+        sql = self.masked.unmask(text)
+        for call in self.searches:
+            call.query_sql = self.masked.unmask(self.rewrite_fragment(call.query_sql))
+        return sql
+
+    def rewrite_fragment(self, text: str) -> str:
+        saved, self.searches = self.searches, []
+        try:
+            return self.rewrite(text)
+        finally:
+            self.searches = saved
+
+
+def _statement_type(text: str) -> str:
+    words = re.findall(r"[A-Za-z_]+", text[:200].upper())
+    if not words:
+        return "SELECT"
+    head = words[0]
+    if head in ("SELECT", "WITH", "VALUES"):
+        return "SELECT"
+    if head == "CREATE":
+        kind = next((w for w in words[1:6] if w in ("TABLE", "VIEW", "INDEX")), "TABLE")
+        if kind == "TABLE" and re.search(r"\)\s*AS\s+(SELECT|WITH)\b|\bAS\s+(SELECT|WITH)\b",
+                                         text, re.IGNORECASE):
+            return "CREATE_TABLE_AS_SELECT"
+        return f"CREATE_{kind}"
+    if head == "DROP":
+        return f"DROP_{words[1] if len(words) > 1 else 'TABLE'}"
+    return head
+
+
+def translate(sql: str) -> LocalStatement:
+    """Translate one rendered BigQuery statement to SQLite."""
+    tr = _Translator(sql)
+    text = tr.masked.text.strip().rstrip(";").strip()
+    stype = _statement_type(text)
+    if stype == "MERGE":
+        return LocalStatement("MERGE", "", merge=_merge_spec(tr, text))
+    if re.match(
+        r"(?:CREATE\s+(?:OR\s+REPLACE\s+)?|DROP\s+)(?:SEARCH|VECTOR)\s+INDEX\b", text, re.IGNORECASE
+    ):
+        return LocalStatement(stype, "")  # managed BigQuery indexes; nothing to build
+    pre: List[str] = []
+    view: Optional[Tuple[str, str]] = None
+    create = re.match(
+        r"CREATE\s+(OR\s+REPLACE\s+)?(TEMP\w*\s+)?(TABLE|VIEW)\s+(IF\s+NOT\s+EXISTS\s+)?(\S+)",
+        text,
+        re.IGNORECASE,
+    )
+    if create:
+        or_replace, temp, kind, _, name = create.groups()
+        sqlite_name = tr.masked.unmask(name)
+        if or_replace:
+            pre.append(f"DROP {kind.upper()} IF EXISTS {sqlite_name}")
+            text = text[:create.start(1)] + text[create.end(1):]
+        if kind.upper() == "TABLE":
+            cut = _top_level(text, r"(?:PARTITION\s+BY|CLUSTER\s+BY|OPTIONS\s*\()")
+            if cut is not None:
+                text = text[:cut.start()].rstrip()
+        else:
+            if re.search(r"\bML\.VECTOR_SEARCH\s*\(", text, re.IGNORECASE):
+                raise LocalSqlError("ML.VECTOR_SEARCH inside a view is not supported locally")
+            target = ddl_target(sql)
+            view = (sqlite_name.strip('"'), target.view_query if target else "")
+            text = re.sub(r"\bOPTIONS\s*\([^)]*\)\s*(?=AS\b)", "", text, flags=re.IGNORECASE)
+    text = tr.rewrite(text)
+    out = tr.finish(text)
+    for call in tr.searches:
+        out = out.replace(f"\x01{call.temp_name}\x01", _search_relation(call))
+    w = _WRITE_RE.match(out)
+    target_name = (w.group(1) or w.group(2)).replace('""', '"') if w else None
+    return LocalStatement(stype, out, pre, tr.searches, target=target_name, view=view)
+
+
+def _search_relation(call: VectorSearchCall) -> str:
+    return (
+        f'(SELECT _b.*, _v.* FROM temp."{call.temp_name}" AS _v '
+        f"JOIN {call.base_table} AS _b ON _b.rowid = _v._base_rowid)"
+    )
+
+
+def _merge_spec(tr: _Translator, text: str) -> MergeSpec:
+    head = re.match(r"MERGE\s+(?:INTO\s+)?(\S+)\s+(?:AS\s+)?(\w+)\s+USING\s+", text, re.IGNORECASE)
+    if not head:
+        raise LocalSqlError("unsupported MERGE form")
+    pos = head.end()
+    if text[pos] == "(":
+        close = _close_paren(text, pos)
+        source = text[pos:close + 1]
+        pos = close + 1
+    else:
+        src = re.compile(r"(\S+)").match(text, pos)
+        source = src.group(1)
+        pos = src.end()
+    rest = re.compile(r"\s*(?:AS\s+)?(\w+)\s+ON\s+(.*?)\s+(WHEN\b.*)$", re.IGNORECASE | re.DOTALL)
+    m = rest.match(text, pos)
+    if not m:
+        raise LocalSqlError("unsupported MERGE form")
+    spec = MergeSpec(
+        target=tr.masked.unmask(head.group(1)),
+        target_alias=head.group(2),
+        source_sql=tr.masked.unmask(tr.rewrite(f"SELECT * FROM {source} AS _src")),
+        source_alias=m.group(1),
+        condition=tr.masked.unmask(tr.rewrite(m.group(2))),
+    )
+    clauses = re.split(r"\bWHEN\s+(?=(?:NOT\s+)?MATCHED\b)", m.group(3), flags=re.IGNORECASE)
+    for clause in filter(None, (c.strip() for c in clauses)):
+        upd = re.match(r"MATCHED\s+THEN\s+UPDATE\s+SET\s+(.*)$", clause, re.IGNORECASE | re.DOTALL)
+        ins = re.match(
+            r"NOT\s+MATCHED(?:\s+BY\s+TARGET)?\s+THEN\s+INSERT\s*\((.*?)\)\s*VALUES\s*\((.*)\)$",
+            clause,
+            re.IGNORECASE | re.DOTALL,
+        )
+        if upd:
+            spec.update_sets = tr.masked.unmask(tr.rewrite(upd.group(1)))
+        elif ins:
+            spec.insert_cols = tr.masked.unmask(ins.group(1))
+            spec.insert_vals = tr.masked.unmask(tr.rewrite(ins.group(2)))
+        else:
+            raise LocalSqlError(f"unsupported MERGE clause: WHEN {clause[:40]}")
+    return spec
+
+
+# ---------------------------------------------------------------------------
+# SQLite functions BigQuery has and SQLite lacks
+# ---------------------------------------------------------------------------
+
+
+def _concat(*args: Any) -> Optional[str]:
+    return None if any(a is None for a in args) else "".join(str(a) for a in args)
+
+
+def _regexp_contains(value: Any, pattern: str) -> Optional[int]:
+    return None if value is None else int(re.search(pattern, str(value)) is not None)
+
+
+def _regexp_replace(value: Any, pattern: str, repl: str) -> Optional[str]:
+    if value is None:
+        return None
+    return re.sub(pattern, re.sub(r"\\(\d)", r"\\g<\1>", repl), str(value))
+
+
+_SEARCH_MAJOR_RE = re.compile(r"[^\w.:/@\-$%\\]+")
+_SEARCH_MINOR_RE = re.compile(r"[.:/@\-$%\\_]+")
+
+
+def _search_tokens(text: str) -> List[str]:
+    """LOG_ANALYZER-style tokens: whole tokens plus their minor-delimiter parts."""
+    out: List[str] = []
+    for major in _SEARCH_MAJOR_RE.split(text.lower()):
+        major = major.strip(".:/@-$%\\")
+        if major:
+            out.append(major)
+            out.extend(p for p in _SEARCH_MINOR_RE.split(major) if p and p != major)
+    return out
+
+
+def _search(value: Any, query: Any) -> Optional[int]:
+    """BigQuery SEARCH(): every query term occurs; `quoted` terms as a whole token."""
+    if value is None or query is None:
+        return None
+    tokens = set(_search_tokens(str(value)))
+    quoted = re.findall(r"`([^`]*)`", str(query))
+    terms = [t.lower() for t in quoted if t]
+    terms += _search_tokens(re.sub(r"`[^`]*`", " ", str(query)))
+    return int(bool(terms) and all(t in tokens for t in terms))
+
+
+def _array_to_string(arr: Any, sep: str) -> Optional[str]:
+    if arr is None:
+        return None
+    items = json.loads(arr) if isinstance(arr, str) else arr
+    return sep.join(str(x) for x in items if x is not None)
+
+
+def _format_timestamp(fmt: str, ts: Any) -> Optional[str]:
+    if ts is None:
+        return None
+    try:
+        parsed = datetime.datetime.fromisoformat(str(ts).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed.strftime(fmt.replace("%E*S", "%S"))
+
+
+def _bind(value: Any) -> Any:
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if hasattr(value, "tolist") and not isinstance(value, (bytes, str)):
+        value = value.tolist()
+    if isinstance(value, (list, tuple, dict)):
+        return json.dumps(value, default=str)
+    return value
+
+
+def _store(column: str, value: Any) -> Any:
+    """Python value -> stored column value (vectors become float32 BLOBs)."""
+    if column in VECTOR_COLUMNS and value is not None and not isinstance(value, (bytes, str)):
+        return to_blob(value)
+    return _bind(value)
+
+
+def _load(column: str, value: Any) -> Any:
+    """Stored column value -> the Python shape RealClient rows carry."""
+    if isinstance(value, bytes) and column in VECTOR_COLUMNS:
+        return from_blob(value)
+    if isinstance(value, str) and column in JSON_COLUMNS and value[:1] in ("{", "["):
+        try:
+            return json.loads(value)
+        except ValueError:
+            return value
+    return value
+
+
+# ---------------------------------------------------------------------------
+# client
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class LocalClient(BigQueryClientBase):
+    """SQLite-backed client running the real sql/ templates offline."""
+
+    db_path: str = ":memory:"
+    project: Optional[str] = None
+    embedder: LocalEmbedder = field(default_factory=LocalEmbedder)
+    metrics: Optional[MetricsRegistry] = field(default_factory=default_registry)
+
+    def __post_init__(self) -> None:
+        if self.db_path != ":memory:":
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            self.db_path, isolation_level=None, check_same_thread=False
+        )
+        self._lock = threading.RLock()
+        self._versions: Dict[str, int] = {}
+        self._vectors: Dict[Tuple[str, str], Tuple[int, VectorTable]] = {}
+        conn = self._conn
+        if self.db_path != ":memory:":
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        embed = self.embedder
+
+        def _embed_fn(text: Any) -> Optional[bytes]:
+            return None if text is None else to_blob(embed.embed(str(text)))
+
+        conn.create_function("ml_generate_embedding", 1, _embed_fn, deterministic=True)
+        conn.create_function("concat", -1, _concat, deterministic=True)
+        conn.create_function("regexp_contains", 2, _regexp_contains, deterministic=True)
+        conn.create_function("regexp_replace", 3, _regexp_replace, deterministic=True)
+        conn.create_function("array_to_string", 2, _array_to_string, deterministic=True)
+        conn.create_function("format_timestamp", 2, _format_timestamp, deterministic=True)
+        conn.create_function("search", 2, _search, deterministic=True)
+        conn.create_function("local_table_version", 1, lambda t: self._versions.get(t, 0))
+        for ddl in _CATALOG_DDL:
+            conn.execute(ddl)
+        # ScriptBatch's INFORMATION_SCHEMA snapshot may describe another database
+        ids = self.identifiers()
+        forget_schema(f"{ids['PROJECT_ID']}.{ids['DATASET']}")
+
+    @classmethod
+    def from_env(cls) -> "LocalClient":
+        try:
+            dim = int(os.getenv("BQ_LOCAL_EMBED_DIM", str(DEFAULT_DIM)))
+        except ValueError:
+            dim = DEFAULT_DIM
+        return cls(
+            db_path=os.getenv("BQ_LOCAL_DB", DEFAULT_DB),
+            project=os.getenv("BQ_PROJECT_ID"),
+            embedder=LocalEmbedder(dim=max(8, dim)),
+        )
+
+    # -- templates ------------------------------------------------------
+    def identifiers(self) -> Dict[str, str]:
+        return template_identifiers(self.project)
+
+    def embedding_model(self) -> Optional[str]:
+        # the hashing embedder, not ${EMBED_MODEL}: vectors differ from BigQuery's
+        return f"local-hash:{self.embedder.dim}:{self.embedder.bigram_weight:g}"
+
+    def render(self, name: str, params: Dict[str, Any]) -> str:
+        return render_sql(name, params, self.identifiers())
+
+    def ensure_schema(self) -> None:
+        """Create the tables / views the templates expect (idempotent)."""
+        self.run_script(BOOTSTRAP_DDL, {}, name="_bootstrap.sql")
+        for name in BOOTSTRAP_TEMPLATES:
+            self.run_script(self.render(name, {}), {}, name=name)
+        with self._lock:
+            for ddl in LOCAL_INDEXES:
+                self._conn.execute(ddl)
+
+    # -- execution ------------------------------------------------------
+    def run_sql_template(
+        self, name: str, params: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        """Run every statement of the template; rows of the last one."""
+        results = self.run_script(self.render(name, params), params, name=name)
+        return results[-1]["rows"] if results else []
+
+    def run_script(
+        self, sql: str, params: Dict[str, Any], name: str = "_script.sql"
+    ) -> List[Dict[str, Any]]:
+        """Per-statement summaries in RealClient.run_script's shape."""
+        started = time.perf_counter()
+        out: List[Dict[str, Any]] = []
+        try:
+            with self._lock:
+                for statement in split_statements(sql):
+                    out.append(self._execute(statement, params))
+        except Exception as exc:
+            self._record(name, started, error=exc)
+            if isinstance(exc, LocalSqlError):
+                raise
+            raise LocalSqlError(f"{name}: {exc}") from exc
+        self._record(name, started, rows=len(out[-1]["rows"]) if out else 0)
+        return out
+
+    def insert_rows(self, table: str, rows: List[Dict[str, Any]]) -> int:
+        """Bulk insert (one transaction); vector columns stored as BLOBs."""
+        if not rows:
+            return 0
+        cols = list(rows[0])
+        sql = 'INSERT INTO {t} ({c}) VALUES ({v})'.format(
+            t=_sqlite_ident(table),
+            c=", ".join(_sqlite_ident(c) for c in cols),
+            v=", ".join("?" for _ in cols),
+        )
+        values = [tuple(_store(c, r.get(c)) for c in cols) for r in rows]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(sql, values)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._touch(table.split(".")[-1])
+        return len(values)
+
+    def _execute(self, statement: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        stmt = translate(statement)
+        bound = {k: _bind(v) for k, v in params.items() if not k.isupper() and k != "raw_sql"}
+        summary: Dict[str, Any] = {
+            "job_id": None,
+            "statement_type": stmt.statement_type,
+            "rows": [],
+            "inserted": 0,
+            "updated": 0,
+            "deleted": 0,
+        }
+        conn = self._conn
+        if stmt.merge is not None:
+            summary.update(self._merge(stmt.merge, bound))
+            return summary
+        for sql in stmt.pre:
+            conn.execute(sql)
+        temps = [self._materialize_search(call, bound) for call in stmt.searches]
+        try:
+            cur = conn.execute(stmt.sql, _used(stmt.sql, bound))
+            if cur.description is not None:
+                cols = [d[0] for d in cur.description]
+                summary["rows"] = [
+                    {c: _load(c, v) for c, v in zip(cols, row)} for row in cur.fetchall()
+                ]
+            elif cur.rowcount and cur.rowcount > 0:
+                key = {"UPDATE": "updated", "DELETE": "deleted"}.get(stmt.statement_type)
+                summary[key or "inserted"] = cur.rowcount
+        finally:
+            for temp in temps:
+                conn.execute(f'DROP TABLE IF EXISTS temp."{temp}"')
+        if stmt.target:
+            self._touch(stmt.target)
+        if stmt.view is not None:
+            conn.execute(
+                'INSERT OR REPLACE INTO "_local_views" (name, definition) VALUES (?, ?)',
+                stmt.view,
+            )
+        return summary
+
+    def _merge(self, spec: MergeSpec, bound: Dict[str, Any]) -> Dict[str, int]:
+        conn = self._conn
+        conn.execute('DROP TABLE IF EXISTS temp."_merge_src"')
+        conn.execute(
+            f'CREATE TEMP TABLE "_merge_src" AS {spec.source_sql}',
+            _used(spec.source_sql, bound),
+        )
+        src = f'temp."_merge_src" AS {spec.source_alias}'
+        tgt = f"{spec.target} AS {spec.target_alias}"
+        updated = inserted = 0
+        try:
+            conn.execute("BEGIN")
+            if spec.update_sets:
+                sql = f"UPDATE {tgt} SET {spec.update_sets} FROM {src} WHERE {spec.condition}"
+                updated = conn.execute(sql, _used(sql, bound)).rowcount
+            if spec.insert_cols is not None:
+                sql = (
+                    f"INSERT INTO {spec.target} ({spec.insert_cols}) "
+                    f"SELECT {spec.insert_vals} FROM {src} "
+                    f"WHERE NOT EXISTS (SELECT 1 FROM {tgt} WHERE {spec.condition})"
+                )
+                inserted = conn.execute(sql, _used(sql, bound)).rowcount
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.execute('DROP TABLE IF EXISTS temp."_merge_src"')
+        self._touch(spec.target.strip('"'))
+        return {"inserted": max(0, inserted), "updated": max(0, updated)}
+
+    # -- vector search --------------------------------------------------
+    def _materialize_search(self, call: VectorSearchCall, bound: Dict[str, Any]) -> str:
+        """Run the query side, search the base matrix, store hits in a temp table."""
+        conn = self._conn
+        cur = conn.execute(call.query_sql, _used(call.query_sql, bound))
+        cols = [d[0] for d in cur.description]
+        rows = cur.fetchall()
+        qcol = call.query_column or (call.column if call.column in cols else None)
+        if qcol is None:
+            qcol = next((c for c in cols if c in VECTOR_COLUMNS), cols[0])
+        qi = cols.index(qcol)
+        top_k = call.top_k
+        k = int(bound[top_k[1:]]) if top_k.startswith(":") else int(float(top_k))
+        table = self._vector_table(call.base_table, call.column)
+        extra = [c for c in cols if c != qcol]
+        conn.execute(f'DROP TABLE IF EXISTS temp."{call.temp_name}"')
+        conn.execute(
+            f'CREATE TEMP TABLE "{call.temp_name}" (_base_rowid INTEGER, distance REAL'
+            + "".join(f', "query_{c}"' for c in extra)
+            + ")"
+        )
+        if rows and len(table):
+            ids, dists = table.search(
+                stack_vectors([r[qi] for r in rows]), k, call.distance_type
+            )
+            out = []
+            for qrow, rid_row, d_row in zip(rows, ids.tolist(), dists.tolist()):
+                qvals = tuple(qrow[cols.index(c)] for c in extra)
+                out.extend((rid, dist) + qvals for rid, dist in zip(rid_row, d_row))
+            conn.executemany(
+                f'INSERT INTO temp."{call.temp_name}" VALUES ({", ".join("?" * (2 + len(extra)))})',
+                out,
+            )
+        return call.temp_name
+
+    def _vector_table(self, table_sql: str, column: str) -> VectorTable:
+        table = table_sql.strip('"')
+        key = (table, column)
+        version = self._versions.get(table, 0)
+        cached = self._vectors.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        rows = self._conn.execute(
+            f'SELECT rowid, "{column}" FROM {table_sql} WHERE "{column}" IS NOT NULL'
+        )
+        vt = VectorTable.from_rows(rows, dim=self.embedder.dim)
+        self._vectors[key] = (version, vt)
+        return vt
+
+    def _touch(self, table: str) -> None:
+        self._versions[table] = self._versions.get(table, 0) + 1
+
+    def _record(
+        self,
+        name: str,
+        started: float,
+        rows: Optional[int] = None,
+        error: Optional[BaseException] = None,
+    ) -> None:
+        if self.metrics is None:
+            return
+        latency_ms = (time.perf_counter() - started) * 1000.0
+        self.metrics.record(JobMetrics.from_job(name, None, latency_ms, rows, error))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def _used(sql: str, bound: Dict[str, Any]) -> Dict[str, Any]:
+    """Bindings for every :name in ``sql``; unsupplied names bind NULL."""
+    names = set(re.findall(r"(?<![:\w]):(\w+)", sql))
+    return {n: bound.get(n) for n in names}
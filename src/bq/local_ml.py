@@ -0,0 +1,218 @@
+"""Local stand-ins for the BigQuery ML functions used by the sql/ templates.
+
+    ML.GENERATE_EMBEDDING  -> LocalEmbedder (feature hashing; deterministic
+                              across processes, no model download)
+    ML.VECTOR_SEARCH       -> VectorTable.search (exact, batched numpy scan)
+
+Vectors are float32. ``to_blob`` / ``as_vector`` convert between numpy and
+the BLOB column format LocalClient stores them in; JSON lists and Python
+sequences are accepted too so ``@param`` vectors work unchanged.
+
+numpy is imported lazily (``local`` extra).
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+import functools
+import hashlib
+import importlib
+import json
+import re
+from typing import Any, Iterable, List, Optional, Sequence, Tuple
+
+DEFAULT_DIM = 256
+BLOCK_ROWS = 65536  # base rows scored per matmul block (bounds peak memory)
+DISTANCE_TYPES = ("COSINE", "EUCLIDEAN", "DOT_PRODUCT")
+
+_TOKEN_RE = re.compile(r"[a-z0-9_]+")
+
+
+def _np() -> Any:
+    try:
+        return importlib.import_module("numpy")
+    except Exception as exc:
+        raise RuntimeError(
+            "numpy missing; install the 'local' extra for the local SQL backend."
+        ) from exc
+
+
+@functools.lru_cache(maxsize=1 << 16)
+def _slot(feature: str, dim: int) -> Tuple[int, float]:
+    h = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+    return h % dim, (1.0 if h >> 63 else -1.0)
+
+
+@dataclass(frozen=True)
+class LocalEmbedder:
+    """Signed feature-hashing embedder over word unigrams and bigrams.
+
+    Texts sharing tokens land close in cosine space, which is enough to
+    exercise retrieval and graph code paths with realistic shapes; it is
+    not a semantic model.
+    """
+
+    dim: int = DEFAULT_DIM
+    bigram_weight: float = 0.5
+
+    def embed(self, text: Optional[str]) -> Any:
+        """L2-normalized float32 vector (all zeros for empty text)."""
+        np = _np()
+        vec = np.zeros(self.dim, dtype=np.float32)
+        tokens = _TOKEN_RE.findall((text or "").lower())
+        for tok in tokens:
+            i, sign = _slot(tok, self.dim)
+            vec[i] += sign
+        for a, b in zip(tokens, tokens[1:]):
+            i, sign = _slot(f"{a} {b}", self.dim)
+            vec[i] += sign * self.bigram_weight
+        norm = float(np.linalg.norm(vec))
+        return vec / norm if norm > 0 else vec
+
+    def embed_many(self, texts: Iterable[Optional[str]]) -> Any:
+        np = _np()
+        rows = [self.embed(t) for t in texts]
+        return np.stack(rows) if rows else np.zeros((0, self.dim), dtype=np.float32)
+
+
+def to_blob(vec: Any) -> bytes:
+    """Vector -> float32 bytes (the stored column format)."""
+    np = _np()
+    return np.asarray(vec, dtype=np.float32).tobytes()
+
+
+def as_vector(value: Any) -> Optional[Any]:
+    """Best-effort conversion of a stored / bound vector to float32 numpy."""
+    if value is None:
+        return None
+    np = _np()
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return np.frombuffer(bytes(value), dtype=np.float32)
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return None
+    if isinstance(value, dict):  # {"values": [...]} style payloads
+        value = value.get("values")
+    if isinstance(value, (list, tuple)) or hasattr(value, "__array__"):
+        arr = np.asarray(value, dtype=np.float32)
+        return arr if arr.ndim == 1 and arr.size else None
+    return None
+
+
+def from_blob(value: bytes) -> List[float]:
+    """Stored vector -> list of floats (the shape RealClient rows carry)."""
+    return _np().frombuffer(bytes(value), dtype="float32").tolist()
+
+
+class VectorTable:
+    """Base vectors of one table column held as a float32 matrix.
+
+    ``row_ids`` maps matrix rows back to the table (SQLite rowids).
+    """
+
+    def __init__(self, row_ids: Any, matrix: Any, block_rows: int = BLOCK_ROWS) -> None:
+        np = _np()
+        self.row_ids = np.asarray(row_ids, dtype=np.int64)
+        self.matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        if self.matrix.ndim != 2 or len(self.row_ids) != len(self.matrix):
+            raise ValueError("row_ids and matrix rows must align")
+        self.norms = np.linalg.norm(self.matrix, axis=1)
+        self.block_rows = max(1, int(block_rows))
+
+    @property
+    def dim(self) -> int:
+        return int(self.matrix.shape[1])
+
+    def __len__(self) -> int:
+        return len(self.row_ids)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple[int, Any]], dim: Optional[int] = None) -> "VectorTable":
+        """Build from (row_id, stored vector) pairs; rows without a vector are skipped.
+
+        Equal-length BLOBs (the common case) are decoded with one
+        ``frombuffer`` over the joined bytes.
+        """
+        np = _np()
+        ids: List[int] = []
+        blobs: List[Any] = []
+        for rid, value in rows:
+            if value is None:
+                continue
+            ids.append(rid)
+            blobs.append(value)
+        if not blobs:
+            return cls(np.zeros(0, dtype=np.int64), np.zeros((0, dim or 0), dtype=np.float32))
+        if all(isinstance(b, bytes) for b in blobs) and len({len(b) for b in blobs}) == 1:
+            matrix = np.frombuffer(b"".join(blobs), dtype=np.float32).reshape(len(blobs), -1)
+            return cls(ids, matrix)
+        vectors = [as_vector(b) for b in blobs]
+        width = next((len(v) for v in vectors if v is not None), dim or 0)
+        keep = [(i, v) for i, v in zip(ids, vectors) if v is not None and len(v) == width]
+        if len(keep) != len(vectors):
+            raise ValueError("vectors of mixed width in one column")
+        return cls([i for i, _ in keep], np.stack([v for _, v in keep]))
+
+    def search(
+        self, queries: Any, top_k: int, distance_type: str = "COSINE"
+    ) -> Tuple[Any, Any]:
+        """Exact top-k per query row.
+
+        Returns (row_ids, distances), both shaped (n_queries, k) and sorted
+        by ascending distance; k = min(top_k, len(self)).
+        """
+        np = _np()
+        kind = distance_type.upper()
+        if kind not in DISTANCE_TYPES:
+            raise ValueError(f"unsupported distance_type: {distance_type}")
+        q = np.asarray(queries, dtype=np.float32)
+        if q.ndim == 1:
+            q = q[None, :]
+        k = min(int(top_k), len(self))
+        if k <= 0 or len(q) == 0:
+            empty = (len(q), 0)
+            return np.zeros(empty, dtype=np.int64), np.zeros(empty, dtype=np.float32)
+        if q.shape[1] != self.dim:
+            raise ValueError(f"query width {q.shape[1]} != base width {self.dim}")
+        q_norms = np.linalg.norm(q, axis=1)
+        best_d = np.zeros((len(q), 0), dtype=np.float32)
+        best_i = np.zeros((len(q), 0), dtype=np.int64)
+        for start in range(0, len(self), self.block_rows):
+            stop = min(start + self.block_rows, len(self))
+            d = _distances(np, q, q_norms, self.matrix[start:stop], self.norms[start:stop], kind)
+            idx = np.broadcast_to(np.arange(start, stop, dtype=np.int64), d.shape)
+            best_d = np.concatenate([best_d, d], axis=1)
+            best_i = np.concatenate([best_i, idx], axis=1)
+            if best_d.shape[1] > k:
+                part = np.argpartition(best_d, k - 1, axis=1)[:, :k]
+                best_d = np.take_along_axis(best_d, part, axis=1)
+                best_i = np.take_along_axis(best_i, part, axis=1)
+        # deterministic order: distance, then position in the table
+        by_pos = np.argsort(best_i, axis=1)
+        best_d = np.take_along_axis(best_d, by_pos, axis=1)
+        best_i = np.take_along_axis(best_i, by_pos, axis=1)
+        order = np.argsort(best_d, axis=1, kind="stable")
+        best_d = np.take_along_axis(best_d, order, axis=1)
+        best_i = np.take_along_axis(best_i, order, axis=1)
+        return self.row_ids[best_i], best_d
+
+
+def _distances(np: Any, q: Any, q_norms: Any, block: Any, b_norms: Any, kind: str) -> Any:
+    dots = q @ block.T
+    if kind == "DOT_PRODUCT":
+        return -dots
+    if kind == "EUCLIDEAN":
+        sq = q_norms[:, None] ** 2 + b_norms[None, :] ** 2 - 2.0 * dots
+        return np.sqrt(np.maximum(sq, 0.0)).astype(np.float32)
+    denom = q_norms[:, None] * b_norms[None, :]
+    sim = np.divide(dots, denom, out=np.zeros_like(dots), where=denom > 0)
+    return np.maximum(1.0 - sim, 0.0).astype(np.float32)
+
+
+def stack_vectors(values: Sequence[Any]) -> Any:
+    """Query-side vectors (any accepted format) -> (n, dim) float32 matrix."""
+    np = _np()
+    vecs = [as_vector(v) for v in values]
+    if any(v is None for v in vecs):
+        raise ValueError("query row without a usable vector")
+    return np.stack(vecs) if vecs else np.zeros((0, 0), dtype=np.float32)
@@ -0,0 +1,81 @@
+"""Chunk-type partitions of chunks_emb (one table per chunk type).
+
+``chunk_vector_search.sql`` takes top_k over every chunk and only then
+filters on ``meta.type``, so a ``logs_only`` route can come back nearly
+empty. With partitions, each requested type is searched in its own
+``chunks_emb_<type>`` table (chunk_vector_search_partition.sql) -- top_k
+after the filter, over that type's rows only -- and retrieval/hybrid.py
+merges the per-type lists with a heap.
+
+Partition tables hold (chunk_id, embedding); text / meta still come from
+chunks_emb. ``refresh_type_partitions`` adds new chunks and drops removed
+or re-typed ones in one script job; pass ``rebuild=True`` after chunks were
+re-embedded.
+
+Environment:
+    BQ_TYPE_PARTITIONS=1    search partitions for typed queries (run
+                            refresh_type_partitions first)
+"""
+from __future__ import annotations
+import os
+import re
+from typing import Any, Dict, Iterable, List, Optional
+
+from .script import ScriptBatch
+
+TYPES_TEMPLATE = "chunk_types.sql"
+REFRESH_TEMPLATE = "chunks_emb_partition_refresh.sql"
+SEARCH_BASE = "chunk_vector_search_partition"
+
+_TYPE_RE = re.compile(r"^[a-z0-9_]{1,64}$")
+
+
+def enabled() -> bool:
+    return os.getenv("BQ_TYPE_PARTITIONS", "0") == "1"
+
+
+def is_partition_type(chunk_type: Any) -> bool:
+    """True if ``chunk_type`` can name a partition table (``chunks_emb_<type>``)."""
+    return isinstance(chunk_type, str) and bool(_TYPE_RE.match(chunk_type))
+
+
+def chunk_types(client: Any) -> List[str]:
+    """Partitionable chunk types present in chunks_emb."""
+    rows = client.run_sql_template(TYPES_TEMPLATE, {})
+    return [str(r["chunk_type"]) for r in rows if is_partition_type(r.get("chunk_type"))]
+
+
+def refresh_type_partitions(
+    client: Any, types: Optional[Iterable[str]] = None, rebuild: bool = False
+) -> Dict[str, Any]:
+    """Create / sync ``chunks_emb_<type>`` for ``types`` (default: all present).
+
+    Returns {types, inserted, deleted, jobs}.
+    """
+    wanted = list(dict.fromkeys(types)) if types is not None else chunk_types(client)
+    bad = [t for t in wanted if not is_partition_type(t)]
+    if bad:
+        raise ValueError(f"invalid chunk type(s) for partitions: {bad}")
+    if not wanted:
+        return {"types": [], "inserted": 0, "deleted": 0, "jobs": 0}
+    # a rebuild drops the tables first, so their CREATE must not be skipped
+    batch = ScriptBatch(client, skip_unchanged_ddl=not rebuild)
+    for t in wanted:
+        if rebuild:
+            batch.add_sql(
+                "DROP TABLE IF EXISTS `${PROJECT_ID}.${DATASET}.chunks_emb_" + t + "`",
+                label="drop_partition",
+            )
+        batch.add(REFRESH_TEMPLATE, {"CHUNK_TYPE": t})
+    result = batch.run()
+    stats = result.dml(REFRESH_TEMPLATE)
+    print(
+        f"[partitions] chunks_emb partitions {','.join(wanted)}: "
+        f"inserted={stats['inserted']} deleted={stats['deleted']} jobs={result.jobs}"
+    )
+    return {
+        "types": wanted,
+        "inserted": stats["inserted"],
+        "deleted": stats["deleted"],
+        "jobs": result.jobs,
+    }
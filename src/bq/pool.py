@@ -0,0 +1,103 @@
+"""Process-wide pool of ``google.cloud.bigquery.Client`` instances.
+
+Building a Client runs credential discovery and later opens a fresh HTTPS
+session. The CLI, every Streamlit rerun and the scripts each used to pay
+that cost; now a single Client per (project, location) is shared by every
+RealClient in the process (the library's Client is thread-safe).
+
+``warm_up`` resolves the auth token and opens the HTTP connection in a
+background thread, so the first real query does not pay the TLS/credential
+round trips.
+"""
+from __future__ import annotations
+import logging
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PoolKey = Tuple[Optional[str], Optional[str]]
+
+_CLIENTS: Dict[PoolKey, Any] = {}
+_WARMERS: Dict[PoolKey, threading.Thread] = {}
+_LOCK = threading.Lock()
+
+
+def _build(bq_mod: Any, project: Optional[str], location: Optional[str]) -> Any:
+    # Support different authentication methods
+    api_key = os.getenv("GOOGLE_API_KEY")
+    service_account_path = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
+    if api_key:
+        # Use API key authentication (for testing)
+        from google.auth.credentials import AnonymousCredentials
+        client = bq_mod.Client(
+            project=project, location=location, credentials=AnonymousCredentials()
+        )
+        # Note: API keys have limited BigQuery support
+        print(f"[auth] Using API key authentication for project {project}")
+    elif service_account_path:
+        # Use service account file
+        client = bq_mod.Client(project=project, location=location)
+        print(f"[auth] Using service account from {service_account_path}")
+    else:
+        # Use default credentials (ADC)
+        client = bq_mod.Client(project=project, location=location)
+        print(f"[auth] Using default credentials for project {project}")
+    return client
+
+
+def get_client(bq_mod: Any, project: Optional[str], location: Optional[str]) -> Any:
+    """Shared Client for (project, location); built on first use."""
+    key = (project, location)
+    with _LOCK:
+        client = _CLIENTS.get(key)
+        if client is None:
+            client = _build(bq_mod, project, location)
+            _CLIENTS[key] = client
+        return client
+
+
+def _warm(client: Any) -> None:
+    try:
+        creds = getattr(client, "_credentials", None)
+        if creds is not None and not getattr(creds, "valid", True):
+            from google.auth.transport.requests import Request
+
+            creds.refresh(Request())
+        # one cheap metadata call opens the pooled HTTPS connection
+        list_datasets = getattr(client, "list_datasets", None)
+        if list_datasets is not None:
+            next(iter(list_datasets(max_results=1)), None)
+    except Exception as exc:  # best effort; the first query will retry auth
+        logger.warning(f"BigQuery warm-up failed: {exc}")
+
+
+def warm_up(
+    bq_mod: Any,
+    project: Optional[str],
+    location: Optional[str],
+    wait: bool = False,
+) -> threading.Thread:
+    """Pre-fetch the token and open the connection (once per key)."""
+    key = (project, location)
+    with _LOCK:
+        thread = _WARMERS.get(key)
+        if thread is None:
+            thread = threading.Thread(
+                target=lambda: _warm(get_client(bq_mod, project, location)),
+                name=f"bq-warmup-{project}",
+                daemon=True,
+            )
+            _WARMERS[key] = thread
+            thread.start()
+    if wait:
+        thread.join()
+    return thread
+
+
+def clear() -> None:
+    """Drop pooled clients (tests, credential rotation)."""
+    with _LOCK:
+        _CLIENTS.clear()
+        _WARMERS.clear()
@@ -0,0 +1,289 @@
+"""Retries, per-template circuit breakers and hedged reads for BigQuery jobs.
+
+RealClient routes ``run_sql_template`` through a Resilience object:
+
+    * retries: read-only templates (SELECT / WITH) are retried on transient
+      errors (5xx, rate limits, connection resets) with exponential backoff
+      and full jitter; DML / DDL is never retried
+    * circuit breaker: after ``failure_threshold`` consecutive failures a
+      template is short-circuited (CircuitOpenError, no job submitted) for
+      ``cooldown`` seconds, then one trial call is let through
+    * hedging: when a read has not finished by its template's observed p95
+      (telemetry registry, >= ``hedge_min_samples`` jobs), an identical job
+      is submitted; the first to finish wins and the other is cancelled
+    * deadlines: per-template timeouts (router_predict.sql by default) cancel
+      the job and raise QueryTimeout, so callers with a fallback use it early
+
+Environment:
+    BQ_RESILIENCE=0          disable the layer (plain single attempt)
+    BQ_RETRY_ATTEMPTS        attempts per read including the first (default 3)
+    BQ_RETRY_BASE_MS         first backoff step (default 200; doubles, capped 5s)
+    BQ_BREAKER_THRESHOLD     consecutive failures that open a breaker (default 3)
+    BQ_BREAKER_COOLDOWN      seconds a breaker stays open (default 60)
+    BQ_HEDGE=0               disable hedged reads
+    BQ_HEDGE_MIN_SAMPLES     jobs of a template needed before hedging (default 20)
+    BQ_TEMPLATE_TIMEOUTS     per-template deadlines: "name=seconds,..."
+"""
+from __future__ import annotations
+import asyncio
+from dataclasses import dataclass, field
+import os
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar
+
+from .guardrails import BytesBudgetExceeded
+from .telemetry import MetricsRegistry, percentile
+
+T = TypeVar("T")
+
+# Seconds; templates with a cheaper fallback should not stall triage.
+DEFAULT_TIMEOUTS: Dict[str, float] = {
+    "router_predict.sql": 5.0,
+}
+HEDGE_PERCENTILE = 95
+HEDGE_WINDOW = 200  # most recent successful jobs considered for the p95
+
+TRANSIENT_CODES = {408, 429, 500, 502, 503, 504}
+TRANSIENT_REASONS = {
+    "backendError",
+    "internalError",
+    "rateLimitExceeded",
+    "jobRateLimitExceeded",
+    "quotaExceeded",  # concurrent-query quota; daily quotas stay exceeded, bounded by attempts
+}
+
+
+class CircuitOpenError(RuntimeError):
+    """A template's breaker is open; the call was not submitted."""
+
+    def __init__(self, name: str, retry_in: float) -> None:
+        self.name = name
+        self.retry_in = retry_in
+        super().__init__(f"{name}: circuit open after repeated failures; retry in {retry_in:.0f}s")
+
+
+class QueryTimeout(TimeoutError):
+    """A template exceeded its deadline; the job was cancelled."""
+
+    def __init__(self, name: str, timeout: float) -> None:
+        self.name = name
+        self.timeout = timeout
+        super().__init__(f"{name}: no result within {timeout:g}s (BQ_TEMPLATE_TIMEOUTS)")
+
+
+def is_transient(exc: BaseException) -> bool:
+    """True for errors worth retrying (server side, throttling, network)."""
+    if isinstance(exc, (BytesBudgetExceeded, CircuitOpenError, QueryTimeout)):
+        return False
+    if isinstance(exc, (ConnectionError, TimeoutError)):
+        return True
+    code = getattr(exc, "code", None)
+    if isinstance(code, int) and code in TRANSIENT_CODES:
+        return True
+    for err in getattr(exc, "errors", None) or []:
+        if isinstance(err, dict) and err.get("reason") in TRANSIENT_REASONS:
+            return True
+    return type(exc).__name__ in {
+        "TooManyRequests",
+        "InternalServerError",
+        "BadGateway",
+        "ServiceUnavailable",
+        "GatewayTimeout",
+        "RetryError",
+    }
+
+
+def _parse_timeouts(raw: str) -> Dict[str, float]:
+    out: Dict[str, float] = {}
+    for part in raw.split(","):
+        name, _, val = part.partition("=")
+        if not name.strip() or not val.strip():
+            continue
+        try:
+            out[name.strip()] = float(val)
+        except ValueError:
+            continue
+    return out
+
+
+def _env_num(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+@dataclass
+class _Breaker:
+    failures: int = 0
+    opened_at: Optional[float] = None
+    trial: bool = False  # half-open call in flight
+
+
+@dataclass
+class Resilience:
+    """Retry / breaker / hedge policy shared by one client."""
+
+    max_attempts: int = 3
+    base_delay: float = 0.2
+    max_delay: float = 5.0
+    failure_threshold: int = 3
+    cooldown: float = 60.0
+    hedge: bool = True
+    hedge_min_samples: int = 20
+    timeouts: Dict[str, float] = field(default_factory=lambda: dict(DEFAULT_TIMEOUTS))
+    clock: Callable[[], float] = time.monotonic
+    sleep: Callable[[float], None] = time.sleep
+    rng: random.Random = field(default_factory=random.Random)
+
+    def __post_init__(self) -> None:
+        self._lock = threading.Lock()
+        self._breakers: Dict[str, _Breaker] = {}
+        self.counters: Dict[str, int] = {
+            "retries": 0,
+            "short_circuits": 0,
+            "hedges": 0,
+            "hedge_wins": 0,
+            "timeouts": 0,
+        }
+
+    @classmethod
+    def from_env(cls) -> Optional["Resilience"]:
+        if os.getenv("BQ_RESILIENCE", "1") == "0":
+            return None
+        timeouts = dict(DEFAULT_TIMEOUTS)
+        timeouts.update(_parse_timeouts(os.getenv("BQ_TEMPLATE_TIMEOUTS", "")))
+        return cls(
+            max_attempts=max(1, int(_env_num("BQ_RETRY_ATTEMPTS", 3))),
+            base_delay=max(0.0, _env_num("BQ_RETRY_BASE_MS", 200) / 1000.0),
+            failure_threshold=max(1, int(_env_num("BQ_BREAKER_THRESHOLD", 3))),
+            cooldown=max(0.0, _env_num("BQ_BREAKER_COOLDOWN", 60)),
+            hedge=os.getenv("BQ_HEDGE", "1") != "0",
+            hedge_min_samples=max(1, int(_env_num("BQ_HEDGE_MIN_SAMPLES", 20))),
+            timeouts={k: v for k, v in timeouts.items() if v > 0},
+        )
+
+    # -- policy lookups -------------------------------------------------
+    def timeout_for(self, name: str) -> Optional[float]:
+        return self.timeouts.get(name)
+
+    def hedge_after(self, name: str, metrics: Optional[MetricsRegistry]) -> Optional[float]:
+        """Seconds to wait before hedging ``name`` (observed p95), or None."""
+        if not self.hedge or metrics is None:
+            return None
+        latencies = [
+            r.latency_ms
+            for r in metrics.records(name)[-HEDGE_WINDOW:]
+            if r.error is None and not r.cache_hit
+        ]
+        if len(latencies) < self.hedge_min_samples:
+            return None
+        return percentile(latencies, HEDGE_PERCENTILE) / 1000.0
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter delay before retry number ``attempt`` (1-based)."""
+        cap = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return self.rng.uniform(0.0, cap)
+
+    def note(self, counter: str) -> None:
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            open_now = sorted(
+                name for name, b in self._breakers.items() if b.opened_at is not None
+            )
+            return {**self.counters, "open_circuits": open_now}
+
+    # -- circuit breaker --------------------------------------------------
+    def before_call(self, name: str) -> None:
+        """Raise CircuitOpenError if ``name`` is short-circuited."""
+        with self._lock:
+            b = self._breakers.get(name)
+            if b is None or b.opened_at is None:
+                return
+            waited = self.clock() - b.opened_at
+            if waited >= self.cooldown and not b.trial:
+                b.trial = True  # half-open: exactly one trial call
+                return
+            self.counters["short_circuits"] += 1
+            retry_in = max(0.0, self.cooldown - waited)
+        raise CircuitOpenError(name, retry_in)
+
+    def on_success(self, name: str) -> None:
+        with self._lock:
+            self._breakers.pop(name, None)
+
+    def on_failure(self, name: str) -> None:
+        with self._lock:
+            b = self._breakers.setdefault(name, _Breaker())
+            b.failures += 1
+            if b.trial or b.failures >= self.failure_threshold:
+                b.opened_at = self.clock()
+            b.trial = False
+
+    def reset(self, name: Optional[str] = None) -> None:
+        with self._lock:
+            if name is None:
+                self._breakers.clear()
+            else:
+                self._breakers.pop(name, None)
+
+    # -- call wrappers ----------------------------------------------------
+    def call(self, name: str, fn: Callable[[], T], retry: bool = True) -> T:
+        """Run ``fn`` under the breaker, retrying transient errors if ``retry``."""
+        self.before_call(name)
+        attempts = self.max_attempts if retry else 1
+        for attempt in range(1, attempts + 1):
+            try:
+                out = fn()
+            except Exception as exc:
+                if attempt < attempts and is_transient(exc):
+                    self.note("retries")
+                    self.sleep(self.backoff(attempt))
+                    continue
+                self.on_failure(name)
+                raise
+            self.on_success(name)
+            return out
+        raise AssertionError("unreachable")  # pragma: no cover
+
+    async def call_async(
+        self, name: str, fn: Callable[[], Awaitable[T]], retry: bool = True
+    ) -> T:
+        """Async twin of call(); backoff sleeps don't block the loop."""
+        self.before_call(name)
+        attempts = self.max_attempts if retry else 1
+        for attempt in range(1, attempts + 1):
+            try:
+                out = await fn()
+            except Exception as exc:
+                if attempt < attempts and is_transient(exc):
+                    self.note("retries")
+                    await asyncio.sleep(self.backoff(attempt))
+                    continue
+                self.on_failure(name)
+                raise
+            self.on_success(name)
+            return out
+        raise AssertionError("unreachable")  # pragma: no cover
+
+
+def first_finished(
+    pending: List[Any], poll: float, deadline: Optional[float], clock: Callable[[], float],
+    sleep: Callable[[float], None],
+) -> Optional[Any]:
+    """Poll handles until one is done; None once ``deadline`` (clock time) passes."""
+    delay = poll
+    while True:
+        for p in pending:
+            if p.done():
+                return p
+        if deadline is not None and clock() >= deadline:
+            return None
+        wait = delay if deadline is None else max(0.0, min(delay, deadline - clock()))
+        sleep(wait)
+        delay = min(1.0, delay * 1.5)
@@ -0,0 +1,288 @@
+"""Batch several templates into one BigQuery script job.
+
+Bootstrap and ingest paths used to submit one job per step (view DDL,
+ticket tables, staging CREATE -> MERGE -> DROP). ``ScriptBatch`` renders
+the templates, splits them into statements and submits a single script;
+per-statement results (rows for SELECTs, DML row counts) are read back from
+the script's child jobs.
+
+Before submitting, DDL that would not change anything is dropped:
+
+    CREATE TABLE IF NOT EXISTS x    skipped when x exists
+    CREATE OR REPLACE VIEW v AS q   skipped when v's stored definition == q
+
+Existing objects come from INFORMATION_SCHEMA (``schema_objects.sql``) once
+per dataset per process and are updated as scripts create objects, so
+repeated bootstrap calls (e.g. every dashboard rerun) submit no jobs.
+
+Clients without ``run_script`` (stub, test doubles) run each template as
+its own job, as before.
+"""
+from __future__ import annotations
+from dataclasses import dataclass, field
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+SCRIPT_NAME = "_script.sql"
+SCHEMA_TEMPLATE = "schema_objects.sql"
+
+_DDL_RE = re.compile(
+    r"^\s*CREATE\s+(OR\s+REPLACE\s+)?(TABLE|VIEW)\s+(IF\s+NOT\s+EXISTS\s+)?"
+    r"`([^`]+)`\s*(.*)$",
+    re.IGNORECASE | re.DOTALL,
+)
+_VIEW_BODY_RE = re.compile(r"^(?:OPTIONS\s*\(.*?\)\s*)?AS\s+(.*)$", re.IGNORECASE | re.DOTALL)
+
+
+def split_statements(sql: str) -> List[str]:
+    """Split a script on top-level ``;`` (quotes, backticks, comments aware).
+
+    Comments are kept with the statement that follows them; statements that
+    are only comments / whitespace are dropped.
+    """
+    out: List[str] = []
+    buf: List[str] = []
+    i, n = 0, len(sql)
+    quote: Optional[str] = None
+    while i < n:
+        ch = sql[i]
+        if quote is not None:
+            buf.append(ch)
+            if ch == "\\" and quote != "`" and i + 1 < n:
+                buf.append(sql[i + 1])
+                i += 2
+                continue
+            if ch == quote:
+                quote = None
+            i += 1
+            continue
+        if ch in ("'", '"', "`"):
+            quote = ch
+        elif sql.startswith("--", i) or ch == "#":
+            end = sql.find("\n", i)
+            end = n if end == -1 else end
+            buf.append(sql[i:end])
+            i = end
+            continue
+        elif sql.startswith("/*", i):
+            end = sql.find("*/", i + 2)
+            end = n if end == -1 else end + 2
+            buf.append(sql[i:end])
+            i = end
+            continue
+        elif ch == ";":
+            out.append("".join(buf))
+            buf = []
+            i += 1
+            continue
+        buf.append(ch)
+        i += 1
+    out.append("".join(buf))
+    return [s.strip() for s in out if strip_comments(s).strip()]
+
+
+def strip_comments(sql: str) -> str:
+    return re.sub(r"--[^\n]*|/\*.*?\*/", " ", sql, flags=re.DOTALL)
+
+
+def _norm(sql: str) -> str:
+    return " ".join(strip_comments(sql).split()).rstrip(";").strip()
+
+
+@dataclass(frozen=True)
+class DdlTarget:
+    """Object a CREATE statement would create, and how to tell it is a no-op."""
+
+    dataset: str  # "project.dataset"
+    table: str
+    kind: str  # TABLE | VIEW
+    if_not_exists: bool
+    or_replace: bool
+    view_query: Optional[str] = None
+
+
+def ddl_target(statement: str) -> Optional[DdlTarget]:
+    m = _DDL_RE.match(strip_comments(statement))
+    if not m:
+        return None
+    or_replace, kind, if_not_exists, fq, rest = m.groups()
+    parts = fq.split(".")
+    if len(parts) != 3:
+        return None
+    view_query = None
+    if kind.upper() == "VIEW":
+        body = _VIEW_BODY_RE.match(rest.strip())
+        view_query = _norm(body.group(1)) if body else None
+    return DdlTarget(
+        dataset=f"{parts[0]}.{parts[1]}",
+        table=parts[2],
+        kind=kind.upper(),
+        if_not_exists=bool(if_not_exists),
+        or_replace=bool(or_replace),
+        view_query=view_query,
+    )
+
+
+# dataset -> {table_name: normalized view definition ("" for tables)}
+_SCHEMA: Dict[str, Dict[str, str]] = {}
+_SCHEMA_LOCK = threading.Lock()
+
+
+def forget_schema(dataset: Optional[str] = None) -> None:
+    """Drop the cached INFORMATION_SCHEMA snapshot (all datasets by default)."""
+    with _SCHEMA_LOCK:
+        if dataset is None:
+            _SCHEMA.clear()
+        else:
+            _SCHEMA.pop(dataset, None)
+
+
+def _schema_for(client: Any, dataset: str) -> Dict[str, str]:
+    with _SCHEMA_LOCK:
+        known = _SCHEMA.get(dataset)
+    if known is not None:
+        return known
+    project, ds = dataset.split(".", 1)
+    try:
+        rows = client.run_sql_template(SCHEMA_TEMPLATE, {"PROJECT_ID": project, "DATASET": ds})
+    except Exception:
+        return {}  # unknown (e.g. dataset missing): run every statement
+    objects = {
+        str(r.get("table_name")): _norm(r.get("view_definition") or "")
+        for r in rows
+        if r.get("table_name")
+    }
+    with _SCHEMA_LOCK:
+        _SCHEMA[dataset] = objects
+    return objects
+
+
+def is_unchanged(target: DdlTarget, existing: Dict[str, str]) -> bool:
+    if target.table not in existing:
+        return False
+    if target.kind == "TABLE":
+        return target.if_not_exists
+    return target.view_query is not None and existing[target.table] == target.view_query
+
+
+def _remember(target: DdlTarget) -> None:
+    with _SCHEMA_LOCK:
+        known = _SCHEMA.get(target.dataset)
+        if known is not None:
+            known[target.table] = target.view_query or ""
+
+
+@dataclass
+class StatementResult:
+    """Outcome of one statement in a batch."""
+
+    label: str
+    sql: str
+    skipped: bool = False
+    statement_type: Optional[str] = None
+    rows: List[Dict[str, Any]] = field(default_factory=list)
+    inserted: int = 0
+    updated: int = 0
+    deleted: int = 0
+
+
+@dataclass
+class ScriptResult:
+    statements: List[StatementResult]
+    jobs: int = 0  # query jobs submitted (0 when everything was skipped)
+
+    def for_label(self, label: str) -> List[StatementResult]:
+        return [s for s in self.statements if s.label == label]
+
+    def rows(self, label: str) -> List[Dict[str, Any]]:
+        """Rows of the last executed statement for ``label``."""
+        ran = [s for s in self.for_label(label) if not s.skipped]
+        return ran[-1].rows if ran else []
+
+    def dml(self, label: str) -> Dict[str, int]:
+        ran = self.for_label(label)
+        return {
+            "inserted": sum(s.inserted for s in ran),
+            "updated": sum(s.updated for s in ran),
+            "deleted": sum(s.deleted for s in ran),
+        }
+
+    @property
+    def skipped(self) -> List[StatementResult]:
+        return [s for s in self.statements if s.skipped]
+
+
+class ScriptBatch:
+    """Collects templates / inline SQL and runs them as one script job."""
+
+    def __init__(self, client: Any, skip_unchanged_ddl: bool = True) -> None:
+        self.client = client
+        self.skip_unchanged_ddl = skip_unchanged_ddl
+        self._entries: List[Tuple[str, Optional[str], Dict[str, Any]]] = []
+
+    def add(self, name: str, params: Optional[Dict[str, Any]] = None) -> "ScriptBatch":
+        """Queue a registry template."""
+        self._entries.append((name, None, dict(params or {})))
+        return self
+
+    def add_sql(
+        self, sql: str, params: Optional[Dict[str, Any]] = None, label: str = "inline"
+    ) -> "ScriptBatch":
+        """Queue already-rendered SQL (``${PROJECT_ID}``-style identifiers allowed)."""
+        self._entries.append((label, sql, dict(params or {})))
+        return self
+
+    def run(self) -> ScriptResult:
+        if not hasattr(self.client, "run_script"):
+            return self._run_each()
+        statements: List[Tuple[str, str]] = []
+        params: Dict[str, Any] = {}
+        for label, sql, entry_params in self._entries:
+            rendered = self.client.render(
+                label, {"raw_sql": sql, **entry_params} if sql is not None else entry_params
+            )
+            for key, value in entry_params.items():
+                if key.isupper():
+                    continue  # identifier values are rendered, not bound
+                if key in params and params[key] != value:
+                    raise ValueError(f"conflicting values for @{key} in script batch")
+                params[key] = value
+            statements.extend((label, s) for s in split_statements(rendered))
+
+        results = [StatementResult(label, s) for label, s in statements]
+        targets = [ddl_target(s) for _, s in statements]
+        if self.skip_unchanged_ddl:
+            for res, target in zip(results, targets):
+                if target is not None and is_unchanged(
+                    target, _schema_for(self.client, target.dataset)
+                ):
+                    res.skipped = True
+        pending = [r for r in results if not r.skipped]
+        if not pending:
+            return ScriptResult(results, jobs=0)
+
+        labels = {r.label for r in pending}
+        name = labels.pop() if len(labels) == 1 else SCRIPT_NAME
+        script = ";\n".join(r.sql for r in pending) + ";"
+        children = self.client.run_script(script, params, name=name)
+        for res, child in zip(pending, children):
+            res.statement_type = child.get("statement_type")
+            res.rows = child.get("rows") or []
+            res.inserted = child.get("inserted", 0)
+            res.updated = child.get("updated", 0)
+            res.deleted = child.get("deleted", 0)
+        for res, target in zip(results, targets):
+            if target is None or res.skipped:
+                continue
+            if target.if_not_exists or target.kind == "VIEW":
+                _remember(target)
+        return ScriptResult(results, jobs=1)
+
+    def _run_each(self) -> ScriptResult:
+        results: List[StatementResult] = []
+        for label, sql, entry_params in self._entries:
+            call_params = {"raw_sql": sql, **entry_params} if sql is not None else entry_params
+            rows = self.client.run_sql_template(label, call_params)
+            results.append(StatementResult(label, sql or label, rows=list(rows or [])))
+        return ScriptResult(results, jobs=len(results))
@@ -0,0 +1,228 @@
+"""Per-template BigQuery job telemetry.
+
+Every job RealClient runs is recorded as a JobMetrics record tagged with
+its template name (bytes processed/billed, slot-ms, BigQuery cache hit,
+client-observed latency). Records live in an in-process MetricsRegistry
+that reports latency percentiles per template and exports JSON lines or
+Prometheus text format.
+"""
+from __future__ import annotations
+from collections import defaultdict, deque
+from dataclasses import asdict, dataclass, field
+import json
+import math
+import threading
+import time
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, TextIO, Union
+
+# Prometheus histogram bucket upper bounds (seconds)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+PERCENTILES = (50, 90, 95, 99)
+
+
+@dataclass
+class JobMetrics:
+    """One executed query job."""
+
+    template: str
+    latency_ms: float
+    job_id: Optional[str] = None
+    bytes_processed: int = 0
+    bytes_billed: int = 0
+    slot_ms: int = 0
+    cache_hit: bool = False
+    job_ms: Optional[float] = None  # server-side start -> end
+    rows: Optional[int] = None
+    error: Optional[str] = None
+    ts: float = field(default_factory=time.time)
+
+    @classmethod
+    def from_job(
+        cls,
+        template: str,
+        job: Any,
+        latency_ms: float,
+        rows: Optional[int] = None,
+        error: Optional[BaseException] = None,
+    ) -> "JobMetrics":
+        started = getattr(job, "started", None)
+        ended = getattr(job, "ended", None)
+        job_ms = None
+        if started is not None and ended is not None:
+            try:
+                job_ms = (ended - started).total_seconds() * 1000.0
+            except Exception:  # pragma: no cover - unexpected types
+                job_ms = None
+        return cls(
+            template=template,
+            latency_ms=latency_ms,
+            job_id=getattr(job, "job_id", None),
+            bytes_processed=int(getattr(job, "total_bytes_processed", None) or 0),
+            bytes_billed=int(getattr(job, "total_bytes_billed", None) or 0),
+            slot_ms=int(getattr(job, "slot_millis", None) or 0),
+            cache_hit=bool(getattr(job, "cache_hit", False)),
+            job_ms=job_ms,
+            rows=rows,
+            error=(f"{type(error).__name__}: {error}" if error is not None else None),
+        )
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile (q in 0..100); 0.0 for empty input."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100.0 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class _TemplateAgg:
+    __slots__ = ("count", "errors", "cache_hits", "bytes_processed", "bytes_billed",
+                 "slot_ms", "latency_sum", "buckets")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.errors = 0
+        self.cache_hits = 0
+        self.bytes_processed = 0
+        self.bytes_billed = 0
+        self.slot_ms = 0
+        self.latency_sum = 0.0
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+
+
+class MetricsRegistry:
+    """Thread-safe store of job records plus cumulative per-template counters.
+
+    Raw records are kept in a bounded window (for percentiles / export);
+    counters and histogram buckets are cumulative for the process.
+    """
+
+    def __init__(self, max_records: int = 10000) -> None:
+        self._lock = threading.Lock()
+        self._records: Deque[JobMetrics] = deque(maxlen=max_records)
+        self._agg: Dict[str, _TemplateAgg] = defaultdict(_TemplateAgg)
+
+    def record(self, m: JobMetrics) -> None:
+        with self._lock:
+            self._records.append(m)
+            agg = self._agg[m.template]
+            agg.count += 1
+            agg.errors += 1 if m.error else 0
+            agg.cache_hits += 1 if m.cache_hit else 0
+            agg.bytes_processed += m.bytes_processed
+            agg.bytes_billed += m.bytes_billed
+            agg.slot_ms += m.slot_ms
+            secs = m.latency_ms / 1000.0
+            agg.latency_sum += secs
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if secs <= bound:
+                    agg.buckets[i] += 1
+
+    def records(self, template: Optional[str] = None) -> List[JobMetrics]:
+        with self._lock:
+            recs = list(self._records)
+        return [r for r in recs if template is None or r.template == template]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._records.clear()
+            self._agg.clear()
+
+    def totals(self) -> Dict[str, int]:
+        """Cumulative counters across all templates."""
+        with self._lock:
+            aggs = list(self._agg.values())
+        return {
+            "jobs": sum(a.count for a in aggs),
+            "errors": sum(a.errors for a in aggs),
+            "cache_hits": sum(a.cache_hits for a in aggs),
+            "bytes_processed": sum(a.bytes_processed for a in aggs),
+            "bytes_billed": sum(a.bytes_billed for a in aggs),
+            "slot_ms": sum(a.slot_ms for a in aggs),
+        }
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """Per-template counters and latency percentiles (ms)."""
+        recs = self.records()
+        with self._lock:
+            aggs = dict(self._agg)
+        by_t: Dict[str, List[float]] = defaultdict(list)
+        for r in recs:
+            by_t[r.template].append(r.latency_ms)
+        out: Dict[str, Dict[str, Any]] = {}
+        for name, agg in sorted(aggs.items()):
+            lat = by_t.get(name, [])
+            out[name] = {
+                "count": agg.count,
+                "errors": agg.errors,
+                "cache_hit_ratio": agg.cache_hits / agg.count if agg.count else 0.0,
+                "bytes_processed": agg.bytes_processed,
+                "bytes_billed": agg.bytes_billed,
+                "slot_ms": agg.slot_ms,
+                "latency_ms": {
+                    **{f"p{q}": percentile(lat, q) for q in PERCENTILES},
+                    "mean": sum(lat) / len(lat) if lat else 0.0,
+                    "max": max(lat) if lat else 0.0,
+                },
+            }
+        return out
+
+    # -- export ---------------------------------------------------------
+    def to_jsonl(self, dest: Union[str, Path, TextIO]) -> int:
+        """Append records as JSON lines; returns number written."""
+        recs = self.records()
+        lines = "".join(json.dumps(asdict(r), sort_keys=True) + "\n" for r in recs)
+        if isinstance(dest, (str, Path)):
+            path = Path(dest)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with path.open("a", encoding="utf-8") as fh:
+                fh.write(lines)
+        else:
+            dest.write(lines)
+        return len(recs)
+
+    def to_prometheus(self, prefix: str = "northstar_bq") -> str:
+        """Prometheus text exposition of cumulative per-template metrics."""
+        with self._lock:
+            aggs = sorted(self._agg.items())
+        out: List[str] = []
+
+        def _counter(metric: str, help_text: str, attr: str) -> None:
+            out.append(f"# HELP {prefix}_{metric} {help_text}")
+            out.append(f"# TYPE {prefix}_{metric} counter")
+            for name, agg in aggs:
+                out.append(f'{prefix}_{metric}{{template="{_esc(name)}"}} {getattr(agg, attr)}')
+
+        _counter("jobs_total", "Query jobs executed.", "count")
+        _counter("job_errors_total", "Query jobs that raised.", "errors")
+        _counter("cache_hits_total", "Jobs answered from the BigQuery result cache.", "cache_hits")
+        _counter("bytes_processed_total", "Bytes processed.", "bytes_processed")
+        _counter("bytes_billed_total", "Bytes billed.", "bytes_billed")
+        _counter("slot_ms_total", "Slot milliseconds consumed.", "slot_ms")
+
+        metric = f"{prefix}_job_latency_seconds"
+        out.append(f"# HELP {metric} Client-observed job latency.")
+        out.append(f"# TYPE {metric} histogram")
+        for name, agg in aggs:
+            label = _esc(name)
+            for bound, n in zip(LATENCY_BUCKETS, agg.buckets):
+                out.append(f'{metric}_bucket{{template="{label}",le="{bound}"}} {n}')
+            out.append(f'{metric}_bucket{{template="{label}",le="+Inf"}} {agg.count}')
+            out.append(f'{metric}_sum{{template="{label}"}} {agg.latency_sum:.6f}')
+            out.append(f'{metric}_count{{template="{label}"}} {agg.count}')
+        return "\n".join(out) + "\n"
+
+
+def _esc(label: str) -> str:
+    return label.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+_DEFAULT = MetricsRegistry()
+
+
+def default_registry() -> MetricsRegistry:
+    """Process-wide registry RealClient records into by default."""
+    return _DEFAULT
+
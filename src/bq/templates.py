@@ -0,0 +1,170 @@
+"""Precompiled SQL template registry.
+
+Scans ``sql/`` once per process and parses each template's placeholders.
+Three dialects are in use across the templates:
+
+    ${NAME}  identifier substitution (RealClient templates)
+    {NAME}   identifier substitution (loader / refresh templates)
+    @name    bound query parameter (never rendered into the text)
+
+Rendering goes through a precompiled segment list (no file I/O, no chained
+``str.replace``) and the rendered text is memoized per value tuple, since
+identifiers such as project / dataset rarely change within a process.
+"""
+from __future__ import annotations
+from dataclasses import dataclass, field
+import functools
+import re
+import threading
+from pathlib import Path
+from typing import Dict, FrozenSet, List, Mapping, Optional, Tuple, Union
+
+SQL_DIR = Path("sql")
+
+_PLACEHOLDER_RE = re.compile(
+    r"\$\{([A-Za-z_][A-Za-z0-9_]*)\}|(?<![\$\w])\{([A-Z_][A-Z0-9_]*)\}"
+)
+_PARAM_RE = re.compile(r"(?<![@\w])@(\w+)")
+_LINE_COMMENT_RE = re.compile(r"--[^\n]*")
+_MEMO_LIMIT = 64
+
+# Segment: literal text or (placeholder name, original token)
+Segment = Union[str, Tuple[str, str]]
+
+
+@functools.lru_cache(maxsize=256)
+def param_names(sql: str) -> FrozenSet[str]:
+    """``@name`` query parameters referenced outside ``--`` comments."""
+    return frozenset(_PARAM_RE.findall(_LINE_COMMENT_RE.sub("", sql)))
+
+
+class TemplateError(ValueError):
+    """Raised when a template is rendered without its required inputs."""
+
+
+@dataclass(eq=False)
+class SqlTemplate:
+    """Parsed template with its placeholder and parameter sets."""
+
+    name: str
+    text: str
+    placeholders: FrozenSet[str]
+    params: FrozenSet[str]
+    segments: Tuple[Segment, ...]
+    _required: Tuple[str, ...] = field(default=(), repr=False)
+    _order: Tuple[str, ...] = field(default=(), repr=False)
+    _memo: Dict[Tuple[str, ...], str] = field(default_factory=dict, repr=False)
+
+    @classmethod
+    def parse(cls, name: str, text: str) -> "SqlTemplate":
+        code = _LINE_COMMENT_RE.sub("", text)
+        required = {a or b for a, b in _PLACEHOLDER_RE.findall(code)}
+        segments: List[Segment] = []
+        pos = 0
+        for m in _PLACEHOLDER_RE.finditer(text):
+            if m.start() > pos:
+                segments.append(text[pos:m.start()])
+            segments.append((m.group(1) or m.group(2), m.group(0)))
+            pos = m.end()
+        if pos < len(text):
+            segments.append(text[pos:])
+        return cls(
+            name=name,
+            text=text,
+            placeholders=frozenset(required),
+            params=param_names(text),
+            segments=tuple(segments),
+            _required=tuple(sorted(required)),
+            _order=tuple(sorted({s[0] for s in segments if not isinstance(s, str)})),
+        )
+
+    def missing(
+        self, values: Mapping[str, object], params: Optional[Mapping[str, object]] = None
+    ) -> List[str]:
+        """Names of placeholders / @params not supplied."""
+        out = [f"${{{p}}}" for p in self._required if p not in values]
+        if params is not None:
+            out.extend(f"@{p}" for p in sorted(self.params) if p not in params)
+        return out
+
+    def render(
+        self, values: Mapping[str, object], params: Optional[Mapping[str, object]] = None
+    ) -> str:
+        """Render identifier placeholders; validates required inputs first.
+
+        ``params`` (when given) is only checked for the template's @names;
+        their values are bound by the client, not rendered.
+        """
+        missing = self.missing(values, params)
+        if missing:
+            raise TemplateError(f"{self.name}: missing {', '.join(missing)}")
+        key = tuple(str(values.get(p)) for p in self._order)
+        cached = self._memo.get(key)
+        if cached is not None:
+            return cached
+        parts: List[str] = []
+        for seg in self.segments:
+            if isinstance(seg, str):
+                parts.append(seg)
+            else:
+                val = values.get(seg[0])
+                # placeholders only mentioned in comments may stay unrendered
+                parts.append(seg[1] if val is None else str(val))
+        out = "".join(parts)
+        if len(self._memo) >= _MEMO_LIMIT:
+            self._memo.clear()
+        self._memo[key] = out
+        return out
+
+
+class TemplateRegistry:
+    """All templates under a directory, parsed once."""
+
+    def __init__(self, sql_dir: Union[str, Path] = SQL_DIR) -> None:
+        self.sql_dir = Path(sql_dir)
+        self._templates: Dict[str, SqlTemplate] = {}
+        self.reload()
+
+    def reload(self) -> None:
+        templates: Dict[str, SqlTemplate] = {}
+        if self.sql_dir.is_dir():
+            for path in sorted(self.sql_dir.glob("*.sql")):
+                templates[path.name] = SqlTemplate.parse(
+                    path.name, path.read_text(encoding="utf-8")
+                )
+        self._templates = templates
+
+    def names(self) -> List[str]:
+        return sorted(self._templates)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._templates
+
+    def get(self, name: str) -> SqlTemplate:
+        try:
+            return self._templates[name]
+        except KeyError:
+            raise FileNotFoundError(f"SQL template not found: {name}") from None
+
+    def render(
+        self,
+        name: str,
+        values: Mapping[str, object],
+        params: Optional[Mapping[str, object]] = None,
+    ) -> str:
+        return self.get(name).render(values, params)
+
+
+_REGISTRIES: Dict[Path, TemplateRegistry] = {}
+_LOCK = threading.Lock()
+
+
+def get_registry(sql_dir: Union[str, Path, None] = None) -> TemplateRegistry:
+    """Process-wide registry for ``sql_dir`` (default ``sql/``)."""
+    key = Path(sql_dir or SQL_DIR).resolve()
+    with _LOCK:
+        reg = _REGISTRIES.get(key)
+        if reg is None:
+            reg = TemplateRegistry(key)
+            _REGISTRIES[key] = reg
+        return reg
@@ -0,0 +1,168 @@
+"""Managed VECTOR INDEX on chunks_emb.embedding (lifecycle and tuning).
+
+Without an index every ML.VECTOR_SEARCH over chunks_emb is a brute-force
+scan, so search bytes and latency grow with the corpus. ``create_index``
+builds ``chunks_emb_vector_idx`` (IVF or TreeAH); BigQuery refreshes it in
+the background and every search over chunks_emb uses it once it covers
+the table (tables under 5000 rows stay brute force). ``index_status`` reads
+INFORMATION_SCHEMA.VECTOR_INDEXES (index_status, coverage_percentage).
+
+Every ML.VECTOR_SEARCH template vector_search runs renders ``options``
+from ${VECTOR_SEARCH_OPTIONS}: ``fraction_lists_to_search`` trades recall for
+latency and ``use_brute_force`` bypasses the index. ``tune`` searches a
+sample of stored embeddings at several fractions and reports recall@k
+against brute force next to latency, for picking the default.
+
+Environment:
+    BQ_VECTOR_SEARCH_FRACTION=0.05   default fraction_lists_to_search
+    BQ_VECTOR_SEARCH_BRUTE_FORCE=1   search without the index
+"""
+from __future__ import annotations
+import json
+import os
+import statistics
+import time
+import uuid
+from typing import Any, Dict, Iterable, List, Optional
+
+INDEX_NAME = "chunks_emb_vector_idx"
+INDEX_TYPES = ("IVF", "TREE_AH")
+CREATE_TEMPLATES = {
+    "IVF": "chunks_emb_vector_index_ivf.sql",
+    "TREE_AH": "chunks_emb_vector_index_tree_ah.sql",
+}
+STATUS_TEMPLATE = "chunks_emb_vector_index_status.sql"
+DROP_TEMPLATE = "chunks_emb_vector_index_drop.sql"
+SAMPLE_TEMPLATE = "chunks_emb_sample.sql"
+PROBE_TEMPLATE = "chunk_vector_search_probe.sql"
+TUNING_FRACTIONS = (0.01, 0.02, 0.05, 0.1, 0.2)
+MAX_NUM_LISTS = 5000  # BigQuery's IVF limit
+
+
+def search_options(
+    fraction_lists_to_search: Optional[float] = None, use_brute_force: Optional[bool] = None
+) -> str:
+    """ML.VECTOR_SEARCH ``options`` JSON; unset arguments come from the environment.
+
+    BigQuery rejects both keys together, so an explicit argument replaces
+    the other key's environment default.
+    """
+    if fraction_lists_to_search is None and use_brute_force is None:
+        use_brute_force = os.getenv("BQ_VECTOR_SEARCH_BRUTE_FORCE", "0") == "1" or None
+        fraction_lists_to_search = None if use_brute_force else _env_fraction()
+    if use_brute_force and fraction_lists_to_search is not None:
+        raise ValueError("use_brute_force and fraction_lists_to_search are exclusive")
+    opts: Dict[str, Any] = {}
+    if use_brute_force:
+        opts["use_brute_force"] = True
+    if fraction_lists_to_search is not None:
+        fraction = float(fraction_lists_to_search)
+        if not 0.0 < fraction <= 1.0:
+            raise ValueError(f"fraction_lists_to_search must be in (0, 1], got {fraction}")
+        opts["fraction_lists_to_search"] = fraction
+    return json.dumps(opts, sort_keys=True)
+
+
+def create_index(
+    client: Any,
+    index_type: str = "IVF",
+    num_lists: Optional[int] = None,
+    leaf_node_embedding_count: Optional[int] = None,
+) -> str:
+    """Create ``chunks_emb_vector_idx`` (no-op if it exists); returns the template run.
+
+    Unset tuning options are left to BigQuery, which sizes them from the
+    table. Changing the type or options means ``drop_index`` first.
+    """
+    kind = index_type.upper()
+    if kind not in INDEX_TYPES:
+        raise ValueError(f"unknown vector index type {index_type!r}; expected one of {INDEX_TYPES}")
+    template = CREATE_TEMPLATES[kind]
+    if kind == "IVF":
+        opts: Dict[str, int] = {}
+        if num_lists is not None:
+            if not 1 <= num_lists <= MAX_NUM_LISTS:
+                raise ValueError(f"num_lists must be in [1, {MAX_NUM_LISTS}], got {num_lists}")
+            opts["num_lists"] = int(num_lists)
+        params = {"IVF_OPTIONS": json.dumps(opts)}
+    else:
+        opts = {}
+        if leaf_node_embedding_count is not None:
+            opts["leaf_node_embedding_count"] = int(leaf_node_embedding_count)
+        params = {"TREE_AH_OPTIONS": json.dumps(opts)}
+    client.run_sql_template(template, params)
+    return template
+
+
+def index_status(client: Any) -> Optional[Dict[str, Any]]:
+    """The chunks_emb row of INFORMATION_SCHEMA.VECTOR_INDEXES, or None."""
+    rows = client.run_sql_template(STATUS_TEMPLATE, {})
+    for r in rows:
+        if r.get("index_name") == INDEX_NAME:
+            return dict(r)
+    return None
+
+
+def drop_index(client: Any) -> None:
+    client.run_sql_template(DROP_TEMPLATE, {})
+
+
+def tune(
+    client: Any,
+    fractions: Iterable[float] = TUNING_FRACTIONS,
+    k: int = 10,
+    sample_size: int = 20,
+) -> List[Dict[str, Any]]:
+    """Recall@k vs latency for each fraction_lists_to_search.
+
+    Queries are ``sample_size`` stored chunk embeddings; the brute-force
+    result of each one is the ground truth. Each setting gets a fresh
+    nonce (no BigQuery query-cache hits) and an untimed warm-up probe.
+    Returns one row per setting ({setting, recall, latency_ms_p50,
+    latency_ms_max, queries}), brute force first.
+    """
+    queries = [
+        r["embedding"]
+        for r in client.run_sql_template(SAMPLE_TEMPLATE, {"sample_size": sample_size})
+        if r.get("embedding") is not None
+    ]
+    truth: List[set] = []
+    settings: List[tuple] = [("brute_force", search_options(use_brute_force=True))]
+    settings += [(f"fraction={f:g}", search_options(f)) for f in fractions]
+    report: List[Dict[str, Any]] = []
+    for label, options in settings:
+        recalls: List[float] = []
+        latencies: List[float] = []
+        base = {"top_k": k, "VECTOR_SEARCH_OPTIONS": options, "nonce": uuid.uuid4().hex}
+        if queries:  # warm-up, untimed; its own nonce so it can't seed a cache hit
+            warm = {**base, "nonce": uuid.uuid4().hex, "query_embedding": queries[0]}
+            client.run_sql_template(PROBE_TEMPLATE, warm)
+        for i, vec in enumerate(queries):
+            started = time.perf_counter()
+            rows = client.run_sql_template(PROBE_TEMPLATE, {**base, "query_embedding": vec})
+            latencies.append((time.perf_counter() - started) * 1000.0)
+            ids = {r.get("chunk_id") for r in rows}
+            if label == "brute_force":
+                truth.append(ids)
+            recalls.append(len(ids & truth[i]) / len(truth[i]) if truth[i] else 1.0)
+        report.append(
+            {
+                "setting": label,
+                "recall": round(statistics.fmean(recalls), 4) if recalls else None,
+                "latency_ms_p50": round(statistics.median(latencies), 1) if latencies else None,
+                "latency_ms_max": round(max(latencies), 1) if latencies else None,
+                "queries": len(queries),
+            }
+        )
+    return report
+
+
+def _env_fraction() -> Optional[float]:
+    raw = os.getenv("BQ_VECTOR_SEARCH_FRACTION", "").strip()
+    if not raw:
+        return None
+    try:
+        value = float(raw)
+    except ValueError:
+        return None
+    return value if 0.0 < value <= 1.0 else None
@@ -1,7 +1,8 @@
 from __future__ import annotations
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List, Dict
+from itertools import islice
+from typing import Any, Iterator, List, Dict, Optional
 
 import streamlit as st
 
@@ -10,6 +11,7 @@ try:
 except Exception:  # pragma: no cover
     from bq.bigquery_client import make_client  # fallback if path differs
 
+from src.bq.script import ScriptBatch
 from pipeline import config as cfg
 
 SQL_DIR = Path("sql")
@@ -21,12 +23,18 @@ VIEW_FILES = [
 
 
 def ensure_views(client) -> None:
-    """Best-effort create/replace views (idempotent)."""
+    """Best-effort create/replace views (idempotent).
+
+    Runs as one script job; views whose stored definition already matches
+    are skipped, so reruns normally submit nothing.
+    """
+    batch = ScriptBatch(client)
     for f in VIEW_FILES:
-        try:
-            client.run_sql_template(f, {})
-        except Exception as exc:  # pragma: no cover - non-fatal
-            st.warning(f"Failed to create view {f}: {exc}")
+        batch.add(f)
+    try:
+        batch.run()
+    except Exception as exc:  # pragma: no cover - non-fatal
+        st.warning(f"Failed to create views {', '.join(VIEW_FILES)}: {exc}")
 
 
 def mask_text(s: str) -> str:
@@ -44,14 +52,37 @@ def mask_text(s: str) -> str:
     return s
 
 
-def query_rows(client, sql: str) -> List[Dict]:
+def query_rows(client, sql: str, params: Optional[Dict[str, Any]] = None) -> List[Dict]:
     try:
-        return client.run_sql_template("_raw.sql", {"raw_sql": sql})
+        return client.run_sql_template("_raw.sql", {"raw_sql": sql, **(params or {})})
     except Exception as exc:  # pragma: no cover
         st.error(f"Query failed: {exc}")
         return []
 
 
+def query_frame(client, sql: str, params: Optional[Dict[str, Any]] = None):
+    """Query straight into a pandas DataFrame (columnar; no per-row dicts)."""
+    try:
+        return client.run_sql_template_arrow(
+            "_raw.sql", {"raw_sql": sql, **(params or {})}, as_pandas=True
+        )
+    except Exception as exc:  # pragma: no cover
+        st.error(f"Query failed: {exc}")
+        return None
+
+
+def iter_query_rows(
+    client, sql: str, params: Optional[Dict[str, Any]] = None, page_size: int = 500
+) -> Iterator[Dict]:
+    """Stream rows page by page; memory stays bounded by ``page_size``."""
+    try:
+        yield from client.run_sql_template_iter(
+            "_raw.sql", {"raw_sql": sql, **(params or {})}, page_size=page_size
+        )
+    except Exception as exc:  # pragma: no cover
+        st.error(f"Query failed: {exc}")
+
+
 def main():  # pragma: no cover - UI function
     st.set_page_config(page_title="NorthStar Issues Dashboard", layout="wide")
     st.title("Common Issues Dashboard (Read-only)")
@@ -69,10 +100,12 @@ def main():  # pragma: no cover - UI function
     severities = ["P0", "P1", "P2", "P3", "Unknown"]
     sel_sev = st.sidebar.multiselect("Severity", severities, default=severities)
 
-    # Build filter predicates
-    start_ts = f"TIMESTAMP('{start_date} 00:00:00 UTC')"
-    end_ts = f"TIMESTAMP('{end_date} 23:59:59 UTC')"
-    sev_in = ",".join(f"'" + s + "'" for s in sel_sev) or "'__none__'"
+    # Filter values are bound as query parameters so SQL text stays stable
+    filters = {
+        "start_ts": datetime.combine(start_date, datetime.min.time(), timezone.utc),
+        "end_ts": datetime.combine(end_date, datetime.max.time(), timezone.utc),
+        "severities": list(sel_sev) or ["__none__"],
+    }
 
     dataset_fq = f"{cfg.PROJECT_ID}.{cfg.DATASET}"
 
@@ -82,11 +115,11 @@ def main():  # pragma: no cover - UI function
         sql_common = f"""
         SELECT fingerprint, issue_example, count, last_seen
         FROM `{dataset_fq}.view_common_issues`
-        WHERE last_seen BETWEEN {start_ts} AND {end_ts}
+        WHERE last_seen BETWEEN @start_ts AND @end_ts
         ORDER BY count DESC
         LIMIT 50
         """
-        rows = query_rows(client, sql_common)
+        rows = query_rows(client, sql_common, filters)
         for r in rows:
             r["issue_example"] = mask_text(r.get("issue_example", ""))
         st.dataframe(rows, use_container_width=True, hide_index=True)
@@ -97,14 +130,12 @@ def main():  # pragma: no cover - UI function
         st.subheader("Severity Trends (Weekly)")
         sql_sev = f"""
         SELECT week, severity, count FROM `{dataset_fq}.view_issues_by_severity`
-        WHERE week BETWEEN DATE_TRUNC({start_ts}, WEEK) AND DATE_TRUNC({end_ts}, WEEK)
-          AND severity IN ({sev_in})
+        WHERE week BETWEEN DATE_TRUNC(@start_ts, WEEK) AND DATE_TRUNC(@end_ts, WEEK)
+          AND severity IN UNNEST(@severities)
         ORDER BY week, severity
         """
-        sev_rows = query_rows(client, sql_sev)
-        if sev_rows:
-            import pandas as pd
-            df = pd.DataFrame(sev_rows)
+        df = query_frame(client, sql_sev, filters)
+        if df is not None and not df.empty:
             pivot = df.pivot_table(index="week", columns="severity", values="count", fill_value=0)
             st.area_chart(pivot)
         else:
@@ -123,20 +154,23 @@ def main():  # pragma: no cover - UI function
     ORDER BY sz.size DESC, d.group_id
     LIMIT 200
     """
-    dup_rows = query_rows(client, sql_dup)[:50]
     from collections import defaultdict
     groups: Dict[str, List[Dict]] = defaultdict(list)
-    for r in dup_rows:
+    # only the first 50 rows are rendered; stop reading once they are in
+    for r in islice(iter_query_rows(client, sql_dup, page_size=50), 50):
         groups[r["group_id"]].append(r)
     for gid, members in list(groups.items())[:50]:
         with st.expander(f"Group {gid} (size={members[0]['size']})"):
-            member_ids = ",".join(f"'" + m['member_chunk_id'] + "'" for m in members[:10])
+            member_ids = [m["member_chunk_id"] for m in members[:10]]
             sql_texts = f"""
             SELECT chunk_id, SUBSTR(text,1,200) AS text
             FROM `{dataset_fq}.chunks`
-            WHERE chunk_id IN ({member_ids})
+            WHERE chunk_id IN UNNEST(@member_ids)
             """
-            texts = {r['chunk_id']: mask_text(r.get('text','')) for r in query_rows(client, sql_texts)}
+            texts = {
+                r["chunk_id"]: mask_text(r.get("text", ""))
+                for r in query_rows(client, sql_texts, {"member_ids": member_ids})
+            }
             for m in members:
                 st.write({
                     "chunk_id": m["member_chunk_id"],
@@ -0,0 +1,664 @@
+"""In-process approximate nearest-neighbour index mirroring chunks_emb.
+
+``ChunkIndex`` is an IVF (inverted file) index over unit-normalized numpy
+vectors: k-means centroids partition the chunks, and a query scores only
+the rows in its ``nprobe`` closest lists. Distances are cosine distances
+(1 - cos), the ML.VECTOR_SEARCH default, and search returns rows shaped
+like chunk_vector_search.sql (chunk_id, text, meta, distance), so
+``hybrid._normalize_rows`` applies unchanged.
+
+BigQuery stays the source of truth:
+    * ``sync(client)`` diffs chunk ids against chunks_emb and fetches only
+      new rows (chunk_embeddings_snapshot.sql), dropping removed ones
+    * ``save`` / ``load`` persist a snapshot (.npz) between processes
+    * hybrid.vector_search embeds the query once and searches the index
+      before BigQuery; it falls back to BigQuery when the index is empty
+      or the query cannot be embedded, and skips the index when the call
+      passes ``search_options`` (those tune ML.VECTOR_SEARCH)
+
+Small indexes (< BRUTE_FORCE_ROWS) are scanned exactly. New rows join
+their nearest existing list; ``train()`` re-clusters once the index has
+grown well past its training size (done by ``sync``).
+
+``quantization="int8"`` or ``"binary"`` (src/retrieval/quantize.py) scans
+compact codes instead of the float32 matrix and rescores the best
+``k * rescore`` candidates exactly. Quantized snapshots keep the
+full-precision vectors in a ``.vectors`` sidecar directory, written in the
+embedding snapshot format (src/retrieval/snapshot.py) that ``load`` maps
+read-only, so resident memory is the codes plus the rescored rows (until
+new rows are upserted, which copies the matrix back into memory).
+``calibrate()`` raises ``rescore`` until recall@k against an exact scan
+(what ML.VECTOR_SEARCH returns without a vector index) is within
+``tolerance``.
+
+Environment:
+    RETRIEVAL_ANN_INDEX      snapshot path loaded by default_index()
+    RETRIEVAL_ANN_NPROBE     lists probed per query (default: nlist / 8, >= 4)
+    RETRIEVAL_ANN_RECALL_TOLERANCE  allowed recall@k loss of quantized
+                             search in calibrate() (default 0.02)
+
+numpy is imported lazily (``ann`` extra).
+"""
+from __future__ import annotations
+import importlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
+
+from ..bq.bigquery_client import BigQueryClientBase
+from ..bq.telemetry import JobMetrics, MetricsRegistry, default_registry
+from . import quantize, snapshot
+from .query_embed import as_float_list
+
+IDS_TEMPLATE = "chunk_embedding_ids.sql"
+SNAPSHOT_TEMPLATE = "chunk_embeddings_snapshot.sql"
+SEARCH_METRIC = "ann_search"  # telemetry template tag for index queries
+
+BRUTE_FORCE_ROWS = 4096
+SYNC_BATCH = 5000  # chunk ids per snapshot fetch during incremental sync
+TRAIN_SAMPLE = 50000
+KMEANS_ITERS = 10
+RETRAIN_GROWTH = 2.0  # re-cluster once rows exceed this multiple of the trained size
+RESCORE_FACTOR = 4  # quantized search: exact rescoring of k * rescore candidates
+MAX_RESCORE = 256
+RECALL_TOLERANCE = 0.02
+CALIBRATION_QUERIES = 100
+
+
+def _np() -> Any:
+    try:
+        return importlib.import_module("numpy")
+    except Exception as exc:
+        raise RuntimeError(
+            "numpy missing; install the 'ann' extra for the in-process index."
+        ) from exc
+
+
+def _normalize(np: Any, m: Any) -> Any:
+    norms = np.linalg.norm(m, axis=-1, keepdims=True)
+    return np.divide(m, norms, out=np.zeros_like(m), where=norms > 0)
+
+
+def _meta_dict(value: Any) -> Dict[str, Any]:
+    if isinstance(value, dict):
+        return value
+    if isinstance(value, str):
+        try:
+            out = json.loads(value)
+        except ValueError:
+            return {}
+        return out if isinstance(out, dict) else {}
+    return {}
+
+
+class ChunkIndex:
+    """IVF index of chunk embeddings with type filtering."""
+
+    def __init__(
+        self,
+        nprobe: Optional[int] = None,
+        metrics: Optional[MetricsRegistry] = None,
+        seed: int = 0,
+        quantization: Optional[str] = None,
+        rescore: Optional[int] = None,
+    ) -> None:
+        self.nprobe = nprobe
+        self.metrics = metrics
+        self.seed = seed
+        self.quantization = quantize.check_scheme(quantization)
+        self.rescore = max(1, int(rescore or RESCORE_FACTOR))
+        self._lock = threading.RLock()
+        self._dim: Optional[int] = None
+        self._ids: List[str] = []
+        self._texts: List[Optional[str]] = []
+        self._metas: List[Dict[str, Any]] = []
+        self._types: List[Optional[str]] = []
+        self._row_of: Dict[str, int] = {}
+        self._vectors: Any = None  # (rows, dim) float32, unit norm (memmap after load)
+        self._codes: Any = None  # quantized rows (quantize.encode), same order
+        self._scale: Any = None  # int8 per-dimension scale
+        self._alive: Any = None  # bool per row
+        self._pending: List[Any] = []  # vectors appended since the last flush
+        self._pending_dead: List[int] = []  # replaced / removed rows not yet flushed
+        self._centroids: Any = None
+        self._assign: Any = None  # list id per row
+        self._offsets: Any = None  # CSR over rows sorted by list
+        self._order: Any = None
+        self._lists_dirty = True
+        self._type_code: Dict[Optional[str], int] = {}
+        self._type_codes: Any = None
+        self._trained_rows = 0
+        self.synced_at: Optional[float] = None
+
+    # -- size / state ---------------------------------------------------
+    def __len__(self) -> int:
+        return len(self._row_of)
+
+    @property
+    def dim(self) -> Optional[int]:
+        return self._dim
+
+    @property
+    def nlist(self) -> int:
+        return 0 if self._centroids is None else int(self._centroids.shape[0])
+
+    def __contains__(self, chunk_id: object) -> bool:
+        return chunk_id in self._row_of
+
+    def memory_bytes(self) -> Dict[str, int]:
+        """Bytes of the scanned arrays: codes, and resident / mapped vectors."""
+        with self._lock:
+            vectors = 0 if self._vectors is None else int(self._vectors.nbytes)
+            mapped = _is_mapped(self._vectors)
+            return {
+                "codes": 0 if self._codes is None else int(self._codes.nbytes),
+                "vectors": 0 if mapped else vectors,
+                "vectors_mapped": vectors if mapped else 0,
+            }
+
+    def ids(self) -> List[str]:
+        with self._lock:
+            return list(self._row_of)
+
+    def details(self, chunk_ids: Iterable[str]) -> List[Dict[str, Any]]:
+        """get_chunk_details.sql-shaped rows for the ids held by the index."""
+        with self._lock:
+            rows = [self._row_of.get(cid) for cid in chunk_ids]
+            return [
+                {"chunk_id": self._ids[r], "text": self._texts[r], "meta": self._metas[r]}
+                for r in rows
+                if r is not None
+            ]
+
+    # -- writes ----------------------------------------------------------
+    def upsert(self, rows: Iterable[Dict[str, Any]]) -> int:
+        """Add or replace rows (chunk_id, embedding, text, meta[, type])."""
+        np = _np()
+        added = 0
+        with self._lock:
+            for r in rows:
+                vec = as_float_list(r.get("embedding"))
+                cid = r.get("chunk_id")
+                if vec is None or cid is None:
+                    continue
+                if self._dim is None:
+                    self._dim = len(vec)
+                if len(vec) != self._dim:
+                    raise ValueError(f"{cid}: embedding width {len(vec)} != index width {self._dim}")
+                cid = str(cid)
+                old = self._row_of.get(cid)
+                if old is not None:
+                    self._kill(old)
+                meta = _meta_dict(r.get("meta"))
+                self._row_of[cid] = len(self._ids)
+                self._ids.append(cid)
+                self._texts.append(r.get("text"))
+                self._metas.append(meta)
+                self._types.append(r.get("type") or meta.get("type"))
+                self._pending.append(np.asarray(vec, dtype=np.float32))
+                added += 1
+            if added:
+                self._lists_dirty = True
+        return added
+
+    def remove(self, chunk_ids: Iterable[str]) -> int:
+        removed = 0
+        with self._lock:
+            for cid in chunk_ids:
+                row = self._row_of.pop(str(cid), None)
+                if row is not None:
+                    self._kill(row, forget=False)
+                    removed += 1
+            if removed:
+                self._lists_dirty = True
+        return removed
+
+    def _kill(self, row: int, forget: bool = True) -> None:
+        flushed = 0 if self._vectors is None else len(self._vectors)
+        if row < flushed:
+            self._alive[row] = False
+        else:
+            self._pending_dead.append(row)
+        if forget:
+            self._row_of.pop(self._ids[row], None)
+
+    def _flush(self) -> None:
+        """Fold pending vectors into the matrix; assign them to lists."""
+        if not self._pending:
+            return
+        np = _np()
+        new = _normalize(np, np.stack(self._pending))
+        self._pending = []
+        if self._vectors is None:
+            self._vectors = new
+            self._alive = np.ones(len(new), dtype=bool)
+        else:
+            self._vectors = np.concatenate([self._vectors, new])
+            self._alive = np.concatenate([self._alive, np.ones(len(new), dtype=bool)])
+        if self.quantization:
+            if self._codes is None or self._scale is None and self.quantization == "int8":
+                self._encode_all()
+            else:
+                codes = quantize.encode(np, self.quantization, new, self._scale)
+                self._codes = np.concatenate([self._codes, codes])
+        if self._pending_dead:
+            self._alive[self._pending_dead] = False
+            self._pending_dead = []
+        if self._centroids is not None:
+            self._assign = np.concatenate([self._assign, self._nearest_list(new)])
+        self._lists_dirty = True
+
+    def _compact(self) -> None:
+        """Drop dead rows (after many removals / replacements)."""
+        np = _np()
+        self._flush()
+        keep = np.flatnonzero(self._alive)
+        self._vectors = self._vectors[keep]
+        self._alive = np.ones(len(keep), dtype=bool)
+        if self._codes is not None:
+            self._codes = self._codes[keep]
+        if self._assign is not None:
+            self._assign = self._assign[keep]
+        self._ids = [self._ids[i] for i in keep]
+        self._texts = [self._texts[i] for i in keep]
+        self._metas = [self._metas[i] for i in keep]
+        self._types = [self._types[i] for i in keep]
+        self._row_of = {cid: i for i, cid in enumerate(self._ids)}
+        self._lists_dirty = True
+
+    def _encode_all(self) -> None:
+        """(Re)quantize every row; int8 scales are refit to the current rows."""
+        np = _np()
+        if not self.quantization or self._vectors is None:
+            self._codes = self._scale = None
+            return
+        if self.quantization == "int8":
+            self._scale = quantize.int8_scale(np, self._vectors)
+        codes = [
+            quantize.encode(np, self.quantization, self._vectors[i:i + 65536], self._scale)
+            for i in range(0, len(self._vectors), 65536)
+        ]
+        self._codes = np.concatenate(codes)
+
+    # -- clustering ------------------------------------------------------
+    def train(self, nlist: Optional[int] = None) -> int:
+        """(Re)build the IVF lists; returns the list count (1 = exact scan)."""
+        np = _np()
+        with self._lock:
+            self._flush()
+            if self._vectors is not None and not self._alive.all():
+                self._compact()
+            if self.quantization:
+                self._encode_all()
+            n = len(self._ids)
+            if n < BRUTE_FORCE_ROWS:
+                self._centroids = self._assign = None
+                self._trained_rows = n
+                self._lists_dirty = True
+                return 1
+            nlist = int(nlist or max(8, round(n ** 0.5)))
+            rng = np.random.default_rng(self.seed)
+            sample_idx = rng.choice(n, size=min(n, max(TRAIN_SAMPLE, nlist * 40)), replace=False)
+            sample = self._vectors[sample_idx]
+            centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+            for _ in range(KMEANS_ITERS):
+                assign = np.argmax(sample @ centroids.T, axis=1)
+                sums = np.zeros_like(centroids)
+                np.add.at(sums, assign, sample)
+                counts = np.bincount(assign, minlength=nlist)
+                empty = counts == 0
+                if empty.any():  # reseed empty lists from random rows
+                    sums[empty] = sample[rng.choice(len(sample), size=int(empty.sum()))]
+                centroids = _normalize(np, sums)
+            self._centroids = centroids.astype(np.float32)
+            self._assign = self._nearest_list(self._vectors)
+            self._trained_rows = n
+            self._lists_dirty = True
+            return nlist
+
+    def _nearest_list(self, vectors: Any) -> Any:
+        np = _np()
+        out = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), 65536):
+            block = vectors[start:start + 65536]
+            out[start:start + len(block)] = np.argmax(block @ self._centroids.T, axis=1)
+        return out
+
+    def _ensure_lists(self) -> None:
+        self._flush()
+        if not self._lists_dirty:
+            return
+        np = _np()
+        if self._alive is not None and (~self._alive).sum() > 0.25 * len(self._alive):
+            self._compact()
+        if self._centroids is not None:
+            self._order = np.argsort(self._assign, kind="stable")
+            counts = np.bincount(self._assign, minlength=self.nlist)
+            self._offsets = np.concatenate([[0], np.cumsum(counts)])
+        self._type_code = {}
+        codes = [self._type_code.setdefault(t, len(self._type_code)) for t in self._types]
+        self._type_codes = np.asarray(codes, dtype=np.int32)
+        self._lists_dirty = False
+
+    # -- queries ---------------------------------------------------------
+    def search(
+        self,
+        query_vec: Sequence[float],
+        k: int = 5,
+        types: Optional[Sequence[str]] = None,
+        nprobe: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Top-k rows (chunk_vector_search.sql shape), nearest first."""
+        np = _np()
+        started = time.perf_counter()
+        with self._lock:
+            self._ensure_lists()
+            if self._vectors is None or not len(self):
+                return []
+            q = _normalize(np, np.asarray(query_vec, dtype=np.float32))
+            if q.shape[0] != self._dim:
+                raise ValueError(f"query width {q.shape[0]} != index width {self._dim}")
+            wanted = None
+            if types:
+                wanted = np.asarray(
+                    [self._type_code[t] for t in types if t in self._type_code], dtype=np.int32
+                )
+            if wanted is not None and not len(wanted):
+                rows, scores = [], []  # no chunk of the requested types
+            else:
+                rows, scores = self._search_rows(np, q, k, wanted, nprobe, self.rescore)
+            out: List[Dict[str, Any]] = [
+                {
+                    "chunk_id": self._ids[r],
+                    "text": self._texts[r],
+                    "meta": self._metas[r],
+                    "distance": max(0.0, 1.0 - float(score)),
+                }
+                for r, score in zip(rows, scores)
+            ]
+        if self.metrics is not None:
+            self.metrics.record(
+                JobMetrics(SEARCH_METRIC, (time.perf_counter() - started) * 1000.0, rows=len(out))
+            )
+        return out
+
+    def _search_rows(
+        self, np: Any, q: Any, k: int, wanted: Any, nprobe: Optional[int], rescore: int
+    ) -> Any:
+        """(rows, similarities) of the top k, best first; quantized: coarse then exact."""
+        cand = self._candidates(np, q, k, wanted, nprobe)
+        if len(cand) == 0:
+            return [], []
+        shortlist = k * rescore
+        if self._codes is not None and len(cand) > shortlist:
+            coarse = quantize.coarse_scores(
+                np, self.quantization, self._codes, q, self._scale, rows=cand
+            )
+            # sorted rows keep the exact pass's reads sequential in a mapped matrix
+            cand = np.sort(cand[np.argpartition(-coarse, shortlist - 1)[:shortlist]])
+        scores = self._vectors[cand] @ q
+        top = min(k, len(cand))
+        part = np.argpartition(-scores, top - 1)[:top]
+        part = part[np.argsort(-scores[part], kind="stable")]
+        return cand[part], scores[part]
+
+    def calibrate(
+        self,
+        k: int = 10,
+        tolerance: Optional[float] = None,
+        queries: int = CALIBRATION_QUERIES,
+    ) -> Dict[str, Any]:
+        """Raise ``rescore`` until recall@k vs an exact scan is >= 1 - tolerance.
+
+        Queries are stored vectors (their own row excluded from both result
+        lists). Returns {recall, rescore, k, queries}; unquantized indexes
+        only report recall (IVF probing is the only loss there).
+        """
+        np = _np()
+        tol = _env_tolerance() if tolerance is None else float(tolerance)
+        with self._lock:
+            self._ensure_lists()
+            alive = np.flatnonzero(self._alive) if self._alive is not None else np.zeros(0, int)
+            if len(alive) <= k:
+                return {"recall": 1.0, "rescore": self.rescore, "k": k, "queries": 0}
+            rng = np.random.default_rng(self.seed)
+            qrows = np.sort(rng.choice(alive, size=min(queries, len(alive)), replace=False))
+            qmat = np.asarray(self._vectors[qrows], dtype=np.float32)
+            exact = _exact_top(np, self._vectors, alive, qmat, k + 1)
+
+            def recall(rescore: int) -> float:
+                hits = 0
+                for qi, row in enumerate(qrows):
+                    got, _ = self._search_rows(np, qmat[qi], k + 1, None, None, rescore)
+                    want = [r for r in exact[qi] if r != row][:k]
+                    hits += len(set(want) & {r for r in got if r != row})
+                return hits / float(k * len(qrows))
+
+            rescore = self.rescore
+            measured = recall(rescore)
+            while self._codes is not None and measured < 1.0 - tol and rescore < MAX_RESCORE:
+                rescore = min(MAX_RESCORE, rescore * 2)
+                measured = recall(rescore)
+            self.rescore = rescore
+        return {"recall": round(measured, 4), "rescore": rescore, "k": k, "queries": len(qrows)}
+
+    def _candidates(self, np: Any, q: Any, k: int, wanted: Any, nprobe: Optional[int]) -> Any:
+        def keep(rows: Any) -> Any:
+            rows = rows[self._alive[rows]]
+            if wanted is not None:
+                rows = rows[np.isin(self._type_codes[rows], wanted)]
+            return rows
+
+        if self._centroids is None:
+            return keep(np.arange(len(self._alive)))
+        nlist = self.nlist
+        probe = int(nprobe or self.nprobe or _env_nprobe() or max(4, nlist // 8))
+        ranked = np.argsort(-(self._centroids @ q))
+        while True:
+            lists = ranked[: min(probe, nlist)]
+            rows = np.concatenate(
+                [self._order[self._offsets[c]:self._offsets[c + 1]] for c in lists]
+            )
+            rows = keep(rows)
+            if len(rows) >= k or probe >= nlist:
+                return rows
+            probe *= 2  # sparse type filter: widen the probe
+
+    # -- BigQuery sync ---------------------------------------------------
+    def sync(self, client: BigQueryClientBase, full: bool = False) -> Dict[str, int]:
+        """Mirror chunks_emb: fetch new chunk ids, drop removed ones.
+
+        ``full`` re-reads every row (picks up re-embedded chunks).
+        """
+        removed = 0
+        if full or not len(self):
+            fetched = self.upsert(
+                client.run_sql_template_iter(SNAPSHOT_TEMPLATE, {"chunk_ids": []})
+            )
+            if full:
+                current = {str(r["chunk_id"]) for r in client.run_sql_template_iter(IDS_TEMPLATE, {})}
+                removed = self.remove(set(self.ids()) - current)
+        else:
+            current = {str(r["chunk_id"]) for r in client.run_sql_template_iter(IDS_TEMPLATE, {})}
+            known = set(self.ids())
+            removed = self.remove(known - current)
+            new = sorted(current - known)
+            fetched = 0
+            for start in range(0, len(new), SYNC_BATCH):
+                fetched += self.upsert(
+                    client.run_sql_template_iter(
+                        SNAPSHOT_TEMPLATE, {"chunk_ids": new[start:start + SYNC_BATCH]}
+                    )
+                )
+        if len(self) >= BRUTE_FORCE_ROWS and (
+            self._centroids is None or len(self) > RETRAIN_GROWTH * max(1, self._trained_rows)
+        ):
+            self.train()
+        self.synced_at = time.time()
+        return {"added": fetched, "removed": removed, "rows": len(self), "nlist": max(1, self.nlist)}
+
+    # -- persistence -----------------------------------------------------
+    def save(self, path: Union[str, Path]) -> Path:
+        """Write the snapshot; quantized indexes add a ``.vectors`` embedding snapshot."""
+        np = _np()
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            self._flush()
+            if self._vectors is not None and not self._alive.all():
+                self._compact()
+            dim = self._dim or 0
+            vectors = self._vectors if self._vectors is not None else np.zeros((0, dim), np.float32)
+            if self.quantization:
+                # swapped in by rename, never truncated: the old one may still be mapped
+                snapshot.write_snapshot(
+                    (
+                        {"chunk_id": cid, "embedding": vectors[i], "type": self._types[i],
+                         "meta": self._metas[i]}
+                        for i, cid in enumerate(self._ids)
+                    ),
+                    _vectors_path(path),
+                    normalize=False,  # rows are unit norm already; keep them bit-identical
+                )
+            arrays = {
+                "vectors": np.zeros((0, dim), np.float32) if self.quantization else vectors,
+                "ids": np.array(self._ids, dtype=str),
+                "texts": np.array([t or "" for t in self._texts], dtype=str),
+                "metas": np.array([json.dumps(m, default=str) for m in self._metas], dtype=str),
+                "types": np.array([t or "" for t in self._types], dtype=str),
+                "synced_at": np.array([self.synced_at or 0.0]),
+            }
+            if self._centroids is not None:
+                arrays["centroids"] = self._centroids
+                arrays["assign"] = self._assign
+            if self.quantization:
+                if self._codes is None:
+                    self._encode_all()
+                arrays["quantization"] = np.array([self.quantization])
+                arrays["rescore"] = np.array([self.rescore])
+                arrays["codes"] = self._codes
+                if self._scale is not None:
+                    arrays["scale"] = self._scale
+            with path.open("wb") as fh:
+                np.savez(fh, **arrays)
+        return path
+
+    @classmethod
+    def load(cls, path: Union[str, Path], **kwargs: Any) -> "ChunkIndex":
+        """Read a snapshot; ``quantization=`` re-encodes (``"none"`` drops codes)."""
+        np = _np()
+        path = Path(path)
+        with np.load(path, allow_pickle=False) as data:
+            saved = str(data["quantization"][0]) if "quantization" in data else None
+            kwargs.setdefault("quantization", saved)
+            if "rescore" in data:
+                kwargs.setdefault("rescore", int(data["rescore"][0]))
+            idx = cls(**kwargs)
+            if saved:
+                snap = snapshot.EmbeddingSnapshot.open(_vectors_path(path))
+                if len(snap) != len(data["ids"]):
+                    raise ValueError(
+                        f"{path}: vectors sidecar has {len(snap)} rows, "
+                        f"index has {len(data['ids'])}"
+                    )
+                vectors = snap.embeddings
+                if saved == idx.quantization:
+                    idx._codes = data["codes"]
+                    idx._scale = data["scale"] if "scale" in data else None
+            else:
+                vectors = data["vectors"].astype(np.float32)
+            idx._ids = [str(v) for v in data["ids"]]
+            idx._texts = [str(v) for v in data["texts"]]
+            idx._metas = [json.loads(str(v)) for v in data["metas"]]
+            idx._types = [str(v) or None for v in data["types"]]
+            if "centroids" in data:
+                idx._centroids = data["centroids"]
+                idx._assign = data["assign"].astype(np.int32)
+            synced = float(data["synced_at"][0])
+        idx._row_of = {cid: i for i, cid in enumerate(idx._ids)}
+        if len(vectors):
+            idx._vectors = vectors
+            idx._alive = np.ones(len(vectors), dtype=bool)
+            idx._dim = int(vectors.shape[1])
+        idx._trained_rows = len(idx._ids)
+        idx.synced_at = synced or None
+        if idx.quantization and idx._codes is None:
+            idx._encode_all()
+        return idx
+
+
+def _vectors_path(path: Path) -> Path:
+    return path.with_suffix(".vectors")
+
+
+def _is_mapped(arr: Any) -> bool:
+    """True for a numpy memmap (or a view of one)."""
+    while arr is not None:
+        if type(arr).__name__ == "memmap":
+            return True
+        arr = getattr(arr, "base", None)
+    return False
+
+
+def _exact_top(np: Any, vectors: Any, rows: Any, queries: Any, k: int) -> List[List[int]]:
+    """Exact top-k rows per query (cosine), scanned in blocks."""
+    best_rows = np.zeros((len(queries), 0), dtype=np.int64)
+    best = np.zeros((len(queries), 0), dtype=np.float32)
+    for start in range(0, len(rows), 65536):
+        block = rows[start:start + 65536]
+        scores = np.concatenate([best, queries @ np.asarray(vectors[block]).T], axis=1)
+        ids = np.concatenate([best_rows, np.broadcast_to(block, (len(queries), len(block)))], axis=1)
+        top = min(k, scores.shape[1])
+        part = np.argpartition(-scores, top - 1, axis=1)[:, :top]
+        best = np.take_along_axis(scores, part, axis=1)
+        best_rows = np.take_along_axis(ids, part, axis=1)
+    order = np.argsort(-best, axis=1, kind="stable")
+    return np.take_along_axis(best_rows, order, axis=1).tolist()
+
+
+def _env_tolerance() -> float:
+    raw = os.getenv("RETRIEVAL_ANN_RECALL_TOLERANCE")
+    try:
+        return min(1.0, max(0.0, float(raw))) if raw else RECALL_TOLERANCE
+    except ValueError:
+        return RECALL_TOLERANCE
+
+
+def _env_nprobe() -> Optional[int]:
+    raw = os.getenv("RETRIEVAL_ANN_NPROBE")
+    try:
+        return max(1, int(raw)) if raw else None
+    except ValueError:
+        return None
+
+
+_DEFAULT: Optional[ChunkIndex] = None
+_DEFAULT_LOCK = threading.Lock()
+_DEFAULT_LOADED = False
+
+
+def default_index() -> Optional[ChunkIndex]:
+    """Index loaded once from RETRIEVAL_ANN_INDEX (None if unset / unreadable)."""
+    global _DEFAULT, _DEFAULT_LOADED
+    with _DEFAULT_LOCK:
+        if not _DEFAULT_LOADED:
+            _DEFAULT_LOADED = True
+            path = os.getenv("RETRIEVAL_ANN_INDEX")
+            if path and Path(path).exists():
+                try:
+                    _DEFAULT = ChunkIndex.load(path, metrics=default_registry())
+                except Exception:  # pragma: no cover - corrupt snapshot
+                    _DEFAULT = None
+        return _DEFAULT
+
+
+def set_default_index(index: Optional[ChunkIndex]) -> None:
+    """Install (or clear) the process-wide index used by vector_search."""
+    global _DEFAULT, _DEFAULT_LOADED
+    with _DEFAULT_LOCK:
+        _DEFAULT = index
+        _DEFAULT_LOADED = True
+
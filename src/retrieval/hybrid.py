@@ -1,12 +1,64 @@
 """Hybrid retrieval (Phase 1) using vector search SQL template."""
 
 from __future__ import annotations
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+import heapq
+from itertools import islice
 import logging
-from typing import Any, Dict, List, Optional, Set
+import os
+import re
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 from ..bq.bigquery_client import BigQueryClientBase
+from ..bq.async_client import AsyncBigQueryClient
+from ..bq import partitions, vector_index
+from . import ann, lexical, neighbor_graph, semantic_cache as semantic
+from .query_embed import (
+    TEMPLATE_NAME as EMBED_TEMPLATE,
+    cached_embedding,
+    embed_query,
+    embedding_model,
+    remember_embedding,
+    remember_from_rows,
+)
 
 logger = logging.getLogger(__name__)
 MAX_K = 8
+BATCH_SIZE = 500  # query texts per job in vector_search_batch
+RRF_K = 60  # reciprocal rank fusion constant: score = sum 1 / (RRF_K + rank)
+SEARCH_MODES = ("vector", "hybrid_sql")
+HYBRID_CANDIDATES = 4  # per-side candidates in chunk_hybrid_search.sql, times k
+TEXT_SEARCH_TEMPLATE = "chunk_text_search.sql"
+SEARCH_INDEX_TEMPLATE = "chunks_search_index_ddl.sql"  # core.cli build-search-index
+
+
+@dataclass
+class SearchStep:
+    """One search path of a plan; a failed step falls through to the next."""
+
+    # "text_search", "hybrid_sql", "ann", "partitions", "fused_graph", or the
+    # base template of the last step ("chunk_vector_search" / "vector_search")
+    kind: str
+    fallback: bool = True  # failures log and try the next step
+    conditional: bool = False  # may pass on a successful job (text_search below k rows)
+
+
+@dataclass
+class SearchPlan:
+    """How one vector_search call is answered; built by _plan_search."""
+
+    query_text: str
+    k: int
+    types: Optional[List[str]]
+    graph_boost: float
+    expand_neighbors: int
+    search_options: Optional[Dict[str, Any]]
+    index: Optional["ann.ChunkIndex"]
+    graph: Optional["neighbor_graph.NeighborGraph"]  # None: expand through BigQuery
+    search: Optional[str]  # SEARCH() query of the hybrid_sql steps
+    vec: Optional[List[float]]  # query vector once known (*_by_vec.sql templates)
+    steps: List[SearchStep] = field(default_factory=list)
 
 
 def vector_search(
@@ -16,36 +68,193 @@ def vector_search(
     types: Optional[List[str]] = None,
     graph_boost: float = 0.0,
     expand_neighbors: int = 5,
+    index: Optional["ann.ChunkIndex"] = None,
+    graph: Optional["neighbor_graph.NeighborGraph"] = None,
+    mode: Optional[str] = None,
+    search_options: Optional[Dict[str, Any]] = None,
+    cache: Optional["semantic.SemanticCache"] = None,
 ) -> List[Dict[str, Any]]:
     """Vector search with optional type filtering and graph expansion.
 
-    If types are specified, uses chunk_vector_search for filtering.
-    Otherwise falls back to simple vector_search for backwards compatibility.
+    The search paths and their order are decided by _plan_search;
+    plan_templates lists the jobs without running them.
 
     Parameters
     ----------
+    types : list of str, optional
+        Chunk types to keep (chunk_vector_search, [] keeps every type); None
+        searches the Phase 0 table
     graph_boost : float
         Graph expansion boost factor (0.0 = disabled, 0.2 = default)
     expand_neighbors : int
         Max neighbors to expand per initial result
+    index : ChunkIndex, optional
+        In-process index to query instead of ML.VECTOR_SEARCH
+    graph : NeighborGraph, optional
+        In-process neighbor graph used for expansion (hop or PPR)
+    mode : str, optional
+        "vector" (default) or "hybrid_sql" (keyword + vector fused in BigQuery)
+    search_options : dict, optional
+        ``fraction_lists_to_search`` or ``use_brute_force`` for the vector
+        index (default: BQ_VECTOR_SEARCH_FRACTION / BQ_VECTOR_SEARCH_BRUTE_FORCE)
+    cache : SemanticCache, optional
+        Result cache hit by nearest past query vector
     """
-    if types:
-        # Use advanced chunk search with type filtering
-        initial_results = chunk_vector_search(client, query_text, k, types)
-    else:
-        # Fall back to old table for backwards compatibility
-        initial_results = _normalize_rows(
-            client.run_sql_template(
-                "vector_search.sql",
-                {"query_text": query_text, "top_k": _clamp_k(k)},
-            ),
-        )
+    args = (client, query_text, k, types, graph_boost, expand_neighbors,
+            index, graph, mode, search_options)
+    sem = cache if cache is not None else semantic.default_semantic_cache()
+    if sem is None or embedding_model(client) is None:
+        return _run_plan(client, _plan_search(*args))
+    scope = _semantic_scope(client, k, types, graph_boost, expand_neighbors, mode, search_options)
+    try:
+        vec = embed_query(client, query_text)
+    except Exception as exc:
+        logger.warning("Query embedding failed, skipping the semantic cache: %s", exc)
+        vec = None
+    if vec is not None:
+        if sem.version_due():
+            sem.observe_version(semantic.corpus_version(client))
+        hit = sem.lookup(scope, vec)
+        if hit is not None:
+            return hit
+    results = _run_plan(client, _plan_search(*args, vec=vec))
+    if vec is not None and results:
+        sem.store(scope, vec, results)
+    return results
 
-    # Apply graph expansion if enabled
-    if graph_boost > 0.0 and initial_results:
-        return _expand_with_graph(client, initial_results, k, graph_boost, expand_neighbors)
-    else:
-        return initial_results
+
+def plan_templates(
+    client: Any,
+    query_text: str,
+    k: int = 5,
+    types: Optional[List[str]] = None,
+    graph_boost: float = 0.0,
+    expand_neighbors: int = 5,
+    index: Optional["ann.ChunkIndex"] = None,
+    graph: Optional["neighbor_graph.NeighborGraph"] = None,
+    mode: Optional[str] = None,
+    search_options: Optional[Dict[str, Any]] = None,
+) -> List[Tuple[str, Dict[str, Any]]]:
+    """Templates (with params) vector_search would submit if every job succeeds.
+
+    Nothing runs. This is the plan vector_search executes, up to its first
+    step that answers, plus the graph expansion jobs (with a probe chunk
+    id) that go through BigQuery. Fallback steps are left out.
+    """
+    plan = _plan_search(
+        client, query_text, k, types, graph_boost, expand_neighbors,
+        index, graph, mode, search_options,
+    )
+    calls: List[Tuple[str, Dict[str, Any]]] = []
+    answering: Optional[SearchStep] = None
+    for step in plan.steps:
+        calls.extend(_step_calls(client, plan, step))
+        if not step.conditional:
+            answering = step
+            break
+    if graph_boost > 0.0 and answering is not None and answering.kind != "fused_graph":
+        probe = ["estimate_probe"]
+        if plan.graph is None:
+            calls.append(
+                ("get_chunk_neighbors.sql", {"chunk_ids": probe, "max_neighbors": expand_neighbors})
+            )
+        if plan.index is None:
+            calls.append(("get_chunk_details.sql", {"chunk_ids": probe}))
+    return calls
+
+
+def _plan_search(
+    client: Any,
+    query_text: str,
+    k: int,
+    types: Optional[List[str]],
+    graph_boost: float,
+    expand_neighbors: int,
+    index: Optional["ann.ChunkIndex"],
+    graph: Optional["neighbor_graph.NeighborGraph"],
+    mode: Optional[str],
+    search_options: Optional[Dict[str, Any]],
+    vec: Optional[List[float]] = None,
+) -> SearchPlan:
+    """Search paths for one query, in the order they are tried.
+
+    * ``mode="hybrid_sql"``: keyword-only chunk_text_search.sql for
+      identifier queries (answers when it fills k), then SEARCH() +
+      ML.VECTOR_SEARCH fused in chunk_hybrid_search.sql
+    * chunk searches (``types`` not None): in-process ANN index (``index`` or
+      ann.default_index()) unless ``search_options`` are given
+    * per-type chunks_emb_<type> partitions (BQ_TYPE_PARTITIONS=1)
+    * chunk search with graph boost and no in-process graph: one fused
+      chunk_vector_search_graph.sql job
+    * chunk_vector_search.sql (``types`` given, [] for every type) or
+      vector_search.sql (None); failures here propagate
+
+    ``vec`` (or a cached query vector) switches every template to its
+    *_by_vec.sql variant, which skips ML.GENERATE_EMBEDDING.
+    """
+    idx = index if index is not None else ann.default_index()
+    local_graph = _local_graph(graph, graph_boost)
+    chunks = types is not None
+    plan = SearchPlan(
+        query_text=query_text,
+        k=k,
+        types=types,
+        graph_boost=graph_boost,
+        expand_neighbors=expand_neighbors,
+        search_options=search_options,
+        index=idx,
+        graph=local_graph,
+        search=None,
+        vec=vec if vec is not None else cached_embedding(client, query_text),
+    )
+    if _search_mode(mode) == "hybrid_sql":
+        plan.search = _search_query(query_text)
+        if plan.search is not None:
+            if lexical.exact_terms(query_text):
+                plan.steps.append(SearchStep("text_search", conditional=True))
+            plan.steps.append(SearchStep("hybrid_sql"))
+    if chunks and idx is not None and len(idx) and search_options is None:
+        plan.steps.append(SearchStep("ann"))
+    if _use_partitions(types):
+        plan.steps.append(SearchStep("partitions"))
+    if chunks and graph_boost > 0.0 and local_graph is None:
+        plan.steps.append(SearchStep("fused_graph"))
+    plan.steps.append(
+        SearchStep("chunk_vector_search" if chunks else "vector_search", fallback=False)
+    )
+    return plan
+
+
+def _run_plan(client: BigQueryClientBase, plan: SearchPlan) -> List[Dict[str, Any]]:
+    """Try the plan's steps in order; expand the first answer with the graph."""
+    for step in plan.steps:
+        try:
+            if step.kind == "ann":
+                if plan.vec is None:
+                    plan.vec = embed_query(client, plan.query_text)
+                results = _ann_results(plan)
+            else:
+                calls = _step_calls(client, plan, step)
+                outputs = [client.run_sql_template(*calls[0])]
+                _note_vector(client, plan, outputs[0])
+                # later partitions reuse the vector the first job returned
+                for name, params in _step_calls(client, plan, step)[1:]:
+                    outputs.append(client.run_sql_template(name, params))
+                results = _step_results(plan, step, outputs)
+        except Exception as exc:
+            if not step.fallback:
+                raise
+            logger.warning("%s search failed, trying the next path: %s", step.kind, exc)
+            continue
+        if results is None:
+            continue
+        if plan.graph_boost > 0.0 and results and step.kind != "fused_graph":
+            return _expand_with_graph(
+                client, results, plan.k, plan.graph_boost, plan.expand_neighbors,
+                plan.graph, plan.index,
+            )
+        return results
+    return []
 
 
 def chunk_vector_search(
@@ -53,27 +262,562 @@ def chunk_vector_search(
     query_text: str,
     k: int = 5,
     types: Optional[List[str]] = None,
+    search_options: Optional[Dict[str, Any]] = None,
 ) -> List[Dict[str, Any]]:
     """Vector search over chunk embeddings with optional type filtering."""
-    params: Dict[str, Any] = {
-        "query_text": query_text,
+    name, params = _search_call(
+        client, "chunk_vector_search", query_text, k, types or [], search_options
+    )
+    rows = client.run_sql_template(name, params)
+    remember_from_rows(client, query_text, rows)
+    return _normalize_rows(rows)
+
+
+def vector_search_batch(
+    client: BigQueryClientBase,
+    queries: Iterable[str],
+    k: int = 5,
+    types: Optional[List[str]] = None,
+    batch_size: int = BATCH_SIZE,
+) -> List[List[Dict[str, Any]]]:
+    """Vector search for many query texts, one job per ``batch_size`` texts.
+
+    Returns one normalized list per query, in input order (duplicates are
+    searched once). Uses the *_batch.sql templates, which embed and search
+    every text of a batch in a single ML.VECTOR_SEARCH over a query table;
+    no ANN index or graph expansion, the same as the plain SQL path of
+    vector_search.
+    """
+    texts = list(queries)
+    unique = list(dict.fromkeys(texts))
+    name = "chunk_vector_search_batch.sql" if types else "vector_search_batch.sql"
+    size = max(1, batch_size)
+    by_text: Dict[str, List[Dict[str, Any]]] = {}
+    for start in range(0, len(unique), size):
+        batch = unique[start:start + size]
+        params: Dict[str, Any] = {"query_texts": batch, "top_k": _clamp_k(k)}
+        if types:
+            params["types"] = types
+        rows = client.run_sql_template(name, params)
+        by_text.update(_split_batch(client, batch, rows))
+    return [[dict(r) for r in by_text.get(t, [])] for t in texts]
+
+
+def _split_batch(
+    client: BigQueryClientBase, batch: List[str], rows: List[Dict[str, Any]]
+) -> Dict[str, List[Dict[str, Any]]]:
+    """Group batch rows by query_id into normalized per-text lists."""
+    grouped: Dict[int, List[Dict[str, Any]]] = {i: [] for i in range(len(batch))}
+    for r in rows:
+        try:
+            qid = int(r.get("query_id"))  # type: ignore[arg-type]
+        except (TypeError, ValueError):
+            continue
+        if qid in grouped:
+            grouped[qid].append(r)
+    out: Dict[str, List[Dict[str, Any]]] = {}
+    for qid, group in grouped.items():
+        group.sort(key=lambda r: r.get("distance") if r.get("distance") is not None else 1.0)
+        remember_from_rows(client, batch[qid], group)
+        out[batch[qid]] = _normalize_rows(group)
+    return out
+
+
+def _search_call(
+    client: Any,
+    base: str,
+    query_text: str,
+    k: int,
+    types: Optional[List[str]],
+    search_options: Optional[Dict[str, Any]] = None,
+    query_embedding: Optional[List[float]] = None,
+) -> Tuple[str, Dict[str, Any]]:
+    """Template name + params; the precomputed-vector variant when one is known.
+
+    ``query_embedding`` is used as given, else the query-embedding cache.
+    """
+    params: Dict[str, Any] = {"top_k": _clamp_k(k)}
+    if types is not None:
+        params["types"] = types
+    if search_options is not None:
+        params["VECTOR_SEARCH_OPTIONS"] = vector_index.search_options(**search_options)
+    vec = query_embedding if query_embedding is not None else cached_embedding(client, query_text)
+    if vec is None:
+        params["query_text"] = query_text
+        return f"{base}.sql", params
+    params["query_embedding"] = vec
+    return f"{base}_by_vec.sql", params
+
+
+async def vector_search_async(
+    aclient: AsyncBigQueryClient,
+    query_text: str,
+    k: int = 5,
+    types: Optional[List[str]] = None,
+    graph_boost: float = 0.0,
+    expand_neighbors: int = 5,
+    index: Optional["ann.ChunkIndex"] = None,
+    graph: Optional["neighbor_graph.NeighborGraph"] = None,
+    mode: Optional[str] = None,
+    search_options: Optional[Dict[str, Any]] = None,
+    cache: Optional["semantic.SemanticCache"] = None,
+) -> List[Dict[str, Any]]:
+    """Async twin of vector_search; same plan, templates and output contract."""
+    args = (aclient, query_text, k, types, graph_boost, expand_neighbors,
+            index, graph, mode, search_options)
+    sem = cache if cache is not None else semantic.default_semantic_cache()
+    if sem is None or embedding_model(aclient) is None:
+        return await _run_plan_async(aclient, _plan_search(*args))
+    scope = _semantic_scope(aclient, k, types, graph_boost, expand_neighbors, mode, search_options)
+    vec = await _query_vector_async(aclient, query_text)
+    if vec is not None:
+        if sem.version_due():
+            try:
+                rows = await aclient.run_sql_template_async(semantic.VERSION_TEMPLATE, {})
+            except Exception as exc:
+                logger.warning("Corpus version check failed: %s", exc)
+                rows = []
+            sem.observe_version(semantic.version_from_rows(rows))
+        hit = sem.lookup(scope, vec)
+        if hit is not None:
+            return hit
+    results = await _run_plan_async(aclient, _plan_search(*args, vec=vec))
+    if vec is not None and results:
+        sem.store(scope, vec, results)
+    return results
+
+
+async def _run_plan_async(
+    aclient: AsyncBigQueryClient, plan: SearchPlan
+) -> List[Dict[str, Any]]:
+    """Async twin of _run_plan: partitions after the first run concurrently."""
+    for step in plan.steps:
+        try:
+            if step.kind == "ann":
+                if plan.vec is None:
+                    plan.vec = await _query_vector_async(aclient, plan.query_text)
+                results = _ann_results(plan)
+            else:
+                calls = _step_calls(aclient, plan, step)
+                first = await aclient.run_sql_template_async(*calls[0])
+                _note_vector(aclient, plan, first)
+                rest = await asyncio.gather(
+                    *(
+                        aclient.run_sql_template_async(name, params)
+                        for name, params in _step_calls(aclient, plan, step)[1:]
+                    )
+                )
+                results = _step_results(plan, step, [first, *rest])
+        except Exception as exc:
+            if not step.fallback:
+                raise
+            logger.warning("%s search failed, trying the next path: %s", step.kind, exc)
+            continue
+        if results is None:
+            continue
+        if plan.graph_boost > 0.0 and results and step.kind != "fused_graph":
+            return await _expand_with_graph_async(
+                aclient, results, plan.k, plan.graph_boost, plan.expand_neighbors,
+                plan.graph, plan.index,
+            )
+        return results
+    return []
+
+
+async def _query_vector_async(
+    aclient: AsyncBigQueryClient, query_text: str
+) -> Optional[List[float]]:
+    """Async embed_query: cached vector, else one embed_query.sql job (None on failure)."""
+    vec = cached_embedding(aclient, query_text)
+    if vec is not None:
+        return vec
+    try:
+        emb_rows = await aclient.run_sql_template_async(EMBED_TEMPLATE, {"query_text": query_text})
+    except Exception as exc:
+        logger.warning("Query embedding failed, using BigQuery search: %s", exc)
+        return None
+    if not emb_rows:
+        return None
+    return remember_embedding(aclient, query_text, emb_rows[0].get("embedding"))
+
+
+def _semantic_scope(
+    client: Any,
+    k: int,
+    types: Optional[List[str]],
+    graph_boost: float,
+    expand_neighbors: int,
+    mode: Optional[str],
+    search_options: Optional[Dict[str, Any]],
+) -> Tuple[Any, ...]:
+    """Everything besides the query vector that shapes vector_search results."""
+    return (
+        embedding_model(client),
+        _clamp_k(k),
+        None if types is None else tuple(sorted(types)),
+        float(graph_boost),
+        int(expand_neighbors),
+        _search_mode(mode),
+        tuple(sorted((search_options or {}).items())),
+    )
+
+
+def hybrid_search(
+    client: BigQueryClientBase,
+    query_text: str,
+    k: int = 5,
+    types: Optional[List[str]] = None,
+    graph_boost: float = 0.0,
+    lexical_index: Optional["lexical.BM25Index"] = None,
+    rrf_k: int = RRF_K,
+    expand_neighbors: int = 5,
+    index: Optional["ann.ChunkIndex"] = None,
+    graph: Optional["neighbor_graph.NeighborGraph"] = None,
+    mode: Optional[str] = None,
+    search_options: Optional[Dict[str, Any]] = None,
+    cache: Optional["semantic.SemanticCache"] = None,
+) -> List[Dict[str, Any]]:
+    """Lexical (BM25) + vector retrieval fused with reciprocal rank fusion.
+
+    The in-process lexical index (``lexical_index`` or
+    lexical.default_lexical_index()) and vector_search run concurrently.
+    Queries with exact tokens (error codes, hosts, CamelCase names) query
+    the lexical index first and skip the embedding round trip when k hits
+    contain those tokens. Without a lexical index this is vector_search.
+
+    BM25 indexes chunks, so the vector side is always a chunk search
+    (``types=None`` searches every chunk type). Graph expansion runs on
+    the fused rows, lexical-only hits included. The remaining arguments
+    are passed to vector_search.
+
+    Rows are vector_search rows plus ``rrf_score``, ``vector_rank`` and
+    ``lexical_rank`` (None when absent from that list); lexical-only hits
+    get ``distance = 1 - rrf_score / best possible rrf_score``.
+    """
+    lex = lexical_index if lexical_index is not None else lexical.default_lexical_index()
+    if lex is None or not len(lex):
+        return vector_search(
+            client, query_text, k, types, graph_boost, expand_neighbors,
+            index, graph, mode, search_options, cache,
+        )
+    args = (client, query_text, k, types or [], 0.0, expand_neighbors,
+            index, graph, mode, search_options, cache)
+    if lexical.exact_terms(query_text):
+        lex_rows = _lexical_search(lex, query_text, k, types)
+        vec_rows = [] if _lexical_sufficient(lex_rows, k) else vector_search(*args)
+    else:
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            pending = pool.submit(vector_search, *args)
+            lex_rows = _lexical_search(lex, query_text, k, types)
+            vec_rows = pending.result()
+    fused = _rrf_fuse(vec_rows, lex_rows, k, rrf_k)
+    if graph_boost <= 0.0 or not fused:
+        return fused
+    return _expand_with_graph(
+        client, fused, k, graph_boost, expand_neighbors,
+        _local_graph(graph, graph_boost), index if index is not None else ann.default_index(),
+    )
+
+
+async def hybrid_search_async(
+    aclient: AsyncBigQueryClient,
+    query_text: str,
+    k: int = 5,
+    types: Optional[List[str]] = None,
+    graph_boost: float = 0.0,
+    lexical_index: Optional["lexical.BM25Index"] = None,
+    rrf_k: int = RRF_K,
+    expand_neighbors: int = 5,
+    index: Optional["ann.ChunkIndex"] = None,
+    graph: Optional["neighbor_graph.NeighborGraph"] = None,
+    mode: Optional[str] = None,
+    search_options: Optional[Dict[str, Any]] = None,
+    cache: Optional["semantic.SemanticCache"] = None,
+) -> List[Dict[str, Any]]:
+    """Async twin of hybrid_search (vector_search_async + lexical in a thread)."""
+    lex = lexical_index if lexical_index is not None else lexical.default_lexical_index()
+    if lex is None or not len(lex):
+        return await vector_search_async(
+            aclient, query_text, k, types, graph_boost, expand_neighbors,
+            index, graph, mode, search_options, cache,
+        )
+    args = (aclient, query_text, k, types or [], 0.0, expand_neighbors,
+            index, graph, mode, search_options, cache)
+    if lexical.exact_terms(query_text):
+        lex_rows = _lexical_search(lex, query_text, k, types)
+        vec_rows = [] if _lexical_sufficient(lex_rows, k) else await vector_search_async(*args)
+    else:
+        vec_rows, lex_rows = await asyncio.gather(
+            vector_search_async(*args),
+            asyncio.to_thread(_lexical_search, lex, query_text, k, types),
+        )
+    fused = _rrf_fuse(vec_rows, lex_rows, k, rrf_k)
+    if graph_boost <= 0.0 or not fused:
+        return fused
+    return await _expand_with_graph_async(
+        aclient, fused, k, graph_boost, expand_neighbors,
+        _local_graph(graph, graph_boost), index if index is not None else ann.default_index(),
+    )
+
+
+def _lexical_search(
+    lex: "lexical.BM25Index", query_text: str, k: int, types: Optional[List[str]]
+) -> List[Dict[str, Any]]:
+    """Normalized BM25 rows (``exact`` kept); [] if the index fails."""
+    try:
+        rows = lex.search(query_text, _clamp_k(k), types or None)
+    except Exception as exc:
+        logger.warning("Lexical search failed, using vector results only: %s", exc)
+        return []
+    out = _normalize_rows(rows, origin="lexical.bm25")
+    for norm, row in zip(out, rows):
+        norm["exact"] = row.get("exact", 0)
+    return out
+
+
+def _lexical_sufficient(rows: List[Dict[str, Any]], k: int) -> bool:
+    """k lexical hits that all contain an exact query token."""
+    return len(rows) >= _clamp_k(k) and all(r.get("exact") for r in rows)
+
+
+def _rrf_fuse(
+    vector_rows: List[Dict[str, Any]],
+    lexical_rows: List[Dict[str, Any]],
+    k: int,
+    rrf_k: int = RRF_K,
+) -> List[Dict[str, Any]]:
+    """Reciprocal rank fusion of the two ranked lists; pure (no BigQuery)."""
+    fused: Dict[Any, Dict[str, Any]] = {}
+    for rank_key, ranked in (("vector_rank", vector_rows), ("lexical_rank", lexical_rows)):
+        for rank, row in enumerate(ranked, start=1):
+            cid = row.get("id")
+            if cid is None:
+                continue
+            entry = fused.get(cid)
+            if entry is None:
+                entry = fused[cid] = {
+                    **{key: v for key, v in row.items() if key != "exact"},
+                    "rrf_score": 0.0,
+                    "vector_rank": None,
+                    "lexical_rank": None,
+                }
+            if entry[rank_key] is None:
+                entry[rank_key] = rank
+                entry["rrf_score"] += 1.0 / (rrf_k + rank)
+    lists = int(bool(vector_rows)) + int(bool(lexical_rows))
+    best = lists / (rrf_k + 1.0) if lists else 1.0
+    for entry in fused.values():
+        if entry["vector_rank"] is None:
+            entry["distance"] = max(0.0, 1.0 - entry["rrf_score"] / best)
+    ranked = sorted(fused.values(), key=lambda e: e["rrf_score"], reverse=True)
+    return ranked[:_clamp_k(k)]
+
+
+def _search_mode(mode: Optional[str]) -> str:
+    """``mode`` or RETRIEVAL_SEARCH_MODE; an unknown env value means "vector"."""
+    if mode is not None:
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"unknown search mode {mode!r}; expected one of {SEARCH_MODES}")
+        return mode
+    env = os.getenv("RETRIEVAL_SEARCH_MODE", "vector").strip().lower()
+    return env if env in SEARCH_MODES else "vector"
+
+
+def _search_query(query_text: str) -> Optional[str]:
+    """SEARCH() query string for ``query_text`` (None if nothing searchable).
+
+    Identifier-like tokens (lexical.exact_terms) are backtick-quoted so they
+    match whole; other queries use their words of three or more characters.
+    SEARCH() requires every term.
+    """
+    exact = lexical.exact_terms(query_text)
+    if exact:
+        return " ".join(f"`{t}`" for t in exact)
+    words = [w for w in re.findall(r"[a-z0-9]+", (query_text or "").lower()) if len(w) > 2]
+    return " ".join(dict.fromkeys(words)) or None
+
+
+def _text_search_call(
+    search: str, k: int, types: Optional[List[str]]
+) -> Tuple[str, Dict[str, Any]]:
+    return TEXT_SEARCH_TEMPLATE, {
+        "search_query": search,
         "top_k": _clamp_k(k),
+        "rrf_k": RRF_K,
         "types": types or [],
     }
-    rows = client.run_sql_template("chunk_vector_search.sql", params)
+
+
+def _hybrid_sql_call(
+    client: Any,
+    query_text: str,
+    search: str,
+    k: int,
+    types: Optional[List[str]],
+    search_options: Optional[Dict[str, Any]] = None,
+    query_embedding: Optional[List[float]] = None,
+) -> Tuple[str, Dict[str, Any]]:
+    name, params = _search_call(
+        client, "chunk_hybrid_search", query_text, k, types or [], search_options,
+        query_embedding,
+    )
+    params.update(
+        search_query=search, candidates=_clamp_k(k) * HYBRID_CANDIDATES, rrf_k=RRF_K
+    )
+    return name, params
+
+
+def _hybrid_sql_rows(
+    rows: List[Dict[str, Any]], origin: str = "bq.vector_search"
+) -> List[Dict[str, Any]]:
+    """Normalized rows keeping rrf_score / vector_rank / lexical_rank."""
+    out = _normalize_rows(rows, origin=origin)
+    for norm, row in zip(out, rows):
+        for key in ("rrf_score", "vector_rank", "lexical_rank"):
+            norm[key] = row.get(key)
+    return out
+
+
+def _use_partitions(types: Optional[List[str]]) -> bool:
+    return bool(types) and partitions.enabled() and all(
+        partitions.is_partition_type(t) for t in types or []
+    )
+
+
+def _partition_call(
+    client: Any,
+    query_text: str,
+    k: int,
+    chunk_type: str,
+    search_options: Optional[Dict[str, Any]] = None,
+    query_embedding: Optional[List[float]] = None,
+) -> Tuple[str, Dict[str, Any]]:
+    name, params = _search_call(
+        client, partitions.SEARCH_BASE, query_text, k, None, search_options, query_embedding
+    )
+    params["CHUNK_TYPE"] = chunk_type
+    return name, params
+
+
+def _merge_partitions(lists: List[List[Dict[str, Any]]], k: int) -> List[Dict[str, Any]]:
+    """k nearest rows across per-type lists (each sorted by distance)."""
+    def dist(r: Dict[str, Any]) -> float:
+        d = r.get("distance")
+        return 1.0 if d is None else float(d)
+
+    return list(islice(heapq.merge(*lists, key=dist), _clamp_k(k)))
+
+
+def _fused_graph_call(
+    client: Any,
+    query_text: str,
+    k: int,
+    types: List[str],
+    expand_neighbors: int,
+    search_options: Optional[Dict[str, Any]] = None,
+    query_embedding: Optional[List[float]] = None,
+) -> Tuple[str, Dict[str, Any]]:
+    name, params = _search_call(
+        client, "chunk_vector_search_graph", query_text, k, types, search_options,
+        query_embedding,
+    )
+    params["max_neighbors"] = expand_neighbors
+    return name, params
+
+
+def _rerank_fused(
+    rows: List[Dict[str, Any]], k: int, graph_boost: float
+) -> List[Dict[str, Any]]:
+    """Split chunk_vector_search_graph.sql rows and blend like _expand_with_graph."""
+    hits = [r for r in rows if r.get("row_kind") == "hit"]
+    initial_results = _normalize_rows(hits)
+    neighbor_rows = [
+        {
+            "src_chunk_id": r.get("src_chunk_id"),
+            "nbr_chunk_id": r.get("chunk_id"),
+            "weight": r.get("weight"),
+            "sources": r.get("sources") or "",
+        }
+        for r in rows
+        if r.get("row_kind") == "neighbor"
+    ]
+    if not initial_results or not neighbor_rows:
+        return initial_results
+    details = [
+        {"chunk_id": r.get("chunk_id"), "text": r.get("text"), "meta": r.get("meta")}
+        for r in rows
+        if r.get("row_kind") == "neighbor"
+    ]
+    return _graph_rerank(initial_results, neighbor_rows, details, k, graph_boost)
+
+
+def _step_calls(
+    client: Any, plan: SearchPlan, step: SearchStep
+) -> List[Tuple[str, Dict[str, Any]]]:
+    """Template calls of one step, using the query vector if it is known by now."""
+    q, k, types, options, vec = (
+        plan.query_text, plan.k, plan.types, plan.search_options, plan.vec
+    )
+    if step.kind == "text_search":
+        return [_text_search_call(plan.search or "", k, types)]
+    if step.kind == "hybrid_sql":
+        return [_hybrid_sql_call(client, q, plan.search or "", k, types, options, vec)]
+    if step.kind == "ann":
+        return [] if vec is not None else [(EMBED_TEMPLATE, {"query_text": q})]
+    if step.kind == "partitions":
+        return [
+            _partition_call(client, q, k, chunk_type, options, vec)
+            for chunk_type in dict.fromkeys(types or [])
+        ]
+    if step.kind == "fused_graph":
+        return [_fused_graph_call(client, q, k, types or [], plan.expand_neighbors, options, vec)]
+    return [_search_call(client, step.kind, q, k, types, options, vec)]
+
+
+def _step_results(
+    plan: SearchPlan, step: SearchStep, outputs: List[List[Dict[str, Any]]]
+) -> Optional[List[Dict[str, Any]]]:
+    """Normalized rows from a step's job outputs; None means try the next step."""
+    rows = outputs[0]
+    if step.kind == "text_search":
+        if len(rows) < _clamp_k(plan.k):
+            return None
+        return _hybrid_sql_rows(rows, origin="bq.search")
+    if step.kind == "hybrid_sql":
+        return _hybrid_sql_rows(rows)
+    if step.kind == "partitions":
+        return _normalize_rows(_merge_partitions(outputs, plan.k))
+    if step.kind == "fused_graph":
+        return _rerank_fused(rows, plan.k, plan.graph_boost)
     return _normalize_rows(rows)
 
 
+def _note_vector(client: Any, plan: SearchPlan, rows: List[Dict[str, Any]]) -> None:
+    """Keep the query vector a search job returned for the plan's later calls."""
+    vec = remember_from_rows(client, plan.query_text, rows)
+    if plan.vec is None:
+        plan.vec = vec
+
+
+def _ann_results(plan: SearchPlan) -> Optional[List[Dict[str, Any]]]:
+    """Normalized rows from the in-process index; None means use BigQuery."""
+    if plan.vec is None or plan.index is None:
+        return None
+    return _normalize_rows(plan.index.search(plan.vec, _clamp_k(plan.k), plan.types or None))
+
+
 def _clamp_k(k: int) -> int:
     return max(1, min(MAX_K, k))
 
 
-def _normalize_rows(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def _normalize_rows(
+    rows: List[Dict[str, Any]], origin: str = "bq.vector_search"
+) -> List[Dict[str, Any]]:
     out: List[Dict[str, Any]] = []
     for r in rows:
         meta_raw = r.get("meta")
         meta: Dict[str, Any] = meta_raw if isinstance(meta_raw, dict) else {}
-        src_parts: List[str] = ["bq.vector_search"]
+        src_parts: List[str] = [origin]
         t = meta.get("type")
         fname = meta.get("filename") or meta.get("uri") or "unknown"
         if t == "log":
@@ -119,6 +863,8 @@ def _expand_with_graph(
     final_k: int,
     graph_boost: float,
     expand_neighbors: int,
+    graph: Optional["neighbor_graph.NeighborGraph"] = None,
+    index: Optional["ann.ChunkIndex"] = None,
 ) -> List[Dict[str, Any]]:
     """Expand initial results with graph neighbors and re-rank."""
     try:
@@ -128,123 +874,224 @@ def _expand_with_graph(
             logger.warning("No chunk IDs found in initial results")
             return initial_results
 
-        # Get neighbors for expansion
-        neighbor_rows = client.run_sql_template(
-            "get_chunk_neighbors.sql",
-            {
-                "chunk_ids": chunk_ids,
-                "max_neighbors": expand_neighbors,
-            },
-        )
+        # Get neighbors for expansion (in-process graph when loaded)
+        if graph is not None:
+            neighbor_rows = _graph_neighbors(graph, initial_results, expand_neighbors)
+        else:
+            neighbor_rows = client.run_sql_template(
+                "get_chunk_neighbors.sql",
+                {
+                    "chunk_ids": chunk_ids,
+                    "max_neighbors": expand_neighbors,
+                },
+            )
 
-        if not neighbor_rows:
-            logger.debug("No neighbors found, returning initial results")
+        unique_neighbor_ids = _new_neighbor_ids(initial_results, neighbor_rows)
+        if not unique_neighbor_ids:
             return initial_results
 
-        # Collect all neighbor chunk IDs
-        neighbor_chunk_ids = [row["nbr_chunk_id"] for row in neighbor_rows]
+        # Get chunk details for neighbors (ANN index mirror when it has them all)
+        neighbor_details = _indexed_details(index, unique_neighbor_ids)
+        if neighbor_details is None:
+            neighbor_details = client.run_sql_template(
+                "get_chunk_details.sql", {"chunk_ids": unique_neighbor_ids}
+            )
+        return _graph_rerank(
+            initial_results, neighbor_rows, neighbor_details, final_k, graph_boost
+        )
+
+    except Exception as exc:
+        logger.warning(f"Graph expansion failed, using vector-only: {exc}")
+        return initial_results
 
-        # Remove duplicates and exclude chunks already in initial results
-        initial_chunk_ids = {r.get("id") for r in initial_results}
-        unique_neighbor_ids = [cid for cid in neighbor_chunk_ids if cid not in initial_chunk_ids]
 
+async def _expand_with_graph_async(
+    aclient: AsyncBigQueryClient,
+    initial_results: List[Dict[str, Any]],
+    final_k: int,
+    graph_boost: float,
+    expand_neighbors: int,
+    graph: Optional["neighbor_graph.NeighborGraph"] = None,
+    index: Optional["ann.ChunkIndex"] = None,
+) -> List[Dict[str, Any]]:
+    """Async twin of _expand_with_graph (neighbors -> details are dependent)."""
+    try:
+        chunk_ids = [r.get("id") for r in initial_results if r.get("id")]
+        if not chunk_ids:
+            logger.warning("No chunk IDs found in initial results")
+            return initial_results
+        if graph is not None:
+            neighbor_rows = _graph_neighbors(graph, initial_results, expand_neighbors)
+        else:
+            neighbor_rows = await aclient.run_sql_template_async(
+                "get_chunk_neighbors.sql",
+                {"chunk_ids": chunk_ids, "max_neighbors": expand_neighbors},
+            )
+        unique_neighbor_ids = _new_neighbor_ids(initial_results, neighbor_rows)
         if not unique_neighbor_ids:
-            logger.debug("No new neighbors to add")
             return initial_results
-
-        # Get chunk details for neighbors
-        neighbor_details = client.run_sql_template(
-            "get_chunk_details.sql", {"chunk_ids": unique_neighbor_ids}
+        neighbor_details = _indexed_details(index, unique_neighbor_ids)
+        if neighbor_details is None:
+            neighbor_details = await aclient.run_sql_template_async(
+                "get_chunk_details.sql", {"chunk_ids": unique_neighbor_ids}
+            )
+        return _graph_rerank(
+            initial_results, neighbor_rows, neighbor_details, final_k, graph_boost
         )
+    except Exception as exc:
+        logger.warning(f"Graph expansion failed, using vector-only: {exc}")
+        return initial_results
+
+
+def _local_graph(
+    graph: Optional["neighbor_graph.NeighborGraph"], graph_boost: float
+) -> Optional["neighbor_graph.NeighborGraph"]:
+    """Graph to expand in-process with; None means expand through BigQuery."""
+    if graph_boost <= 0.0:
+        return None
+    g = graph if graph is not None else neighbor_graph.default_graph()
+    return g if g is not None and len(g) else None
+
+
+def _graph_neighbors(
+    graph: "neighbor_graph.NeighborGraph",
+    initial_results: List[Dict[str, Any]],
+    expand_neighbors: int,
+) -> List[Dict[str, Any]]:
+    """get_chunk_neighbors.sql-shaped rows from the in-process graph."""
+    seeds = [r for r in initial_results if r.get("id")]
+    return graph.expand(
+        [r["id"] for r in seeds],
+        max_neighbors=expand_neighbors,
+        # never more rows than one hop could return: bounds the details lookup
+        limit=expand_neighbors * len(seeds),
+        seed_scores=[1.0 - float(r.get("distance") or 0.0) for r in seeds],
+    )
+
+
+def _indexed_details(
+    index: Optional["ann.ChunkIndex"], chunk_ids: List[str]
+) -> Optional[List[Dict[str, Any]]]:
+    """Neighbor details from the ANN mirror; None unless it holds every id."""
+    if index is None or not all(cid in index for cid in chunk_ids):
+        return None
+    return index.details(chunk_ids)
+
+
+def _new_neighbor_ids(
+    initial_results: List[Dict[str, Any]], neighbor_rows: List[Dict[str, Any]]
+) -> List[str]:
+    """Neighbor chunk IDs not already present in the initial results."""
+    if not neighbor_rows:
+        logger.debug("No neighbors found, returning initial results")
+        return []
+
+    # Collect all neighbor chunk IDs
+    neighbor_chunk_ids = [row["nbr_chunk_id"] for row in neighbor_rows]
 
-        # Create neighbor lookup
-        neighbor_map = {row["chunk_id"]: row for row in neighbor_details}
+    # Remove duplicates and exclude chunks already in initial results
+    initial_chunk_ids = {r.get("id") for r in initial_results}
+    unique_neighbor_ids = [cid for cid in neighbor_chunk_ids if cid not in initial_chunk_ids]
 
-        # Build expanded result set
-        expanded_results = []
-        seen_chunk_ids = set()
+    if not unique_neighbor_ids:
+        logger.debug("No new neighbors to add")
+    return unique_neighbor_ids
 
-        # Add initial results with original scores
-        for result in initial_results:
-            distance = result.get("distance", 1.0)
-            vector_score = 1.0 - distance
-            chunk_id = result.get("id")
 
-            if chunk_id and chunk_id not in seen_chunk_ids:
-                seen_chunk_ids.add(chunk_id)
+def _graph_rerank(
+    initial_results: List[Dict[str, Any]],
+    neighbor_rows: List[Dict[str, Any]],
+    neighbor_details: List[Dict[str, Any]],
+    final_k: int,
+    graph_boost: float,
+) -> List[Dict[str, Any]]:
+    """Blend vector scores with neighbor weights; pure (no BigQuery)."""
+    # Create neighbor lookup
+    neighbor_map = {row["chunk_id"]: row for row in neighbor_details}
+
+    # Build expanded result set
+    expanded_results = []
+    seen_chunk_ids = set()
+
+    # Add initial results with original scores
+    for result in initial_results:
+        distance = result.get("distance", 1.0)
+        vector_score = 1.0 - distance
+        chunk_id = result.get("id")
+
+        if chunk_id and chunk_id not in seen_chunk_ids:
+            seen_chunk_ids.add(chunk_id)
+            expanded_results.append(
+                {
+                    **result,
+                    "final_score": vector_score,
+                    "vector_score": vector_score,
+                    "graph_weight": 0.0,
+                    "source_type": "vector",
+                }
+            )
+
+    # Group neighbor rows by source once (row order kept within each source)
+    rows_by_src: Dict[Any, List[Dict[str, Any]]] = {}
+    for neighbor_row in neighbor_rows:
+        rows_by_src.setdefault(neighbor_row["src_chunk_id"], []).append(neighbor_row)
+
+    # Add neighbor results with graph-boosted scores
+    for result in initial_results:
+        src_chunk_id = result.get("id")
+        if not src_chunk_id:
+            continue
+
+        for neighbor_row in rows_by_src.get(src_chunk_id, ()):
+            nbr_chunk_id = neighbor_row["nbr_chunk_id"]
+
+            # Skip if already seen (deduplication)
+            if nbr_chunk_id in seen_chunk_ids:
+                continue
+
+            if nbr_chunk_id in neighbor_map:
+                seen_chunk_ids.add(nbr_chunk_id)
+                neighbor_detail = neighbor_map[nbr_chunk_id]
+                graph_weight = neighbor_row["weight"]
+
+                # Estimate distance for neighbor (no direct vector score)
+                estimated_distance = max(0.1, 1.0 - graph_weight)
+                vector_score = 1.0 - estimated_distance
+
+                # Combined score: vector + graph boost
+                final_score = (1.0 - graph_boost) * vector_score + graph_boost * graph_weight
+
                 expanded_results.append(
                     {
-                        **result,
-                        "final_score": vector_score,
+                        "id": nbr_chunk_id,
+                        "text": neighbor_detail.get("text"),
+                        "distance": estimated_distance,
+                        "source": _build_source_string(neighbor_detail),
+                        "final_score": final_score,
                         "vector_score": vector_score,
-                        "graph_weight": 0.0,
-                        "source_type": "vector",
+                        "graph_weight": graph_weight,
+                        "source_type": "graph",
+                        "graph_sources": neighbor_row.get("sources", ""),
                     }
                 )
 
-        # Add neighbor results with graph-boosted scores
-        for result in initial_results:
-            src_chunk_id = result.get("id")
-            if not src_chunk_id:
-                continue
-
-            for neighbor_row in neighbor_rows:
-                if neighbor_row["src_chunk_id"] != src_chunk_id:
-                    continue
-
-                nbr_chunk_id = neighbor_row["nbr_chunk_id"]
-
-                # Skip if already seen (deduplication)
-                if nbr_chunk_id in seen_chunk_ids:
-                    continue
-
-                if nbr_chunk_id in neighbor_map:
-                    seen_chunk_ids.add(nbr_chunk_id)
-                    neighbor_detail = neighbor_map[nbr_chunk_id]
-                    graph_weight = neighbor_row["weight"]
-
-                    # Estimate distance for neighbor (no direct vector score)
-                    estimated_distance = max(0.1, 1.0 - graph_weight)
-                    vector_score = 1.0 - estimated_distance
-
-                    # Combined score: vector + graph boost
-                    final_score = (1.0 - graph_boost) * vector_score + graph_boost * graph_weight
-
-                    expanded_results.append(
-                        {
-                            "id": nbr_chunk_id,
-                            "text": neighbor_detail.get("text"),
-                            "distance": estimated_distance,
-                            "source": _build_source_string(neighbor_detail),
-                            "final_score": final_score,
-                            "vector_score": vector_score,
-                            "graph_weight": graph_weight,
-                            "source_type": "graph",
-                            "graph_sources": neighbor_row.get("sources", ""),
-                        }
-                    )
-
-        # Re-rank by final score and limit to final_k
-        sorted_results = sorted(
-            expanded_results, key=lambda x: x.get("final_score", 0.0), reverse=True
-        )[:final_k]
-
-        # Log expansion stats
-        original_count = len(initial_results)
-        expanded_count = len(expanded_results)
-        final_count = len(sorted_results)
-        graph_count = sum(1 for r in sorted_results if r.get("source_type") == "graph")
+    # Re-rank by final score and limit to final_k
+    sorted_results = sorted(
+        expanded_results, key=lambda x: x.get("final_score", 0.0), reverse=True
+    )[:final_k]
 
-        logger.info(
-            f"Graph expansion: {original_count} → {expanded_count} → "
-            f"{final_count} (graph: {graph_count})"
-        )
+    # Log expansion stats
+    original_count = len(initial_results)
+    expanded_count = len(expanded_results)
+    final_count = len(sorted_results)
+    graph_count = sum(1 for r in sorted_results if r.get("source_type") == "graph")
 
-        return sorted_results
+    logger.info(
+        f"Graph expansion: {original_count} → {expanded_count} → "
+        f"{final_count} (graph: {graph_count})"
+    )
 
-    except Exception as exc:
-        logger.warning(f"Graph expansion failed, using vector-only: {exc}")
-        return initial_results
+    return sorted_results
 
 
 def _build_source_string(chunk_detail: Dict[str, Any]) -> str:
@@ -0,0 +1,439 @@
+"""In-process BM25 inverted index over chunk text (lexical retrieval).
+
+Support tickets quote exact tokens -- error codes, hostnames, exception
+names, stack frames -- that embeddings blur. ``BM25Index`` keeps postings
+for every token of every chunk and scores queries with Okapi BM25; rows
+come back shaped like chunk_vector_search.sql (chunk_id, text, meta) plus
+``score``, so hybrid.hybrid_search can fuse them with vector results
+(reciprocal rank fusion).
+
+Tokens keep identifiers whole and add their parts, lower-cased:
+``java.lang.NullPointerException`` -> ``java.lang.nullpointerexception``,
+``java``, ``lang``, ``null``, ``pointer``, ``exception``; ``host:port``
+also yields ``host``. ``exact_terms`` picks the identifier-like tokens of a
+query (digits, ``._-:/@`` inside, CamelCase); hybrid_search skips the
+embedding round trip when chunks containing them fill the result list.
+The BigQuery-side equivalent is ``RETRIEVAL_SEARCH_MODE=hybrid_sql``:
+vector_search runs SEARCH() over the chunks.text search index
+(chunk_text_search.sql, keyword only) for queries with exact terms and
+returns it when it fills k, else fuses SEARCH() with ML.VECTOR_SEARCH in
+one job (chunk_hybrid_search.sql).
+
+Postings are numpy CSR arrays (term -> doc rows, term frequencies). New
+chunks are buffered and folded in on the next search; replaced / removed
+rows are masked and compacted once they pile up.
+
+Index maintenance:
+    * ``upsert`` / ``remove``; ``core.cli ingest`` upserts the chunks it
+      loads into the snapshot at RETRIEVAL_LEXICAL_INDEX (``index_chunks``)
+    * ``sync(client)`` diffs chunk ids against the chunks table and fetches
+      only new rows (chunk_texts_snapshot.sql), dropping removed ones
+    * ``save`` / ``load`` persist a snapshot (.npz)
+
+Environment:
+    RETRIEVAL_LEXICAL_INDEX  snapshot path (loaded by default_lexical_index,
+                             updated by ingest)
+
+numpy is imported lazily (``ann`` extra).
+"""
+from __future__ import annotations
+import importlib
+import json
+import math
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
+
+from ..bq.bigquery_client import BigQueryClientBase
+from ..bq.telemetry import JobMetrics, MetricsRegistry, default_registry
+
+IDS_TEMPLATE = "chunk_text_ids.sql"
+SNAPSHOT_TEMPLATE = "chunk_texts_snapshot.sql"
+SEARCH_METRIC = "lexical_search"  # telemetry template tag for index queries
+
+K1 = 1.2
+B = 0.75
+SYNC_BATCH = 5000  # chunk ids per snapshot fetch during incremental sync
+COMPACT_DEAD_FRACTION = 0.25
+
+_TOKEN_RE = re.compile(r"[A-Za-z0-9_]+(?:[.:/@\-][A-Za-z0-9_]+)*")
+_SPLIT_RE = re.compile(r"[.:/@\-_]+")
+_SEGMENT_RE = re.compile(r"[:/@]+")
+_CAMEL_RE = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+_EXACT_RE = re.compile(r"\d|[.:/@\-_]|[a-z][A-Z]")
+
+
+def _np() -> Any:
+    try:
+        return importlib.import_module("numpy")
+    except Exception as exc:
+        raise RuntimeError(
+            "numpy missing; install the 'ann' extra for the in-process lexical index."
+        ) from exc
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lower-cased tokens; compound identifiers also yield their parts."""
+    out: List[str] = []
+    for m in _TOKEN_RE.finditer(text or ""):
+        raw = m.group(0)
+        whole = raw.lower()
+        out.append(whole)
+        segments = _SEGMENT_RE.split(whole)
+        if len(segments) > 1:  # host:port, url paths, user@host
+            out.extend(seg for seg in segments if _SPLIT_RE.search(seg))
+        parts = [p.lower() for piece in _SPLIT_RE.split(raw) for p in _CAMEL_RE.findall(piece)]
+        if len(parts) > 1:
+            out.extend(p for p in parts if p != whole)
+    return out
+
+
+def exact_terms(text: Optional[str]) -> List[str]:
+    """Identifier-like query tokens (error codes, hosts, CamelCase names)."""
+    seen: Dict[str, None] = {}
+    for m in _TOKEN_RE.finditer(text or ""):
+        raw = m.group(0)
+        if len(raw) > 2 and _EXACT_RE.search(raw):
+            seen.setdefault(raw.lower())
+    return list(seen)
+
+
+def _meta_dict(value: Any) -> Dict[str, Any]:
+    if isinstance(value, dict):
+        return value
+    if isinstance(value, str) and value:
+        try:
+            parsed = json.loads(value)
+        except ValueError:
+            return {}
+        return parsed if isinstance(parsed, dict) else {}
+    return {}
+
+
+class BM25Index:
+    """BM25 postings over chunk text, mirroring the chunks table."""
+
+    def __init__(
+        self, k1: float = K1, b: float = B, metrics: Optional[MetricsRegistry] = None
+    ) -> None:
+        self.k1 = k1
+        self.b = b
+        self.metrics = metrics
+        self._lock = threading.RLock()
+        self._ids: List[str] = []
+        self._texts: List[Optional[str]] = []
+        self._metas: List[Dict[str, Any]] = []
+        self._types: List[Optional[str]] = []
+        self._lens: List[int] = []
+        self._row_of: Dict[str, int] = {}
+        self._dead: set = set()
+        self._vocab: Dict[str, int] = {}
+        self._terms: List[str] = []
+        self._indptr: Any = None  # CSR over terms -> (doc row, tf)
+        self._docs: Any = None
+        self._tfs: Any = None
+        self._pending: List[Any] = []  # (term id, doc row, tf) since the last flush
+        self._type_code: Dict[Optional[str], int] = {}
+        self._cache: Any = None  # (alive mask, lens, type codes) after a flush
+        self.synced_at: Optional[float] = None
+
+    # -- size / state ---------------------------------------------------
+    def __len__(self) -> int:
+        return len(self._row_of)
+
+    def __contains__(self, chunk_id: object) -> bool:
+        return chunk_id in self._row_of
+
+    def ids(self) -> List[str]:
+        with self._lock:
+            return list(self._row_of)
+
+    @property
+    def terms(self) -> int:
+        return len(self._terms)
+
+    # -- writes ----------------------------------------------------------
+    def upsert(self, rows: Iterable[Dict[str, Any]]) -> int:
+        """Add or replace rows (chunk_id, text, meta[, type])."""
+        added = 0
+        with self._lock:
+            for r in rows:
+                cid = r.get("chunk_id")
+                if cid is None:
+                    continue
+                cid = str(cid)
+                old = self._row_of.get(cid)
+                if old is not None:
+                    self._dead.add(old)
+                row = len(self._ids)
+                meta = _meta_dict(r.get("meta"))
+                text = r.get("text")
+                tokens = tokenize(text)
+                counts: Dict[int, int] = {}
+                for tok in tokens:
+                    tid = self._vocab.get(tok)
+                    if tid is None:
+                        tid = self._vocab[tok] = len(self._terms)
+                        self._terms.append(tok)
+                    counts[tid] = counts.get(tid, 0) + 1
+                self._pending.extend((tid, row, tf) for tid, tf in counts.items())
+                self._row_of[cid] = row
+                self._ids.append(cid)
+                self._texts.append(text)
+                self._metas.append(meta)
+                self._types.append(r.get("type") or meta.get("type"))
+                self._lens.append(len(tokens))
+                added += 1
+            if added:
+                self._cache = None
+        return added
+
+    def remove(self, chunk_ids: Iterable[str]) -> int:
+        removed = 0
+        with self._lock:
+            for cid in chunk_ids:
+                row = self._row_of.pop(str(cid), None)
+                if row is not None:
+                    self._dead.add(row)
+                    removed += 1
+            if removed:
+                self._cache = None
+        return removed
+
+    def _flush(self, compact: bool = False) -> None:
+        """Fold pending postings into the CSR arrays; compact dead rows.
+
+        Dead rows are dropped once they exceed COMPACT_DEAD_FRACTION (always
+        with ``compact``).
+        """
+        if self._cache is not None:
+            return
+        np = _np()
+        alive = np.ones(len(self._ids), dtype=bool)
+        if self._dead:
+            alive[list(self._dead)] = False
+        dead = len(self._ids) - int(alive.sum())
+        compacting = bool(dead) and (compact or dead > COMPACT_DEAD_FRACTION * len(self._ids))
+        if self._pending or compacting or self._docs is None:
+            if self._docs is None:
+                term = np.zeros(0, dtype=np.int64)
+                docs = np.zeros(0, dtype=np.int64)
+                tfs = np.zeros(0, dtype=np.float32)
+            else:
+                term = np.repeat(np.arange(len(self._indptr) - 1), np.diff(self._indptr))
+                docs, tfs = self._docs.astype(np.int64), self._tfs
+            if self._pending:
+                pend = np.asarray(self._pending, dtype=np.int64).reshape(-1, 3)
+                self._pending = []
+                term = np.concatenate([term, pend[:, 0]])
+                docs = np.concatenate([docs, pend[:, 1]])
+                tfs = np.concatenate([tfs, pend[:, 2].astype(np.float32)])
+            if compacting:
+                keep = np.flatnonzero(alive)
+                new_of = np.full(len(self._ids), -1, dtype=np.int64)
+                new_of[keep] = np.arange(len(keep))
+                docs = new_of[docs]
+                live = docs >= 0
+                term, docs, tfs = term[live], docs[live], tfs[live]
+                self._ids = [self._ids[i] for i in keep]
+                self._texts = [self._texts[i] for i in keep]
+                self._metas = [self._metas[i] for i in keep]
+                self._types = [self._types[i] for i in keep]
+                self._lens = [self._lens[i] for i in keep]
+                self._row_of = {cid: i for i, cid in enumerate(self._ids)}
+                self._dead = set()
+                alive = np.ones(len(self._ids), dtype=bool)
+            n_terms = len(self._terms)
+            order = np.lexsort((docs, term))
+            self._docs = docs[order].astype(np.int32)
+            self._tfs = tfs[order]
+            self._indptr = np.zeros(n_terms + 1, dtype=np.int64)
+            np.cumsum(np.bincount(term, minlength=n_terms), out=self._indptr[1:])
+        self._type_code = {}
+        codes = np.asarray(
+            [self._type_code.setdefault(t, len(self._type_code)) for t in self._types],
+            dtype=np.int32,
+        )
+        self._cache = (alive, np.asarray(self._lens, dtype=np.float32), codes)
+
+    # -- queries ---------------------------------------------------------
+    def search(
+        self, query: str, k: int = 5, types: Optional[Sequence[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Top-k rows by BM25 (chunk_id, text, meta, score, exact), best first.
+
+        ``exact`` counts the query's exact_terms the chunk contains.
+        """
+        np = _np()
+        started = time.perf_counter()
+        out: List[Dict[str, Any]] = []
+        with self._lock:
+            self._flush()
+            alive, lens, codes = self._cache
+            n_alive = int(alive.sum())
+            tids = [self._vocab[t] for t in dict.fromkeys(tokenize(query)) if t in self._vocab]
+            exact = {self._vocab[t] for t in exact_terms(query) if t in self._vocab}
+            if n_alive and tids:
+                avgdl = float(lens[alive].mean()) or 1.0
+                doc_parts, score_parts, exact_parts = [], [], []
+                for tid in tids:
+                    lo, hi = self._indptr[tid], self._indptr[tid + 1]
+                    docs, tfs = self._docs[lo:hi], self._tfs[lo:hi]
+                    live = alive[docs]
+                    docs, tfs = docs[live], tfs[live]
+                    if not len(docs):
+                        continue
+                    df = len(docs)
+                    idf = math.log(1.0 + (n_alive - df + 0.5) / (df + 0.5))
+                    norm = self.k1 * (1.0 - self.b + self.b * lens[docs] / avgdl)
+                    doc_parts.append(docs)
+                    score_parts.append(idf * tfs * (self.k1 + 1.0) / (tfs + norm))
+                    exact_parts.append(np.full(len(docs), 1.0 if tid in exact else 0.0))
+                if doc_parts:
+                    cand, inv = np.unique(np.concatenate(doc_parts), return_inverse=True)
+                    scores = np.bincount(inv, weights=np.concatenate(score_parts))
+                    hits = np.bincount(inv, weights=np.concatenate(exact_parts))
+                    if types:
+                        wanted = [self._type_code[t] for t in types if t in self._type_code]
+                        keep = np.isin(codes[cand], wanted)
+                        cand, scores, hits = cand[keep], scores[keep], hits[keep]
+                    top = min(max(1, k), len(cand))
+                    if top:
+                        part = np.argpartition(-scores, top - 1)[:top]
+                        part = part[np.lexsort((cand[part], -scores[part]))]
+                        out = [
+                            {
+                                "chunk_id": self._ids[cand[i]],
+                                "text": self._texts[cand[i]],
+                                "meta": self._metas[cand[i]],
+                                "score": float(scores[i]),
+                                "exact": int(hits[i]),
+                            }
+                            for i in part
+                        ]
+        if self.metrics is not None:
+            self.metrics.record(
+                JobMetrics(SEARCH_METRIC, (time.perf_counter() - started) * 1000.0, rows=len(out))
+            )
+        return out
+
+    # -- BigQuery sync ---------------------------------------------------
+    def sync(self, client: BigQueryClientBase, full: bool = False) -> Dict[str, int]:
+        """Mirror the chunks table: fetch new chunk ids, drop removed ones.
+
+        ``full`` re-reads every row (picks up edited text).
+        """
+        current = {str(r["chunk_id"]) for r in client.run_sql_template_iter(IDS_TEMPLATE, {})}
+        removed = self.remove(set(self.ids()) - current)
+        if full or not len(self):
+            fetched = self.upsert(
+                client.run_sql_template_iter(SNAPSHOT_TEMPLATE, {"chunk_ids": []})
+            )
+        else:
+            new = sorted(current - set(self.ids()))
+            fetched = 0
+            for start in range(0, len(new), SYNC_BATCH):
+                fetched += self.upsert(
+                    client.run_sql_template_iter(
+                        SNAPSHOT_TEMPLATE, {"chunk_ids": new[start:start + SYNC_BATCH]}
+                    )
+                )
+        self.synced_at = time.time()
+        return {"added": fetched, "removed": removed, "rows": len(self), "terms": self.terms}
+
+    # -- persistence -----------------------------------------------------
+    def save(self, path: Union[str, Path]) -> Path:
+        np = _np()
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            if self._dead:
+                self._cache = None  # the snapshot holds live rows only
+            self._flush(compact=True)
+            arrays = {
+                "ids": np.array(self._ids, dtype=str),
+                "texts": np.array([t or "" for t in self._texts], dtype=str),
+                "metas": np.array([json.dumps(m, default=str) for m in self._metas], dtype=str),
+                "types": np.array([t or "" for t in self._types], dtype=str),
+                "lens": np.asarray(self._lens, dtype=np.int32),
+                "terms": np.array(self._terms, dtype=str),
+                "indptr": self._indptr,
+                "docs": self._docs,
+                "tfs": self._tfs,
+                "synced_at": np.array([self.synced_at or 0.0]),
+            }
+            with path.open("wb") as fh:
+                np.savez(fh, **arrays)
+        return path
+
+    @classmethod
+    def load(cls, path: Union[str, Path], **kwargs: Any) -> "BM25Index":
+        np = _np()
+        idx = cls(**kwargs)
+        with np.load(Path(path), allow_pickle=False) as data:
+            idx._ids = [str(v) for v in data["ids"]]
+            idx._texts = [str(v) for v in data["texts"]]
+            idx._metas = [json.loads(str(v)) for v in data["metas"]]
+            idx._types = [str(v) or None for v in data["types"]]
+            idx._lens = [int(v) for v in data["lens"]]
+            idx._terms = [str(v) for v in data["terms"]]
+            idx._indptr = data["indptr"].astype(np.int64)
+            idx._docs = data["docs"].astype(np.int32)
+            idx._tfs = data["tfs"].astype(np.float32)
+            synced = float(data["synced_at"][0])
+        idx._vocab = {t: i for i, t in enumerate(idx._terms)}
+        idx._row_of = {cid: i for i, cid in enumerate(idx._ids)}
+        idx.synced_at = synced or None
+        return idx
+
+
+_DEFAULT: Optional[BM25Index] = None
+_DEFAULT_LOCK = threading.Lock()
+_DEFAULT_LOADED = False
+
+
+def default_lexical_index() -> Optional[BM25Index]:
+    """Index loaded once from RETRIEVAL_LEXICAL_INDEX (None if unset / unreadable)."""
+    global _DEFAULT, _DEFAULT_LOADED
+    with _DEFAULT_LOCK:
+        if not _DEFAULT_LOADED:
+            _DEFAULT_LOADED = True
+            path = os.getenv("RETRIEVAL_LEXICAL_INDEX")
+            if path and Path(path).exists():
+                try:
+                    _DEFAULT = BM25Index.load(path, metrics=default_registry())
+                except Exception:  # pragma: no cover - corrupt snapshot
+                    _DEFAULT = None
+        return _DEFAULT
+
+
+def set_default_lexical_index(index: Optional[BM25Index]) -> None:
+    """Install (or clear) the process-wide index used by hybrid_search."""
+    global _DEFAULT, _DEFAULT_LOADED
+    with _DEFAULT_LOCK:
+        _DEFAULT = index
+        _DEFAULT_LOADED = True
+
+
+def index_chunks(
+    rows: Iterable[Dict[str, Any]], path: Union[str, Path, None] = None
+) -> Optional[Dict[str, Any]]:
+    """Upsert chunk rows into the persisted index (ingest hook).
+
+    ``path`` defaults to RETRIEVAL_LEXICAL_INDEX; returns None when neither
+    is set. The updated index becomes the process default.
+    """
+    target = path or os.getenv("RETRIEVAL_LEXICAL_INDEX")
+    if not target:
+        return None
+    target = Path(target)
+    idx = BM25Index.load(target, metrics=default_registry()) if target.exists() else BM25Index(
+        metrics=default_registry()
+    )
+    added = idx.upsert(rows)
+    idx.save(target)
+    set_default_lexical_index(idx)
+    return {"index": str(target), "added": added, "rows": len(idx), "terms": idx.terms}
@@ -1,7 +1,9 @@
 """Legacy retrieval logic moved from src/retrieval.py for clarity."""
 from __future__ import annotations
-from typing import Any, Iterable
+from typing import Any, Iterable, Union
 from src.bigquery_client import BigQueryClient
+from src.bq.bigquery_client import BigQueryClientBase
+from .hybrid import vector_search_batch
 
 
 def retrieve(
@@ -15,8 +17,15 @@ def retrieve(
 
 
 def batch_retrieve(
-    client: BigQueryClient,
+    client: Union[BigQueryClient, BigQueryClientBase],
     queries: Iterable[str],
     top_k: int = 5,
 ) -> list[list[dict[str, Any]]]:
+    """One result list per query.
+
+    Template clients (make_client()) search every query in batched jobs via
+    hybrid.vector_search_batch; the legacy client searches one at a time.
+    """
+    if isinstance(client, BigQueryClientBase):
+        return vector_search_batch(client, queries, k=top_k)
     return [retrieve(client, q, top_k=top_k) for q in queries]
@@ -0,0 +1,435 @@
+"""In-process chunk neighbor graph (CSR) for local graph expansion.
+
+``NeighborGraph`` mirrors the edges get_chunk_neighbors.sql reads, i.e.
+chunk_neighbors plus the chunk_neighbors_ticket co-link view, as numpy
+CSR arrays: ``indptr`` (row offsets), ``indices`` (neighbor nodes),
+``weights`` and ``sources`` (bit flags: 1 similarity, 2 co_occurrence).
+Duplicate (src, nbr) pairs keep the max weight. Each row is sorted by
+weight desc, then neighbor id, so the first ``max_neighbors`` entries of
+a row are exactly the ones the SQL template returns.
+
+Expansion (``expand``) from the seed chunks of a vector search:
+    * mode="hop": breadth-first for ``hops`` hops, ``max_neighbors`` per
+      node; a node is claimed at the first hop that reaches it (earliest
+      seed first) with the product of edge weights along that path, so
+      hops=1 yields the neighbors and weights of the SQL path
+    * mode="ppr": personalized PageRank (restart ``alpha``) by power
+      iteration over the ``hops``-hop subgraph; scores are rescaled so the
+      top node matches the strongest seed edge and blend like weights
+
+BigQuery stays the source of truth:
+    * ``sync(client)`` compares per-source edge counts and weight sums
+      (chunk_neighbor_stats.sql) and reloads only when they changed
+    * ``refresh(client, chunk_ids)`` re-reads the edges of given source
+      chunks (chunk_neighbor_edges.sql) and splices them in
+    * ``save`` / ``load`` persist a snapshot (.npz) between processes
+
+Environment:
+    RETRIEVAL_GRAPH          snapshot path loaded by default_graph()
+    RETRIEVAL_GRAPH_MODE     hop | ppr (default hop)
+    RETRIEVAL_GRAPH_HOPS     expansion depth (default 1 for hop, 2 for ppr)
+    RETRIEVAL_GRAPH_ALPHA    PPR restart probability (default 0.15)
+
+numpy is imported lazily (``ann`` extra).
+"""
+from __future__ import annotations
+import importlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
+
+from ..bq.bigquery_client import BigQueryClientBase
+from ..bq.telemetry import JobMetrics, MetricsRegistry, default_registry
+
+EDGES_TEMPLATE = "chunk_neighbor_edges.sql"
+STATS_TEMPLATE = "chunk_neighbor_stats.sql"
+EXPAND_METRIC = "graph_expand"  # telemetry template tag for local expansion
+
+MODES = ("hop", "ppr")
+SOURCE_FLAGS = {"similarity": 1, "co_occurrence": 2}
+_FLAG_NAMES = {0: "", 1: "similarity", 2: "co_occurrence", 3: "similarity,co_occurrence"}
+PPR_ITERS = 20
+
+
+def _np() -> Any:
+    try:
+        return importlib.import_module("numpy")
+    except Exception as exc:
+        raise RuntimeError(
+            "numpy missing; install the 'ann' extra for the in-process graph."
+        ) from exc
+
+
+class NeighborGraph:
+    """CSR adjacency of chunk neighbors with hop / PPR expansion."""
+
+    def __init__(
+        self,
+        mode: str = "hop",
+        hops: Optional[int] = None,
+        alpha: float = 0.15,
+        metrics: Optional[MetricsRegistry] = None,
+    ) -> None:
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}, got {mode!r}")
+        self.mode = mode
+        self.hops = max(1, hops) if hops else (2 if mode == "ppr" else 1)
+        self.alpha = alpha
+        self.metrics = metrics
+        self._lock = threading.RLock()
+        self._ids: List[str] = []
+        self._node: Dict[str, int] = {}
+        np = _np()
+        self._indptr = np.zeros(1, dtype=np.int64)
+        self._indices = np.zeros(0, dtype=np.int64)
+        self._weights = np.zeros(0, dtype=np.float64)
+        self._sources = np.zeros(0, dtype=np.uint8)
+        self._stats: Optional[Dict[str, List[float]]] = None
+        self.synced_at: Optional[float] = None
+
+    # -- size / state ---------------------------------------------------
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @property
+    def edges(self) -> int:
+        return int(len(self._indices))
+
+    def __contains__(self, chunk_id: object) -> bool:
+        return chunk_id in self._node
+
+    def neighbors(self, chunk_id: str) -> List[Dict[str, Any]]:
+        """Row of ``chunk_id`` (strongest first), get_chunk_neighbors.sql shape."""
+        with self._lock:
+            node = self._node.get(chunk_id)
+            if node is None:
+                return []
+            lo, hi = int(self._indptr[node]), int(self._indptr[node + 1])
+            return [
+                {
+                    "src_chunk_id": chunk_id,
+                    "nbr_chunk_id": self._ids[int(self._indices[p])],
+                    "weight": float(self._weights[p]),
+                    "sources": _FLAG_NAMES[int(self._sources[p])],
+                }
+                for p in range(lo, hi)
+            ]
+
+    # -- writes ----------------------------------------------------------
+    def load_edges(self, rows: Iterable[Dict[str, Any]]) -> int:
+        """Replace the whole graph with edge rows (chunk_neighbor_edges.sql shape)."""
+        with self._lock:
+            self._ids, self._node = [], {}
+            src, dst, w, flags = self._edge_arrays(rows)
+            self._build(src, dst, w, flags)
+            return self.edges
+
+    def replace_rows(self, chunk_ids: Iterable[str], rows: Iterable[Dict[str, Any]]) -> int:
+        """Swap the out-edges of ``chunk_ids`` for ``rows``; returns edges now stored."""
+        np = _np()
+        with self._lock:
+            src, dst, w, flags = self._coo()
+            drop = np.array(
+                [self._node[c] for c in set(map(str, chunk_ids)) if c in self._node],
+                dtype=np.int64,
+            )
+            keep = ~np.isin(src, drop)
+            n_src, n_dst, n_w, n_flags = self._edge_arrays(rows)
+            self._build(
+                np.concatenate([src[keep], n_src]),
+                np.concatenate([dst[keep], n_dst]),
+                np.concatenate([w[keep], n_w]),
+                np.concatenate([flags[keep], n_flags]),
+            )
+            return self.edges
+
+    def _code(self, chunk_id: str) -> int:
+        node = self._node.get(chunk_id)
+        if node is None:
+            node = self._node[chunk_id] = len(self._ids)
+            self._ids.append(chunk_id)
+        return node
+
+    def _edge_arrays(self, rows: Iterable[Dict[str, Any]]) -> Any:
+        np = _np()
+        src: List[int] = []
+        dst: List[int] = []
+        w: List[float] = []
+        flags: List[int] = []
+        for r in rows:
+            s, d = r.get("src_chunk_id"), r.get("nbr_chunk_id")
+            if s is None or d is None or r.get("weight") is None:
+                continue
+            src.append(self._code(str(s)))
+            dst.append(self._code(str(d)))
+            w.append(float(r["weight"]))
+            flags.append(SOURCE_FLAGS.get(str(r.get("source_type") or "similarity"), 1))
+        return (
+            np.asarray(src, dtype=np.int64),
+            np.asarray(dst, dtype=np.int64),
+            np.asarray(w, dtype=np.float64),
+            np.asarray(flags, dtype=np.uint8),
+        )
+
+    def _coo(self) -> Any:
+        np = _np()
+        n = len(self._indptr) - 1
+        src = np.repeat(np.arange(n, dtype=np.int64), np.diff(self._indptr))
+        return src, self._indices, self._weights, self._sources
+
+    def _build(self, src: Any, dst: Any, w: Any, flags: Any) -> None:
+        """Dedupe (src, nbr) pairs (max weight, OR of sources) into sorted CSR rows."""
+        np = _np()
+        n = len(self._ids)
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        if len(src):
+            key = src * n + dst
+            order = np.lexsort((-w, key))
+            key_s = key[order]
+            first = np.ones(len(key_s), dtype=bool)
+            first[1:] = key_s[1:] != key_s[:-1]
+            starts = np.flatnonzero(first)
+            flags = np.bitwise_or.reduceat(flags[order], starts)
+            pick = order[starts]
+            src, dst, w = src[pick], dst[pick], w[pick]
+            rank = np.empty(n, dtype=np.int64)
+            rank[np.argsort(np.array(self._ids, dtype=str), kind="stable")] = np.arange(n)
+            order = np.lexsort((rank[dst], -w, src))
+            src, dst, w, flags = src[order], dst[order], w[order], flags[order]
+            np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+        self._indptr = indptr
+        self._indices = dst.astype(np.int64)
+        self._weights = w.astype(np.float64)
+        self._sources = flags.astype(np.uint8)
+
+    # -- expansion -------------------------------------------------------
+    def expand(
+        self,
+        seeds: Sequence[str],
+        max_neighbors: int = 5,
+        limit: Optional[int] = None,
+        seed_scores: Optional[Sequence[float]] = None,
+        mode: Optional[str] = None,
+        hops: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Neighbor rows (get_chunk_neighbors.sql shape) reached from ``seeds``.
+
+        Seeds themselves are never returned; each neighbor appears once with
+        the seed it was reached from. ``limit`` keeps the strongest rows.
+        """
+        np = _np()
+        started = time.perf_counter()
+        mode = mode or self.mode
+        hops = max(1, hops) if hops else self.hops
+        with self._lock:
+            seed_nodes: List[int] = []
+            seed_w: List[float] = []
+            for i, cid in enumerate(seeds):
+                node = self._node.get(cid)
+                if node is not None and node not in seed_nodes:
+                    seed_nodes.append(node)
+                    seed_w.append(float(seed_scores[i]) if seed_scores is not None else 1.0)
+            rows: List[Dict[str, Any]] = []
+            if seed_nodes and self.edges:
+                seeds_arr = np.asarray(seed_nodes, dtype=np.int64)
+                nodes, score, origin, pos = self._bfs(seeds_arr, max(1, max_neighbors), hops)
+                if mode == "ppr" and len(nodes):
+                    score = self._ppr(seeds_arr, np.asarray(seed_w), nodes, max(1, max_neighbors))
+                    keep = np.flatnonzero(score > 0)
+                    keep = keep[np.argsort(-score[keep], kind="stable")]
+                else:
+                    keep = np.arange(len(nodes))
+                if limit is not None and len(keep) > limit:
+                    top = np.argsort(-score[keep], kind="stable")[:max(0, limit)]
+                    keep = keep[np.sort(top)]
+                rows = [
+                    {
+                        "src_chunk_id": self._ids[int(seeds_arr[origin[i]])],
+                        "nbr_chunk_id": self._ids[int(nodes[i])],
+                        "weight": float(score[i]),
+                        "sources": _FLAG_NAMES[int(self._sources[pos[i]])],
+                    }
+                    for i in keep.tolist()
+                ]
+        if self.metrics is not None:
+            self.metrics.record(
+                JobMetrics(EXPAND_METRIC, (time.perf_counter() - started) * 1000.0, rows=len(rows))
+            )
+        return rows
+
+    def _gather(self, nodes: Any, limit: int) -> Any:
+        """(owner index into ``nodes``, edge position) for the first ``limit`` edges of each row."""
+        np = _np()
+        starts = self._indptr[nodes]
+        lens = np.minimum(self._indptr[nodes + 1] - starts, limit)
+        ends = np.cumsum(lens)
+        owner = np.repeat(np.arange(len(nodes)), lens)
+        pos = np.arange(int(ends[-1]) if len(ends) else 0) - np.repeat(ends - lens - starts, lens)
+        return owner, pos
+
+    def _bfs(self, seeds: Any, max_neighbors: int, hops: int) -> Any:
+        """Nodes claimed hop by hop: (node, path weight, seed index, edge position)."""
+        np = _np()
+        visited = seeds
+        frontier, f_score = seeds, np.ones(len(seeds))
+        f_origin = np.arange(len(seeds))
+        out: List[Any] = []
+        for _ in range(hops):
+            if not len(frontier):
+                break
+            owner, pos = self._gather(frontier, max_neighbors)
+            cand = self._indices[pos]
+            fresh = ~np.isin(cand, visited)
+            cand, owner, pos = cand[fresh], owner[fresh], pos[fresh]
+            if not len(cand):
+                break
+            _, first = np.unique(cand, return_index=True)
+            first.sort()  # discovery order: earliest frontier node wins
+            cand, owner, pos = cand[first], owner[first], pos[first]
+            score = f_score[owner] * self._weights[pos]
+            origin = f_origin[owner]
+            out.append((cand, score, origin, pos))
+            visited = np.concatenate([visited, cand])
+            frontier, f_score, f_origin = cand, score, origin
+        if not out:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, np.zeros(0), empty, empty
+        return tuple(np.concatenate(parts) for parts in zip(*out))
+
+    def _ppr(self, seeds: Any, seed_w: Any, nodes: Any, max_neighbors: int) -> Any:
+        """PPR scores of ``nodes`` over the subgraph spanned by seeds + nodes."""
+        np = _np()
+        sub = np.concatenate([seeds, nodes])
+        m, s = len(sub), len(seeds)
+        owner, pos = self._gather(sub, max_neighbors)
+        dst = self._indices[pos]
+        sorter = np.argsort(sub)
+        at = np.clip(np.searchsorted(sub, dst, sorter=sorter), 0, m - 1)
+        inside = sub[sorter[at]] == dst
+        src_l, dst_l, w = owner[inside], sorter[at[inside]], self._weights[pos[inside]]
+        out_w = np.bincount(src_l, weights=w, minlength=m)
+        step = w / out_w[src_l]
+        dangling = out_w == 0
+        pers = np.zeros(m)
+        pers[:s] = np.clip(seed_w, 1e-9, None)
+        pers /= pers.sum()
+        x = pers.copy()
+        for _ in range(PPR_ITERS):
+            spread = np.bincount(dst_l, weights=x[src_l] * step, minlength=m)
+            x = self.alpha * pers + (1.0 - self.alpha) * (spread + x[dangling].sum() * pers)
+        scores = x[s:]
+        top = scores.max()
+        if top <= 0:
+            return np.zeros(len(nodes))
+        owner1, pos1 = self._gather(seeds, max_neighbors)
+        ref = float(self._weights[pos1].max()) if len(pos1) else 1.0
+        return scores / top * ref
+
+    # -- BigQuery mirror -------------------------------------------------
+    def sync(self, client: BigQueryClientBase, full: bool = False) -> Dict[str, Any]:
+        """Reload from BigQuery when edge counts / weight sums changed (or ``full``)."""
+        stats = _edge_stats(client)
+        if not full and self._stats is not None and stats == self._stats:
+            return {"reloaded": False, "nodes": len(self), "edges": self.edges}
+        self.load_edges(client.run_sql_template_iter(EDGES_TEMPLATE, {"chunk_ids": []}))
+        self._stats = stats
+        self.synced_at = time.time()
+        return {"reloaded": True, "nodes": len(self), "edges": self.edges}
+
+    def refresh(self, client: BigQueryClientBase, chunk_ids: Sequence[str]) -> int:
+        """Re-read the out-edges of ``chunk_ids`` (e.g. after new ticket links)."""
+        ids = sorted({str(c) for c in chunk_ids})
+        if not ids:
+            return 0
+        rows = list(client.run_sql_template_iter(EDGES_TEMPLATE, {"chunk_ids": ids}))
+        self.replace_rows(ids, rows)
+        self._stats = _edge_stats(client)
+        self.synced_at = time.time()
+        return len(rows)
+
+    # -- persistence -----------------------------------------------------
+    def save(self, path: Union[str, Path]) -> Path:
+        np = _np()
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            arrays = {
+                "ids": np.array(self._ids, dtype=str),
+                "indptr": self._indptr,
+                "indices": self._indices,
+                "weights": self._weights,
+                "sources": self._sources,
+                "stats": np.array(json.dumps(self._stats)),
+                "synced_at": np.array([self.synced_at or 0.0]),
+            }
+            with path.open("wb") as fh:
+                np.savez(fh, **arrays)
+        return path
+
+    @classmethod
+    def load(cls, path: Union[str, Path], **kwargs: Any) -> "NeighborGraph":
+        np = _np()
+        graph = cls(**kwargs)
+        with np.load(Path(path), allow_pickle=False) as data:
+            graph._ids = [str(v) for v in data["ids"]]
+            graph._indptr = data["indptr"].astype(np.int64)
+            graph._indices = data["indices"].astype(np.int64)
+            graph._weights = data["weights"].astype(np.float64)
+            graph._sources = data["sources"].astype(np.uint8)
+            graph._stats = json.loads(str(data["stats"]))
+            synced = float(data["synced_at"][0])
+        graph._node = {cid: i for i, cid in enumerate(graph._ids)}
+        graph.synced_at = synced or None
+        return graph
+
+
+def _edge_stats(client: BigQueryClientBase) -> Dict[str, List[float]]:
+    return {
+        str(r["source_type"]): [int(r.get("edges") or 0), round(float(r.get("weight_sum") or 0.0), 6)]
+        for r in client.run_sql_template(STATS_TEMPLATE, {})
+    }
+
+
+def _env_config() -> Dict[str, Any]:
+    mode = os.getenv("RETRIEVAL_GRAPH_MODE", "hop")
+    cfg: Dict[str, Any] = {"mode": mode if mode in MODES else "hop"}
+    try:
+        cfg["hops"] = int(os.getenv("RETRIEVAL_GRAPH_HOPS", "0")) or None
+    except ValueError:
+        pass
+    try:
+        cfg["alpha"] = min(0.99, max(0.01, float(os.getenv("RETRIEVAL_GRAPH_ALPHA", "0.15"))))
+    except ValueError:
+        pass
+    return cfg
+
+
+_DEFAULT: Optional[NeighborGraph] = None
+_DEFAULT_LOCK = threading.Lock()
+_DEFAULT_LOADED = False
+
+
+def default_graph() -> Optional[NeighborGraph]:
+    """Graph loaded once from RETRIEVAL_GRAPH (None if unset / unreadable)."""
+    global _DEFAULT, _DEFAULT_LOADED
+    with _DEFAULT_LOCK:
+        if not _DEFAULT_LOADED:
+            _DEFAULT_LOADED = True
+            path = os.getenv("RETRIEVAL_GRAPH")
+            if path and Path(path).exists():
+                try:
+                    _DEFAULT = NeighborGraph.load(path, metrics=default_registry(), **_env_config())
+                except Exception:  # pragma: no cover - corrupt snapshot
+                    _DEFAULT = None
+        return _DEFAULT
+
+
+def set_default_graph(graph: Optional[NeighborGraph]) -> None:
+    """Install (or clear) the process-wide graph used by graph expansion."""
+    global _DEFAULT, _DEFAULT_LOADED
+    with _DEFAULT_LOCK:
+        _DEFAULT = graph
+        _DEFAULT_LOADED = True
@@ -0,0 +1,88 @@
+"""Query-text embedding through the configured BigQuery model.
+
+Used where a search runs on a precomputed vector instead of embedding
+inside the search job (in-process ANN index, *_by_vec.sql templates).
+Vectors are reused across calls through the query-embedding cache
+(src/bq/embed_cache.py), keyed by the client's embedding_model().
+"""
+from __future__ import annotations
+import json
+from typing import Any, Dict, List, Optional
+
+from ..bq.bigquery_client import BigQueryClientBase
+from ..bq.embed_cache import EmbeddingCache, default_embedding_cache
+
+TEMPLATE_NAME = "embed_query.sql"
+
+
+def as_float_list(value: Any) -> Optional[List[float]]:
+    """Embedding cell (ARRAY, {"values": [...]}, JSON text) -> list of floats."""
+    if value is None:
+        return None
+    if isinstance(value, dict):
+        value = value.get("values")
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return None
+    if hasattr(value, "tolist"):
+        value = value.tolist()
+    if not isinstance(value, (list, tuple)) or not value:
+        return None
+    try:
+        return [float(v) for v in value]
+    except (TypeError, ValueError):
+        return None
+
+
+def embedding_model(client: Any) -> Optional[str]:
+    """Embedding model identity of a (sync or async facade) client."""
+    inner = getattr(client, "client", client)  # AsyncBigQueryClient wraps one
+    fn = getattr(inner, "embedding_model", None)
+    return fn() if callable(fn) else None
+
+
+def cached_embedding(
+    client: Any, query_text: str, cache: Optional[EmbeddingCache] = None
+) -> Optional[List[float]]:
+    """Cached vector for ``query_text`` under the client's model; never runs a job."""
+    cache = cache if cache is not None else default_embedding_cache()
+    model = embedding_model(client) if cache is not None else None
+    if model is None:
+        return None
+    return cache.get(model, query_text)
+
+
+def remember_embedding(
+    client: Any, query_text: str, value: Any, cache: Optional[EmbeddingCache] = None
+) -> Optional[List[float]]:
+    """Parse an embedding cell and store it for ``query_text``; returns the vector."""
+    vec = as_float_list(value)
+    cache = cache if cache is not None else default_embedding_cache()
+    model = embedding_model(client) if cache is not None else None
+    if vec is not None and model is not None:
+        cache.put(model, query_text, vec)
+    return vec
+
+
+def remember_from_rows(
+    client: Any, query_text: str, rows: List[Dict[str, Any]]
+) -> Optional[List[float]]:
+    """Store the ``query_embedding`` a search template returned; returns it (or None)."""
+    for r in rows:
+        vec = as_float_list(r.get("query_embedding"))
+        if vec is not None:
+            return remember_embedding(client, query_text, vec)
+    return None
+
+
+def embed_query(client: BigQueryClientBase, query_text: str) -> Optional[List[float]]:
+    """Embedding of ``query_text``; None if the backend returns none (stub)."""
+    vec = cached_embedding(client, query_text)
+    if vec is not None:
+        return vec
+    rows = client.run_sql_template(TEMPLATE_NAME, {"query_text": query_text})
+    if not rows:
+        return None
+    return remember_embedding(client, query_text, rows[0].get("embedding"))
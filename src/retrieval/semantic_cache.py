@@ -0,0 +1,275 @@
+"""Semantic result cache in front of vector_search (nearest past query).
+
+The result cache (src/bq/cache.py) and the query-embedding cache only hit
+on the same query text; during an incident storm titles differ slightly
+("Login timeout", "login timeout error") and each one still runs
+ML.VECTOR_SEARCH. This cache keeps the unit query vector and the
+normalized result list of past searches. A new query whose embedding is
+within ``threshold`` cosine similarity of a cached one gets that cached
+list back. hybrid.vector_search embeds the query before the lookup; on
+a miss the search runs on that vector (*_by_vec.sql templates), so the
+query is embedded once either way.
+
+Entries are grouped by scope, meaning everything else that shapes the
+results (embedding model, k, types, graph boost, mode, search options).
+Lookup within a scope is one matrix-vector product. They expire after
+``ttl`` seconds. Every ``freshness_interval`` seconds
+retrieval/hybrid.py reads chunks_emb's table metadata
+(chunks_emb_version.sql; no scan). When the table has changed since an
+entry was stored, that entry is dropped.
+
+numpy comes with the 'ann' extra and is imported lazily.
+
+Environment:
+    RETRIEVAL_SEMANTIC_CACHE=1            enable the default cache
+    RETRIEVAL_SEMANTIC_THRESHOLD=0.95     minimum cosine similarity for a hit
+    RETRIEVAL_SEMANTIC_TTL=600            entry lifetime in seconds
+    RETRIEVAL_SEMANTIC_FRESHNESS=30       seconds between corpus version checks
+    RETRIEVAL_SEMANTIC_MAX=2048           entries across all scopes
+"""
+from __future__ import annotations
+from dataclasses import dataclass, field
+import importlib
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+VERSION_TEMPLATE = "chunks_emb_version.sql"
+DEFAULT_THRESHOLD = 0.95
+DEFAULT_TTL = 600.0
+DEFAULT_FRESHNESS = 30.0
+DEFAULT_MAX_ENTRIES = 2048
+
+
+def _np() -> Any:
+    try:
+        return importlib.import_module("numpy")
+    except Exception as exc:
+        raise RuntimeError(
+            "numpy missing; install the 'ann' extra for the semantic cache."
+        ) from exc
+
+
+@dataclass
+class _Scope:
+    vectors: Any  # (n, dim) float32, unit rows
+    results: List[List[Dict[str, Any]]] = field(default_factory=list)
+    stored: List[float] = field(default_factory=list)
+    versions: List[Any] = field(default_factory=list)
+
+
+class SemanticCache:
+    """Past query vectors -> result lists, hit by cosine similarity."""
+
+    def __init__(
+        self,
+        threshold: float = DEFAULT_THRESHOLD,
+        ttl: float = DEFAULT_TTL,
+        freshness_interval: float = DEFAULT_FRESHNESS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError(f"threshold must be in (0, 1], got {threshold}")
+        self.threshold = float(threshold)
+        self.ttl = float(ttl)
+        self.freshness_interval = float(freshness_interval)
+        self.max_entries = max(1, int(max_entries))
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._scopes: Dict[Hashable, _Scope] = {}
+        self._version: Any = None
+        self._checked: Optional[float] = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_env(cls) -> "SemanticCache":
+        return cls(
+            threshold=_env_float("RETRIEVAL_SEMANTIC_THRESHOLD", DEFAULT_THRESHOLD),
+            ttl=_env_float("RETRIEVAL_SEMANTIC_TTL", DEFAULT_TTL),
+            freshness_interval=_env_float("RETRIEVAL_SEMANTIC_FRESHNESS", DEFAULT_FRESHNESS),
+            max_entries=int(_env_float("RETRIEVAL_SEMANTIC_MAX", DEFAULT_MAX_ENTRIES)),
+        )
+
+    # -- corpus freshness ------------------------------------------------
+    def version_due(self) -> bool:
+        """True if the corpus version should be re-read before trusting entries."""
+        with self._lock:
+            return self._checked is None or (
+                self._clock() - self._checked >= self.freshness_interval
+            )
+
+    def observe_version(self, version: Any) -> None:
+        """Record the current corpus version; entries stored under another one drop.
+
+        None (version unavailable) keeps the last known version, so entries
+        then live until their ttl.
+        """
+        with self._lock:
+            self._checked = self._clock()
+            if version is None or version == self._version:
+                return
+            self._version = version
+            for key in list(self._scopes):
+                scope = self._scopes[key]
+                keep = [i for i, v in enumerate(scope.versions) if v == version]
+                self.invalidations += len(scope.versions) - len(keep)
+                self._keep(key, scope, keep)
+
+    # -- entries ---------------------------------------------------------
+    def lookup(
+        self, scope_key: Hashable, vec: Sequence[float]
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Copy of the cached results nearest to ``vec`` in its scope, or None."""
+        np = _np()
+        q = _unit(np, vec)
+        with self._lock:
+            scope = self._scopes.get(scope_key)
+            if q is None or scope is None:
+                self.misses += 1
+                return None
+            self._expire(scope_key, scope)
+            scope = self._scopes.get(scope_key)
+            if scope is None or scope.vectors.shape[1] != len(q):
+                self.misses += 1
+                return None
+            sims = scope.vectors @ q
+            best = int(np.argmax(sims))
+            if float(sims[best]) < self.threshold:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return [dict(r) for r in scope.results[best]]
+
+    def store(
+        self, scope_key: Hashable, vec: Sequence[float], results: List[Dict[str, Any]]
+    ) -> None:
+        np = _np()
+        q = _unit(np, vec)
+        if q is None:
+            return
+        rows = [dict(r) for r in results]
+        with self._lock:
+            scope = self._scopes.get(scope_key)
+            if scope is not None and scope.vectors.shape[1] != len(q):
+                scope = None  # model width changed under the same scope key
+            if scope is None:
+                scope = _Scope(vectors=np.empty((0, len(q)), dtype=np.float32))
+                self._scopes[scope_key] = scope
+            same = np.flatnonzero(scope.vectors @ q >= 0.9999) if len(scope.vectors) else []
+            if len(same):
+                i = int(same[0])  # same query again: refresh in place
+                scope.results[i], scope.stored[i], scope.versions[i] = (
+                    rows, self._clock(), self._version,
+                )
+                return
+            scope.vectors = np.vstack([scope.vectors, q[None, :]])
+            scope.results.append(rows)
+            scope.stored.append(self._clock())
+            scope.versions.append(self._version)
+            while sum(len(s.results) for s in self._scopes.values()) > self.max_entries:
+                self._evict_oldest()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._scopes.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(s.results) for s in self._scopes.values())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": sum(len(s.results) for s in self._scopes.values()),
+                "scopes": len(self._scopes),
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "evictions": self.evictions,
+            }
+
+    # -- internals (lock held) -------------------------------------------
+    def _expire(self, key: Hashable, scope: _Scope) -> None:
+        cutoff = self._clock() - self.ttl
+        keep = [i for i, t in enumerate(scope.stored) if t > cutoff]
+        if len(keep) != len(scope.stored):
+            self.evictions += len(scope.stored) - len(keep)
+            self._keep(key, scope, keep)
+
+    def _keep(self, key: Hashable, scope: _Scope, keep: List[int]) -> None:
+        if not keep:
+            del self._scopes[key]
+            return
+        scope.vectors = scope.vectors[keep]
+        scope.results = [scope.results[i] for i in keep]
+        scope.stored = [scope.stored[i] for i in keep]
+        scope.versions = [scope.versions[i] for i in keep]
+
+    def _evict_oldest(self) -> None:
+        key = min(self._scopes, key=lambda k: min(self._scopes[k].stored))
+        scope = self._scopes[key]
+        oldest = scope.stored.index(min(scope.stored))
+        self.evictions += 1
+        self._keep(key, scope, [i for i in range(len(scope.stored)) if i != oldest])
+
+
+def version_from_rows(rows: List[Dict[str, Any]]) -> Any:
+    """Comparable corpus version from chunks_emb_version.sql rows (None if empty)."""
+    if not rows:
+        return None
+    r = rows[0]
+    return (str(r.get("last_modified_time")), str(r.get("row_count")))
+
+
+def corpus_version(client: Any) -> Any:
+    """Current chunks_emb version; None if the metadata read fails."""
+    try:
+        return version_from_rows(client.run_sql_template(VERSION_TEMPLATE, {}))
+    except Exception as exc:
+        logger.warning("Corpus version check failed: %s", exc)
+        return None
+
+
+def _unit(np: Any, vec: Sequence[float]) -> Any:
+    if vec is None or not len(vec):
+        return None
+    q = np.asarray(vec, dtype=np.float32)
+    norm = float(np.linalg.norm(q))
+    return q / norm if norm > 0.0 else None
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+_DEFAULT: Optional[SemanticCache] = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def default_semantic_cache() -> Optional[SemanticCache]:
+    """Process-wide cache from env (None unless RETRIEVAL_SEMANTIC_CACHE=1)."""
+    global _DEFAULT
+    if os.getenv("RETRIEVAL_SEMANTIC_CACHE", "0") != "1":
+        return None
+    with _DEFAULT_LOCK:
+        if _DEFAULT is None:
+            _DEFAULT = SemanticCache.from_env()
+        return _DEFAULT
+
+
+def set_default_semantic_cache(cache: Optional[SemanticCache]) -> None:
+    """Install (or reset to env-configured) the process-wide cache."""
+    global _DEFAULT
+    with _DEFAULT_LOCK:
+        _DEFAULT = cache
@@ -0,0 +1,265 @@
+"""Memory-mapped chunks_emb snapshot shared across local processes.
+
+``export_snapshot`` streams export_chunk_embeddings.sql into a directory of
+flat arrays; ``EmbeddingSnapshot.open`` maps them read-only with
+numpy.memmap, so processes reading the same snapshot share one page-cache
+copy and nothing is turned into Python lists. Readers: scripts/run_eval.py
+(default_snapshot, chunk embeddings by id) and quantized ANN indexes,
+whose full-precision vectors are a snapshot next to the index file
+(src/retrieval/ann.py). Layout (``manifest.json`` holds rows, dim and
+the type names):
+
+    embeddings.f32   (rows, dim) float32, C order, unit norm
+    ids.bin/ids.off  chunk_id UTF-8 bytes + int64 offsets (rows + 1)
+    ids.order        int64 row numbers sorted by chunk_id (binary search)
+    types.u16        uint16 index into manifest["types"] (0 = untyped)
+    meta.bin/meta.off  meta JSON bytes + int64 offsets, decoded on access
+
+Rows are unit-normalized on export (cosine distance is scale-free), so a
+dot product with a unit query is the cosine similarity. Snapshots are
+replaced by renaming a finished directory into place; processes that
+still map the old one keep reading it.
+
+Environment:
+    RETRIEVAL_EMBEDDING_SNAPSHOT  snapshot directory opened by default_snapshot()
+
+numpy is imported lazily (``ann`` extra).
+"""
+from __future__ import annotations
+import importlib
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
+
+from ..bq.bigquery_client import BigQueryClientBase
+from .query_embed import as_float_list
+
+EXPORT_TEMPLATE = "export_chunk_embeddings.sql"
+FORMAT = "northstar-embeddings"
+VERSION = 1
+WRITE_BLOCK = 4096  # rows buffered per embeddings.f32 write
+
+
+def _np() -> Any:
+    try:
+        return importlib.import_module("numpy")
+    except Exception as exc:
+        raise RuntimeError(
+            "numpy missing; install the 'ann' extra for embedding snapshots."
+        ) from exc
+
+
+def write_snapshot(
+    rows: Iterable[Dict[str, Any]], path: Union[str, Path], normalize: bool = True
+) -> Dict[str, Any]:
+    """Write rows (chunk_id, embedding[, type, meta]) as a snapshot directory.
+
+    Streams in blocks; only chunk ids are held in memory (to sort them).
+    ``normalize=False`` writes rows that are already unit norm unchanged.
+    Returns the manifest.
+    """
+    np = _np()
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    ids: List[bytes] = []
+    type_names: List[str] = []
+    type_code: Dict[str, int] = {}
+    codes: List[int] = []
+    meta_off = [0]
+    dim: Optional[int] = None
+    block: List[Any] = []
+    with (tmp / "embeddings.f32").open("wb") as emb, (tmp / "meta.bin").open("wb") as meta:
+
+        def flush() -> None:
+            m = np.stack(block).astype(np.float32)
+            if normalize:
+                norms = np.linalg.norm(m, axis=1, keepdims=True)
+                m = np.divide(m, norms, out=np.zeros_like(m), where=norms > 0)
+            emb.write(m.tobytes())
+            block.clear()
+
+        for r in rows:
+            raw = r.get("embedding")
+            vec = np.asarray(raw, dtype=np.float32) if hasattr(raw, "shape") else None
+            if vec is None:
+                values = as_float_list(raw)
+                vec = None if values is None else np.asarray(values, dtype=np.float32)
+            cid = r.get("chunk_id")
+            if vec is None or cid is None:
+                continue
+            if dim is None:
+                dim = len(vec)
+            if len(vec) != dim:
+                raise ValueError(f"{cid}: embedding width {len(vec)} != snapshot width {dim}")
+            raw_meta = r.get("meta")
+            meta_dict = raw_meta if isinstance(raw_meta, dict) else {}
+            if isinstance(raw_meta, str):
+                meta_bytes = raw_meta.encode("utf-8")
+            else:
+                meta_bytes = json.dumps(meta_dict, default=str).encode("utf-8")
+            chunk_type = r.get("type") or meta_dict.get("type")
+            if chunk_type and chunk_type not in type_code:
+                type_code[chunk_type] = len(type_names) + 1
+                type_names.append(str(chunk_type))
+            codes.append(type_code.get(chunk_type, 0) if chunk_type else 0)
+            ids.append(str(cid).encode("utf-8"))
+            meta.write(meta_bytes)
+            meta_off.append(meta_off[-1] + len(meta_bytes))
+            block.append(vec)
+            if len(block) >= WRITE_BLOCK:
+                flush()
+        if block:
+            flush()
+    if len(set(ids)) != len(ids):
+        raise ValueError("duplicate chunk_id in snapshot rows")
+    id_off = np.zeros(len(ids) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in ids], out=id_off[1:])
+    (tmp / "ids.bin").write_bytes(b"".join(ids))
+    id_off.tofile(tmp / "ids.off")
+    np.asarray(sorted(range(len(ids)), key=ids.__getitem__), dtype=np.int64).tofile(
+        tmp / "ids.order"
+    )
+    np.asarray(codes, dtype=np.uint16).tofile(tmp / "types.u16")
+    np.asarray(meta_off, dtype=np.int64).tofile(tmp / "meta.off")
+    manifest = {
+        "format": FORMAT,
+        "version": VERSION,
+        "rows": len(ids),
+        "dim": dim or 0,
+        "types": type_names,
+        "created_at": time.time(),
+    }
+    (tmp / "manifest.json").write_text(json.dumps(manifest), encoding="utf-8")
+    _swap_in(tmp, path)
+    return manifest
+
+
+def export_snapshot(client: BigQueryClientBase, path: Union[str, Path]) -> Dict[str, Any]:
+    """Stream chunks_emb (export_chunk_embeddings.sql) into a snapshot at ``path``."""
+    return write_snapshot(client.run_sql_template_iter(EXPORT_TEMPLATE, {}), path)
+
+
+def _swap_in(tmp: Path, path: Path) -> None:
+    old = path.with_name(path.name + ".old")
+    shutil.rmtree(old, ignore_errors=True)
+    if path.exists():
+        os.replace(path, old)
+    os.replace(tmp, path)
+    shutil.rmtree(old, ignore_errors=True)  # mapped files stay readable until unmapped
+
+
+class EmbeddingSnapshot:
+    """Read-only, memory-mapped view of a snapshot directory."""
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        np = _np()
+        self.path = Path(path)
+        manifest = json.loads((self.path / "manifest.json").read_text(encoding="utf-8"))
+        if manifest.get("format") != FORMAT or manifest.get("version") != VERSION:
+            raise ValueError(f"{self.path}: not a {FORMAT} v{VERSION} snapshot")
+        self.rows = int(manifest["rows"])
+        self.dim = int(manifest["dim"])
+        self.types: List[str] = list(manifest["types"])
+        self.created_at = float(manifest.get("created_at") or 0.0)
+        self.embeddings = self._map("embeddings.f32", np.float32, (self.rows, self.dim))
+        self._ids = self._map("ids.bin", np.uint8, None)
+        self._id_off = self._map("ids.off", np.int64, (self.rows + 1,))
+        self._order = self._map("ids.order", np.int64, (self.rows,))
+        self.type_codes = self._map("types.u16", np.uint16, (self.rows,))
+        self._meta = self._map("meta.bin", np.uint8, None)
+        self._meta_off = self._map("meta.off", np.int64, (self.rows + 1,))
+
+    @classmethod
+    def open(cls, path: Union[str, Path]) -> "EmbeddingSnapshot":
+        return cls(path)
+
+    def _map(self, name: str, dtype: Any, shape: Optional[tuple]) -> Any:
+        np = _np()
+        file = self.path / name
+        if file.stat().st_size == 0:  # mmap cannot map an empty file
+            return np.zeros(shape or (0,), dtype=dtype)
+        return np.memmap(file, dtype=dtype, mode="r", shape=shape)
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def __contains__(self, chunk_id: object) -> bool:
+        return isinstance(chunk_id, str) and self.row_of(chunk_id) is not None
+
+    # -- rows ------------------------------------------------------------
+    def chunk_id(self, row: int) -> str:
+        return self._id_bytes(row).decode("utf-8")
+
+    def _id_bytes(self, row: int) -> bytes:
+        return self._ids[self._id_off[row]:self._id_off[row + 1]].tobytes()
+
+    def row_of(self, chunk_id: str) -> Optional[int]:
+        """Row number of ``chunk_id`` (binary search over ids.order), or None."""
+        target = chunk_id.encode("utf-8")
+        lo, hi = 0, self.rows
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._id_bytes(int(self._order[mid])) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.rows and self._id_bytes(int(self._order[lo])) == target:
+            return int(self._order[lo])
+        return None
+
+    def embedding(self, chunk_id: str) -> Any:
+        """Zero-copy (dim,) row of the mapped matrix, or None."""
+        row = self.row_of(chunk_id)
+        return None if row is None else self.embeddings[row]
+
+    def chunk_type(self, row: int) -> Optional[str]:
+        code = int(self.type_codes[row])
+        return self.types[code - 1] if code else None
+
+    def meta(self, row: int) -> Dict[str, Any]:
+        raw = self._meta[self._meta_off[row]:self._meta_off[row + 1]].tobytes()
+        try:
+            out = json.loads(raw.decode("utf-8")) if raw else {}
+        except ValueError:
+            return {}
+        return out if isinstance(out, dict) else {}
+
+    def type_mask(self, types: Sequence[str]) -> Any:
+        """Bool mask of rows whose type is in ``types``."""
+        np = _np()
+        wanted = [self.types.index(t) + 1 for t in types if t in self.types]
+        return np.isin(self.type_codes, np.asarray(wanted, dtype=np.uint16))
+
+
+_DEFAULT: Optional[EmbeddingSnapshot] = None
+_DEFAULT_LOCK = threading.Lock()
+_DEFAULT_LOADED = False
+
+
+def default_snapshot() -> Optional[EmbeddingSnapshot]:
+    """Snapshot opened once from RETRIEVAL_EMBEDDING_SNAPSHOT (None if unset / unreadable)."""
+    global _DEFAULT, _DEFAULT_LOADED
+    with _DEFAULT_LOCK:
+        if not _DEFAULT_LOADED:
+            _DEFAULT_LOADED = True
+            path = os.getenv("RETRIEVAL_EMBEDDING_SNAPSHOT")
+            if path and (Path(path) / "manifest.json").exists():
+                try:
+                    _DEFAULT = EmbeddingSnapshot.open(path)
+                except Exception:  # pragma: no cover - corrupt snapshot
+                    _DEFAULT = None
+        return _DEFAULT
+
+
+def set_default_snapshot(snapshot: Optional[EmbeddingSnapshot]) -> None:
+    """Install (or clear) the process-wide snapshot."""
+    global _DEFAULT, _DEFAULT_LOADED
+    with _DEFAULT_LOCK:
+        _DEFAULT = snapshot
+        _DEFAULT_LOADED = True
@@ -6,3 +6,138 @@ ROOT = Path(__file__).resolve().parent.parent
 root_str = str(ROOT)
 if root_str not in sys.path:
     sys.path.insert(0, root_str)
+
+import types  # noqa: E402
+
+import pytest  # noqa: E402
+
+
+class FakeQueryJobConfig:
+    def __init__(self, **kwargs):
+        self.query_parameters = kwargs.pop("query_parameters", [])
+        for k, v in kwargs.items():
+            setattr(self, k, v)
+
+
+class FakeScalarQueryParameter:
+    def __init__(self, name, type_, value):
+        self.name, self.type_, self.value = name, type_, value
+
+
+class FakeArrayQueryParameter:
+    def __init__(self, name, array_type, values):
+        self.name, self.array_type, self.values = name, array_type, values
+
+
+class FakeColumnar:
+    """Marker for to_arrow()/to_dataframe() results."""
+
+    def __init__(self, rows, kind):
+        self.rows, self.kind = list(rows), kind
+
+    def __len__(self):
+        return len(self.rows)
+
+
+class FakeRowIterator:
+    """Stand-in for google.cloud.bigquery.table.RowIterator."""
+
+    def __init__(self, rows, page_size=None):
+        self._rows = rows
+        self.page_size = page_size
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    def to_arrow(self, create_bqstorage_client=False, **kwargs):
+        self.bqstorage = create_bqstorage_client
+        return FakeColumnar(self._rows, "arrow")
+
+    def to_dataframe(self, create_bqstorage_client=False, **kwargs):
+        self.bqstorage = create_bqstorage_client
+        return FakeColumnar(self._rows, "pandas")
+
+    @property
+    def pages(self):
+        size = self.page_size or len(self._rows) or 1
+        for i in range(0, len(self._rows), size):
+            yield iter(self._rows[i:i + size])
+
+
+class FakeQueryJob:
+    """Minimal stand-in for google.cloud.bigquery.QueryJob."""
+
+    def __init__(self, rows, job_config=None, ready_after=0):
+        self._rows = list(rows)
+        self.job_config = job_config
+        self.ready_after = ready_after
+        self.polls = 0
+        # job statistics read by src.bq.telemetry
+        self.job_id = "job_fake"
+        self.total_bytes_processed = 1024
+        self.total_bytes_billed = 10 * 1024 * 1024
+        self.slot_millis = 50
+        self.cache_hit = False
+        self.started = None
+        self.ended = None
+        self.statement_type = None
+        self.dml_stats = None
+
+    def done(self):
+        self.polls += 1
+        return self.polls > self.ready_after
+
+    def result(self, page_size=None, **kwargs):
+        self.page_size = page_size
+        self.row_iter = FakeRowIterator(list(self._rows), page_size)
+        return self.row_iter
+
+
+class FakeBigQueryClient:
+    """Records submitted SQL; returns ``rows`` for every query."""
+
+    def __init__(self, project=None, location=None, credentials=None):
+        self.project = project
+        self.location = location
+        self.rows: list = []
+        self.ready_after = 0  # done() polls before a job reports finished
+        self.bytes_processed = 1024  # reported by every job (incl. dry runs)
+        self.rows_for: dict = {}  # SQL substring -> rows (overrides ``rows``)
+        self.child_jobs: list = []  # returned by list_jobs(parent_job=...)
+        self.queries: list = []
+        self.job_configs: list = []
+        self.jobs: list = []
+        self.warmed = False
+
+    def list_datasets(self, max_results=None):
+        self.warmed = True
+        return iter([])
+
+    def list_jobs(self, parent_job=None, **kwargs):
+        return list(reversed(self.child_jobs))  # API order: newest first
+
+    def query(self, sql, job_config=None, **kwargs):
+        self.queries.append(sql)
+        self.job_configs.append(job_config)
+        rows = next((r for key, r in self.rows_for.items() if key in sql), self.rows)
+        job = FakeQueryJob(rows, job_config, self.ready_after)
+        job.total_bytes_processed = self.bytes_processed
+        self.jobs.append(job)
+        return job
+
+
+@pytest.fixture
+def fake_bigquery(monkeypatch):
+    """Install a fake google.cloud.bigquery so RealClient can be built."""
+    mod = types.SimpleNamespace(
+        Client=FakeBigQueryClient,
+        QueryJobConfig=FakeQueryJobConfig,
+        ScalarQueryParameter=FakeScalarQueryParameter,
+        ArrayQueryParameter=FakeArrayQueryParameter,
+    )
+    monkeypatch.setitem(sys.modules, "google.cloud.bigquery", mod)
+    from src.bq import pool
+
+    pool.clear()  # every test gets fresh pooled fake clients
+    monkeypatch.delenv("GOOGLE_API_KEY", raising=False)
+    return mod
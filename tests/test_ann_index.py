@@ -0,0 +1,142 @@
+"""In-process IVF index over chunks_emb: search, sync, persistence, fallback."""
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.bq.bigquery_client import StubClient  # noqa: E402
+from src.bq.local import LocalClient  # noqa: E402
+from src.bq.local_ml import to_blob  # noqa: E402
+from src.bq.telemetry import MetricsRegistry  # noqa: E402
+from src.retrieval import ann  # noqa: E402
+from src.retrieval.ann import ChunkIndex  # noqa: E402
+from src.retrieval.hybrid import vector_search  # noqa: E402
+from src.retrieval.snapshot import EmbeddingSnapshot  # noqa: E402
+
+
+def _clustered(n=6000, dim=32, centers=40, seed=3):
+    rng = np.random.default_rng(seed)
+    c = rng.normal(size=(centers, dim))
+    x = c[rng.integers(0, centers, n)] + 0.2 * rng.normal(size=(n, dim))
+    return c, x
+
+
+def _rows(x):
+    return (
+        {"chunk_id": f"c{i}", "embedding": x[i], "text": f"t{i}",
+         "meta": {"type": "pdf" if i % 4 == 0 else "log", "filename": "f"}}
+        for i in range(len(x))
+    )
+
+
+def test_ivf_recall_and_type_filter():
+    centers, x = _clustered()
+    idx = ChunkIndex(nprobe=6)
+    idx.upsert(_rows(x))
+    assert idx.train() > 1
+    xn = x / np.linalg.norm(x, axis=1, keepdims=True)
+    hits = 0
+    for q in centers[:20]:
+        got = {r["chunk_id"] for r in idx.search(q, 8)}
+        truth = {f"c{i}" for i in np.argsort(-(xn @ (q / np.linalg.norm(q))))[:8]}
+        hits += len(got & truth)
+    assert hits / (20 * 8) >= 0.9
+    pdf = idx.search(centers[0], 5, types=["pdf"])
+    assert len(pdf) == 5 and all(r["meta"]["type"] == "pdf" for r in pdf)
+    assert [r["distance"] for r in pdf] == sorted(r["distance"] for r in pdf)
+    assert idx.search(centers[0], 5, types=["image"]) == []
+
+
+def test_upsert_replace_remove_and_roundtrip(tmp_path):
+    _, x = _clustered(n=50)
+    idx = ChunkIndex()
+    idx.upsert(_rows(x))
+    idx.upsert([{"chunk_id": "c1", "embedding": x[2], "text": "moved", "meta": {"type": "log"}}])
+    assert idx.remove(["c2", "missing"]) == 1
+    top = idx.search(x[2], 1)[0]
+    assert top["chunk_id"] == "c1" and top["text"] == "moved"
+    assert len(idx) == 49 and "c2" not in idx
+
+    loaded = ChunkIndex.load(idx.save(tmp_path / "idx.npz"))
+    assert len(loaded) == 49
+    assert loaded.search(x[7], 3) == idx.search(x[7], 3)
+
+
+@pytest.mark.parametrize("scheme,ratio", [("int8", 4), ("binary", 32)])
+def test_quantized_codes_rescore_exactly_within_tolerance(tmp_path, scheme, ratio):
+    _, x = _clustered(n=3000, dim=64)
+    exact = ChunkIndex()
+    exact.upsert(_rows(x))
+    idx = ChunkIndex(quantization=scheme, rescore=1)
+    idx.upsert(_rows(x))
+    mem = idx.memory_bytes()
+    assert mem["vectors"] == ratio * mem["codes"]
+    cal = idx.calibrate(k=8, tolerance=0.05, queries=50)
+    assert cal["recall"] >= 0.95 and idx.rescore == cal["rescore"]
+    got, want = idx.search(x[11], 8), exact.search(x[11], 8)
+    assert got[0] == want[0]  # shortlist rescored with full-precision vectors
+
+    path = idx.save(tmp_path / "q.ann.npz")
+    sidecar = EmbeddingSnapshot.open(tmp_path / "q.ann.vectors")  # one memmap format
+    assert len(sidecar) == 3000 and sidecar.chunk_id(11) == idx.ids()[11]
+    loaded = ChunkIndex.load(path)
+    assert (loaded.quantization, loaded.rescore) == (scheme, idx.rescore)
+    assert loaded.memory_bytes()["vectors"] == 0  # full vectors are mapped, not resident
+    assert loaded.search(x[11], 8) == got
+    loaded.upsert([{"chunk_id": "new", "embedding": x[11], "text": "n", "meta": {}}])
+    assert loaded.search(x[11], 2)[0]["distance"] == pytest.approx(0.0, abs=1e-6)
+
+
+def _local_with_chunks(texts):
+    client = LocalClient(metrics=MetricsRegistry())
+    client.ensure_schema()
+    emb = client.embedder
+    client.insert_rows(
+        "chunks_emb",
+        [
+            {"chunk_id": cid, "doc_id": "d", "text": text, "meta": {"type": kind},
+             "embedding": to_blob(emb.embed(text))}
+            for cid, text, kind in texts
+        ],
+    )
+    return client
+
+
+def test_sync_is_incremental_and_matches_bigquery_path():
+    client = _local_with_chunks([
+        ("a", "database timeout during login", "log"),
+        ("b", "database connection pool exhausted", "log"),
+        ("c", "ssl certificate expires soon", "pdf"),
+    ])
+    idx = ChunkIndex()
+    assert idx.sync(client)["added"] == 3
+    client.run_sql_template("inline", {"raw_sql": "DELETE FROM `p.d.chunks_emb` WHERE chunk_id = 'c'"})
+    client.insert_rows("chunks_emb", [{
+        "chunk_id": "d", "doc_id": "d", "text": "database timeout again",
+        "meta": {"type": "log"}, "embedding": to_blob(client.embedder.embed("database timeout again")),
+    }])
+    stats = idx.sync(client)
+    assert (stats["added"], stats["removed"], stats["rows"]) == (1, 1, 3)
+
+    via_index = vector_search(client, "database timeout", k=3, types=["log"], index=idx)
+    via_sql = vector_search(client, "database timeout", k=3, types=["log"])
+    assert [r["id"] for r in via_index] == [r["id"] for r in via_sql]
+    assert via_index[0]["source"] == via_sql[0]["source"]
+
+
+def test_falls_back_to_bigquery_without_query_embedding():
+    idx = ChunkIndex()
+    idx.upsert([{"chunk_id": "x", "embedding": [1.0, 0.0], "meta": {"type": "log"}}])
+    rows = vector_search(StubClient(), "q", k=2, types=["log"], index=idx)
+    assert rows and rows[0]["text"] == "chunk snippet for: q"  # stub SQL path
+
+
+def test_default_index_from_env(tmp_path, monkeypatch):
+    idx = ChunkIndex()
+    idx.upsert([{"chunk_id": "x", "embedding": [1.0, 0.0], "meta": {"type": "log"}}])
+    path = idx.save(tmp_path / "i.npz")
+    monkeypatch.setattr(ann, "_DEFAULT_LOADED", False)
+    monkeypatch.setattr(ann, "_DEFAULT", None)
+    monkeypatch.setenv("RETRIEVAL_ANN_INDEX", str(path))
+    assert len(ann.default_index()) == 1
+    ann.set_default_index(None)
+    assert ann.default_index() is None
@@ -0,0 +1,49 @@
+"""Columnar (Arrow / pandas) result path."""
+import pytest
+
+from src.bq.bigquery_client import RealClient, StubClient, rows_to_columnar
+from src.bq.telemetry import MetricsRegistry
+
+
+def test_real_client_reads_via_storage_api(fake_bigquery):
+    reg = MetricsRegistry()
+    client = RealClient(project="p", metrics=reg)
+    client._client.rows = [{"chunk_id": "a", "embedding": [0.1, 0.2]}]
+    table = client.run_sql_template_arrow("export_chunk_embeddings.sql", {})
+    assert table.kind == "arrow"
+    assert client._client.jobs[-1].row_iter.bqstorage is True
+    assert "chunks_emb" in client._client.queries[-1]
+    assert reg.records()[0].rows == 1
+
+
+def test_real_client_dataframe(fake_bigquery):
+    client = RealClient(project="p")
+    client._client.rows = [{"week": "w1", "severity": "P1", "count": 2}]
+    df = client.run_sql_template_arrow("_raw.sql", {"raw_sql": "SELECT 1"}, as_pandas=True)
+    assert df.kind == "pandas"
+    assert df.rows == client._client.rows
+
+
+def test_stub_client_builds_arrow_from_rows():
+    pa = pytest.importorskip("pyarrow")
+    table = StubClient().run_sql_template_arrow(
+        "_raw.sql", {"raw_sql": "select * from view_issues_by_severity"}
+    )
+    assert isinstance(table, pa.Table)
+    assert table.column_names == ["week", "severity", "count"]
+    assert table.num_rows == 8
+
+
+def test_missing_columnar_lib_message(monkeypatch):
+    import importlib
+
+    real = importlib.import_module
+
+    def fake_import(name, *a, **kw):
+        if name in ("pyarrow", "pandas"):
+            raise ImportError(name)
+        return real(name, *a, **kw)
+
+    monkeypatch.setattr(importlib, "import_module", fake_import)
+    with pytest.raises(RuntimeError, match="arrow"):
+        rows_to_columnar([{"a": 1}])
@@ -0,0 +1,90 @@
+"""Tests for the asyncio client facade and async orchestrator variants."""
+from __future__ import annotations
+import asyncio
+import threading
+import time
+from typing import Any, Dict, List
+
+from bq import make_client
+from core.orchestrator import Orchestrator
+from src.bq.async_client import AsyncBigQueryClient
+from src.bq.bigquery_client import BigQueryClientBase, RealClient
+from src.retrieval.hybrid import vector_search_async
+
+
+class SlowClient(BigQueryClientBase):
+    """Sync client whose every call takes ``delay`` seconds."""
+
+    def __init__(self, delay: float = 0.1) -> None:
+        self.delay = delay
+        self.calls: List[str] = []
+        self._lock = threading.Lock()
+
+    def run_sql_template(self, name: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        time.sleep(self.delay)
+        with self._lock:
+            self.calls.append(name)
+        if name == "router_predict.sql":
+            return [{"predicted_label": "logs_only", "predicted_label_probs": [0.9]}]
+        if name in ("chunk_vector_search.sql", "vector_search.sql"):
+            return [{"chunk_id": "c1", "text": "t", "distance": 0.2, "meta": {"type": "log"}}]
+        return []
+
+
+def test_jobs_run_concurrently():
+    aclient = AsyncBigQueryClient(SlowClient(0.1))
+
+    async def go():
+        return await asyncio.gather(
+            *(aclient.run_sql_template_async("x.sql", {}) for _ in range(4))
+        )
+
+    start = time.perf_counter()
+    asyncio.run(go())
+    assert time.perf_counter() - start < 0.35
+
+
+def test_real_client_polls_until_done(fake_bigquery):
+    real = RealClient(project="p", location="US")
+    real._client.rows = [{"n": 1}]
+    real._client.ready_after = 2
+    aclient = AsyncBigQueryClient(real, poll_interval=0.001)
+    rows = asyncio.run(aclient.run_sql_template_async("_raw.sql", {"raw_sql": "SELECT 1"}))
+    assert rows == [{"n": 1}]
+
+
+def test_vector_search_async_matches_sync_contract():
+    aclient = AsyncBigQueryClient(make_client())
+    rows = asyncio.run(vector_search_async(aclient, "disk full", k=3, types=["log"]))
+    assert rows[0]["source"].startswith("bq.vector_search:log")
+
+
+def test_triage_async_speculative_search_reused():
+    # "error timeout" routes heuristically to logs_only, same as the learned label
+    client = SlowClient(0.1)
+    orch = Orchestrator(client)
+    start = time.perf_counter()
+    result = asyncio.run(orch.triage_async({"title": "error timeout"}, router_mode="auto"))
+    elapsed = time.perf_counter() - start
+    assert result["stats"]["router_strategy"] == "learned"
+    assert result["stats"]["types"] == ["log"]
+    assert client.calls.count("chunk_vector_search.sql") == 1
+    assert elapsed < 0.19  # routing and search overlapped
+
+
+def test_triage_async_matches_sync_on_stub():
+    orch = Orchestrator(make_client())
+    ticket = {"title": "Login fails intermittently", "body": "Users report 500"}
+    sync = orch.triage(dict(ticket), k=3)
+    res = asyncio.run(orch.triage_async(dict(ticket), k=3))
+    assert res["snippets"] == sync["snippets"]
+    assert res["draft_ok"] == sync["draft_ok"]
+
+
+def test_triage_ticket_async_writes_links():
+    client = SlowClient(0.05)
+    orch = Orchestrator(client)
+    res = asyncio.run(orch.triage_ticket_async("T-1", router_mode="heuristic"))
+    assert res["links_written"] == 1
+    assert client.calls.count("insert_ticket_links.sql") == 1
+    assert "insert_resolution.sql" in client.calls
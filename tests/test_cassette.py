@@ -0,0 +1,159 @@
+"""Cassettes: RecordingClient captures calls, ReplayClient serves them back."""
+import datetime
+import decimal
+
+import pytest
+
+from bq.tickets import TicketsRepo
+from src.bq import script
+from src.bq.bigquery_client import RealClient, StubClient, make_client
+from src.bq.cassette import (
+    CassetteMiss,
+    RecordingClient,
+    ReplayClient,
+    ReplayedError,
+    call_key,
+    load_cassette,
+)
+from src.bq.telemetry import MetricsRegistry
+from src.retrieval.hybrid import vector_search
+
+
+class _Boom(StubClient):
+    def run_sql_template(self, name, params):
+        if name == "router_predict.sql":
+            raise RuntimeError("model missing")
+        return super().run_sql_template(name, params)
+
+
+def test_record_then_replay_rows_and_order(tmp_path):
+    path = tmp_path / "c.jsonl"
+    rec = RecordingClient(StubClient(), path)
+    first = vector_search(rec, "db timeout", k=3)
+    rec.run_sql_template("_raw.sql", {"raw_sql": "select * from view_common_issues"})
+    entries = load_cassette(path)
+    assert [e["template"] for e in entries] == ["vector_search.sql", "_raw.sql"]
+    assert entries[0]["params"] == {"query_text": "db timeout", "top_k": 3}
+
+    reg = MetricsRegistry()
+    replay = ReplayClient(path, latency_scale=0.0, metrics=reg)
+    assert vector_search(replay, "db timeout", k=3) == first
+    assert len(replay.run_sql_template(
+        "_raw.sql", {"raw_sql": "select * from view_common_issues"})) == 3
+    assert reg.summary()["vector_search.sql"]["count"] == 1
+    with pytest.raises(CassetteMiss):
+        replay.run_sql_template("vector_search.sql", {"query_text": "other", "top_k": 3})
+
+
+def test_replay_latency_scaled(tmp_path):
+    path = tmp_path / "c.jsonl"
+    path.write_text(
+        '{"key": "%s", "kind": "template", "template": "t.sql", "params": {}, '
+        '"rows": [{"x": 1}], "latency_ms": 200.0, "error": null}\n'
+        % call_key("template", "t.sql", {})
+    )
+    slept = []
+    replay = ReplayClient(path, latency_scale=0.5, sleep=slept.append, metrics=MetricsRegistry())
+    assert replay.run_sql_template("t.sql", {}) == [{"x": 1}]
+    assert slept == [0.1]
+    ReplayClient(path, latency_scale=0.0, sleep=slept.append).run_sql_template("t.sql", {})
+    assert slept == [0.1]
+
+
+def test_repeated_calls_cycle_and_errors_replay(tmp_path):
+    path = tmp_path / "c.jsonl"
+    rec = RecordingClient(_Boom(), path)
+    with pytest.raises(RuntimeError):
+        rec.run_sql_template("router_predict.sql", {"title": "x"})
+    replay = ReplayClient(path, latency_scale=0.0, metrics=MetricsRegistry())
+    for _ in range(2):
+        with pytest.raises(ReplayedError, match="model missing"):
+            replay.run_sql_template("router_predict.sql", {"title": "x"})
+
+
+class _Pending:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def done(self):
+        return True
+
+    def result(self):
+        return self.rows
+
+
+class _StartQueryStub(StubClient):
+    started = 0
+
+    def start_query(self, name, params, sql=None):
+        self.started += 1
+        return _Pending(self.run_sql_template(name, params))
+
+
+def test_async_jobs_are_recorded(tmp_path):
+    import asyncio
+
+    from src.bq.async_client import AsyncBigQueryClient
+
+    path = tmp_path / "c.jsonl"
+    inner = _StartQueryStub()
+    rec = RecordingClient(inner, path)
+    rows = asyncio.run(AsyncBigQueryClient(rec).run_sql_template_async(
+        "vector_search.sql", {"query_text": "db timeout", "top_k": 2}
+    ))
+    assert inner.started == 0 and not hasattr(rec, "start_query")
+    entries = load_cassette(path)
+    assert [e["template"] for e in entries] == ["vector_search.sql"]
+    assert entries[0]["rows"] == rows
+
+
+def test_non_json_values_round_trip(tmp_path):
+    path = tmp_path / "c.jsonl"
+    row = {
+        "ts": datetime.datetime(2025, 8, 1, 12, 30, tzinfo=datetime.timezone.utc),
+        "day": datetime.date(2025, 8, 1),
+        "amount": decimal.Decimal("1.50"),
+        "blob": b"\x00\x01",
+        "meta": {"type": "log", "tags": ["a"]},
+    }
+
+    class _Rows(StubClient):
+        def run_sql_template(self, name, params):
+            return [dict(row)]
+
+    RecordingClient(_Rows(), path).run_sql_template("x.sql", {"d": row["day"]})
+    out = ReplayClient(path, latency_scale=0.0).run_sql_template("x.sql", {"d": row["day"]})
+    assert out == [row]
+
+
+def test_real_client_bytes_and_script_path(fake_bigquery, tmp_path):
+    script.forget_schema()
+    path = tmp_path / "c.jsonl"
+    real = RealClient(project="p", metrics=MetricsRegistry())
+    real._client.rows = [{"chunk_id": "c1", "text": "t", "distance": 0.1}]
+    rec = RecordingClient(real, path)
+    rec.run_sql_template("get_chunk_details.sql", {"chunk_ids": ["c1"]})
+    TicketsRepo(rec).ensure_schema()  # ScriptBatch -> run_script via the wrapper
+    entries = load_cassette(path)
+    assert entries[0]["bytes_processed"] == 1024
+    assert entries[0]["bytes_billed"] == 10 * 1024 * 1024
+    assert "script" in {e["kind"] for e in entries}
+    assert not hasattr(RecordingClient(StubClient(), path), "run_script")
+    script.forget_schema()
+
+
+def test_make_client_env(monkeypatch, tmp_path):
+    path = tmp_path / "c.jsonl"
+    monkeypatch.delenv("BIGQUERY_REAL", raising=False)
+    monkeypatch.delenv("BIGQUERY_LOCAL", raising=False)
+    monkeypatch.delenv("BQ_REPLAY", raising=False)
+    monkeypatch.setenv("BQ_RECORD", str(path))
+    client = make_client()
+    assert isinstance(client, RecordingClient)
+    client.run_sql_template("vector_search.sql", {"query_text": "q", "top_k": 1})
+    monkeypatch.delenv("BQ_RECORD")
+    monkeypatch.setenv("BQ_REPLAY", str(path))
+    monkeypatch.setenv("BQ_REPLAY_LATENCY", "0")
+    replay = make_client()
+    assert isinstance(replay, ReplayClient) and len(replay) == 1
+    assert replay.run_sql_template("vector_search.sql", {"query_text": "q", "top_k": 1})
@@ -10,9 +10,9 @@ def test_chunk_vector_search_sql_variables_present():
     required = [
         "${PROJECT_ID}",
         "${DATASET}",
-        "${TOP_K}",
-        "${QUERY_TEXT}",
         "${EMBED_MODEL}",
+        "@top_k",
+        "@query_text",
     ]
     for var in required:
         assert var in sql
@@ -25,4 +25,5 @@ def test_chunk_vector_search_sql_variables_present():
 def test_chunk_vector_search_has_type_filter_clause():
     sql = SQL_PATH.read_text(encoding="utf-8")
     assert "JSON_VALUE(c.meta, '$.type')" in sql
-    assert "TYPE_ARRAY" in sql or "ARRAY_LENGTH(${TYPE_ARRAY})" in sql
+    assert "ARRAY_LENGTH(@types)" in sql
+    assert "IN UNNEST(@types)" in sql
@@ -0,0 +1,43 @@
+"""Process-wide BigQuery client pool and warm-up hook."""
+from src.bq import pool
+from src.bq.bigquery_client import RealClient, make_client
+
+
+def test_clients_shared_per_project_location(fake_bigquery):
+    a = RealClient(project="p", location="US")
+    b = RealClient(project="p", location="US")
+    c = RealClient(project="p", location="EU")
+    assert a._client is b._client
+    assert a._client is not c._client
+
+
+def test_make_client_reuses_pool_and_warms(fake_bigquery, monkeypatch):
+    monkeypatch.setenv("BIGQUERY_REAL", "1")
+    monkeypatch.setenv("BQ_PROJECT_ID", "proj")
+    monkeypatch.delenv("BQ_LOCATION", raising=False)
+    monkeypatch.delenv("BQ_WARMUP", raising=False)
+    first = make_client()
+    second = make_client()
+    assert first._client is second._client
+    pool.warm_up(fake_bigquery, "proj", None, wait=True)
+    assert first._client.warmed is True
+
+
+def test_warm_up_runs_once(fake_bigquery, monkeypatch):
+    calls = []
+    monkeypatch.setattr(pool, "_warm", lambda client: calls.append(client))
+    t1 = pool.warm_up(fake_bigquery, "p", None, wait=True)
+    t2 = pool.warm_up(fake_bigquery, "p", None, wait=True)
+    assert t1 is t2
+    assert len(calls) == 1
+
+
+def test_warm_up_failure_is_non_fatal(fake_bigquery):
+    client = RealClient(project="p")
+
+    def boom(max_results=None):
+        raise RuntimeError("network down")
+
+    client._client.list_datasets = boom
+    client.warm_up(wait=True)  # logs, does not raise
+    assert client.run_sql_template("_raw.sql", {"raw_sql": "SELECT 1"}) == []
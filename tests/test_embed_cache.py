@@ -0,0 +1,94 @@
+"""Query-embedding cache: tiers, LRU eviction and *_by_vec.sql reuse."""
+import pytest
+
+from src.bq.bigquery_client import RealClient, StubClient
+from src.bq.embed_cache import EmbeddingCache, normalize_text, set_default_embedding_cache
+from src.bq.telemetry import MetricsRegistry
+from src.retrieval.hybrid import vector_search
+from src.retrieval.query_embed import embed_query
+
+
+@pytest.fixture
+def cache():
+    c = EmbeddingCache()
+    set_default_embedding_cache(c)
+    yield c
+    set_default_embedding_cache(None)
+
+
+def test_normalized_key_and_memory_lru():
+    assert normalize_text("  DB timeout \n on  login ") == "DB timeout on login"
+    c = EmbeddingCache(max_entries=2)
+    c.put("m", "db  timeout", [1.0, 0.5])
+    assert c.get("m", " db timeout") == [1.0, 0.5]
+    assert c.get("other-model", "db timeout") is None
+    c.put("m", "b", [2.0])
+    c.get("m", "db timeout")  # touch: "b" is now least recent
+    c.put("m", "c", [3.0])
+    assert c.get("m", "b") is None and c.get("m", "db timeout") == [1.0, 0.5]
+    assert c.stats()["evictions"] == 1
+
+
+def test_disk_tier_shared_and_lru_trimmed(tmp_path):
+    path = tmp_path / "emb.sqlite3"
+    ticks = iter(range(1000))
+    a = EmbeddingCache(path=path, max_disk_entries=10, clock=lambda: next(ticks))
+    for i in range(10):
+        a.put("m", f"q{i}", [float(i), 0.25])
+    a.get("m", "q0")  # memory hit; disk recency only moves on disk reads
+    b = EmbeddingCache(path=path, max_disk_entries=10, clock=lambda: next(ticks))
+    assert b.get("m", "q1") == [1.0, 0.25] and b.stats()["disk_hits"] == 1
+    b.put("m", "q10", [10.0])  # 11 > 10: trim to 9, oldest first
+    assert b.stats()["disk_entries"] == 9
+    fresh = EmbeddingCache(path=path)
+    assert fresh.get("m", "q1") is not None  # touched by b's disk read
+    assert fresh.get("m", "q0") is None and fresh.get("m", "q2") is None
+
+
+def test_stub_client_never_caches(cache):
+    rows = vector_search(StubClient(), "q", k=2, types=["log"])
+    assert rows[0]["text"] == "chunk snippet for: q"
+    assert len(cache) == 0
+
+
+def test_real_client_reuses_vector_from_search_row(fake_bigquery, cache):
+    client = RealClient(project="p", metrics=MetricsRegistry(), resilience=None)
+    client._client.rows = [
+        {"chunk_id": "a", "distance": 0.1, "text": "t", "meta": {"type": "log"},
+         "query_embedding": [0.5, 0.25]},
+        {"chunk_id": "b", "distance": 0.2, "text": "u", "meta": {"type": "log"},
+         "query_embedding": []},
+    ]
+    first = vector_search(client, "Login timeout", k=2, types=["log"])
+    second = vector_search(client, " login  timeout", k=2, types=["log"])
+    assert vector_search(client, "Login  timeout", k=2, types=["log"]) == first == second
+    sqls = client._client.queries
+    assert "ML.GENERATE_EMBEDDING" in sqls[0]
+    assert "@query_embedding" in sqls[2] and "ML.GENERATE_EMBEDDING" not in sqls[2]
+    assert "ML.GENERATE_EMBEDDING" in sqls[1]  # case is part of the key
+    bound = {p.name: p for p in client._client.jobs[2].job_config.query_parameters}
+    assert bound["query_embedding"].values == [0.5, 0.25]
+    assert embed_query(client, "Login timeout") == [0.5, 0.25]
+    assert len(client._client.jobs) == 3  # served from the cache
+
+
+def test_local_client_by_vec_matches_embedding_search(cache):
+    pytest.importorskip("numpy")
+    from src.bq.local import LocalClient
+    from src.bq.local_ml import to_blob
+
+    reg = MetricsRegistry()
+    client = LocalClient(metrics=reg)
+    client.ensure_schema()
+    client.insert_rows("chunks_emb", [
+        {"chunk_id": cid, "doc_id": "d", "text": text, "meta": {"type": "log"},
+         "embedding": to_blob(client.embedder.embed(text))}
+        for cid, text in [("a", "database timeout on login"), ("b", "ssl certificate"),
+                          ("c", "database pool exhausted")]
+    ])
+    cold = vector_search(client, "database timeout", k=3, types=["log"])
+    warm = vector_search(client, "database  timeout", k=3, types=["log"])
+    assert cold == warm
+    assert [r.template for r in reg.records() if "vector_search" in r.template] == [
+        "chunk_vector_search.sql", "chunk_vector_search_by_vec.sql",
+    ]
@@ -0,0 +1,61 @@
+"""Memory-mapped chunks_emb snapshot: layout, lookups, export, ANN sidecar."""
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.bq.local import LocalClient  # noqa: E402
+from src.bq.local_ml import to_blob  # noqa: E402
+from src.bq.telemetry import MetricsRegistry  # noqa: E402
+from src.retrieval.snapshot import EmbeddingSnapshot, export_snapshot, write_snapshot  # noqa: E402
+
+
+def _rows(x):
+    kinds = ["log", "pdf", None]
+    return [
+        {"chunk_id": f"c{i:03d}" if i % 2 else f"z{i}", "embedding": x[i],
+         "type": kinds[i % 3], "meta": {"type": kinds[i % 3], "n": i}}
+        for i in range(len(x))
+    ]
+
+
+def test_write_open_and_lookup(tmp_path):
+    x = np.random.default_rng(0).normal(size=(300, 16))
+    rows = _rows(x)
+    manifest = write_snapshot(iter(rows), tmp_path / "snap")
+    assert (manifest["rows"], manifest["dim"], manifest["types"]) == (300, 16, ["log", "pdf"])
+
+    snap = EmbeddingSnapshot.open(tmp_path / "snap")
+    assert isinstance(snap.embeddings, np.memmap) and snap.embeddings.dtype == np.float32
+    row = snap.row_of("z42")
+    assert snap.chunk_id(row) == "z42" and snap.meta(row) == {"type": "log", "n": 42}
+    assert snap.row_of("missing") is None and "c001" in snap
+    vec = snap.embedding("c007")
+    assert isinstance(vec, np.memmap)  # a view into the mapping, not a copy
+    assert np.allclose(vec, x[7] / np.linalg.norm(x[7]), atol=1e-6)
+    assert int(snap.type_mask(["pdf"]).sum()) == 100 and snap.chunk_type(row) == "log"
+
+    xn = x / np.linalg.norm(x, axis=1, keepdims=True)
+    assert np.allclose(snap.embeddings, xn, atol=1e-6)  # rows kept in input order
+    write_snapshot(iter(rows), tmp_path / "raw", normalize=False)
+    assert np.array_equal(EmbeddingSnapshot.open(tmp_path / "raw").embeddings, x.astype(np.float32))
+
+    # replacing the snapshot leaves an already-open reader intact
+    write_snapshot(iter(rows[:10]), tmp_path / "snap")
+    assert len(EmbeddingSnapshot.open(tmp_path / "snap")) == 10
+    assert snap.chunk_id(snap.row_of("z42")) == "z42"
+
+
+def test_export_from_chunks_emb(tmp_path):
+    client = LocalClient(metrics=MetricsRegistry())
+    client.ensure_schema()
+    client.insert_rows("chunks_emb", [
+        {"chunk_id": cid, "doc_id": "d", "text": text, "meta": {"type": "log"},
+         "embedding": to_blob(client.embedder.embed(text))}
+        for cid, text in (("a", "database timeout"), ("b", "disk full"))
+    ])
+    manifest = export_snapshot(client, tmp_path / "snap")
+    snap = EmbeddingSnapshot.open(tmp_path / "snap")
+    assert manifest["rows"] == 2 and snap.types == ["log"]
+    vec = np.asarray(client.embedder.embed("database timeout"), dtype=np.float32)
+    assert np.allclose(snap.embedding("a"), vec / np.linalg.norm(vec), atol=1e-6)
+    assert snap.meta(snap.row_of("a")) == {"type": "log"} and snap.chunk_type(0) == "log"
@@ -0,0 +1,105 @@
+"""Fused vector search + graph expansion (chunk_vector_search_graph.sql)."""
+import asyncio
+from unittest.mock import Mock
+
+import pytest
+
+from src.bq.embed_cache import EmbeddingCache, set_default_embedding_cache
+from src.bq.telemetry import MetricsRegistry
+from src.retrieval import hybrid
+
+
+@pytest.fixture
+def cache():
+    c = EmbeddingCache()
+    set_default_embedding_cache(c)
+    yield c
+    set_default_embedding_cache(None)
+
+
+@pytest.fixture
+def local():
+    pytest.importorskip("numpy")
+    from bq.tickets import TicketsRepo
+    from src.bq.local import LocalClient
+    from src.bq.local_ml import to_blob
+
+    client = LocalClient(metrics=MetricsRegistry())
+    client.ensure_schema()
+    texts = [
+        ("c0", "database timeout on login", "log"),
+        ("c1", "database pool exhausted", "log"),
+        ("c2", "connection reset by peer", "log"),
+        ("c3", "ssl handshake failure", "pdf"),
+        ("c4", "retry storm after deploy", "log"),
+    ]
+    client.insert_rows("chunks_emb", [
+        {"chunk_id": cid, "doc_id": "d", "text": text, "meta": {"type": kind},
+         "embedding": to_blob(client.embedder.embed(text))}
+        for cid, text, kind in texts
+    ])
+    client.run_sql_template("inline", {"raw_sql": (
+        "INSERT INTO `p.d.chunk_neighbors` (src_chunk_id, nbr_chunk_id, weight) VALUES "
+        "('c0', 'c2', 0.9), ('c0', 'c1', 0.7), ('c1', 'c3', 0.4)"
+    )})
+    repo = TicketsRepo(client)
+    repo.ensure_schema()
+    for ticket in ("T1", "T2"):  # c0 <-> c4 co-occur in two tickets
+        repo.upsert_link(ticket, "c0", "evidence", 0.5)
+        repo.upsert_link(ticket, "c4", "evidence", 0.5)
+    return client
+
+
+def _sequential(client, query, k, types, boost):
+    initial = hybrid.chunk_vector_search(client, query, k, types)
+    return hybrid._expand_with_graph(client, initial, k, boost, 5)
+
+
+def test_fused_matches_sequential_in_one_job(local, cache):
+    expected = _sequential(local, "database timeout", 2, ["log"], 0.3)
+    local.metrics.reset()
+    cache.clear()
+    fused = hybrid.vector_search(local, "database timeout", k=2, types=["log"], graph_boost=0.3)
+    assert fused == expected
+    # neighbors from both chunk_neighbors and the ticket co-link view
+    assert {r.get("graph_sources") for r in fused if r["source_type"] == "graph"} == {
+        "similarity", "co_occurrence"
+    }
+    assert [r.template for r in local.metrics.records()] == ["chunk_vector_search_graph.sql"]
+
+    again = hybrid.vector_search(local, "database timeout", k=2, types=["log"], graph_boost=0.3)
+    assert again == fused
+    assert local.metrics.records()[-1].template == "chunk_vector_search_graph_by_vec.sql"
+
+
+def test_async_fused_matches_sync(local, cache):
+    from src.bq.async_client import AsyncBigQueryClient
+
+    sync = hybrid.vector_search(local, "database timeout", k=3, types=["log"], graph_boost=0.3)
+    cache.clear()
+    out = asyncio.run(hybrid.vector_search_async(
+        AsyncBigQueryClient(local), "database timeout", k=3, types=["log"], graph_boost=0.3
+    ))
+    assert out == sync
+
+
+def test_fused_failure_falls_back_to_sequential_expansion():
+    client = Mock()
+    client.embedding_model.return_value = None
+    responses = {
+        "chunk_vector_search.sql": [{"chunk_id": "c1", "distance": 0.1, "text": "t1"}],
+        "get_chunk_neighbors.sql": [
+            {"src_chunk_id": "c1", "nbr_chunk_id": "c2", "weight": 0.8, "sources": "similarity"},
+        ],
+        "get_chunk_details.sql": [{"chunk_id": "c2", "text": "t2", "meta": {}}],
+    }
+
+    def run(name, params):
+        if name == "chunk_vector_search_graph.sql":
+            raise RuntimeError("Not found: Table chunk_neighbors_ticket")
+        return responses[name]
+
+    client.run_sql_template.side_effect = run
+    out = hybrid.vector_search(client, "q", k=3, types=["log"], graph_boost=0.2)
+    assert [r["id"] for r in out] == ["c1", "c2"]
+    assert client.run_sql_template.call_count == 4
@@ -19,7 +19,7 @@ class TestChunkNeighborSQL:
             sql_content = f.read()
 
         # Verify required parameters
-        required_params = ["${PROJECT_ID}", "${DATASET}", "${CHUNK_IDS_ARRAY}", "${MAX_NEIGHBORS}"]
+        required_params = ["${PROJECT_ID}", "${DATASET}", "@chunk_ids", "@max_neighbors"]
         for param in required_params:
             assert param in sql_content, f"Missing parameter {param}"
 
@@ -42,7 +42,7 @@ class TestChunkNeighborSQL:
             sql_content = f.read()
 
         # Verify required parameters
-        required_params = ["${PROJECT_ID}", "${DATASET}", "${CHUNK_IDS_ARRAY}"]
+        required_params = ["${PROJECT_ID}", "${DATASET}", "@chunk_ids"]
         for param in required_params:
             assert param in sql_content, f"Missing parameter {param}"
 
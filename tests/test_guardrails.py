@@ -0,0 +1,73 @@
+"""Dry-run estimates and per-template maximum_bytes_billed caps."""
+import pytest
+
+from core.cli import build_parser, cmd_triage
+from src.bq.bigquery_client import RealClient, StubClient
+from src.bq.guardrails import GIB, BytesBudget, BytesBudgetExceeded
+
+
+def test_budget_from_env(monkeypatch):
+    monkeypatch.setenv("BQ_MAX_BYTES_BILLED", "5000")
+    monkeypatch.setenv("BQ_TEMPLATE_MAX_BYTES", "vector_search.sql=100,_raw.sql=0")
+    budget = BytesBudget.from_env()
+    assert budget.cap_for("vector_search.sql") == 100
+    assert budget.cap_for("_raw.sql") is None  # 0 disables the default cap
+    assert budget.cap_for("router_predict.sql") == 5000
+    assert budget.cap_for("build_chunk_neighbors.sql") == 50 * GIB
+
+
+def test_estimate_uses_dry_run(fake_bigquery):
+    client = RealClient(project="p", budget=BytesBudget(caps={}))
+    client._client.bytes_processed = 4096
+    assert client.estimate("vector_search.sql", {"query_text": "q", "top_k": 3}) == 4096
+    cfg = client._client.job_configs[-1]
+    assert cfg.dry_run is True
+    assert cfg.use_query_cache is False
+    assert {p.name for p in cfg.query_parameters} == {"query_text", "top_k"}
+    assert StubClient().estimate("vector_search.sql", {}) is None
+
+
+def test_cap_set_on_job_config(fake_bigquery):
+    client = RealClient(project="p", budget=BytesBudget(caps={"vector_search.sql": 2048}))
+    client.run_sql_template("vector_search.sql", {"query_text": "q", "top_k": 3})
+    assert client._client.job_configs[-1].maximum_bytes_billed == 2048
+    client.run_sql_template("router_predict.sql", {"query_text": "q"})
+    assert not hasattr(client._client.job_configs[-1], "maximum_bytes_billed")
+
+
+def test_preflight_fails_before_submit(fake_bigquery):
+    budget = BytesBudget(caps={"vector_search.sql": 100}, preflight=True)
+    client = RealClient(project="p", budget=budget)
+    client._client.bytes_processed = 10_000
+    with pytest.raises(BytesBudgetExceeded) as err:
+        client.run_sql_template("vector_search.sql", {"query_text": "q", "top_k": 3})
+    assert err.value.estimate == 10_000
+    # only the dry run reached BigQuery
+    assert len(client._client.queries) == 1
+    assert client._client.job_configs[0].dry_run is True
+
+
+def test_billing_limit_error_translated(fake_bigquery):
+    client = RealClient(project="p", budget=BytesBudget(caps={"vector_search.sql": 100}))
+
+    def over_limit(sql, job_config=None, **kw):
+        raise RuntimeError("400 Query exceeded limit for bytes billed: 100.")
+
+    client._client.query = over_limit
+    with pytest.raises(BytesBudgetExceeded, match="vector_search.sql"):
+        client.run_sql_template("vector_search.sql", {"query_text": "q", "top_k": 3})
+
+
+def test_cli_estimate_runs_no_jobs(fake_bigquery, monkeypatch, capsys):
+    client = RealClient(project="p", budget=BytesBudget(caps={"router_predict.sql": 10}))
+    monkeypatch.setattr("core.cli.make_client", lambda: client)
+    args = build_parser().parse_args(
+        ["triage", "--title", "timeout error", "--estimate", "--graph-boost", "0.2"]
+    )
+    rc = cmd_triage(args)
+    out = capsys.readouterr().out
+    assert rc == 1  # router_predict estimate (1 KiB) is over its 10 byte cap
+    assert "router_predict.sql: bytes=1.00 KiB cap=10 B OVER CAP" in out
+    assert "chunk_vector_search_graph.sql" in out  # search + graph expansion fused
+    assert "get_chunk_details.sql" not in out
+    assert all(cfg.dry_run for cfg in client._client.job_configs)
@@ -0,0 +1,125 @@
+"""BM25 lexical index and hybrid (lexical + vector) rank fusion."""
+import asyncio
+
+import pytest
+
+from src.bq.bigquery_client import StubClient
+from src.bq.telemetry import MetricsRegistry
+from src.retrieval import hybrid
+from src.retrieval.lexical import exact_terms, tokenize
+
+np = pytest.importorskip("numpy")
+
+from src.retrieval.lexical import BM25Index  # noqa: E402
+
+ROWS = [
+    {"chunk_id": "c1", "text": "ERR_CONN_RESET from api.example.com:443", "meta": {"type": "log"}},
+    {"chunk_id": "c2", "text": "Connection reset while calling the billing api", "meta": {"type": "log"}},
+    {"chunk_id": "c3", "text": "java.lang.NullPointerException in OrderService", "meta": {"type": "pdf"}},
+    {"chunk_id": "c4", "text": "Disk full on db-01, writes failing", "meta": {"type": "log"}},
+]
+
+
+def test_tokenize_keeps_identifiers_and_parts():
+    assert tokenize("java.lang.NullPointerException")[:2] == ["java.lang.nullpointerexception", "java"]
+    assert {"null", "pointer", "exception"} <= set(tokenize("NullPointerException"))
+    assert "api.example.com" in tokenize("api.example.com:443")
+    assert exact_terms("why does ERR_CONN_RESET happen") == ["err_conn_reset"]
+    assert exact_terms("database is slow") == []
+
+
+def test_bm25_ranking_types_and_exact():
+    idx = BM25Index(metrics=MetricsRegistry())
+    assert idx.upsert(ROWS) == 4
+    rows = idx.search("connection reset ERR_CONN_RESET", k=3)
+    assert rows[0]["chunk_id"] == "c1" and rows[0]["exact"] == 1
+    assert {r["chunk_id"] for r in rows} == {"c1", "c2"}
+    assert [r["chunk_id"] for r in idx.search("NullPointerException", k=3, types=["log"])] == []
+    assert idx.search("NullPointerException", k=3, types=["pdf"])[0]["chunk_id"] == "c3"
+    assert [r.template for r in idx.metrics.records()] == ["lexical_search"] * 3
+
+
+def test_upsert_remove_and_save_load(tmp_path):
+    idx = BM25Index()
+    idx.upsert(ROWS)
+    idx.upsert([{"chunk_id": "c4", "text": "Disk full on db-02", "meta": {"type": "log"}}])
+    assert idx.remove(["c2", "missing"]) == 1
+    assert len(idx) == 3 and "c2" not in idx
+    assert idx.search("db-01")[0]["exact"] == 0  # old text gone; "db" still matches
+    assert idx.search("db-02")[0]["exact"] == 1
+    loaded = BM25Index.load(idx.save(tmp_path / "lex.npz"))
+    assert loaded.ids() == idx.ids()
+    assert loaded.search("reset api", k=2) == idx.search("reset api", k=2)
+
+
+def test_rrf_fuse_orders_by_reciprocal_rank():
+    vec = [{"id": "a", "distance": 0.1}, {"id": "b", "distance": 0.2}]
+    lex = [{"id": "b", "distance": None, "exact": 1}, {"id": "c", "distance": None, "exact": 0}]
+    out = hybrid._rrf_fuse(vec, lex, k=3, rrf_k=60)
+    assert [r["id"] for r in out] == ["b", "a", "c"]
+    assert (out[0]["vector_rank"], out[0]["lexical_rank"]) == (2, 1)
+    assert out[0]["distance"] == 0.2 and "exact" not in out[0]
+    assert out[2]["vector_rank"] is None and 0.0 < out[2]["distance"] < 1.0
+
+
+class _CountingStub(StubClient):
+    def __init__(self):
+        super().__init__()
+        self.templates = []
+
+    def run_sql_template(self, name, params, **kwargs):
+        self.templates.append(name)
+        return super().run_sql_template(name, params, **kwargs)
+
+
+def test_exact_identifier_query_skips_vector_search():
+    idx = BM25Index()
+    idx.upsert(ROWS)
+    client = _CountingStub()
+    out = hybrid.hybrid_search(client, "db-01 disk full", k=1, lexical_index=idx)
+    assert [r["id"] for r in out] == ["c4"] and client.templates == []
+    assert out[0]["source"].startswith("lexical.bm25")
+
+    fused = hybrid.hybrid_search(client, "connection reset", k=3, lexical_index=idx)
+    assert client.templates and {"c1", "c2"} <= {r["id"] for r in fused}
+    assert all(r["rrf_score"] > 0 for r in fused)
+
+    from src.bq.async_client import AsyncBigQueryClient
+
+    async_out = asyncio.run(hybrid.hybrid_search_async(
+        AsyncBigQueryClient(client), "connection reset", k=3, lexical_index=idx
+    ))
+    assert async_out == fused
+
+
+class _NeighborStub(_CountingStub):
+    def run_sql_template(self, name, params, **kwargs):
+        if name == "get_chunk_neighbors.sql":
+            self.templates.append(name)
+            return [{"src_chunk_id": "c4", "nbr_chunk_id": "c9", "weight": 0.9}]
+        if name == "get_chunk_details.sql":
+            self.templates.append(name)
+            return [{"chunk_id": "c9", "text": "db-01 replica lag", "meta": {"type": "log"}}]
+        return super().run_sql_template(name, params, **kwargs)
+
+
+def test_hybrid_fuses_chunk_rows_and_expands_after_fusion():
+    idx = BM25Index()
+    idx.upsert(ROWS)
+    client = _NeighborStub()
+    hybrid.hybrid_search(client, "connection reset", k=3, lexical_index=idx)
+    assert "chunk_vector_search.sql" in client.templates  # untyped, still chunk rows
+    assert "vector_search.sql" not in client.templates
+
+    client.templates.clear()
+    out = hybrid.hybrid_search(client, "db-01 disk full", k=1, graph_boost=0.5, lexical_index=idx)
+    assert client.templates == ["get_chunk_neighbors.sql", "get_chunk_details.sql"]
+    assert out[0]["id"] == "c4" and out[0]["lexical_rank"] == 1
+
+    from src.bq.async_client import AsyncBigQueryClient
+
+    client.templates.clear()
+    async_out = asyncio.run(hybrid.hybrid_search_async(
+        AsyncBigQueryClient(client), "db-01 disk full", k=1, graph_boost=0.5, lexical_index=idx
+    ))
+    assert async_out == out and "get_chunk_neighbors.sql" in client.templates
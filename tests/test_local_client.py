@@ -0,0 +1,115 @@
+"""LocalClient: sql/ templates on SQLite with numpy vector search."""
+import pytest
+
+pytest.importorskip("numpy")
+
+from bq.load import upsert_chunks  # noqa: E402
+from bq.refresh import refresh_embeddings  # noqa: E402
+from bq.tickets import TicketsRepo  # noqa: E402
+from src.bq.bigquery_client import make_client  # noqa: E402
+from src.bq.local import LocalClient, LocalSqlError, translate  # noqa: E402
+from src.bq.local_ml import LocalEmbedder, VectorTable, to_blob  # noqa: E402
+from src.bq.telemetry import MetricsRegistry  # noqa: E402
+from src.retrieval.hybrid import vector_search  # noqa: E402
+
+TEXTS = [
+    ("c0", "database timeout during login", "log"),
+    ("c1", "database connection pool exhausted", "log"),
+    ("c2", "ssl certificate expires soon", "pdf"),
+    ("c3", "login page screenshot broken", "image"),
+]
+
+
+@pytest.fixture
+def client():
+    c = LocalClient(metrics=MetricsRegistry())
+    c.ensure_schema()
+    emb = c.embedder
+    c.insert_rows(
+        "chunks_emb",
+        [
+            {"chunk_id": cid, "doc_id": "d1", "text": text,
+             "meta": {"type": kind}, "embedding": to_blob(emb.embed(text))}
+            for cid, text, kind in TEXTS
+        ],
+    )
+    yield c
+    c.close()
+
+
+def test_translate_rewrites_dialect():
+    stmt = translate(
+        "SELECT SAFE.PARSE_JSON(x) FROM `p.d.t` WHERE id IN UNNEST(@ids) "
+        "AND ARRAY_LENGTH(@ids) > 0"
+    )
+    assert '"t"' in stmt.sql and ":ids" in stmt.sql
+    assert "UNNEST" not in stmt.sql.upper() and "@" not in stmt.sql
+
+
+def test_vector_table_exact_topk():
+    emb = LocalEmbedder(dim=64)
+    vecs = emb.embed_many(t for _, t, _ in TEXTS)
+    table = VectorTable(list(range(len(TEXTS))), vecs, block_rows=2)
+    ids, dists = table.search(emb.embed("database timeout"), 2)
+    assert ids.tolist() == [[0, 1]]
+    assert dists[0, 0] <= dists[0, 1]
+
+
+def test_chunk_vector_search_with_type_filter(client):
+    rows = client.run_sql_template(
+        "chunk_vector_search.sql",
+        {"query_text": "database timeout", "top_k": 4, "types": ["log"]},
+    )
+    assert [r["chunk_id"] for r in rows] == ["c0", "c1"]
+    assert rows[0]["meta"] == {"type": "log"}
+    assert client.metrics.summary()["chunk_vector_search.sql"]["count"] == 1
+
+
+def test_graph_expansion_uses_neighbors(client):
+    client.run_sql_template(
+        "inline",
+        {"raw_sql": "INSERT INTO `p.d.chunk_neighbors` (src_chunk_id, nbr_chunk_id, weight) "
+                    "VALUES ('c0', 'c2', 0.9)"},
+    )
+    out = vector_search(client, "database timeout", k=2, types=["log"], graph_boost=0.2)
+    assert "c2" in [r["id"] for r in out]
+
+
+def test_ticket_link_merge_updates_in_place(client):
+    repo = TicketsRepo(client)
+    repo.ensure_schema()
+    repo.upsert_link("T1", "c0", "evidence", 0.4)
+    repo.upsert_link("T1", "c0", "root_cause", 0.8)
+    rows = client.run_sql_template(
+        "inline", {"raw_sql": "SELECT relation, score FROM `p.d.ticket_chunk_links`"}
+    )
+    assert rows == [{"relation": "root_cause", "score": 0.8}]
+
+
+def test_ingest_then_refresh_embeddings(monkeypatch):
+    monkeypatch.setenv("EMBED_BATCH_LIMIT", "2")
+    c = LocalClient(metrics=MetricsRegistry())
+    c.ensure_schema()
+    chunks = [{"chunk_id": f"k{i}", "doc_id": "d", "text": f"row {i} timeout"} for i in range(3)]
+    assert upsert_chunks(c, chunks) == 3
+    assert upsert_chunks(c, chunks) == 0  # insert-only MERGE
+    stats = refresh_embeddings(c, "p.d.model", loop=True)
+    assert stats["total_inserted"] == 3
+    rows = c.run_sql_template(
+        "chunk_vector_search.sql", {"query_text": "row 2 timeout", "top_k": 1, "types": []}
+    )
+    assert rows[0]["chunk_id"] == "k2"
+
+
+def test_unsupported_sql_raises_local_error(client):
+    with pytest.raises(LocalSqlError):
+        client.run_sql_template("inline", {"raw_sql": "SELECT * FROM `p.d.no_such_table`"})
+
+
+def test_make_client_local_switch(monkeypatch):
+    monkeypatch.delenv("BIGQUERY_REAL", raising=False)
+    monkeypatch.setenv("BIGQUERY_LOCAL", "1")
+    monkeypatch.setenv("BQ_LOCAL_DB", ":memory:")
+    c = make_client()
+    assert isinstance(c, LocalClient)
+    assert c.run_sql_template("get_chunk_details.sql", {"chunk_ids": ["x"]}) == []
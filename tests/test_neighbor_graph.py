@@ -0,0 +1,118 @@
+"""In-process CSR neighbor graph: layout, hop / PPR expansion, sync and hybrid use."""
+import pytest
+
+from src.bq.embed_cache import EmbeddingCache, set_default_embedding_cache
+from src.bq.telemetry import MetricsRegistry
+from src.retrieval import hybrid
+
+np = pytest.importorskip("numpy")
+
+from src.retrieval.neighbor_graph import NeighborGraph  # noqa: E402
+
+
+def _edge(src, nbr, weight, source="similarity"):
+    return {"src_chunk_id": src, "nbr_chunk_id": nbr, "weight": weight, "source_type": source}
+
+
+@pytest.fixture
+def graph():
+    g = NeighborGraph()
+    g.load_edges([
+        _edge("a", "c", 0.5), _edge("a", "b", 0.5), _edge("a", "d", 0.9),
+        _edge("a", "d", 0.4, "co_occurrence"), _edge("b", "e", 0.8),
+        _edge("d", "b", 0.6), _edge("e", "f", 0.5),
+    ])
+    return g
+
+
+def test_rows_merged_and_sorted_like_get_chunk_neighbors(graph):
+    assert graph.edges == 6
+    assert [(r["nbr_chunk_id"], r["weight"], r["sources"]) for r in graph.neighbors("a")] == [
+        ("d", 0.9, "similarity,co_occurrence"), ("b", 0.5, "similarity"), ("c", 0.5, "similarity"),
+    ]
+    # one hop: per-seed prefix, seeds excluded, earliest seed claims a node
+    rows = graph.expand(["a", "d"], max_neighbors=2)
+    assert [(r["src_chunk_id"], r["nbr_chunk_id"], r["weight"]) for r in rows] == [("a", "b", 0.5)]
+
+
+def test_multi_hop_path_weights_and_limit(graph):
+    rows = graph.expand(["a"], max_neighbors=2, hops=3)
+    got = {r["nbr_chunk_id"]: round(r["weight"], 6) for r in rows}
+    assert got == {"d": 0.9, "b": 0.5, "e": 0.4, "f": 0.2}
+    assert {r["src_chunk_id"] for r in rows} == {"a"}
+    top = graph.expand(["a"], max_neighbors=2, hops=3, limit=2)
+    assert [r["nbr_chunk_id"] for r in top] == ["d", "b"]
+    assert graph.expand(["unknown"], max_neighbors=2) == []
+
+
+def test_ppr_ranks_reachable_nodes(graph):
+    rows = graph.expand(["a"], max_neighbors=3, mode="ppr", hops=2)
+    ids = [r["nbr_chunk_id"] for r in rows]
+    assert set(ids) == {"b", "c", "d", "e"}
+    assert ids[0] == "b"  # reached via a and via d: outranks the single strong edge
+    assert rows[0]["weight"] == pytest.approx(0.9)  # rescaled to the strongest seed edge
+    assert all(a["weight"] >= b["weight"] for a, b in zip(rows, rows[1:]))
+
+
+def test_save_load_round_trip(graph, tmp_path):
+    path = graph.save(tmp_path / "g.npz")
+    loaded = NeighborGraph.load(path, mode="ppr")
+    assert loaded.mode == "ppr" and loaded.hops == 2
+    assert loaded.neighbors("a") == graph.neighbors("a")
+
+
+@pytest.fixture
+def local():
+    from bq.tickets import TicketsRepo
+    from src.bq.local import LocalClient
+    from src.bq.local_ml import to_blob
+
+    set_default_embedding_cache(EmbeddingCache())
+    client = LocalClient(metrics=MetricsRegistry())
+    client.ensure_schema()
+    texts = [
+        ("c0", "database timeout on login", "log"),
+        ("c1", "database pool exhausted", "log"),
+        ("c2", "connection reset by peer", "log"),
+        ("c3", "ssl handshake failure", "pdf"),
+        ("c4", "retry storm after deploy", "log"),
+    ]
+    client.insert_rows("chunks_emb", [
+        {"chunk_id": cid, "doc_id": "d", "text": text, "meta": {"type": kind},
+         "embedding": to_blob(client.embedder.embed(text))}
+        for cid, text, kind in texts
+    ])
+    client.run_sql_template("inline", {"raw_sql": (
+        "INSERT INTO `p.d.chunk_neighbors` (src_chunk_id, nbr_chunk_id, weight) VALUES "
+        "('c0', 'c2', 0.9), ('c0', 'c1', 0.7), ('c1', 'c3', 0.4)"
+    )})
+    repo = TicketsRepo(client)
+    repo.ensure_schema()
+    for ticket in ("T1", "T2"):
+        repo.upsert_link(ticket, "c0", "evidence", 0.5)
+        repo.upsert_link(ticket, "c4", "evidence", 0.5)
+    yield client, repo
+    set_default_embedding_cache(None)
+
+
+def test_sync_refresh_and_local_expansion_matches_sql(local):
+    client, repo = local
+    g = NeighborGraph()
+    assert g.sync(client)["reloaded"] is True
+    assert g.sync(client)["reloaded"] is False  # counts / sums unchanged
+    assert {r["nbr_chunk_id"] for r in g.neighbors("c0")} == {"c1", "c2", "c4"}
+
+    initial = hybrid.chunk_vector_search(client, "database timeout", 3, ["log"])
+    expected = hybrid._expand_with_graph(client, initial, 3, 0.3, 5)
+    client.metrics.reset()
+    out = hybrid.vector_search(client, "database timeout", k=3, types=["log"], graph_boost=0.3, graph=g)
+    assert out == expected
+    assert [r.template for r in client.metrics.records()] == [
+        "chunk_vector_search_by_vec.sql", "get_chunk_details.sql",
+    ]
+
+    for ticket in ("T1", "T2"):  # c2 now co-occurs with c0
+        repo.upsert_link(ticket, "c2", "evidence", 0.5)
+    g.refresh(client, ["c0", "c2", "c4"])
+    assert "co_occurrence" in {r["sources"] for r in g.neighbors("c2")}
+    assert g.sync(client)["reloaded"] is False
@@ -0,0 +1,45 @@
+"""Tests for native query parameter binding in RealClient."""
+from __future__ import annotations
+import datetime
+
+from src.bq.bigquery_client import RealClient, query_parameters
+
+
+def _by_name(job_config):
+    return {p.name: p for p in job_config.query_parameters}
+
+
+def test_sql_text_identical_across_queries(fake_bigquery):
+    client = RealClient(project="p", location="US")
+    client.run_sql_template(
+        "chunk_vector_search.sql",
+        {"query_text": "can't login", "top_k": 5, "types": ["log"]},
+    )
+    client.run_sql_template(
+        "chunk_vector_search.sql",
+        {"query_text": "upload fails", "top_k": 3, "types": []},
+    )
+    first, second = client._client.queries
+    assert first == second
+    assert "can't" not in first
+    bound = _by_name(client._client.job_configs[0])
+    assert bound["query_text"].value == "can't login"
+    assert bound["top_k"].type_ == "INT64"
+    assert bound["types"].array_type == "STRING"
+    assert bound["types"].values == ["log"]
+    assert _by_name(client._client.job_configs[1])["types"].values == []
+
+
+def test_only_referenced_names_bound(fake_bigquery):
+    sql = "SELECT @a AS a -- @b in a comment\n, '@@x'"
+    params = query_parameters(fake_bigquery, sql, {"a": 1.5, "b": 2, "c": 3})
+    assert [p.name for p in params] == ["a"]
+    assert params[0].type_ == "FLOAT64"
+
+
+def test_scalar_type_inference(fake_bigquery):
+    ts = datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc)
+    sql = "SELECT @flag, @ts, @d, @s"
+    params = {"flag": True, "ts": ts, "d": ts.date(), "s": None}
+    types = {p.name: p.type_ for p in query_parameters(fake_bigquery, sql, params)}
+    assert types == {"flag": "BOOL", "ts": "TIMESTAMP", "d": "DATE", "s": "STRING"}
@@ -0,0 +1,191 @@
+"""Retry with backoff, per-template circuit breakers, hedged reads, deadlines."""
+import asyncio
+
+import pytest
+
+from bq.router import predict_routing
+from src.bq.async_client import AsyncBigQueryClient
+from src.bq.bigquery_client import RealClient
+from src.bq.resilience import (
+    CircuitOpenError,
+    QueryTimeout,
+    Resilience,
+    is_transient,
+)
+from src.bq.telemetry import JobMetrics, MetricsRegistry
+
+
+class ServiceUnavailable(Exception):
+    code = 503
+
+
+class NotFound(Exception):
+    code = 404
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def _policy(clock=None, **kw):
+    clock = clock or FakeClock()
+    return Resilience(clock=clock, sleep=clock.sleep, **kw)
+
+
+def test_is_transient_classification():
+    assert is_transient(ServiceUnavailable())
+    assert is_transient(ConnectionResetError())
+    err = Exception("quota")
+    err.errors = [{"reason": "rateLimitExceeded"}]
+    assert is_transient(err)
+    assert not is_transient(NotFound())
+    assert not is_transient(QueryTimeout("t.sql", 1.0))
+
+
+def test_retries_transient_then_succeeds():
+    res = _policy(max_attempts=3)
+    calls = []
+
+    def fn():
+        calls.append(1)
+        if len(calls) < 3:
+            raise ServiceUnavailable()
+        return "ok"
+
+    assert res.call("t.sql", fn) == "ok"
+    assert len(calls) == 3
+    assert res.stats()["retries"] == 2
+
+
+def test_no_retry_for_writes_or_permanent_errors():
+    res = _policy(max_attempts=3)
+    calls = []
+
+    def fn():
+        calls.append(1)
+        raise ServiceUnavailable()
+
+    with pytest.raises(ServiceUnavailable):
+        res.call("insert_ticket_links.sql", fn, retry=False)
+    assert len(calls) == 1
+
+
+def test_backoff_is_bounded_full_jitter():
+    res = _policy(base_delay=0.2, max_delay=1.0)
+    for attempt in range(1, 8):
+        d = res.backoff(attempt)
+        assert 0.0 <= d <= min(1.0, 0.2 * 2 ** (attempt - 1))
+
+
+def test_breaker_opens_then_half_opens_after_cooldown():
+    clock = FakeClock()
+    res = _policy(clock, failure_threshold=2, cooldown=30.0, max_attempts=1)
+
+    def boom():
+        raise NotFound()
+
+    for _ in range(2):
+        with pytest.raises(NotFound):
+            res.call("router_predict.sql", boom)
+    with pytest.raises(CircuitOpenError):
+        res.call("router_predict.sql", lambda: "never")
+    assert res.stats()["open_circuits"] == ["router_predict.sql"]
+    assert res.call("vector_search.sql", lambda: "other templates unaffected")
+
+    clock.now += 31.0
+    with pytest.raises(NotFound):  # the one half-open trial fails -> reopen
+        res.call("router_predict.sql", boom)
+    with pytest.raises(CircuitOpenError):
+        res.call("router_predict.sql", lambda: "never")
+    clock.now += 31.0
+    assert res.call("router_predict.sql", lambda: "recovered") == "recovered"
+    assert res.stats()["open_circuits"] == []
+
+
+def test_real_client_hedges_slow_read_at_p95(fake_bigquery):
+    reg = MetricsRegistry()
+    for _ in range(20):
+        reg.record(JobMetrics("get_chunk_details.sql", 100.0))
+    res = _policy(hedge_min_samples=20)
+    client = RealClient(project="p", metrics=reg, resilience=res)
+    client._client.rows = [{"chunk_id": "a"}]
+    client._client.ready_after = 10**6  # first job never finishes
+    original_query = client._client.query
+
+    def query(sql, job_config=None, **kw):
+        job = original_query(sql, job_config, **kw)
+        if len(client._client.jobs) > 1:
+            job.ready_after = 0  # hedge finishes immediately
+        job.cancelled = False
+        job.cancel = lambda j=job: setattr(j, "cancelled", True)
+        return job
+
+    client._client.query = query
+    renders = []
+    original_render = client.render
+    client.render = lambda name, params: renders.append(name) or original_render(name, params)
+    rows = client.run_sql_template("get_chunk_details.sql", {"chunk_ids": ["a"]})
+    assert rows == [{"chunk_id": "a"}]
+    assert len(client._client.jobs) == 2 and len(renders) == 1  # hedge reuses the render
+    assert client._client.jobs[0].cancelled is True
+    assert res.stats()["hedges"] == 1 and res.stats()["hedge_wins"] == 1
+
+
+def test_real_client_deadline_falls_back_in_router(fake_bigquery):
+    res = _policy(timeouts={"router_predict.sql": 2.0}, failure_threshold=1)
+    client = RealClient(project="p", metrics=MetricsRegistry(), resilience=res)
+    client._client.ready_after = 10**6
+    config, strategy = predict_routing(client, "ssl certificate pdf", mode="auto")
+    assert strategy == "heuristic"
+    assert res.stats()["timeouts"] == 1
+    submitted = len(client._client.jobs)
+    predict_routing(client, "ssl certificate pdf", mode="auto")  # breaker open now
+    assert len(client._client.jobs) == submitted
+
+
+def test_real_client_retries_transient_read(fake_bigquery):
+    res = _policy(max_attempts=2)
+    client = RealClient(project="p", metrics=MetricsRegistry(), resilience=res)
+    original_query = client._client.query
+    state = {"n": 0}
+
+    def flaky(sql, job_config=None, **kw):
+        state["n"] += 1
+        if state["n"] == 1:
+            raise ServiceUnavailable()
+        return original_query(sql, job_config, **kw)
+
+    client._client.query = flaky
+    client._client.rows = [{"x": 1}]
+    assert client.run_sql_template("get_chunk_details.sql", {"chunk_ids": ["a"]}) == [{"x": 1}]
+    assert state["n"] == 2
+
+
+def test_async_deadline_and_breaker(fake_bigquery):
+    res = Resilience(timeouts={"router_predict.sql": 0.05}, failure_threshold=1)
+    client = RealClient(project="p", metrics=MetricsRegistry(), resilience=res)
+    client._client.ready_after = 10**6
+    aclient = AsyncBigQueryClient(client, poll_interval=0.01)
+    with pytest.raises(QueryTimeout):
+        asyncio.run(aclient.run_sql_template_async("router_predict.sql", {"query_text": "q"}))
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(aclient.run_sql_template_async("router_predict.sql", {"query_text": "q"}))
+
+
+def test_from_env(monkeypatch):
+    monkeypatch.setenv("BQ_RESILIENCE", "0")
+    assert Resilience.from_env() is None
+    monkeypatch.setenv("BQ_RESILIENCE", "1")
+    monkeypatch.setenv("BQ_RETRY_ATTEMPTS", "5")
+    monkeypatch.setenv("BQ_TEMPLATE_TIMEOUTS", "router_predict.sql=0,vector_search.sql=3")
+    res = Resilience.from_env()
+    assert res.max_attempts == 5
+    assert res.timeout_for("router_predict.sql") is None
+    assert res.timeout_for("vector_search.sql") == 3.0
@@ -0,0 +1,90 @@
+"""Tests for the template result cache (memory LRU + disk tier)."""
+from __future__ import annotations
+
+from src.bq.bigquery_client import RealClient
+from src.bq.cache import ResultCache, is_read_only, make_key
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_is_read_only():
+    assert is_read_only("-- header\nSELECT 1")
+    assert is_read_only("WITH a AS (SELECT 1) SELECT * FROM a")
+    assert not is_read_only("MERGE `t` T USING (SELECT 1) S ON TRUE")
+    assert not is_read_only("CREATE OR REPLACE VIEW v AS SELECT 1")
+    assert not is_read_only("SELECT 1; DELETE FROM t WHERE TRUE")
+
+
+def test_key_depends_on_sql_and_params():
+    assert make_key("SELECT 1", {"a": 1}) == make_key("SELECT 1", {"a": 1})
+    assert make_key("SELECT 1", {"a": 1}) != make_key("SELECT 1", {"a": 2})
+    assert make_key("SELECT 1", {}) != make_key("SELECT 2", {})
+
+
+def test_ttl_expiry_and_counters():
+    clock = Clock()
+    cache = ResultCache(ttls={"t.sql": 10.0}, clock=clock)
+    cache.put("t.sql", "k", [{"x": 1}])
+    assert cache.get("k") == [{"x": 1}]
+    clock.now += 11
+    assert cache.get("k") is None
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1
+
+
+def test_untimed_template_not_stored():
+    cache = ResultCache(ttls={})
+    cache.put("other.sql", "k", [{"x": 1}])
+    assert cache.get("k") is None
+    assert not cache.should_cache("other.sql", "SELECT 1")
+
+
+def test_lru_evicts_by_bytes():
+    cache = ResultCache(max_bytes=400, ttls={"t.sql": 60.0})
+    payload = [{"text": "x" * 150}]
+    cache.put("t.sql", "a", payload)
+    cache.put("t.sql", "b", payload)
+    cache.get("a")  # touch a so b becomes least recent
+    cache.put("t.sql", "c", payload)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.stats()["evictions"] >= 1
+    assert cache.stats()["bytes"] <= 400
+
+
+def test_disk_tier_shared_between_instances(tmp_path):
+    first = ResultCache(ttls={"t.sql": 60.0}, disk_dir=tmp_path)
+    first.put("t.sql", "k", [{"x": 1}])
+    second = ResultCache(ttls={"t.sql": 60.0}, disk_dir=tmp_path)
+    assert second.get("k") == [{"x": 1}]
+    assert second.stats()["disk_hits"] == 1
+    assert second.get("k") == [{"x": 1}]  # promoted to memory
+    assert second.stats()["hits"] == 1
+
+
+def test_returned_rows_are_copies():
+    cache = ResultCache(ttls={"t.sql": 60.0})
+    cache.put("t.sql", "k", [{"x": 1}])
+    rows = cache.get("k")
+    rows[0]["x"] = 2
+    assert cache.get("k") == [{"x": 1}]
+
+
+def test_real_client_serves_repeat_reads_from_cache(fake_bigquery):
+    cache = ResultCache(ttls={"_raw.sql": 60.0})
+    client = RealClient(project="p", location="US", cache=cache)
+    client._client.rows = [{"n": 1}]
+    sql = "SELECT 1 AS n"
+    assert client.run_sql_template("_raw.sql", {"raw_sql": sql}) == [{"n": 1}]
+    assert client.run_sql_template("_raw.sql", {"raw_sql": sql}) == [{"n": 1}]
+    assert len(client._client.queries) == 1
+    # writes are never cached
+    client.run_sql_template("_raw.sql", {"raw_sql": "DELETE FROM t WHERE TRUE"})
+    client.run_sql_template("_raw.sql", {"raw_sql": "DELETE FROM t WHERE TRUE"})
+    assert len(client._client.queries) == 3
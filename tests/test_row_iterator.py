@@ -0,0 +1,47 @@
+"""run_sql_template_iter: paged streaming of large results."""
+from itertools import islice
+
+from src.bq.bigquery_client import RealClient, StubClient
+from src.bq.cache import ResultCache
+from src.bq.telemetry import MetricsRegistry
+
+
+def test_iter_pages_with_page_size(fake_bigquery):
+    reg = MetricsRegistry()
+    client = RealClient(project="p", metrics=reg)
+    client._client.rows = [{"id": i} for i in range(25)]
+    it = client.run_sql_template_iter("vector_search.sql", {"query_text": "q", "top_k": 3}, page_size=10)
+    assert client._client.queries  # submitted eagerly
+    rows = list(it)
+    assert [r["id"] for r in rows] == list(range(25))
+    assert client._client.jobs[-1].page_size == 10
+    (rec,) = reg.records()
+    assert rec.rows == 25
+
+
+def test_iter_early_stop_records_partial(fake_bigquery):
+    reg = MetricsRegistry()
+    client = RealClient(project="p", metrics=reg)
+    client._client.rows = [{"id": i} for i in range(100)]
+    it = client.run_sql_template_iter("_raw.sql", {"raw_sql": "SELECT 1"}, page_size=5)
+    assert len(list(islice(it, 7))) == 7
+    it.close()
+    assert reg.records()[0].rows == 7
+
+
+def test_iter_skips_result_cache_but_reads_hits(fake_bigquery):
+    cache = ResultCache(ttls={"vector_search.sql": 60})
+    client = RealClient(project="p", cache=cache)
+    client._client.rows = [{"id": 1}]
+    params = {"query_text": "q", "top_k": 1}
+    list(client.run_sql_template_iter("vector_search.sql", params))
+    assert cache.stats()["entries"] == 0
+    client.run_sql_template("vector_search.sql", params)  # populates cache
+    before = len(client._client.queries)
+    assert list(client.run_sql_template_iter("vector_search.sql", params)) == [{"id": 1}]
+    assert len(client._client.queries) == before
+
+
+def test_stub_iter_falls_back():
+    rows = list(StubClient().run_sql_template_iter("vector_search.sql", {"query_text": "x"}))
+    assert rows and rows[0]["id"] == 1
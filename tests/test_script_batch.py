@@ -0,0 +1,142 @@
+"""ScriptBatch: several templates in one script job, DDL schema-diff skip."""
+import types
+
+import pytest
+
+from bq.tickets import TicketsRepo
+from src.bq import script
+from src.bq.bigquery_client import RealClient, StubClient
+from src.bq.script import ScriptBatch, ddl_target, split_statements
+from tests.conftest import FakeQueryJob
+
+
+@pytest.fixture(autouse=True)
+def _fresh_schema():
+    script.forget_schema()
+    yield
+    script.forget_schema()
+
+
+def _child(statement_type, rows=(), inserted=0, deleted=0):
+    job = FakeQueryJob(list(rows))
+    job.statement_type = statement_type
+    job.dml_stats = types.SimpleNamespace(
+        inserted_row_count=inserted, updated_row_count=0, deleted_row_count=deleted
+    )
+    return job
+
+
+def test_split_statements_respects_quotes_and_comments():
+    sql = """
+    -- header; not a split
+    SELECT 'a;b' AS x;
+    /* block; comment */
+    SELECT `weird;name` FROM t;
+    -- trailing comment only
+    """
+    parts = split_statements(sql)
+    assert len(parts) == 2
+    assert "'a;b'" in parts[0]
+    assert "`weird;name`" in parts[1]
+
+
+def test_ddl_target_parsing():
+    t = ddl_target("CREATE TABLE IF NOT EXISTS `p.d.tickets` (id STRING)")
+    assert (t.dataset, t.table, t.kind, t.if_not_exists) == ("p.d", "tickets", "TABLE", True)
+    v = ddl_target("CREATE OR REPLACE VIEW `p.d.v` AS\n  SELECT 1  AS x")
+    assert v.kind == "VIEW" and v.view_query == "SELECT 1 AS x"
+    assert ddl_target("DELETE FROM `p.d.t` WHERE TRUE") is None
+
+
+def test_ticket_ddl_is_one_script_and_skips_existing(fake_bigquery, monkeypatch):
+    monkeypatch.setenv("BQ_DATASET", "d")
+    client = RealClient(project="p")
+    client._client.rows_for = {
+        "INFORMATION_SCHEMA": [
+            {"table_name": "tickets", "table_type": "BASE TABLE", "view_definition": None},
+            {"table_name": "resolutions", "table_type": "BASE TABLE", "view_definition": None},
+        ]
+    }
+    TicketsRepo(client).ensure_schema()
+    # schema lookup + one script with the three missing tables
+    assert len(client._client.queries) == 2
+    script_sql = client._client.queries[-1]
+    assert script_sql.count("CREATE TABLE IF NOT EXISTS") == 3
+    assert "`p.d.tickets`" not in script_sql
+    # second call: everything known to exist -> no jobs at all
+    TicketsRepo(client).ensure_schema()
+    assert len(client._client.queries) == 2
+
+
+def test_unchanged_view_skipped(fake_bigquery, monkeypatch):
+    monkeypatch.setenv("BQ_DATASET", "d")
+    client = RealClient(project="p")
+    body = client.render("views_common_issues.sql", {})
+    view_query = ddl_target(split_statements(body)[0]).view_query
+    client._client.rows_for = {
+        "INFORMATION_SCHEMA": [
+            {"table_name": "view_common_issues", "table_type": "VIEW",
+             "view_definition": view_query},
+        ]
+    }
+    result = ScriptBatch(client).add("views_common_issues.sql").run()
+    assert result.jobs == 0
+    assert len(result.skipped) == 1
+
+
+def test_child_job_results_mapped_to_statements(fake_bigquery, monkeypatch):
+    monkeypatch.setenv("BQ_DATASET", "d")
+    client = RealClient(project="p")
+    client._client.child_jobs = [
+        _child("DELETE", deleted=4),
+        _child("INSERT", inserted=3),
+        _child("SELECT", rows=[{"n": 7}]),
+    ]
+    result = (
+        ScriptBatch(client, skip_unchanged_ddl=False)
+        .add_sql("DELETE FROM `${PROJECT_ID}.${DATASET}.t` WHERE TRUE", label="rebuild")
+        .add_sql("INSERT INTO `p.d.t` SELECT @x", {"x": 1}, label="rebuild")
+        .add_sql("SELECT COUNT(*) AS n FROM `p.d.t`", label="count")
+    )
+    out = result.run()
+    assert out.jobs == 1
+    assert out.dml("rebuild") == {"inserted": 3, "updated": 0, "deleted": 4}
+    assert out.rows("count") == [{"n": 7}]
+    submitted = client._client.queries[-1]
+    assert "`p.d.t` WHERE TRUE;\nINSERT" in submitted
+    assert [p.name for p in client._client.job_configs[-1].query_parameters] == ["x"]
+
+
+def test_conflicting_params_rejected(fake_bigquery):
+    client = RealClient(project="p")
+    batch = (
+        ScriptBatch(client, skip_unchanged_ddl=False)
+        .add_sql("SELECT @x", {"x": 1})
+        .add_sql("SELECT @x", {"x": 2})
+    )
+    with pytest.raises(ValueError, match="@x"):
+        batch.run()
+
+
+def test_stub_runs_each_template():
+    result = ScriptBatch(StubClient()).add("views_common_issues.sql").add("ddl_tickets.sql").run()
+    assert result.jobs == 2
+
+
+def test_upsert_documents_is_single_script(fake_bigquery, monkeypatch):
+    from bq.load import upsert_documents
+
+    monkeypatch.setenv("PROJECT_ID", "p")
+    monkeypatch.setenv("DATASET", "d")
+    client = RealClient(project="p")
+    client._client.child_jobs = [
+        _child("CREATE_TABLE_AS_SELECT"),
+        _child("CREATE_TABLE"),
+        _child("MERGE", inserted=2),
+        _child("DROP_TABLE"),
+    ]
+    n = upsert_documents(client, [{"doc_id": "a"}, {"doc_id": "b"}])
+    assert n == 2
+    scripts = [q for q in client._client.queries if "MERGE" in q]
+    assert len(scripts) == 1
+    assert "staging_documents_" in scripts[0] and "DROP TABLE IF EXISTS" in scripts[0]
@@ -0,0 +1,122 @@
+"""Semantic result cache: nearest-past-query hits, scopes, expiry, corpus freshness."""
+import asyncio
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.bq.async_client import AsyncBigQueryClient  # noqa: E402
+from src.bq.local import LocalClient  # noqa: E402
+from src.bq.local_ml import to_blob  # noqa: E402
+from src.bq.telemetry import MetricsRegistry  # noqa: E402
+from src.retrieval import hybrid  # noqa: E402
+from src.retrieval.semantic_cache import SemanticCache  # noqa: E402
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lookup_threshold_scope_ttl_and_versions():
+    clock = Clock()
+    cache = SemanticCache(threshold=0.9, ttl=60, freshness_interval=10, max_entries=3, clock=clock)
+    rows = [{"id": "c1", "distance": 0.1}]
+    cache.store("s", [1.0, 0.0, 0.0], rows)
+    assert cache.lookup("s", [0.98, 0.1, 0.0]) == rows  # cosine ~0.995
+    assert cache.lookup("s", [0.5, 0.5, 0.5]) is None  # cosine ~0.58
+    assert cache.lookup("other", [1.0, 0.0, 0.0]) is None
+    hit = cache.lookup("s", [2.0, 0.0, 0.0])
+    hit[0]["id"] = "mutated"
+    assert cache.lookup("s", [1.0, 0.0, 0.0]) == rows  # callers get copies
+
+    assert cache.version_due()
+    cache.observe_version(("v1", "10"))  # entries stored before any version drop
+    assert len(cache) == 0 and not cache.version_due()
+    cache.store("s", [1.0, 0.0, 0.0], rows)
+    cache.observe_version(None)  # version unavailable: keep entries
+    assert len(cache) == 1
+    clock.now = 61
+    assert cache.lookup("s", [1.0, 0.0, 0.0]) is None  # expired
+
+    for i in range(4):
+        clock.now += 1
+        cache.store("s", np.eye(4)[i], rows)
+    assert len(cache) == 3 and cache.lookup("s", np.eye(4)[0]) is None  # oldest evicted
+    clock.now += 10
+    assert cache.version_due()
+    cache.observe_version(("v2", "11"))
+    assert len(cache) == 0
+    assert cache.stats()["invalidations"] == 4
+
+
+def _seed(client):
+    texts = ["login timeout on auth service", "disk full on db-01", "cpu spike after deploy"]
+    client.insert_rows("chunks_emb", [
+        {"chunk_id": f"c{i}", "doc_id": "d", "text": t, "meta": {"type": "log"},
+         "embedding": to_blob(client.embedder.embed(t))}
+        for i, t in enumerate(texts)
+    ])
+
+
+def _searches(client):
+    return [r for r in client.metrics.records() if "vector_search" in r.template]
+
+
+def test_vector_search_skips_search_for_near_duplicate_queries():
+    client = LocalClient(metrics=MetricsRegistry())
+    client.ensure_schema()
+    _seed(client)
+    clock = Clock()
+    cache = SemanticCache(threshold=0.75, freshness_interval=30, clock=clock)
+
+    first = hybrid.vector_search(client, "Login timeout", 2, types=["log"], cache=cache)
+    assert len(_searches(client)) == 1
+    again = hybrid.vector_search(client, "login timeout error", 2, types=["log"], cache=cache)
+    assert again == first and len(_searches(client)) == 1
+    hybrid.vector_search(client, "login timeout error", 1, types=["log"], cache=cache)  # other k
+    hybrid.vector_search(client, "disk full", 2, types=["log"], cache=cache)
+    assert len(_searches(client)) == 3
+
+    _seed(client)  # corpus rewritten: entries are stale once the version is re-read
+    hybrid.vector_search(client, "Login timeout", 2, types=["log"], cache=cache)
+    assert len(_searches(client)) == 3
+    clock.now = 31
+    hybrid.vector_search(client, "Login timeout", 2, types=["log"], cache=cache)
+    assert len(_searches(client)) == 4
+    assert cache.stats()["hits"] == 2
+
+
+def test_async_vector_search_uses_the_cache():
+    client = LocalClient(metrics=MetricsRegistry())
+    client.ensure_schema()
+    _seed(client)
+    cache = SemanticCache(threshold=0.75)
+    aclient = AsyncBigQueryClient(client)
+
+    async def run():
+        a = await hybrid.vector_search_async(aclient, "Login timeout", 2, ["log"], cache=cache)
+        b = await hybrid.vector_search_async(aclient, "login timeout error", 2, ["log"], cache=cache)
+        return a, b
+
+    a, b = asyncio.run(run())
+    assert a == b and a[0]["id"] == "c0"
+    assert len(_searches(client)) == 1
+
+
+def test_miss_searches_with_the_lookup_vector(monkeypatch):
+    monkeypatch.setenv("BQ_EMBED_CACHE", "0")  # only the semantic lookup knows the vector
+    client = LocalClient(metrics=MetricsRegistry())
+    client.ensure_schema()
+    _seed(client)
+    hybrid.vector_search(client, "Login timeout", 2, types=["log"], cache=SemanticCache())
+    asyncio.run(hybrid.vector_search_async(
+        AsyncBigQueryClient(client), "disk full", 2, ["log"], cache=SemanticCache()
+    ))
+    templates = [r.template for r in client.metrics.records()]
+    assert templates.count("embed_query.sql") == 2
+    assert templates.count("chunk_vector_search_by_vec.sql") == 2
+    assert "chunk_vector_search.sql" not in templates
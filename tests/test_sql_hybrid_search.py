@@ -0,0 +1,113 @@
+"""BigQuery-side keyword (SEARCH index) + vector fusion: vector_search mode="hybrid_sql"."""
+import asyncio
+
+import pytest
+
+from src.bq.bigquery_client import StubClient
+from src.bq.embed_cache import EmbeddingCache, set_default_embedding_cache
+from src.bq.telemetry import MetricsRegistry
+from src.retrieval import hybrid
+
+TEXTS = [
+    ("c1", "ERR_CONN_RESET from api.example.com:443", "log"),
+    ("c2", "Connection reset while calling the billing api", "log"),
+    ("c3", "java.lang.NullPointerException in OrderService", "pdf"),
+    ("c4", "Disk full on db-01, writes failing", "log"),
+    ("c5", "database timeout on login", "log"),
+]
+
+
+def test_search_query_and_mode():
+    assert hybrid._search_query("why ERR_CONN_RESET on api.example.com") == (
+        "`err_conn_reset` `api.example.com`"
+    )
+    assert hybrid._search_query("the database is slow") == "the database slow"
+    assert hybrid._search_query("is it ok") is None
+    with pytest.raises(ValueError):
+        hybrid.vector_search(StubClient(), "x", mode="bm25")
+
+
+def test_stub_fused_rows_keep_ranks(monkeypatch):
+    monkeypatch.setenv("RETRIEVAL_SEARCH_MODE", "hybrid_sql")
+    rows = hybrid.vector_search(StubClient(), "database timeout", k=3, types=["log"])
+    assert rows[0]["id"] == "chunk_1" and rows[0]["vector_rank"] == 1
+    assert rows[0]["lexical_rank"] == 1
+
+
+@pytest.fixture
+def local():
+    pytest.importorskip("numpy")
+    from src.bq.local import LocalClient
+    from src.bq.local_ml import to_blob
+
+    set_default_embedding_cache(EmbeddingCache())
+    client = LocalClient(metrics=MetricsRegistry())
+    client.ensure_schema()
+    client.insert_rows("chunks", [
+        {"chunk_id": cid, "doc_id": "d", "text": text, "meta": {"type": kind}}
+        for cid, text, kind in TEXTS
+    ])
+    client.insert_rows("chunks_emb", [
+        {"chunk_id": cid, "doc_id": "d", "text": text, "meta": {"type": kind},
+         "embedding": to_blob(client.embedder.embed(text))}
+        for cid, text, kind in TEXTS
+    ])
+    client.run_sql_template(hybrid.SEARCH_INDEX_TEMPLATE, {})  # no-op locally
+    client.metrics.reset()
+    yield client
+    set_default_embedding_cache(None)
+
+
+def test_identifier_query_skips_embedding(local):
+    out = hybrid.vector_search(local, "db-01 disk", k=1, mode="hybrid_sql")
+    assert [r["id"] for r in out] == ["c4"]
+    assert out[0]["lexical_rank"] == 1 and out[0]["vector_rank"] is None
+    assert [r.template for r in local.metrics.records()] == ["chunk_text_search.sql"]
+
+
+def test_one_job_rrf_fusion(local):
+    out = hybrid.vector_search(local, "connection reset api", k=3, mode="hybrid_sql")
+    assert [r.template for r in local.metrics.records()] == ["chunk_hybrid_search.sql"]
+    assert out[0]["id"] == "c2" and (out[0]["vector_rank"], out[0]["lexical_rank"]) == (1, 1)
+    assert out[0]["rrf_score"] == pytest.approx(2.0 / 61)
+    assert [r["rrf_score"] for r in out] == sorted((r["rrf_score"] for r in out), reverse=True)
+
+    from src.bq.async_client import AsyncBigQueryClient
+
+    local.metrics.reset()  # second run reuses the cached query vector
+    again = asyncio.run(hybrid.vector_search_async(
+        AsyncBigQueryClient(local), "connection reset api", k=3, mode="hybrid_sql"
+    ))
+    assert again == out
+    assert [r.template for r in local.metrics.records()] == ["chunk_hybrid_search_by_vec.sql"]
+
+
+class _Mirror:
+    """Loaded ANN index stand-in (plan_templates only checks its size)."""
+
+    def __len__(self):
+        return 1
+
+
+def test_plan_templates_follow_the_search_route(monkeypatch):
+    monkeypatch.setenv("BQ_EMBED_CACHE", "0")
+    client = StubClient()
+
+    def names(query_text, **kwargs):
+        return [name for name, _ in hybrid.plan_templates(client, query_text, **kwargs)]
+
+    assert names("ERR_CONN_RESET on api", k=3, mode="hybrid_sql") == [
+        "chunk_text_search.sql", "chunk_hybrid_search.sql",
+    ]
+    assert names("disk full", types=["log"], graph_boost=0.2) == [
+        "chunk_vector_search_graph.sql",
+    ]
+    assert names("disk full", types=["log"], index=_Mirror(), graph_boost=0.2) == [
+        "embed_query.sql", "get_chunk_neighbors.sql",  # details come from the mirror
+    ]
+    monkeypatch.setenv("BQ_TYPE_PARTITIONS", "1")
+    calls = hybrid.plan_templates(client, "disk full", k=20, types=["log", "pdf"])
+    assert [(n, p["CHUNK_TYPE"], p["top_k"]) for n, p in calls] == [
+        ("chunk_vector_search_partition.sql", "log", hybrid.MAX_K),
+        ("chunk_vector_search_partition.sql", "pdf", hybrid.MAX_K),
+    ]
@@ -0,0 +1,78 @@
+"""Per-template job telemetry: percentiles, export, RealClient recording."""
+import io
+import json
+
+import pytest
+
+from src.bq.bigquery_client import RealClient
+from src.bq.telemetry import JobMetrics, MetricsRegistry, percentile
+
+
+def test_percentile_nearest_rank():
+    vals = [float(v) for v in range(1, 101)]
+    assert percentile(vals, 50) == 50.0
+    assert percentile(vals, 95) == 95.0
+    assert percentile(vals, 99) == 99.0
+    assert percentile([], 50) == 0.0
+
+
+def test_summary_per_template():
+    reg = MetricsRegistry()
+    for ms in (10.0, 20.0, 30.0, 40.0):
+        reg.record(JobMetrics("vector_search.sql", ms, bytes_processed=100, slot_ms=5))
+    reg.record(JobMetrics("router_predict.sql", 5.0, cache_hit=True))
+    s = reg.summary()
+    vs = s["vector_search.sql"]
+    assert vs["count"] == 4
+    assert vs["bytes_processed"] == 400
+    assert vs["slot_ms"] == 20
+    assert vs["latency_ms"]["p50"] == 20.0
+    assert vs["latency_ms"]["max"] == 40.0
+    assert s["router_predict.sql"]["cache_hit_ratio"] == 1.0
+    assert reg.totals()["jobs"] == 5
+
+
+def test_jsonl_and_prometheus_export():
+    reg = MetricsRegistry()
+    reg.record(JobMetrics("get_chunk_details.sql", 120.0, bytes_billed=2048))
+    reg.record(JobMetrics("get_chunk_details.sql", 3000.0, error="RuntimeError: x"))
+    buf = io.StringIO()
+    assert reg.to_jsonl(buf) == 2
+    first = json.loads(buf.getvalue().splitlines()[0])
+    assert first["template"] == "get_chunk_details.sql"
+    assert first["bytes_billed"] == 2048
+
+    prom = reg.to_prometheus()
+    assert '# TYPE northstar_bq_job_latency_seconds histogram' in prom
+    assert 'northstar_bq_jobs_total{template="get_chunk_details.sql"} 2' in prom
+    assert 'northstar_bq_job_errors_total{template="get_chunk_details.sql"} 1' in prom
+    assert 'le="0.25"} 1' in prom
+    assert 'le="+Inf"} 2' in prom
+
+
+def test_real_client_records_job_stats(fake_bigquery):
+    reg = MetricsRegistry()
+    client = RealClient(project="p", metrics=reg)
+    client._client.rows = [{"id": 1}, {"id": 2}]
+    client.run_sql_template("vector_search.sql", {"query_text": "q", "top_k": 2})
+    (rec,) = reg.records("vector_search.sql")
+    assert rec.job_id == "job_fake"
+    assert rec.bytes_processed == 1024
+    assert rec.bytes_billed == 10 * 1024 * 1024
+    assert rec.slot_ms == 50
+    assert rec.rows == 2
+    assert rec.error is None
+
+
+def test_real_client_records_failures(fake_bigquery):
+    reg = MetricsRegistry()
+    client = RealClient(project="p", metrics=reg)
+
+    def boom(sql, job_config=None, **kw):
+        raise ValueError("bad query")
+
+    client._client.query = boom
+    with pytest.raises(ValueError):
+        client.run_sql_template("vector_search.sql", {"query_text": "q", "top_k": 2})
+    (rec,) = reg.records()
+    assert rec.error == "ValueError: bad query"
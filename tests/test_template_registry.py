@@ -0,0 +1,55 @@
+"""Tests for the precompiled SQL template registry."""
+from __future__ import annotations
+import pytest
+
+from src.bq.bigquery_client import RealClient
+from src.bq.templates import SqlTemplate, TemplateError, TemplateRegistry, get_registry
+
+
+def test_registry_scans_all_templates():
+    reg = get_registry()
+    assert "chunk_vector_search.sql" in reg
+    assert "embeddings_refresh.sql" in reg.names()
+    assert get_registry() is reg  # one registry per process
+
+
+def test_placeholder_dialects_parsed():
+    reg = get_registry()
+    cvs = reg.get("chunk_vector_search.sql")
+    assert cvs.placeholders == {"PROJECT_ID", "DATASET", "EMBED_MODEL", "VECTOR_SEARCH_OPTIONS"}
+    assert cvs.params == {"query_text", "top_k", "types"}
+    refresh = reg.get("embeddings_refresh.sql")
+    assert refresh.placeholders == {"PROJECT", "DATASET", "EMBED_MODEL_FQID", "BATCH_LIMIT"}
+    # @names that only appear in comments are not parameters
+    remote = reg.get("create_remote_models.sql")
+    assert "region" not in remote.params
+
+
+def test_render_validates_and_memoizes():
+    t = SqlTemplate.parse("t.sql", "-- uses ${A}\nSELECT * FROM `${A}.{B}` WHERE x = @x")
+    with pytest.raises(TemplateError, match=r"\$\{B\}"):
+        t.render({"A": "p"})
+    with pytest.raises(TemplateError, match="@x"):
+        t.render({"A": "p", "B": "d"}, params={})
+    out = t.render({"A": "p", "B": "d"}, params={"x": 1})
+    assert out == "-- uses p\nSELECT * FROM `p.d` WHERE x = @x"
+    assert t.render({"A": "p", "B": "d"}) is out
+
+
+def test_unknown_template():
+    with pytest.raises(FileNotFoundError):
+        TemplateRegistry().get("nope.sql")
+
+
+def test_real_client_fails_fast_on_missing_param(fake_bigquery):
+    client = RealClient(project="p", location="US")
+    with pytest.raises(TemplateError, match="@types"):
+        client.run_sql_template("chunk_vector_search.sql", {"query_text": "q", "top_k": 3})
+    assert client._client.queries == []
+
+
+def test_real_client_fills_extra_identifiers(fake_bigquery):
+    client = RealClient(project="p", location="US")
+    client.run_sql_template("embeddings.sql", {"SOURCE_TABLE": "demo_texts"})
+    assert ".demo_texts`" in client._client.queries[0]
+    assert "${SOURCE_TABLE}" not in client._client.queries[0]
@@ -1,6 +1,8 @@
 """Acceptance test for Phase 1 triage orchestrator."""
 from __future__ import annotations
 
+import pytest
+
 from core.orchestrator import Orchestrator
 from bq import make_client
 
@@ -18,3 +20,19 @@ def test_triage_basic() -> None:
     md = result["draft_md"]
     assert "# Agent Playbook" in md
     assert result["draft_ok"], result["verify_msg"]
+
+
+def test_triage_uses_loaded_lexical_index() -> None:
+    pytest.importorskip("numpy")
+    from src.retrieval import lexical
+
+    idx = lexical.BM25Index()
+    idx.upsert([
+        {"chunk_id": "c9", "text": "ERR_CONN_RESET from api.example.com:443", "meta": {"type": "log"}},
+    ])
+    lexical.set_default_lexical_index(idx)
+    try:
+        result = Orchestrator(make_client()).triage({"title": "ERR_CONN_RESET on checkout"}, k=3)
+    finally:
+        lexical.set_default_lexical_index(None)
+    assert "c9" in {s["id"] for s in result["snippets"]}
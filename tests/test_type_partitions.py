@@ -0,0 +1,75 @@
+"""Type-partitioned vector search: filter before top-k, heap merge across types."""
+import asyncio
+
+import pytest
+
+from src.bq import partitions
+from src.bq.bigquery_client import StubClient
+from src.bq.embed_cache import EmbeddingCache, set_default_embedding_cache
+from src.bq.telemetry import MetricsRegistry
+from src.retrieval import hybrid
+
+
+def test_merge_partitions_heap_order_and_type_names():
+    logs = [{"chunk_id": "l1", "distance": 0.1}, {"chunk_id": "l2", "distance": 0.4}]
+    pdfs = [{"chunk_id": "p1", "distance": 0.2}, {"chunk_id": "p2", "distance": None}]
+    merged = hybrid._merge_partitions([logs, pdfs], 3)
+    assert [r["chunk_id"] for r in merged] == ["l1", "p1", "l2"]
+    assert partitions.is_partition_type("image_ocr")
+    assert not partitions.is_partition_type("log`; DROP TABLE x")
+    with pytest.raises(ValueError):
+        partitions.refresh_type_partitions(StubClient(), ["bad-type"])
+
+
+@pytest.fixture
+def local(monkeypatch):
+    pytest.importorskip("numpy")
+    from src.bq.local import LocalClient
+    from src.bq.local_ml import to_blob
+
+    set_default_embedding_cache(EmbeddingCache())
+    client = LocalClient(metrics=MetricsRegistry())
+    client.ensure_schema()
+    # many near-duplicate pdf chunks crowd the two logs out of a global top-k
+    texts = [(f"p{i}", f"database timeout report section {i}", "pdf") for i in range(12)]
+    texts += [("l0", "database timeout on login", "log"), ("l1", "worker crashed", "log")]
+    client.insert_rows("chunks_emb", [
+        {"chunk_id": cid, "doc_id": "d", "text": text, "meta": {"type": kind},
+         "embedding": to_blob(client.embedder.embed(text))}
+        for cid, text, kind in texts
+    ])
+    monkeypatch.setenv("BQ_TYPE_PARTITIONS", "1")
+    yield client
+    set_default_embedding_cache(None)
+
+
+def test_partitions_return_full_typed_results(local, monkeypatch):
+    stats = partitions.refresh_type_partitions(local)
+    assert stats["types"] == ["log", "pdf"] and stats["inserted"] == 14
+    assert partitions.refresh_type_partitions(local)["inserted"] == 0  # already in sync
+
+    monkeypatch.setenv("BQ_TYPE_PARTITIONS", "0")
+    filtered = hybrid.vector_search(local, "database timeout", k=4, types=["log"])
+    monkeypatch.setenv("BQ_TYPE_PARTITIONS", "1")
+    local.metrics.reset()
+    out = hybrid.vector_search(local, "database timeout", k=4, types=["log"])
+    assert len(filtered) < 2 and [r["id"] for r in out] == ["l0", "l1"]
+    assert [r.template for r in local.metrics.records()] == [
+        "chunk_vector_search_partition_by_vec.sql"
+    ]
+
+    both = hybrid.vector_search(local, "database timeout", k=5, types=["log", "pdf"])
+    assert len(both) == 5 and [r["distance"] for r in both] == sorted(r["distance"] for r in both)
+
+    from src.bq.async_client import AsyncBigQueryClient
+
+    async_out = asyncio.run(hybrid.vector_search_async(
+        AsyncBigQueryClient(local), "database timeout", k=5, types=["log", "pdf"]
+    ))
+    assert async_out == both
+
+
+def test_missing_partition_falls_back_to_filtered_search(local):
+    out = hybrid.vector_search(local, "database timeout", k=3, types=["log"])
+    assert out and all(r["id"].startswith("l") for r in out)
+    assert "chunk_vector_search.sql" in [r.template for r in local.metrics.records()]
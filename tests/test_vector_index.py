@@ -0,0 +1,110 @@
+"""chunks_emb VECTOR INDEX: DDL / status / drop, search options, tuning report."""
+import json
+
+import pytest
+
+from src.bq import vector_index
+from src.bq.bigquery_client import render_sql, template_identifiers
+from src.bq.local import LocalClient
+from src.bq.local_ml import to_blob
+from src.bq.telemetry import MetricsRegistry
+from src.retrieval import hybrid
+
+
+class RecordingClient:
+    def __init__(self, rows=None):
+        self.calls = []
+        self.rows = rows or {}
+
+    def run_sql_template(self, name, params):
+        self.calls.append((name, params))
+        return self.rows.get(name, [])
+
+
+def test_search_options_env_and_overrides(monkeypatch):
+    monkeypatch.delenv("BQ_VECTOR_SEARCH_BRUTE_FORCE", raising=False)
+    monkeypatch.delenv("BQ_VECTOR_SEARCH_FRACTION", raising=False)
+    assert vector_index.search_options() == "{}"
+    monkeypatch.setenv("BQ_VECTOR_SEARCH_FRACTION", "0.05")
+    assert json.loads(vector_index.search_options()) == {"fraction_lists_to_search": 0.05}
+    assert json.loads(vector_index.search_options(use_brute_force=True)) == {"use_brute_force": True}
+    monkeypatch.setenv("BQ_VECTOR_SEARCH_BRUTE_FORCE", "1")
+    assert json.loads(vector_index.search_options()) == {"use_brute_force": True}
+    with pytest.raises(ValueError):
+        vector_index.search_options(0.1, use_brute_force=True)
+    with pytest.raises(ValueError):
+        vector_index.search_options(1.5)
+
+    sql = render_sql(
+        "chunk_vector_search.sql",
+        {"query_text": "q", "top_k": 3, "types": []},
+        template_identifiers("p"),
+    )
+    assert """options => '{"use_brute_force": true}'""" in sql
+    name, params = hybrid._search_call(
+        RecordingClient(), "chunk_vector_search", "q", 3, [], {"fraction_lists_to_search": 0.2}
+    )
+    assert name == "chunk_vector_search.sql"
+    assert params["VECTOR_SEARCH_OPTIONS"] == '{"fraction_lists_to_search": 0.2}'
+
+    brute = {"use_brute_force": True}
+    for kwargs in ({}, {"types": ["log"], "graph_boost": 0.3}, {"mode": "hybrid_sql"}):
+        client = RecordingClient()
+        hybrid.vector_search(client, "disk full", 3, search_options=brute, **kwargs)
+        name, params = client.calls[0]
+        assert params["VECTOR_SEARCH_OPTIONS"] == '{"use_brute_force": true}', name
+
+
+def test_create_status_drop_templates():
+    client = RecordingClient(
+        {"chunks_emb_vector_index_status.sql": [
+            {"index_name": "chunks_emb_vector_idx", "index_status": "ACTIVE",
+             "coverage_percentage": 100}
+        ]}
+    )
+    assert vector_index.create_index(client, "ivf", num_lists=500) == (
+        "chunks_emb_vector_index_ivf.sql"
+    )
+    assert client.calls[-1][1] == {"IVF_OPTIONS": '{"num_lists": 500}'}
+    vector_index.create_index(client, "TREE_AH")
+    assert client.calls[-1] == ("chunks_emb_vector_index_tree_ah.sql", {"TREE_AH_OPTIONS": "{}"})
+    with pytest.raises(ValueError):
+        vector_index.create_index(client, "HNSW")
+    with pytest.raises(ValueError):
+        vector_index.create_index(client, "IVF", num_lists=0)
+    assert vector_index.index_status(client)["coverage_percentage"] == 100
+    other = RecordingClient({"chunks_emb_vector_index_status.sql": [{"index_name": "old_idx"}]})
+    assert vector_index.index_status(other) is None
+    vector_index.drop_index(client)
+    assert client.calls[-1][0] == "chunks_emb_vector_index_drop.sql"
+
+    sql = render_sql(
+        "chunks_emb_vector_index_ivf.sql", {"IVF_OPTIONS": '{"num_lists": 500}'},
+        template_identifiers("p"),
+    )
+    assert """ivf_options = '{"num_lists": 500}'""" in sql
+
+
+def test_local_lifecycle_and_tuning_report():
+    client = LocalClient(metrics=MetricsRegistry())
+    client.ensure_schema()
+    texts = ["database timeout", "disk full", "auth failed", "network down", "cpu spike"]
+    client.insert_rows("chunks_emb", [
+        {"chunk_id": f"c{i}", "doc_id": "d", "text": t, "meta": {"type": "log"},
+         "embedding": to_blob(client.embedder.embed(t))}
+        for i, t in enumerate(texts)
+    ])
+    vector_index.create_index(client)  # managed index: no-op locally
+    assert vector_index.index_status(client) is None
+    vector_index.drop_index(client)
+
+    report = vector_index.tune(client, fractions=[0.05, 0.5], k=2, sample_size=3)
+    assert [r["setting"] for r in report] == ["brute_force", "fraction=0.05", "fraction=0.5"]
+    assert all(r["queries"] == 3 and r["recall"] == 1.0 for r in report)  # local search is exact
+    probes = [r for r in client.metrics.records() if r.template == vector_index.PROBE_TEMPLATE]
+    assert len(probes) == 3 * (3 + 1)  # one untimed warm-up per setting
+
+    rows = hybrid.vector_search(
+        client, "database timeout", 1, types=["log"], search_options={"use_brute_force": True}
+    )
+    assert rows[0]["id"] == "c0"
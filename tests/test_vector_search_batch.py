@@ -0,0 +1,65 @@
+"""Batched multi-query vector search: one job per batch, per-query results."""
+import pytest
+
+from src.bq.bigquery_client import StubClient
+from src.bq.embed_cache import EmbeddingCache, set_default_embedding_cache
+from src.bq.telemetry import MetricsRegistry
+from src.retrieval import batch_retrieve
+from src.retrieval.hybrid import vector_search, vector_search_batch
+
+
+class CountingStub(StubClient):
+    def __init__(self):
+        self.calls = []
+
+    def run_sql_template(self, name, params):
+        self.calls.append(name)
+        return super().run_sql_template(name, params)
+
+
+def test_stub_batch_order_duplicates_and_chunking():
+    client = CountingStub()
+    out = vector_search_batch(client, ["a", "b", "a", "c"], k=3, types=["log"], batch_size=2)
+    assert [r[0]["text"] for r in out] == [
+        "chunk snippet for: a", "chunk snippet for: b",
+        "chunk snippet for: a", "chunk snippet for: c",
+    ]
+    assert out[0] == out[2] and out[0] is not out[2]
+    assert client.calls.count("chunk_vector_search_batch.sql") == 2  # 3 unique / 2 per job
+    assert vector_search_batch(client, [], k=3) == []
+
+
+def test_batch_retrieve_uses_batched_search_for_template_clients():
+    client = CountingStub()
+    results = batch_retrieve(client, ["x", "y"], top_k=2)
+    assert [r[0]["text"] for r in results] == ["stub snippet for: x", "stub snippet for: y"]
+    assert client.calls.count("vector_search_batch.sql") == 1
+
+
+def test_local_batch_matches_single_searches():
+    pytest.importorskip("numpy")
+    from src.bq.local import LocalClient
+    from src.bq.local_ml import to_blob
+
+    set_default_embedding_cache(EmbeddingCache(max_entries=0))  # force SQL embedding
+    try:
+        reg = MetricsRegistry()
+        client = LocalClient(metrics=reg)
+        client.ensure_schema()
+        client.insert_rows("chunks_emb", [
+            {"chunk_id": f"c{i}", "doc_id": "d", "text": text,
+             "meta": {"type": "pdf" if i % 3 == 0 else "log"},
+             "embedding": to_blob(client.embedder.embed(text))}
+            for i, text in enumerate([
+                "database timeout on login", "ssl certificate expired", "disk quota exceeded",
+                "database pool exhausted", "login page returns 500", "certificate chain invalid",
+            ])
+        ])
+        queries = ["database timeout", "certificate problem", "login error", "no match at all"]
+        batched = vector_search_batch(client, queries, k=3, types=["log", "pdf"])
+        singles = [vector_search(client, q, k=3, types=["log", "pdf"]) for q in queries]
+        assert batched == singles
+        jobs = [r.template for r in reg.records() if "vector_search" in r.template]
+        assert jobs.count("chunk_vector_search_batch.sql") == 1
+    finally:
+        set_default_embedding_cache(None)